@@ -1 +1,2 @@
 __author__ = 'timlinux'
+default_app_config = 'base.apps.BaseConfig'
@@ -0,0 +1,19 @@
+# coding=utf-8
+"""App configuration for base."""
+from django.apps import AppConfig
+
+
+class BaseConfig(AppConfig):
+    """Registers the cache tags of the project model."""
+    name = 'base'
+    verbose_name = 'Base'
+
+    def ready(self):
+        # noinspection PyUnresolvedReferences
+        import base.handlers  # noqa
+        # Drops changed projects from the project cache
+        # noinspection PyUnresolvedReferences
+        import base.project_cache  # noqa
+        # Purges the nginx cache when cache tags are invalidated
+        # noinspection PyUnresolvedReferences
+        import core.edge_cache  # noqa
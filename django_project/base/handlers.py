@@ -0,0 +1,22 @@
+# coding=utf-8
+"""Cache tags of the project model.
+
+Connected when the app registry is ready (see BaseConfig).
+"""
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from core.cache_tags import register
+from core.page_cache import forget_project_slug
+from .models import Project
+
+# The project list and the navigation of every page list the projects.
+register(Project, lambda project: [
+    'project:%s' % project.id,
+    'projects',
+])
+
+
+@receiver(post_delete, sender=Project)
+def project_deleted(sender, instance, **kwargs):
+    """Forget the cached id of a deleted project."""
+    forget_project_slug(instance.slug)
@@ -0,0 +1,85 @@
+# coding=utf-8
+"""A command to generate a large synthetic data set for load testing."""
+from django.core.management.base import BaseCommand, CommandError
+from core.load_data import LoadDataGenerator
+from search.index import rebuild_index
+
+
+class Command(BaseCommand):
+    """Fill the database with realistic volumes of generated data.
+
+    The defaults create 50 projects with 300 versions of 500 entries each,
+    committees of 1000 users and ballots with a thousand votes, e.g.
+    ``manage.py generate_load_data --projects=5 --seed=2``.
+
+    Never run this against a production database.
+    """
+    # noinspection PyShadowingBuiltins
+    help = 'Generates a synthetic data set for load testing.'
+
+    def add_arguments(self, parser):
+        for option, default, help_text in (
+                ('projects', 50, 'Number of projects.'),
+                ('versions', 300, 'Versions per project.'),
+                ('entries', 500, 'Entries per version.'),
+                ('users', 2000, 'Size of the pool of users.'),
+                ('committee-size', 1000, 'Members per committee.'),
+                ('committees', 2, 'Committees per project.'),
+                ('ballots', 10, 'Ballots per committee.'),
+                ('votes', 1000,
+                 'Votes per ballot, at most the committee size.'),
+                ('sponsors', 40, 'Sponsors per project.'),
+                ('periods', 3, 'Sponsorship periods per sponsor.'),
+                ('seed', 1, 'Seed of the random generator.'),
+                ('chunk-size', 1000, 'Rows per INSERT statement.')):
+            parser.add_argument(
+                '--%s' % option,
+                dest=option.replace('-', '_'),
+                type=int,
+                default=default,
+                help=help_text)
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            default=False,
+            help='Delete previously generated data first.')
+        parser.add_argument(
+            '--skip-index',
+            action='store_true',
+            dest='skip_index',
+            default=False,
+            help='Do not rebuild the search index afterwards.')
+
+    def handle(self, *args, **options):
+        """Implementation for command.
+
+        :param args: Not used
+        :param options: Parsed command line options
+        """
+        try:
+            generator = LoadDataGenerator(
+                projects=options['projects'],
+                versions=options['versions'],
+                entries=options['entries'],
+                users=options['users'],
+                committee_size=options['committee_size'],
+                committees=options['committees'],
+                ballots=options['ballots'],
+                votes=options['votes'],
+                sponsors=options['sponsors'],
+                periods=options['periods'],
+                seed=options['seed'],
+                chunk_size=options['chunk_size'],
+                stdout=self.stdout)
+        except ValueError as e:
+            raise CommandError(e)
+        if options['clear']:
+            generator.clear()
+            self.stdout.write('Deleted previously generated data.')
+        counts = generator.run()
+        for model, count in sorted(counts.items()):
+            self.stdout.write('Created %s %s objects.' % (count, model))
+        if not options['skip_index']:
+            # bulk_create bypassed the signal handlers maintaining the index.
+            for kind, count in sorted(rebuild_index().items()):
+                self.stdout.write('Indexed %s %s documents.' % (count, kind))
@@ -0,0 +1,127 @@
+# coding=utf-8
+"""A command to benchmark the latency of the most visited pages."""
+import json
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from core.benchmark import (
+    BENCHMARK_PAGES,
+    BenchmarkError,
+    LOAD_DATA_PASSWORD,
+    benchmark_targets,
+    compare,
+    dump_results,
+    run_benchmark)
+
+
+class Command(BaseCommand):
+    """Measure p50/p95 latency and throughput of the hot pages.
+
+    Fill the database with ``generate_load_data`` first, then e.g.::
+
+        manage.py run_benchmarks --save-baseline=baseline.json
+        manage.py run_benchmarks --baseline=baseline.json
+
+    The second run fails when a page got slower than the baseline allows.
+    Any run fails when a page does not return 200, e.g. when the host
+    requested (see --host) is not in ALLOWED_HOSTS.
+    """
+    # noinspection PyShadowingBuiltins
+    help = 'Benchmarks the hot pages and compares them with a baseline.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--project',
+            help='Slug of the project to benchmark, by default the one '
+                 'with the most versions.')
+        parser.add_argument(
+            '--page',
+            action='append',
+            dest='pages',
+            choices=[name for name, _, _ in BENCHMARK_PAGES],
+            help='Benchmark only this page, may be repeated.')
+        parser.add_argument(
+            '--username',
+            help='User to log in as for pages which require it, by default '
+                 'the chair of the benchmarked committee.')
+        parser.add_argument(
+            '--password',
+            default=LOAD_DATA_PASSWORD,
+            help='Password of that user.')
+        parser.add_argument(
+            '--host',
+            help='Host name to request, by default the first of '
+                 'ALLOWED_HOSTS.')
+        parser.add_argument(
+            '--requests', type=int, default=50,
+            help='Measured requests per page.')
+        parser.add_argument(
+            '--warmup', type=int, default=5,
+            help='Unmeasured requests per page made first.')
+        parser.add_argument(
+            '--cold',
+            action='store_true',
+            default=False,
+            help='Clear the cache before every request.')
+        parser.add_argument(
+            '--output',
+            help='Write the JSON results to this file instead of stdout.')
+        parser.add_argument(
+            '--baseline',
+            help='Compare the results with this JSON file.')
+        parser.add_argument(
+            '--save-baseline',
+            dest='save_baseline',
+            help='Store the results as the baseline in this JSON file.')
+        parser.add_argument(
+            '--tolerance', type=float, default=0.2,
+            help='Allowed relative p95 slowdown against the baseline.')
+
+    def handle(self, *args, **options):
+        """Implementation for command.
+
+        :param args: Not used
+        :param options: Parsed command line options
+        """
+        try:
+            targets = benchmark_targets(options['project'])
+            results = run_benchmark(
+                targets,
+                pages=options['pages'],
+                requests=options['requests'],
+                warmup=options['warmup'],
+                cold=options['cold'],
+                username=options['username'],
+                password=options['password'],
+                host=options['host'])
+        except BenchmarkError as e:
+            raise CommandError('%s Run generate_load_data first.' % e)
+
+        failed = [
+            '%s: status %s' % (name, result['status'])
+            for name, result in sorted(results.items())
+            if result['status'] != 200]
+        if failed:
+            raise CommandError(
+                'Pages did not load, their latencies are not comparable:\n' +
+                '\n'.join(failed))
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                dump_results(results, output)
+        else:
+            dump_results(results, self.stdout)
+        if options['save_baseline']:
+            with open(options['save_baseline'], 'w') as output:
+                dump_results(results, output)
+
+        if options['baseline']:
+            try:
+                with open(options['baseline']) as baseline_file:
+                    baseline = json.load(baseline_file)
+            except (IOError, ValueError) as e:
+                raise CommandError('Can not read the baseline: %s' % e)
+            regressions = compare(results, baseline, options['tolerance'])
+            if regressions:
+                raise CommandError(
+                    'Slower than the baseline:\n' + '\n'.join(regressions))
+            sys.stderr.write('No regression against the baseline.\n')
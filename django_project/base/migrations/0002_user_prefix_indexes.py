@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""Index the user columns searched by prefix on PostgreSQL.
+
+``istartswith`` lookups compare ``UPPER(column::text)`` with ``LIKE``, which
+only an index on the same expression with ``text_pattern_ops`` can serve.
+The user autocomplete (base.views.user) searches these columns. Other
+databases scan the table, so this is a no-op there.
+
+The indexes are built ``CONCURRENTLY``, so that the user table stays
+writable (logins, sign ups) while they are built. That can not happen in
+a transaction, and Django 1.8 runs every migration on PostgreSQL in one
+(there is no ``Migration.atomic`` yet), so the statements run on a
+connection of their own in autocommit mode. The transaction of this
+migration runs no query, which the concurrent build would wait for.
+"""
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+COLUMNS = ('username', 'first_name', 'last_name', 'email')
+
+FORWARD_SQL = [
+    'CREATE INDEX CONCURRENTLY auth_user_%(column)s_upper_like '
+    'ON auth_user (UPPER("%(column)s"::text) text_pattern_ops)' % {
+        'column': column}
+    for column in COLUMNS
+]
+
+BACKWARD_SQL = [
+    'DROP INDEX CONCURRENTLY IF EXISTS auth_user_%s_upper_like' % column
+    for column in COLUMNS
+]
+
+
+def run_sql(statements):
+    def operation(apps, schema_editor):
+        connection = schema_editor.connection
+        if connection.vendor != 'postgresql':
+            return
+        autocommit = type(connection)(
+            connection.settings_dict, alias=connection.alias)
+        try:
+            with autocommit.cursor() as cursor:
+                for statement in statements:
+                    cursor.execute(statement)
+        finally:
+            autocommit.close()
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0006_require_contenttypes_0002'),
+        ('base', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_sql(FORWARD_SQL), run_sql(BACKWARD_SQL)),
+    ]
@@ -130,7 +130,8 @@ class Project(models.Model):
 
         :returns: List of versions.
         :rtype: list"""
-        return self.versions()[:settings.PROJECT_VERSION_LIST_SIZE]
+        return self.versions().select_related('project')[
+            :settings.PROJECT_VERSION_LIST_SIZE]
 
     @staticmethod
     def pagination_threshold(self):
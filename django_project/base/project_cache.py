@@ -0,0 +1,131 @@
+# coding=utf-8
+"""
+base.project_cache
+
+Look up projects by slug without a query on most requests.
+
+Nearly every view starts by getting the project of its url, often from
+more than one method. ``get_project`` keeps the rows of recently used
+projects in memory for ``PROJECT_CACHE_TIMEOUT`` seconds and remembers the
+project on the request, so all methods of a view share one instance.
+
+The cache is per process: saving or deleting a project drops it from the
+cache of the process which made the change, the others keep the old row
+until it expires, which is why the timeout is short.
+"""
+import threading
+import time
+from django.conf import settings
+from django.db import router
+from django.db.models.signals import post_delete, post_save
+from django.http import Http404
+from .models import Project
+
+# Attribute of the request holding the projects it looked up.
+REQUEST_ATTRIBUTE = '_projects_by_slug'
+
+# slug -> (expiry time, values of the project row)
+_rows = {}
+
+_lock = threading.Lock()
+
+
+def _load(slug):
+    """Get a project from the process cache or the database.
+
+    :param slug: The project slug.
+    :type slug: str
+
+    :returns: A new Project instance.
+    :rtype: Project
+
+    :raises: Project.DoesNotExist
+    """
+    names = [field.attname for field in Project._meta.concrete_fields]
+    now = time.time()
+    found = _rows.get(slug)
+    if found is not None and found[0] > now:
+        row = found[1]
+    else:
+        row = Project.objects.filter(slug=slug).values_list(*names).first()
+        if row is None:
+            raise Project.DoesNotExist(
+                'Project matching query does not exist.')
+        timeout = getattr(settings, 'PROJECT_CACHE_TIMEOUT', 30)
+        if timeout:
+            with _lock:
+                _rows[slug] = (now + timeout, row)
+    return Project.from_db(router.db_for_read(Project), names, row)
+
+
+def get_project(slug, request=None):
+    """Get a project by slug, cached.
+
+    Use instead of ``Project.objects.get(slug=slug)``.
+
+    :param slug: The project slug.
+    :type slug: str
+
+    :param request: The request to memoize the project on, if any. Every
+        call for the same request and slug returns the same instance.
+    :type request: HttpRequest
+
+    :returns: The project.
+    :rtype: Project
+
+    :raises: Project.DoesNotExist
+    """
+    if request is None:
+        return _load(slug)
+    projects = request.__dict__.setdefault(REQUEST_ATTRIBUTE, {})
+    project = projects.get(slug)
+    if project is None:
+        project = projects[slug] = _load(slug)
+    return project
+
+
+def get_project_or_404(slug, request=None):
+    """Get a project by slug like get_project, or raise Http404.
+
+    :param slug: The project slug.
+    :type slug: str
+
+    :param request: The request to memoize the project on, if any.
+    :type request: HttpRequest
+
+    :returns: The project.
+    :rtype: Project
+
+    :raises: Http404
+    """
+    try:
+        return get_project(slug, request)
+    except Project.DoesNotExist:
+        raise Http404('No project matches the given query.')
+
+
+def forget_project(slug):
+    """Drop a project from the cache of this process.
+
+    :param slug: The project slug.
+    :type slug: str
+    """
+    with _lock:
+        _rows.pop(slug, None)
+
+
+def clear():
+    """Drop all projects from the cache of this process."""
+    with _lock:
+        _rows.clear()
+
+
+def project_changed(sender, instance, **kwargs):
+    """Drop a saved or deleted project from the cache."""
+    forget_project(instance.slug)
+
+
+post_save.connect(
+    project_changed, sender=Project, dispatch_uid='project_cache_save')
+post_delete.connect(
+    project_changed, sender=Project, dispatch_uid='project_cache_delete')
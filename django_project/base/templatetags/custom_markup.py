@@ -3,16 +3,22 @@ from django import template
 from django.template.defaultfilters import stringfilter
 from django.utils.encoding import force_unicode
 from django.utils.safestring import mark_safe
+from core.instrumentation import timed
 
 register = template.Library()
 
 
+@timed('markdown')
+def render_markdown(value):
+    extensions = ["nl2br", ]
+
+    return markdown.markdown(force_unicode(value),
+                             extensions,
+                             safe_mode=True,
+                             enable_attributes=False)
+
+
 @register.filter(name='base_markdown', is_safe=True)
 @stringfilter
 def base_markdown(value):
-    extensions = ["nl2br", ]
-
-    return mark_safe(markdown.markdown(force_unicode(value),
-                                       extensions,
-                                       safe_mode=True,
-                                       enable_attributes=False))
+    return mark_safe(render_markdown(value))
@@ -0,0 +1,66 @@
+# coding=utf-8
+"""Tests for the project by slug cache."""
+from django.http import Http404, HttpRequest
+from django.test import TestCase, override_settings
+from base.models import Project
+from base import project_cache
+from base.project_cache import get_project, get_project_or_404
+from base.tests.model_factories import ProjectF
+
+
+@override_settings(PROJECT_CACHE_TIMEOUT=30)
+class TestProjectCache(TestCase):
+    """Tests for base.project_cache."""
+
+    def setUp(self):
+        """
+        Setup before each test
+        """
+        project_cache.clear()
+        self.project = ProjectF.create(name='Cached Project')
+
+    def tearDown(self):
+        """
+        Cleanup after each test
+        """
+        project_cache.clear()
+
+    def test_cached(self):
+        with self.assertNumQueries(1):
+            first = get_project(self.project.slug)
+        with self.assertNumQueries(0):
+            second = get_project(self.project.slug)
+        self.assertEqual(first, self.project)
+        self.assertEqual(second.name, 'Cached Project')
+        self.assertFalse(second._state.adding)
+        # Every call gets its own instance.
+        self.assertIsNot(first, second)
+
+    def test_request_memoization(self):
+        request = HttpRequest()
+        project = get_project(self.project.slug, request)
+        self.assertIs(get_project(self.project.slug, request), project)
+        self.assertIsNot(get_project(self.project.slug, HttpRequest()),
+                         project)
+
+    def test_invalidated_on_save(self):
+        get_project(self.project.slug)
+        self.project.name = 'Renamed Project'
+        self.project.save()
+        with self.assertNumQueries(1):
+            project = get_project(self.project.slug)
+        self.assertEqual(project.name, 'Renamed Project')
+        slug = self.project.slug
+        self.project.delete()
+        self.assertRaises(Project.DoesNotExist, get_project, slug)
+
+    def test_expires(self):
+        get_project(self.project.slug)
+        expiry, row = project_cache._rows[self.project.slug]
+        project_cache._rows[self.project.slug] = (expiry - 31, row)
+        with self.assertNumQueries(1):
+            get_project(self.project.slug)
+
+    def test_missing(self):
+        self.assertRaises(Project.DoesNotExist, get_project, 'missing')
+        self.assertRaises(Http404, get_project_or_404, 'missing')
@@ -4,6 +4,7 @@ from django.test import TestCase
 from django.test.client import Client
 from base.tests.model_factories import ProjectF
 from core.model_factories import UserF
+import json
 import logging
 
 
@@ -170,3 +171,34 @@ class TestViews(TestCase):
             'slug': project_to_delete.slug
         }))
         self.assertEqual(response.status_code, 302)
+
+    def test_UserAutocompleteView(self):
+        UserF.create(
+            username='annabel', first_name='Zoe', last_name='',
+            email='x@a.org')
+        UserF.create(username='bob', first_name='Anna', last_name='Smith')
+        UserF.create(username='anna-gone', is_active=False)
+        member = UserF.create(username='member', password='password')
+        client = Client()
+        client.post('/set_language/', data={'language': 'en'})
+        url = reverse('user-autocomplete')
+        self.assertEqual(client.get(url, {'term': 'an'}).status_code, 302)
+
+        client.login(username='member', password='password')
+        self.assertEqual(client.get(url, {'term': 'an'}).status_code, 403)
+        # Project owners pick committee members.
+        ProjectF.create(owner=member)
+        users = json.loads(client.get(url, {'term': 'ANN'}).content)
+        self.assertEqual(
+            [user['label'] for user in users],
+            ['annabel (Zoe)', 'bob (Anna Smith)'])
+        # Too short to search.
+        users = json.loads(client.get(url, {'term': 'a'}).content)
+        self.assertEqual(users, [])
+        # Only staff search by email.
+        users = json.loads(client.get(url, {'term': 'x@'}).content)
+        self.assertEqual(users, [])
+        client.login(username='timlinux', password='password')
+        users = json.loads(client.get(url, {'term': 'x@'}).content)
+        self.assertEqual([user['label'] for user in users], ['annabel (Zoe)'])
+        self.assertNotEqual(member.id, users[0]['id'])
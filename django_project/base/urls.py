@@ -13,6 +13,7 @@ from views import (
     PendingProjectListView,
     ApproveProjectView,
     ProjectBallotListView,
+    UserAutocompleteView,
     custom_404
 )
 
@@ -33,6 +34,9 @@ urlpatterns = patterns(
     url(regex='^project/list/$',
         view=ProjectListView.as_view(),
         name='project-list'),
+    url(regex='^users/autocomplete/$',
+        view=UserAutocompleteView.as_view(),
+        name='user-autocomplete'),
     url(regex='^(?P<slug>[\w-]+)/$',
         view=ProjectDetailView.as_view(),
         name='project-detail'),
@@ -1,2 +1,3 @@
 from project import *  # noqa
 from error_views import *  # noqa
+from user import *  # noqa
@@ -18,8 +18,10 @@ from django.core.exceptions import ValidationError
 from braces.views import LoginRequiredMixin, StaffuserRequiredMixin
 from pure_pagination.mixins import PaginationMixin
 from changes.models import Version
+from changes.statistics import project_statistics
 from ..models import Project
 from ..forms import ProjectForm
+from vota.closing import load_vote_counts
 from vota.models import Committee, Ballot
 from django.conf import settings
 
@@ -50,6 +52,9 @@ class ProjectBallotListView(ProjectMixin, PaginationMixin, DetailView):
             else:
                 committee_ballots = Ballot.objects.filter(
                     committee=committee).filter(private=False)
+            committee_ballots = load_vote_counts(
+                committee_ballots.select_related(
+                    'committee__project', 'result'))
             if committee_ballots:
                 ballots.append(committee_ballots)
         context['ballots_list'] = ballots
@@ -113,6 +118,7 @@ class ProjectDetailView(ProjectMixin, DetailView):
         page_size = settings.PROJECT_VERSION_LIST_SIZE
         context['versions'] = Version.objects.filter(
             project=self.object).order_by('-padded_version')[:page_size]
+        context['statistics'] = project_statistics(self.object)
         return context
 
     def get_queryset(self):
@@ -0,0 +1,127 @@
+# coding=utf-8
+"""Views for looking up users."""
+import json
+import logging
+from django.contrib.auth.models import User
+from django.core.exceptions import PermissionDenied
+from django.db.models import Q
+from django.http import HttpResponse
+from django.views.generic import View
+from braces.views import LoginRequiredMixin
+from base.models import Project
+from vota.models import Committee
+
+logger = logging.getLogger(__name__)
+
+# Fewest characters of a search, shorter prefixes match too many users.
+MIN_TERM_LENGTH = 2
+# Most users returned for a search.
+MAX_RESULTS = 20
+
+
+def user_label(username, first_name, last_name):
+    """Label of a user in autocomplete results and widgets.
+
+    :param username: The username.
+    :type username: str
+
+    :param first_name: The first name.
+    :type first_name: str
+
+    :param last_name: The last name.
+    :type last_name: str
+
+    :returns: The username, followed by the full name if there is one.
+    :rtype: unicode
+    """
+    full_name = u' '.join(name for name in (first_name, last_name) if name)
+    if full_name:
+        return u'%s (%s)' % (username, full_name)
+    return username
+
+
+def may_search_users(user):
+    """Whether a user may look up the other users.
+
+    Staff, project owners and committee chairs pick the chair and members
+    of committees.
+
+    :param user: The user.
+    :type user: User
+
+    :rtype: bool
+    """
+    return (
+        user.is_staff or
+        Project.objects.filter(owner=user).exists() or
+        Committee.objects.filter(chair=user).exists())
+
+
+def search_users(term, include_email=False, limit=MAX_RESULTS):
+    """Find active users by a case insensitive prefix.
+
+    The prefix lookups use the upper case expression indexes of
+    base/migrations/0002_user_prefix_indexes.py on PostgreSQL.
+
+    :param term: The prefix of the username, first or last name.
+    :type term: str
+
+    :param include_email: Whether to match the prefix of the email too.
+    :type include_email: bool
+
+    :param limit: The most users to return.
+    :type limit: int
+
+    :returns: A list of dictionaries with the id and label of each user,
+        ordered by username.
+    :rtype: list
+    """
+    term = term.strip()
+    if len(term) < MIN_TERM_LENGTH:
+        return []
+    query = (
+        Q(username__istartswith=term) |
+        Q(first_name__istartswith=term) |
+        Q(last_name__istartswith=term))
+    if include_email:
+        query |= Q(email__istartswith=term)
+    users = User.objects.filter(query, is_active=True).order_by(
+        'username').values_list(
+        'id', 'username', 'first_name', 'last_name')[:limit]
+    return [
+        {'id': user_id, 'label': user_label(username, first, last)}
+        for user_id, username, first, last in users]
+
+
+class UserAutocompleteView(LoginRequiredMixin, View):
+    """JSON list of the users starting with the ``term`` parameter.
+
+    Used by the user widgets of base.widgets. Only staff, project owners
+    and committee chairs can search (see may_search_users), and only staff
+    by email address.
+    """
+
+    def get(self, request, *args, **kwargs):
+        """Search the users.
+
+        :param request: HTTP request object
+        :type request: HttpRequest
+
+        :param args: Positional arguments
+        :type args: tuple
+
+        :param kwargs: Keyword arguments
+        :type kwargs: dict
+
+        :returns: JSON list of users, each with an id and a label.
+        :rtype: HttpResponse
+
+        :raises: PermissionDenied
+        """
+        if not may_search_users(request.user):
+            raise PermissionDenied
+        users = search_users(
+            request.GET.get('term', ''),
+            include_email=request.user.is_staff)
+        return HttpResponse(
+            json.dumps(users), content_type='application/json')
@@ -0,0 +1,107 @@
+# coding=utf-8
+"""Form widgets for picking users.
+
+A select lists every user of the site, which makes forms with a user field
+slow to render and to submit once there are many accounts. These widgets
+render a text input holding the ids of the picked users, which
+js/user-autocomplete.js turns into a search box using the user-autocomplete
+view. Only the picked users are loaded.
+
+Templates using them include jQuery UI and js/user-autocomplete.js, see
+committee/create.html.
+"""
+import json
+from django import forms
+from django.contrib.auth.models import User
+from django.core.urlresolvers import reverse_lazy
+from django.utils.encoding import force_text
+from base.views.user import user_label
+
+
+class UserAutocompleteWidget(forms.TextInput):
+    """Pick a user by searching, submits the id of the user."""
+    multiple = False
+
+    @staticmethod
+    def user_ids(value):
+        """Get the user ids of a field value.
+
+        :param value: A user id, a list of them or a comma separated string.
+
+        :returns: The ids, ignoring anything which is not a number.
+        :rtype: list
+        """
+        if value is None:
+            return []
+        if not isinstance(value, (list, tuple)):
+            value = force_text(value).split(',')
+        ids = []
+        for user_id in value:
+            user_id = force_text(user_id).strip()
+            if user_id.isdigit():
+                ids.append(int(user_id))
+        return ids
+
+    def render(self, name, value, attrs=None):
+        """Render the input with the labels of the picked users.
+
+        :param name: The field name.
+        :type name: str
+
+        :param value: The user id(s).
+
+        :param attrs: Extra attributes of the input.
+        :type attrs: dict
+
+        :rtype: SafeText
+        """
+        ids = self.user_ids(value)
+        labels = {}
+        if ids:
+            labels = dict(
+                (user_id, user_label(username, first, last))
+                for user_id, username, first, last in
+                User.objects.filter(pk__in=ids).values_list(
+                    'id', 'username', 'first_name', 'last_name'))
+        selected = [
+            {'id': user_id, 'label': labels[user_id]}
+            for user_id in ids if user_id in labels]
+        attrs = dict(attrs or {})
+        attrs.update({
+            'class': ' '.join(
+                filter(None, [attrs.get('class'), 'user-autocomplete'])),
+            'data-url': force_text(reverse_lazy('user-autocomplete')),
+            'data-multiple': json.dumps(self.multiple),
+            'data-selected': json.dumps(selected),
+        })
+        return super(UserAutocompleteWidget, self).render(
+            name, ','.join(str(user['id']) for user in selected), attrs)
+
+    def value_from_datadict(self, data, files, name):
+        """Get the submitted user id.
+
+        :returns: The id, None if empty.
+        :rtype: str
+        """
+        value = data.get(name)
+        return value or None
+
+
+class UserAutocompleteMultipleWidget(UserAutocompleteWidget):
+    """Pick users by searching, submits their ids separated by commas."""
+    multiple = True
+
+    def value_from_datadict(self, data, files, name):
+        """Get the submitted user ids.
+
+        :returns: The ids.
+        :rtype: list
+        """
+        if hasattr(data, 'getlist'):
+            values = data.getlist(name)
+        else:
+            values = [data.get(name)]
+        ids = []
+        for value in values:
+            ids.extend(self.user_ids(value))
+        return [force_text(user_id) for user_id in ids]
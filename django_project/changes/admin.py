@@ -15,103 +15,70 @@ historization for a model).
 
 from django.contrib import admin
 from models import (Category, Version,
-                    Entry, Sponsor, SponsorshipLevel,
+                    Entry, Organisation, Sponsor, SponsorshipLevel,
                     SponsorshipPeriod)
 import reversion
+from common.changelist import LargeTableAdminMixin
 
 
-class CategoryAdmin(reversion.VersionAdmin):
+class CategoryAdmin(LargeTableAdminMixin, reversion.VersionAdmin):
     """Category admin model."""
+    list_display = ('name', 'project', 'sort_number', 'approved')
+    list_select_related = ('project',)
+    search_fields = ('^name',)
 
-    def queryset(self, request):
-        """Ensure we use the correct manager.
 
-        :param request: HttpRequest object
-        """
-        qs = self.model.objects
-        ordering = self.get_ordering(request)
-        if ordering:
-            qs = qs.order_by(*ordering)
-        return qs
-
-
-class VersionAdmin(reversion.VersionAdmin):
+class VersionAdmin(LargeTableAdminMixin, reversion.VersionAdmin):
     """Verion admin model."""
+    list_display = ('name', 'project', 'author', 'approved')
+    list_select_related = ('project', 'author')
+    search_fields = ('^name',)
+    raw_id_fields = ('author',)
 
-    def queryset(self, request):
-        """Ensure we use the correct manager.
-
-        :param request: HttpRequest object
-        """
-        qs = self.model.objects
-        ordering = self.get_ordering(request)
-        if ordering:
-            qs = qs.order_by(*ordering)
-        return qs
 
-
-class EntryAdmin(reversion.VersionAdmin):
+class EntryAdmin(LargeTableAdminMixin, reversion.VersionAdmin):
     """Entry admin model."""
+    list_display = ('title', 'version', 'category', 'author', 'approved')
+    list_select_related = ('version__project', 'category__project', 'author')
+    search_fields = ('^title', '^author__username')
+    raw_id_fields = ('author', 'version', 'category')
 
-    def queryset(self, request):
-        """Ensure we use the correct manager.
 
-        :param request: HttpRequest object
-        """
-        qs = self.model.objects
-        ordering = self.get_ordering(request)
-        if ordering:
-            qs = qs.order_by(*ordering)
-        return qs
+class OrganisationAdmin(reversion.VersionAdmin):
+    """Funder and developer organisation admin model."""
+    list_display = ('name', 'url')
+    search_fields = ('name', 'key')
 
 
-class SponsorAdmin(reversion.VersionAdmin):
+class SponsorAdmin(LargeTableAdminMixin, reversion.VersionAdmin):
     """Sponsor admin model."""
+    list_display = ('name', 'project', 'author', 'approved')
+    list_select_related = ('project', 'author')
+    search_fields = ('^name',)
+    raw_id_fields = ('author',)
 
-    def queryset(self, request):
-        """Ensure we use the correct manager.
-
-        :param request: HttpRequest object
-        """
-        qs = self.model.objects
-        ordering = self.get_ordering(request)
-        if ordering:
-            qs = qs.order_by(*ordering)
-        return qs
 
-
-class SponsorLevelAdmin(reversion.VersionAdmin):
+class SponsorLevelAdmin(LargeTableAdminMixin, reversion.VersionAdmin):
     """Sponsor level admin model."""
-
-    def queryset(self, request):
-        """Ensure we use the correct manager.
-
-        :param request: HttpRequest object
-        """
-        qs = self.model.objects
-        ordering = self.get_ordering(request)
-        if ordering:
-            qs = qs.order_by(*ordering)
-        return qs
+    list_display = ('name', 'value', 'currency', 'project', 'approved')
+    list_select_related = ('project',)
+    search_fields = ('^name',)
+    raw_id_fields = ('author',)
 
 
-class SponsorRenewedAdmin(reversion.VersionAdmin):
+class SponsorRenewedAdmin(LargeTableAdminMixin, reversion.VersionAdmin):
     """Renewed sponsor admin model."""
-
-    def queryset(self, request):
-        """Ensure we use the correct manager.
-
-        :param request: HttpRequest object
-        """
-        qs = self.model.objects
-        ordering = self.get_ordering(request)
-        if ordering:
-            qs = qs.order_by(*ordering)
-        return qs
+    list_display = (
+        'sponsor', 'sponsorship_level', 'start_date', 'end_date', 'project',
+        'approved')
+    list_select_related = ('sponsor', 'sponsorship_level', 'project')
+    search_fields = ('^sponsor__name',)
+    raw_id_fields = ('author',)
 
 admin.site.register(Category, CategoryAdmin)
 admin.site.register(Version, VersionAdmin)
 admin.site.register(Entry, EntryAdmin)
+admin.site.register(Organisation, OrganisationAdmin)
 admin.site.register(Sponsor, SponsorAdmin)
 admin.site.register(SponsorshipLevel, SponsorLevelAdmin)
 admin.site.register(SponsorshipPeriod, SponsorRenewedAdmin)
@@ -0,0 +1,15 @@
+# coding=utf-8
+"""App configuration for changes."""
+from django.apps import AppConfig
+
+
+class ChangesConfig(AppConfig):
+    """Registers the cache tags and statistics of the changes models."""
+    name = 'changes'
+    verbose_name = 'Changes'
+
+    def ready(self):
+        # noinspection PyUnresolvedReferences
+        import changes.handlers  # noqa
+        # noinspection PyUnresolvedReferences
+        import changes.statistics  # noqa
@@ -0,0 +1,39 @@
+# coding=utf-8
+"""Cache helpers for data derived from the changelog of a project.
+
+The sponsors of a project are tagged ``sponsors:<project id>`` in the same
+way, see changes.sponsor_wall. The sponsorship report of all projects
+depends on ``sponsorship-report``, see changes.sponsorship_report.
+
+Derived data (e.g. the entries between two versions) is cached under keys
+containing the generation of the ``changelog:<project id>`` cache tag. Any
+change to the entries, versions or categories of a project invalidates the
+tag (see changes.handlers), so stale keys are simply never read again and
+expire.
+"""
+from core.cache_tags import invalidate_tags, tag_generation
+
+CHANGELOG_TAG = 'changelog:%s'
+SPONSORS_TAG = 'sponsors:%s'
+SPONSORSHIP_REPORT_TAG = 'sponsorship-report'
+
+
+def changelog_generation(project_id):
+    """Get the current changelog generation of a project.
+
+    :param project_id: Primary key of the project.
+    :type project_id: int
+
+    :returns: The generation number.
+    :rtype: int
+    """
+    return tag_generation(CHANGELOG_TAG % project_id)
+
+
+def bump_changelog_generation(project_id):
+    """Invalidate all cached changelog data of a project.
+
+    :param project_id: Primary key of the project.
+    :type project_id: int
+    """
+    invalidate_tags([CHANGELOG_TAG % project_id])
@@ -12,7 +12,7 @@ from django.contrib.syndication.views import Feed
 from django.utils.feedgenerator import Atom1Feed
 from django.shortcuts import get_list_or_404
 from django.http import Http404
-from base.models.project import Project
+from base.project_cache import get_project
 from changes.models.version import Version
 from changes.models.entry import Entry
 from django.conf import settings
@@ -41,7 +41,7 @@ class RssEntryFeed(Feed):
         """
         try:
             project_slug = kwargs.get('project_slug', None)
-            project = Project.objects.get(slug=project_slug)
+            project = get_project(project_slug, request)
             version_slug = kwargs.get('version_slug', None)
             # Check if version is given, give atom for the that version,
             # otherwise give the latest version.
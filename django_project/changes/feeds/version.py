@@ -10,8 +10,7 @@ __copyright__ = ''
 
 from django.contrib.syndication.views import Feed
 from django.utils.feedgenerator import Atom1Feed
-from django.shortcuts import get_object_or_404
-from base.models.project import Project
+from base.project_cache import get_project_or_404
 from changes.models.version import Version
 
 
@@ -37,7 +36,7 @@ class RssVersionFeed(Feed):
         :raises: Http404
         """
         project_slug = kwargs.get('project_slug', None)
-        return get_object_or_404(Project, slug=project_slug)
+        return get_project_or_404(project_slug, request)
 
     def title(self, obj):
         """Return a title for the RSS.
@@ -81,7 +80,8 @@ class RssVersionFeed(Feed):
         :returns: List of approved version of a project
         :rtype: list
         """
-        return Version.objects.filter(project=obj, approved=True).order_by(
+        return Version.objects.filter(
+            project=obj, approved=True).select_related('project').order_by(
             '-name')[:5]
 
     def item_title(self, item):
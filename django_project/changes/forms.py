@@ -15,6 +15,7 @@ from models import (
     SponsorshipPeriod,
     SponsorshipLevel
 )
+from importers import guess_import_format
 
 
 class CategoryForm(forms.ModelForm):
@@ -132,6 +133,9 @@ class EntryForm(forms.ModelForm):
         if not self.instance.id:
             self.fields['category'].queryset = Category.objects.filter(
                 project=self.project).order_by('name')
+        # The choices are labelled with the project name.
+        self.fields['category'].queryset = \
+            self.fields['category'].queryset.select_related('project')
 
     def save(self, commit=True):
         instance = super(EntryForm, self).save(commit=False)
@@ -266,3 +270,60 @@ class SponsorshipPeriodForm(forms.ModelForm):
         instance.project = self.project
         instance.save()
         return instance
+
+
+class EntryImportForm(forms.Form):
+    """Upload form for importing many entries into a version at once."""
+
+    import_file = forms.FileField(
+        label='Entries file',
+        help_text=(
+            'A CSV file with a header row or a JSON list of objects. '
+            'The category and title columns are required; description, '
+            'image_credits, video, funded_by, funder_url, developed_by and '
+            'developer_url are optional.'))
+
+    import_format = forms.ChoiceField(
+        label='Format',
+        choices=(
+            ('', 'Detect from file extension'),
+            ('csv', 'CSV'),
+            ('json', 'JSON'),
+        ),
+        required=False)
+
+    skip_invalid = forms.BooleanField(
+        label='Import valid rows even if some rows have errors',
+        required=False)
+
+    def __init__(self, *args, **kwargs):
+        self.version = kwargs.pop('version')
+        form_title = 'Import Entries into %s %s' % (
+            self.version.project.name,
+            self.version.name
+        )
+        self.helper = FormHelper()
+        layout = Layout(
+            Fieldset(
+                form_title,
+                Field('import_file', css_class='form-control'),
+                Field('import_format', css_class='form-control'),
+                Field('skip_invalid'),
+                css_id='entry-import-form')
+        )
+        self.helper.layout = layout
+        self.helper.html5_required = False
+        super(EntryImportForm, self).__init__(*args, **kwargs)
+        self.helper.add_input(Submit('submit', 'Import'))
+
+    def clean(self):
+        cleaned_data = super(EntryImportForm, self).clean()
+        import_file = cleaned_data.get('import_file')
+        if import_file and not cleaned_data.get('import_format'):
+            import_format = guess_import_format(import_file.name)
+            if import_format is None:
+                raise forms.ValidationError(
+                    'Could not detect the format of %s, please choose one.'
+                    % import_file.name)
+            cleaned_data['import_format'] = import_format
+        return cleaned_data
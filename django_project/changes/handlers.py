@@ -0,0 +1,98 @@
+# coding=utf-8
+"""Cache tags of the changes models and receivers of the bulk signals.
+
+Connected when the app registry is ready (see ChangesConfig).
+"""
+from django.dispatch import receiver
+from core.cache_tags import invalidate_tags, register
+from .caching import CHANGELOG_TAG, SPONSORS_TAG, SPONSORSHIP_REPORT_TAG
+from .models import (
+    Category,
+    Entry,
+    Sponsor,
+    SponsorshipLevel,
+    SponsorshipPeriod,
+    Version)
+from .signals import entries_imported, objects_moderated
+
+
+def project_tags(project_id):
+    """Get the tags of everything shown on the pages of a project.
+
+    :param project_id: Primary key of the project.
+    :type project_id: int
+
+    :returns: The tags.
+    :rtype: list
+    """
+    return [
+        'project:%s' % project_id,
+        CHANGELOG_TAG % project_id,
+        'feeds:%s' % project_id,
+        SPONSORS_TAG % project_id,
+    ]
+
+
+register(Category, lambda category: [
+    'category:%s' % category.id,
+    'project:%s' % category.project_id,
+    CHANGELOG_TAG % category.project_id,
+])
+
+# The project list shows the latest versions of each project.
+register(Version, lambda version: [
+    'version:%s' % version.id,
+    'project:%s' % version.project_id,
+    'projects',
+    CHANGELOG_TAG % version.project_id,
+    'feeds:%s' % version.project_id,
+])
+
+register(Entry, lambda entry: [
+    'entry:%s' % entry.id,
+    'version:%s' % entry.version_id,
+    'project:%s' % entry.version.project_id,
+    CHANGELOG_TAG % entry.version.project_id,
+    'feeds:%s' % entry.version.project_id,
+])
+
+register(Sponsor, lambda sponsor: [
+    'sponsor:%s' % sponsor.id,
+    'project:%s' % sponsor.project_id,
+    SPONSORS_TAG % sponsor.project_id,
+    SPONSORSHIP_REPORT_TAG,
+])
+
+register(SponsorshipLevel, lambda level: [
+    'sponsorshiplevel:%s' % level.id,
+    'project:%s' % level.project_id,
+    SPONSORS_TAG % level.project_id,
+    SPONSORSHIP_REPORT_TAG,
+])
+
+register(SponsorshipPeriod, lambda period: [
+    'sponsorshipperiod:%s' % period.id,
+    'sponsor:%s' % period.sponsor_id,
+    'project:%s' % period.project_id,
+    SPONSORS_TAG % period.project_id,
+    SPONSORSHIP_REPORT_TAG,
+])
+
+
+@receiver(entries_imported)
+def entries_imported_changed(sender, version, **kwargs):
+    """Invalidate the caches of a version after a bulk import."""
+    invalidate_tags(
+        ['version:%s' % version.id] + project_tags(version.project_id))
+
+
+@receiver(objects_moderated)
+def objects_moderated_changed(sender, project, ids, **kwargs):
+    """Invalidate the caches of bulk approved or rejected objects."""
+    kind = sender._meta.model_name
+    tags = ['%s:%s' % (kind, pk) for pk in ids] + project_tags(project.id)
+    if sender is Version:
+        tags.append('projects')
+    elif sender in (Sponsor, SponsorshipLevel, SponsorshipPeriod):
+        tags.append(SPONSORSHIP_REPORT_TAG)
+    invalidate_tags(tags)
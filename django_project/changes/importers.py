@@ -0,0 +1,293 @@
+# coding=utf-8
+"""Bulk import of changelog entries from CSV or JSON documents.
+
+Release managers typically collect the features of a release in an issue
+tracker. Rather than adding them one by one through ``EntryCreateView``, the
+tracker export can be uploaded (or passed to ``manage.py import_entries``)
+and all rows are validated in memory and written with a single
+``bulk_create`` inside one transaction.
+"""
+import codecs
+import csv
+import io
+import json
+import logging
+import os
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from changes.models import Category, Entry
+from changes.signals import entries_imported
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = ('csv', 'json')
+
+# Entry fields which may be supplied by an import document.
+IMPORT_FIELDS = (
+    'title',
+    'description',
+    'image_credits',
+    'video',
+    'funded_by',
+    'funder_url',
+    'developed_by',
+    'developer_url',
+)
+
+SLUG_MAX_LENGTH = 50
+
+
+def guess_import_format(file_name):
+    """Guess the import format from the extension of a file name.
+
+    :param file_name: Name of the uploaded or local file.
+    :type file_name: str
+
+    :returns: One of IMPORT_FORMATS, or None if it can not be guessed.
+    :rtype: str, None
+    """
+    extension = os.path.splitext(file_name or '')[1].lower().lstrip('.')
+    if extension in IMPORT_FORMATS:
+        return extension
+    return None
+
+
+def _json_text(key, value):
+    """Convert a value of a JSON import to text.
+
+    :param key: The key of the value, for the error message.
+    :type key: str
+
+    :param value: A value decoded from JSON.
+
+    :returns: The value as text, an empty string for null.
+    :rtype: unicode
+
+    :raises: ValueError if the value is a list or an object.
+    """
+    if value is None:
+        return u''
+    if isinstance(value, (dict, list)):
+        raise ValueError(
+            'The value of "%s" must be text, not a list or an object.' % key)
+    return unicode(value)
+
+
+def parse_entry_rows(content, file_format):
+    """Parse an import document into a list of row dictionaries.
+
+    A CSV document needs a header row naming the columns (``category`` and
+    ``title`` are required, see IMPORT_FIELDS for the optional ones). A JSON
+    document is a list of objects using the same keys, optionally wrapped
+    in an ``{"entries": [...]}`` object.
+
+    :param content: Raw (utf-8 encoded) content of the document.
+    :type content: str
+
+    :param file_format: One of IMPORT_FORMATS.
+    :type file_format: str
+
+    :returns: A list of dictionaries with lower cased keys.
+    :rtype: list
+
+    :raises: ValueError if the document can not be parsed.
+    """
+    if content.startswith(codecs.BOM_UTF8):
+        content = content[len(codecs.BOM_UTF8):]
+    if file_format == 'json':
+        try:
+            data = json.loads(content.decode('utf-8'))
+        except (UnicodeDecodeError, ValueError) as e:
+            raise ValueError('Invalid JSON document: %s' % e)
+        if isinstance(data, dict):
+            data = data.get('entries')
+        if not isinstance(data, list) or not all(
+                isinstance(row, dict) for row in data):
+            raise ValueError(
+                'A JSON import must be a list of objects, one per entry.')
+        rows = [
+            dict((key, _json_text(key, value)) for key, value in row.items())
+            for row in data]
+    elif file_format == 'csv':
+        try:
+            reader = csv.DictReader(io.BytesIO(content))
+            rows = [
+                dict((key, (value or '').decode('utf-8'))
+                     for key, value in row.items() if key)
+                for row in reader]
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise ValueError('Invalid CSV document: %s' % e)
+    else:
+        raise ValueError('Unsupported import format: %s' % file_format)
+    return [
+        dict((key.strip().lower(), value) for key, value in row.items())
+        for row in rows]
+
+
+class EntryImporter(object):
+    """Validate and create many Entry objects for one Version at once.
+
+    Example::
+
+        importer = EntryImporter(version, request.user)
+        report = importer.run(parse_entry_rows(data, 'csv'))
+
+    The importer costs a constant number of queries regardless of the number
+    of rows: one for the project categories, one for the entries already in
+    the version, up to three for the funder and developer organisations and
+    the batched insert.
+    """
+
+    def __init__(self, version, author, approved=False, skip_invalid=False):
+        """Constructor.
+
+        :param version: Version the entries are imported into.
+        :type version: Version
+
+        :param author: User recorded as author of the entries.
+        :type author: User
+
+        :param approved: Whether the imported entries are approved.
+        :type approved: bool
+
+        :param skip_invalid: When True, valid rows are imported even if other
+            rows have errors. Otherwise nothing is imported when any row is
+            invalid.
+        :type skip_invalid: bool
+        """
+        self.version = version
+        self.author = author
+        self.approved = approved
+        self.skip_invalid = skip_invalid
+
+    def _category_lookup(self):
+        """Index the project categories by lower cased name and by slug.
+
+        :returns: A dictionary of category key -> Category.
+        :rtype: dict
+        """
+        lookup = {}
+        categories = Category.objects.filter(project=self.version.project_id)
+        for category in categories:
+            lookup[category.slug] = category
+            lookup[category.name.strip().lower()] = category
+        return lookup
+
+    @staticmethod
+    def _unique_slug(title, used_slugs):
+        """Generate a slug not present in used_slugs and reserve it.
+
+        :param title: The entry title.
+        :type title: str
+
+        :param used_slugs: Slugs already taken within the version.
+        :type used_slugs: set
+
+        :returns: A unique slug of at most SLUG_MAX_LENGTH characters.
+        :rtype: str
+        """
+        base = Entry.slug_for_title(title) or 'entry'
+        slug = base
+        counter = 2
+        while slug in used_slugs:
+            suffix = '-%s' % counter
+            slug = base[:SLUG_MAX_LENGTH - len(suffix)] + suffix
+            counter += 1
+        used_slugs.add(slug)
+        return slug
+
+    def build(self, rows):
+        """Validate rows and build (unsaved) Entry instances.
+
+        :param rows: Row dictionaries as returned by parse_entry_rows.
+        :type rows: list
+
+        :returns: A tuple of (entries, errors) where errors is a list of
+            dictionaries with the 1-based 'row', the 'title' and the
+            'errors' found for that row.
+        :rtype: tuple
+        """
+        categories = self._category_lookup()
+        existing = Entry.objects.filter(
+            version=self.version).values_list('title', 'category', 'slug')
+        used_titles = set()
+        used_slugs = set()
+        for title, category_id, slug in existing:
+            used_titles.add((title, category_id))
+            used_slugs.add(slug)
+
+        entries = []
+        errors = []
+        for index, row in enumerate(rows, start=1):
+            row_errors = []
+            title = (row.get('title') or '').strip()
+            category_key = (row.get('category') or '').strip()
+            category = categories.get(category_key.lower()) or \
+                categories.get(category_key)
+            if not title:
+                row_errors.append('A title is required.')
+            if category is None:
+                row_errors.append(
+                    'Unknown category "%s".' % category_key)
+            elif (title, category.id) in used_titles:
+                row_errors.append(
+                    'An entry with this title already exists in category '
+                    '"%s".' % category.name)
+
+            values = dict(
+                (field, (row.get(field) or '').strip())
+                for field in IMPORT_FIELDS)
+            values['title'] = title
+            entry = Entry(
+                version=self.version,
+                author=self.author,
+                approved=self.approved,
+                **values)
+            if category is not None:
+                entry.category = category
+            try:
+                entry.clean_fields(
+                    exclude=['image_file', 'slug', 'author', 'version',
+                             'category'])
+            except ValidationError as e:
+                for field, messages in sorted(e.message_dict.items()):
+                    for message in messages:
+                        row_errors.append('%s: %s' % (field, message))
+
+            if row_errors:
+                errors.append({
+                    'row': index,
+                    'title': title,
+                    'errors': row_errors
+                })
+                continue
+            used_titles.add((title, category.id))
+            entry.slug = self._unique_slug(title, used_slugs)
+            entries.append(entry)
+        return entries, errors
+
+    def run(self, rows):
+        """Validate rows and create the entries in a single transaction.
+
+        :param rows: Row dictionaries as returned by parse_entry_rows.
+        :type rows: list
+
+        :returns: A report dictionary with the number of 'rows', the
+            number of entries 'created' and the per row 'errors'.
+        :rtype: dict
+        """
+        entries, errors = self.build(rows)
+        created = 0
+        if entries and (self.skip_invalid or not errors):
+            with transaction.atomic():
+                Entry.link_credits(entries)
+                Entry.objects.bulk_create(entries, batch_size=500)
+            created = len(entries)
+            entries_imported.send(sender=Entry, version=self.version)
+            logger.info(
+                'Imported %s entries into %s', created, self.version)
+        return {
+            'rows': len(rows),
+            'created': created,
+            'errors': errors
+        }
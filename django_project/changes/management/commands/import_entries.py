@@ -0,0 +1,93 @@
+# coding=utf-8
+"""A command to import many changelog entries into a version at once."""
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from ...models import Version
+from ...importers import (
+    EntryImporter,
+    IMPORT_FORMATS,
+    guess_import_format,
+    parse_entry_rows)
+
+
+class Command(BaseCommand):
+    """Import entries from a CSV or JSON file into a project version.
+
+    e.g. ``manage.py import_entries qgis 2.14.0 entries.csv --author=tim``
+    """
+    # noinspection PyShadowingBuiltins
+    help = 'Imports changelog entries from a CSV or JSON file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('project_slug')
+        parser.add_argument('version_slug')
+        parser.add_argument('path')
+        parser.add_argument(
+            '--author',
+            help='Username recorded as the author of the entries.')
+        parser.add_argument(
+            '--format',
+            choices=IMPORT_FORMATS,
+            dest='import_format',
+            help='Format of the file, detected from its extension if '
+                 'omitted.')
+        parser.add_argument(
+            '--approve',
+            action='store_true',
+            default=False,
+            help='Mark the imported entries as approved.')
+        parser.add_argument(
+            '--skip-invalid',
+            action='store_true',
+            dest='skip_invalid',
+            default=False,
+            help='Import the valid rows even if some rows have errors.')
+
+    def handle(self, *args, **options):
+        """Implementation for command.
+
+        :param args: Not used
+        :param options: Parsed command line options
+        """
+        try:
+            version = Version.objects.select_related('project').get(
+                slug=options['version_slug'],
+                project__slug=options['project_slug'])
+        except Version.DoesNotExist:
+            raise CommandError(
+                'Version %s of project %s does not exist.' % (
+                    options['version_slug'], options['project_slug']))
+        if not options['author']:
+            raise CommandError('Please specify --author=<username>.')
+        try:
+            author = User.objects.get(username=options['author'])
+        except User.DoesNotExist:
+            raise CommandError('User %s does not exist.' % options['author'])
+
+        import_format = options['import_format'] or guess_import_format(
+            options['path'])
+        if import_format is None:
+            raise CommandError(
+                'Could not detect the format of %s, use --format.' %
+                options['path'])
+        try:
+            with open(options['path'], 'rb') as import_file:
+                rows = parse_entry_rows(import_file.read(), import_format)
+        except (IOError, ValueError) as e:
+            raise CommandError(e)
+
+        importer = EntryImporter(
+            version,
+            author,
+            approved=options['approve'],
+            skip_invalid=options['skip_invalid'])
+        report = importer.run(rows)
+        for row in report['errors']:
+            for error in row['errors']:
+                self.stderr.write(
+                    u'Row %s (%s): %s' % (row['row'], row['title'], error))
+        self.stdout.write(
+            'Imported %s of %s entries into %s.' % (
+                report['created'], report['rows'], version.name))
+        if report['errors'] and not report['created']:
+            raise CommandError('No entries were imported.')
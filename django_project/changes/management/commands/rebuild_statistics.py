@@ -0,0 +1,44 @@
+# coding=utf-8
+"""A command to count the statistics of projects and versions again."""
+from django.core.management.base import BaseCommand, CommandError
+from base.models import Project
+from ...statistics import rebuild_project_statistics
+
+
+class Command(BaseCommand):
+    """Recount the project and version statistics from scratch.
+
+    e.g. ``manage.py rebuild_statistics`` for all projects or
+    ``manage.py rebuild_statistics qgis inasafe`` for some. Only needed
+    after rows were changed bypassing the models, e.g. with raw SQL or
+    loaddata.
+    """
+    # noinspection PyShadowingBuiltins
+    help = 'Counts the statistics of projects and their versions again.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'project_slugs',
+            nargs='*',
+            help='Slugs of the projects, all projects if omitted.')
+
+    def handle(self, *args, **options):
+        """Implementation for command.
+
+        :param args: Not used
+        :param options: Parsed command line options
+        """
+        projects = Project.objects.order_by('name')
+        if options['project_slugs']:
+            projects = projects.filter(slug__in=options['project_slugs'])
+            missing = set(options['project_slugs']) - set(
+                projects.values_list('slug', flat=True))
+            if missing:
+                raise CommandError(
+                    'Projects %s do not exist.' % ', '.join(sorted(missing)))
+        for project in projects.only('name'):
+            statistics = rebuild_project_statistics(project.id)
+            self.stdout.write(
+                '%s: %s versions, %s entries, %s contributors, %s pending' % (
+                    project.name, statistics.versions, statistics.entries,
+                    statistics.contributors, statistics.pending))
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from collections import Counter, defaultdict
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+import markdown
+
+CREDIT_FIELDS = ('funded_by', 'funder_url', 'developed_by', 'developer_url')
+
+
+# Copies of Organisation.key_for, Entry.credit_markdown and
+# render_markdown as of this migration, so that later changes to them do
+# not change what it does.
+def key_for(name, url):
+    key = ' '.join((name or '').split()).lower()
+    if not key:
+        key = (url or '').strip().lower().rstrip('/')
+    return key[:255]
+
+
+def credit_markdown(verb, name, url):
+    if name and url is None:
+        return ''
+    elif name and not url:
+        return 'This feature was %s by %s ' % (verb, name)
+    elif url and not name:
+        return 'This feature was %s by [%s](%s)' % (verb, url, url)
+    elif name and url:
+        return 'This feature was %s by [%s](%s)' % (verb, name, url)
+    else:
+        return ''
+
+
+def render_markdown(value):
+    return markdown.markdown(
+        value, ['nl2br'], safe_mode=True, enable_attributes=False)
+
+
+def link_credits(apps, schema_editor):
+    """Create one organisation per distinct credit and link the entries.
+
+    Spellings of a name differing only in case or spaces are one
+    organisation, named as most entries spell it.
+    """
+    Entry = apps.get_model('changes', 'Entry')
+    Organisation = apps.get_model('changes', 'Organisation')
+    credits = list(Entry.objects.values(*CREDIT_FIELDS).annotate(
+        count=Count('id')).order_by())
+
+    names = defaultdict(Counter)
+    urls = defaultdict(Counter)
+    for row in credits:
+        for name, url in (
+                (row['funded_by'], row['funder_url']),
+                (row['developed_by'], row['developer_url'])):
+            credit = key_for(name, url)
+            if credit:
+                names[credit][(name or '').strip() or credit] += row['count']
+                if url and url.strip():
+                    urls[credit][url.strip()] += row['count']
+    Organisation.objects.bulk_create([
+        Organisation(
+            key=key,
+            name=names[key].most_common(1)[0][0],
+            url=urls[key].most_common(1)[0][0] if urls[key] else '')
+        for key in names])
+    organisations = dict(Organisation.objects.values_list('key', 'id'))
+
+    for row in credits:
+        funder_markdown = credit_markdown(
+            'funded', row['funded_by'], row['funder_url'])
+        developer_markdown = credit_markdown(
+            'developed', row['developed_by'], row['developer_url'])
+        lookups = dict(
+            (field, row[field]) if row[field] is not None
+            else (field + '__isnull', True)
+            for field in CREDIT_FIELDS)
+        Entry.objects.filter(**lookups).update(
+            funder_id=organisations.get(
+                key_for(row['funded_by'], row['funder_url'])),
+            developer_id=organisations.get(
+                key_for(row['developed_by'], row['developer_url'])),
+            credits_html=u'\n'.join(
+                render_markdown(credit)
+                for credit in (funder_markdown, developer_markdown)
+                if credit))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('changes', '0005_auto_20160229_2050'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Organisation',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('name', models.CharField(help_text=b'Name of the organisation.', max_length=255)),
+                ('url', models.CharField(help_text=b'Website of the organisation.', max_length=255, blank=True)),
+                ('key', models.CharField(help_text=b'The name in lower case with single spaces (or the url when an entry only gives a url), used to match the credits of entries.', unique=True, max_length=255)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='entry',
+            name='credits_html',
+            field=models.TextField(default=b'', help_text=b'The funder and developer credits rendered on save.', editable=False, blank=True),
+        ),
+        migrations.AddField(
+            model_name='entry',
+            name='developer',
+            field=models.ForeignKey(related_name='developed_entries', on_delete=django.db.models.deletion.SET_NULL, blank=True, editable=False, to='changes.Organisation', null=True, db_index=False),
+        ),
+        migrations.AddField(
+            model_name='entry',
+            name='funder',
+            field=models.ForeignKey(related_name='funded_entries', on_delete=django.db.models.deletion.SET_NULL, blank=True, editable=False, to='changes.Organisation', null=True, db_index=False),
+        ),
+        migrations.AlterIndexTogether(
+            name='entry',
+            index_together=set([('developer', 'version'), ('funder', 'version')]),
+        ),
+        migrations.RunPython(link_credits, migrations.RunPython.noop),
+    ]
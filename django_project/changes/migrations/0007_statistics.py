@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0002_user_prefix_indexes'),
+        ('changes', '0006_organisation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectStatistics',
+            fields=[
+                ('project', models.OneToOneField(related_name='statistics', primary_key=True, serialize=False, to='base.Project')),
+                ('versions', models.IntegerField(default=0, help_text=b'Number of approved versions.')),
+                ('categories', models.IntegerField(default=0, help_text=b'Number of approved categories.')),
+                ('entries', models.IntegerField(default=0, help_text=b'Number of approved entries.')),
+                ('contributors', models.IntegerField(default=0, help_text=b'Number of authors of approved entries.')),
+                ('pending', models.IntegerField(default=0, help_text=b'Number of versions, categories and entries awaiting approval.')),
+            ],
+            options={
+                'verbose_name_plural': 'project statistics',
+            },
+        ),
+        migrations.CreateModel(
+            name='VersionStatistics',
+            fields=[
+                ('version', models.OneToOneField(related_name='statistics', primary_key=True, serialize=False, to='changes.Version')),
+                ('categories', models.IntegerField(default=0, help_text=b'Number of categories with approved entries.')),
+                ('entries', models.IntegerField(default=0, help_text=b'Number of approved entries.')),
+                ('contributors', models.IntegerField(default=0, help_text=b'Number of authors of approved entries.')),
+                ('pending', models.IntegerField(default=0, help_text=b'Number of entries awaiting approval.')),
+            ],
+            options={
+                'verbose_name_plural': 'version statistics',
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""Index the entry titles searched by prefix on PostgreSQL.
+
+The entry admin searches ``^title``, an ``istartswith`` lookup comparing
+``UPPER(title::text)`` with ``LIKE``, which only an index on the same
+expression with ``text_pattern_ops`` can serve. Other databases scan the
+table, so this is a no-op there.
+"""
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+FORWARD_SQL = [
+    'CREATE INDEX changes_entry_title_upper_like '
+    'ON changes_entry (UPPER("title"::text) text_pattern_ops)',
+]
+
+BACKWARD_SQL = [
+    'DROP INDEX IF EXISTS changes_entry_title_upper_like',
+]
+
+
+def run_sql(statements):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('changes', '0007_statistics'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_sql(FORWARD_SQL), run_sql(BACKWARD_SQL)),
+    ]
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""Count the statistics of the existing projects and versions.
+
+Without rows the first request reading the statistics of each project
+would count them, see changes.statistics. The counting is copied here as
+of this migration, with one GROUP BY query per model for all projects.
+"""
+from __future__ import unicode_literals
+
+from django.db import migrations
+from django.db.models import Case, Count, IntegerField, Sum, When
+
+
+def _count(approved):
+    return Sum(Case(
+        When(approved=approved, then=1),
+        default=0,
+        output_field=IntegerField()))
+
+
+def _count_approved(field):
+    return Count(Case(When(approved=True, then=field)), distinct=True)
+
+
+def backfill_statistics(apps, schema_editor):
+    Project = apps.get_model('base', 'Project')
+    Version = apps.get_model('changes', 'Version')
+    Category = apps.get_model('changes', 'Category')
+    Entry = apps.get_model('changes', 'Entry')
+    ProjectStatistics = apps.get_model('changes', 'ProjectStatistics')
+    VersionStatistics = apps.get_model('changes', 'VersionStatistics')
+
+    versions = dict(
+        (row.pop('project'), row)
+        for row in Version.objects.values('project').annotate(
+            versions=_count(True), pending=_count(False)).order_by())
+    categories = dict(
+        (row.pop('project'), row)
+        for row in Category.objects.values('project').annotate(
+            categories=_count(True), pending=_count(False)).order_by())
+    entries = dict(
+        (row.pop('version__project'), row)
+        for row in Entry.objects.values('version__project').annotate(
+            entries=_count(True),
+            contributors=_count_approved('author'),
+            pending=_count(False)).order_by())
+    counted = set(
+        ProjectStatistics.objects.values_list('project_id', flat=True))
+    ProjectStatistics.objects.bulk_create([
+        ProjectStatistics(
+            project_id=project_id,
+            versions=versions.get(project_id, {}).get('versions') or 0,
+            categories=categories.get(project_id, {}).get('categories') or 0,
+            entries=entries.get(project_id, {}).get('entries') or 0,
+            contributors=entries.get(project_id, {}).get('contributors') or 0,
+            pending=sum(
+                counts.get(project_id, {}).get('pending') or 0
+                for counts in (versions, categories, entries)))
+        for project_id in Project.objects.values_list('id', flat=True)
+        if project_id not in counted])
+
+    by_version = dict(
+        (row.pop('version'), row)
+        for row in Entry.objects.values('version').annotate(
+            categories=_count_approved('category'),
+            entries=_count(True),
+            contributors=_count_approved('author'),
+            pending=_count(False)).order_by())
+    counted = set(
+        VersionStatistics.objects.values_list('version_id', flat=True))
+    VersionStatistics.objects.bulk_create([
+        VersionStatistics(
+            version_id=version_id,
+            **dict(
+                (field, count or 0)
+                for field, count in by_version.get(version_id, {}).items()))
+        for version_id in Version.objects.values_list('id', flat=True)
+        if version_id not in counted])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('changes', '0008_entry_title_prefix_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_statistics, migrations.RunPython.noop),
+    ]
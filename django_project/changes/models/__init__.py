@@ -1,8 +1,9 @@
 
 from category import *
+from organisation import *
 from entry import *
 from version import *
 from sponsor import *
 from sponsorship_level import *
 from sponsorship_period import *
-
+from statistics import *
@@ -4,14 +4,20 @@ from django.core.urlresolvers import reverse
 from django.utils.text import slugify
 import os
 import logging
+from itertools import chain
 from core.settings.contrib import STOP_WORDS
 from django.conf.global_settings import MEDIA_ROOT
 from django.db import models
 from embed_video.fields import EmbedVideoField
 from django.contrib.auth.models import User
+from base.templatetags.custom_markup import render_markdown
+from .organisation import Organisation
 
 logger = logging.getLogger(__name__)
 
+# The fields linked to organisations and rendered to credits_html.
+CREDIT_FIELDS = ('funded_by', 'funder_url', 'developed_by', 'developer_url')
+
 
 class ApprovedEntryManager(models.Manager):
     """Custom entry manager that shows only approved records."""
@@ -91,6 +97,32 @@ class Entry(models.Model):
         null=True,
         blank=True)
 
+    # Linked from the names above on save, see link_credits. The composite
+    # indexes below serve the lookups by organisation.
+    funder = models.ForeignKey(
+        Organisation,
+        related_name='funded_entries',
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=False,
+        on_delete=models.SET_NULL)
+
+    developer = models.ForeignKey(
+        Organisation,
+        related_name='developed_entries',
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=False,
+        on_delete=models.SET_NULL)
+
+    credits_html = models.TextField(
+        help_text='The funder and developer credits rendered on save.',
+        blank=True,
+        default='',
+        editable=False)
+
     approved = models.BooleanField(
         help_text=(
             'Whether this entry has been approved for use by the '
@@ -114,16 +146,68 @@ class Entry(models.Model):
             ('title', 'version', 'category'),
             ('version', 'slug'),
         )
+        index_together = (
+            ('funder', 'version'),
+            ('developer', 'version'),
+        )
         app_label = 'changes'
 
     def save(self, *args, **kwargs):
         if not self.pk:
-            words = self.title.split()
-            filtered_words = [t for t in words if t.lower() not in STOP_WORDS]
-            new_list = ' '.join(filtered_words)
-            self.slug = slugify(new_list)[:50]
+            self.slug = self.slug_for_title(self.title)
+        if self.credits_changed():
+            self.link_credits([self])
         super(Entry, self).save(*args, **kwargs)
 
+    def credits_changed(self):
+        """Whether the funder or developer differs from the saved entry.
+
+        :returns: True for a new entry or changed credits, so that save
+            only resolves organisations and renders credits when needed.
+        :rtype: bool
+        """
+        if not self.pk:
+            return True
+        saved = Entry.objects.filter(pk=self.pk).values_list(
+            *CREDIT_FIELDS).first()
+        return saved != tuple(getattr(self, field) for field in CREDIT_FIELDS)
+
+    @staticmethod
+    def link_credits(entries):
+        """Link entries to their organisations and render their credits.
+
+        Entries written with bulk_create must be passed here first, save
+        does it for single entries.
+
+        :param entries: The entries.
+        :type entries: list
+        """
+        organisations = Organisation.objects.for_credits(chain.from_iterable(
+            ((entry.funded_by, entry.funder_url),
+             (entry.developed_by, entry.developer_url))
+            for entry in entries))
+        for entry in entries:
+            entry.funder = organisations.get(
+                Organisation.key_for(entry.funded_by, entry.funder_url))
+            entry.developer = organisations.get(
+                Organisation.key_for(entry.developed_by, entry.developer_url))
+            entry.credits_html = entry.render_credits()
+
+    @staticmethod
+    def slug_for_title(title):
+        """Create the slug for an entry title, ignoring stop words.
+
+        :param title: The title of the entry.
+        :type title: str
+
+        :returns: A slug of at most 50 characters.
+        :rtype: str
+        """
+        words = title.split()
+        filtered_words = [t for t in words if t.lower() not in STOP_WORDS]
+        new_list = ' '.join(filtered_words)
+        return slugify(new_list)[:50]
+
     def __unicode__(self):
         return u'%s' % self.title
 
@@ -132,40 +216,46 @@ class Entry(models.Model):
             'pk': self.id
         })
 
-    def funder_info_html(self):
-        string = ""
-        if self.funded_by and self.funder_url is None:
-            string = ""
-            return string
-        elif self.funded_by and not self.funder_url:
-            string = "This feature was funded by %s " % self.funded_by
-            return string
-        elif self.funder_url and not self.funded_by:
-            string = "This feature was funded by [%s](%s)" % (
-                self.funder_url, self.funder_url)
-            return string
-        elif self.funded_by and self.funder_url:
-            string = "This feature was funded by [%s](%s)" % (
-                self.funded_by, self.funder_url)
-            return string
+    @staticmethod
+    def credit_markdown(verb, name, url):
+        """Write the markdown of a funder or developer credit.
+
+        :param verb: 'funded' or 'developed'.
+        :type verb: str
+
+        :param name: The name of the funder or developer.
+        :type name: str
+
+        :param url: The url of the funder or developer.
+        :type url: str
+
+        :returns: The credit, empty if there is none.
+        :rtype: str
+        """
+        if name and url is None:
+            return ""
+        elif name and not url:
+            return "This feature was %s by %s " % (verb, name)
+        elif url and not name:
+            return "This feature was %s by [%s](%s)" % (verb, url, url)
+        elif name and url:
+            return "This feature was %s by [%s](%s)" % (verb, name, url)
         else:
-            return string
+            return ""
+
+    def funder_info_html(self):
+        return self.credit_markdown('funded', self.funded_by, self.funder_url)
 
     def developer_info_html(self):
-        string = ""
-        if self.developed_by and self.developer_url is None:
-            string = ""
-            return string
-        elif self.developed_by and not self.developer_url:
-            string = "This feature was developed by %s " % self.developed_by
-            return string
-        elif self.developer_url and not self.developed_by:
-            string = "This feature was developed by [%s](%s)" % (
-                self.developer_url, self.developer_url)
-            return string
-        elif self.developed_by and self.developer_url:
-            string = "This feature was developed by [%s](%s)" % (
-                self.developed_by, self.developer_url)
-            return string
-        else:
-            return string
+        return self.credit_markdown(
+            'developed', self.developed_by, self.developer_url)
+
+    def render_credits(self):
+        """Render the funder and developer credits to html.
+
+        :rtype: str
+        """
+        return u'\n'.join(
+            render_markdown(credit) for credit in (
+                self.funder_info_html(), self.developer_info_html())
+            if credit)
@@ -0,0 +1,110 @@
+# coding=utf-8
+"""Organisations credited with funding or developing changelog entries.
+
+Entries keep the funder and developer names and urls as typed by their
+author, and are linked to one Organisation per distinct name, so the
+features credited to an organisation across all releases can be found
+with an indexed query.
+"""
+import logging
+from django.db import IntegrityError, models, transaction
+
+logger = logging.getLogger(__name__)
+
+
+class OrganisationManager(models.Manager):
+    """Custom organisation manager resolving credits in bulk."""
+
+    def for_credits(self, credits):
+        """Get or create the organisations of many credits at once.
+
+        :param credits: Tuples of the name and url of a credit.
+        :type credits: iterable
+
+        :returns: A dictionary of organisation key -> Organisation, see
+            Organisation.key_for.
+        :rtype: dict
+        """
+        wanted = {}
+        for name, url in credits:
+            key = Organisation.key_for(name, url)
+            if key and key not in wanted:
+                wanted[key] = Organisation(
+                    key=key,
+                    name=(name or '').strip() or key,
+                    url=(url or '').strip())
+        if not wanted:
+            return {}
+        found = dict(
+            (organisation.key, organisation)
+            for organisation in self.filter(
+                key__in=list(wanted)).order_by())
+        missing = [
+            organisation for organisation in wanted.values()
+            if organisation.key not in found]
+        if missing:
+            try:
+                with transaction.atomic(using=self.db):
+                    self.bulk_create(missing)
+            except IntegrityError:
+                # A concurrent request created some of them first.
+                for organisation in missing:
+                    self.get_or_create(
+                        key=organisation.key,
+                        defaults={'name': organisation.name,
+                                  'url': organisation.url})
+            found.update(
+                (organisation.key, organisation)
+                for organisation in self.filter(
+                    key__in=[organisation.key for organisation in missing]
+                ).order_by())
+        return found
+
+
+class Organisation(models.Model):
+    """A funder or developer of changelog entries."""
+    name = models.CharField(
+        help_text='Name of the organisation.',
+        max_length=255)
+
+    url = models.CharField(
+        help_text='Website of the organisation.',
+        max_length=255,
+        blank=True)
+
+    key = models.CharField(
+        help_text=(
+            'The name in lower case with single spaces (or the url when an '
+            'entry only gives a url), used to match the credits of '
+            'entries.'),
+        max_length=255,
+        unique=True)
+
+    objects = OrganisationManager()
+
+    # noinspection PyClassicStyleClass
+    class Meta:
+        """Meta options for the organisation class."""
+        ordering = ['name']
+        app_label = 'changes'
+
+    def __unicode__(self):
+        return u'%s' % self.name
+
+    @staticmethod
+    def key_for(name, url):
+        """Create the key matching the credits of an organisation.
+
+        :param name: The funder or developer name of an entry.
+        :type name: str
+
+        :param url: The funder or developer url of an entry.
+        :type url: str
+
+        :returns: The key, empty if the entry gives no name nor url.
+        :rtype: str
+        """
+        key = ' '.join((name or '').split()).lower()
+        if not key:
+            key = (url or '').strip().lower().rstrip('/')
+        return key[:255]
@@ -0,0 +1,86 @@
+# coding=utf-8
+"""Counters shown on the project and version pages.
+
+The rows are kept up to date by changes.statistics as entries, versions and
+categories are saved and deleted, so reading them costs one primary key
+lookup instead of counting the entries on every request.
+"""
+import logging
+from django.db import models
+
+logger = logging.getLogger(__name__)
+
+
+class ProjectStatistics(models.Model):
+    """The counters of a project."""
+
+    # noinspection PyUnresolvedReferences
+    project = models.OneToOneField(
+        'base.Project', primary_key=True, related_name='statistics')
+
+    versions = models.IntegerField(
+        help_text='Number of approved versions.',
+        default=0)
+
+    categories = models.IntegerField(
+        help_text='Number of approved categories.',
+        default=0)
+
+    entries = models.IntegerField(
+        help_text='Number of approved entries.',
+        default=0)
+
+    contributors = models.IntegerField(
+        help_text='Number of authors of approved entries.',
+        default=0)
+
+    pending = models.IntegerField(
+        help_text='Number of versions, categories and entries awaiting '
+                  'approval.',
+        default=0)
+
+    objects = models.Manager()
+
+    # noinspection PyClassicStyleClass
+    class Meta:
+        """Meta options for the project statistics class."""
+        app_label = 'changes'
+        verbose_name_plural = 'project statistics'
+
+    def __unicode__(self):
+        return u'%s' % self.project_id
+
+
+class VersionStatistics(models.Model):
+    """The counters of a version."""
+
+    # noinspection PyUnresolvedReferences
+    version = models.OneToOneField(
+        'Version', primary_key=True, related_name='statistics')
+
+    categories = models.IntegerField(
+        help_text='Number of categories with approved entries.',
+        default=0)
+
+    entries = models.IntegerField(
+        help_text='Number of approved entries.',
+        default=0)
+
+    contributors = models.IntegerField(
+        help_text='Number of authors of approved entries.',
+        default=0)
+
+    pending = models.IntegerField(
+        help_text='Number of entries awaiting approval.',
+        default=0)
+
+    objects = models.Manager()
+
+    # noinspection PyClassicStyleClass
+    class Meta:
+        """Meta options for the version statistics class."""
+        app_label = 'changes'
+        verbose_name_plural = 'version statistics'
+
+    def __unicode__(self):
+        return u'%s' % self.version_id
@@ -100,13 +100,25 @@ class Version(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.pk:
-            words = self.name.split()
-            filtered_words = [t for t in words if t.lower() not in STOP_WORDS]
-            new_list = ' '.join(filtered_words)
-            self.slug = version_slugify(new_list)[:50]
+            self.slug = self.slug_for_name(self.name)
         self.padded_version = self.pad_name(self.name)
         super(Version, self).save(*args, **kwargs)
 
+    @staticmethod
+    def slug_for_name(name):
+        """Create the slug for a version name, ignoring stop words.
+
+        :param name: The name of the version.
+        :type name: str
+
+        :returns: A slug of at most 50 characters.
+        :rtype: str
+        """
+        words = name.split()
+        filtered_words = [t for t in words if t.lower() not in STOP_WORDS]
+        new_list = ' '.join(filtered_words)
+        return version_slugify(new_list)[:50]
+
     def pad_name(self, version):
         """Create a 0 padded version of the version name.
 
@@ -142,25 +154,16 @@ class Version(models.Model):
 
     def entries(self):
         """Get the entries for this version."""
-        qs = Entry.objects.filter(version=self).order_by('category')
-        return qs
-
-    def _entries_for_category(self, category):
-        """All entries for this version and filtered by the given category.
-
-        :param category: Category to filter by.
-        :type category: Category
-
-        .. note:: only approved entries returned.
-        """
-        qs = Entry.objects.filter(version=self,
-                                  category=category,
-                                  approved=True)
+        qs = Entry.objects.filter(version=self).select_related(
+            'category').order_by('category')
         return qs
 
     def categories(self):
         """Get a list of categories where there are one or more entries.
 
+        The entries and their categories are read with one query, however
+        many categories there are.
+
         Example use in template::
             {% for row in version.categories %}
               <h2 class="text-muted">{{ row.category.name }}</h2>
@@ -170,19 +173,16 @@ class Version(models.Model):
               {% endfor %}
               </ul>
             {% endfor %}
+
+        .. note:: only approved entries are listed in the rows.
         """
-        qs = self.entries()
-        used = []
+        qs = self.entries().order_by('category', 'id')
         categories = []
         for entry in qs:
-            category = entry.category
-            if category not in used:
-                row = {
-                    'category': category,
-                    'entries': self._entries_for_category(category)
-                }
-                categories.append(row)
-                used.append(category)
+            if not categories or categories[-1]['category'] != entry.category:
+                categories.append({'category': entry.category, 'entries': []})
+            if entry.approved:
+                categories[-1]['entries'].append(entry)
         return categories
 
     def sponsors(self):
@@ -197,7 +197,8 @@ class Version(models.Model):
             return None
         sponsors = SponsorshipPeriod.approved_objects.filter(
                 end_date__gte=self.release_date).filter(
-                start_date__lte=self.release_date).order_by(
+                start_date__lte=self.release_date).select_related(
+            'sponsor', 'sponsorship_level').order_by(
             'start_date').order_by(
             '-sponsorship_level__value')
         return sponsors
@@ -0,0 +1,211 @@
+# coding=utf-8
+"""What awaits moderation, for the staff dashboard.
+
+The pending objects of the seven moderated models are counted per project
+with one GROUP BY query per model (the pending entries per version, so the
+dashboard can link to their lists), and the oldest pending objects of each
+model are listed. The models have no creation date, the oldest are those
+with the lowest ids.
+
+The dashboard is cached for a minute under the ``projects`` tag and the
+``project:<id>`` tag of every project, which any change to a project or
+its versions, categories, entries or sponsors invalidates (see
+changes.handlers).
+"""
+import logging
+from django.core.urlresolvers import reverse
+from django.db.models import Count
+from core.cache_tags import get_tagged, set_tagged
+from base.models import Project
+from .models import (
+    Category,
+    Entry,
+    Sponsor,
+    SponsorshipLevel,
+    SponsorshipPeriod,
+    Version)
+
+logger = logging.getLogger(__name__)
+
+# URL name of each moderated model -> (model, lookup of its Project).
+MODERATED_MODELS = {
+    'entry': (Entry, 'version__project'),
+    'version': (Version, 'project'),
+    'category': (Category, 'project'),
+    'sponsor': (Sponsor, 'project'),
+    'sponsorshiplevel': (SponsorshipLevel, 'project'),
+    'sponsorshipperiod': (SponsorshipPeriod, 'project'),
+}
+
+# The kinds on the dashboard, in order, with their title and the lookup of
+# the label of an object.
+DASHBOARD_KINDS = (
+    ('project', 'Projects', 'name'),
+    ('version', 'Versions', 'name'),
+    ('category', 'Categories', 'name'),
+    ('entry', 'Entries', 'title'),
+    ('sponsor', 'Sponsors', 'name'),
+    ('sponsorshiplevel', 'Sponsorship levels', 'name'),
+    ('sponsorshipperiod', 'Sponsorship periods', 'sponsor__name'),
+)
+
+# Seconds the dashboard stays cached when nothing changes.
+MODERATION_DASHBOARD_TIMEOUT = 60
+
+# Number of the oldest pending objects listed per kind.
+OLDEST_PENDING = 10
+
+
+def _model_and_project(kind):
+    """Get the model of a kind and the lookup of its project.
+
+    :param kind: One of the DASHBOARD_KINDS.
+    :type kind: str
+
+    :rtype: tuple
+    """
+    if kind == 'project':
+        return Project, 'id'
+    return MODERATED_MODELS[kind]
+
+
+def pending_url(kind, project_slug, version_slug=None):
+    """Get the url of the pending list of a kind.
+
+    :param kind: One of the DASHBOARD_KINDS.
+    :type kind: str
+
+    :param project_slug: The slug of the project.
+    :type project_slug: str
+
+    :param version_slug: The slug of the version, for entries.
+    :type version_slug: str
+
+    :rtype: str
+    """
+    if kind == 'project':
+        return reverse('pending-project-list')
+    kwargs = {'project_slug': project_slug}
+    if kind == 'entry':
+        kwargs['version_slug'] = version_slug
+    return reverse('pending-%s-list' % kind, kwargs=kwargs)
+
+
+def build_moderation_dashboard():
+    """Count and list the pending objects.
+
+    :returns: A dictionary with the 'projects' which have pending objects,
+        the 'oldest' pending objects, the 'totals' per kind and the 'total'.
+        Each project is a dictionary with its 'id', 'name', 'slug',
+        'approved' flag, the 'counts' per kind, the 'versions' with pending
+        entries ('slug', 'name' and 'count') and its 'total'. Each kind of
+        'oldest' is a dictionary with the 'kind', 'title' and its 'objects',
+        dictionaries with the 'id', 'label', 'project' name, 'project_slug'
+        and 'version_slug' (of entries).
+    :rtype: dict
+    """
+    names = dict(
+        (project_id, (name, slug, approved))
+        for project_id, name, slug, approved in Project.objects.values_list(
+            'id', 'name', 'slug', 'approved'))
+    projects = {}
+    kinds = [kind for kind, _, _ in DASHBOARD_KINDS]
+    totals = dict.fromkeys(kinds, 0)
+
+    def project_row(project_id):
+        if project_id not in projects:
+            name, slug, approved = names[project_id]
+            projects[project_id] = {
+                'id': project_id,
+                'name': name,
+                'slug': slug,
+                'approved': approved,
+                'counts': dict.fromkeys(kinds, 0),
+                'versions': [],
+                'total': 0,
+            }
+        return projects[project_id]
+
+    oldest = []
+    for kind, title, label in DASHBOARD_KINDS:
+        model, project_lookup = _model_and_project(kind)
+        fields = [project_lookup]
+        if kind == 'entry':
+            fields += ['version__slug', 'version__name']
+        for row in model.unapproved_objects.values(*fields).annotate(
+                count=Count('id')).order_by():
+            if row[project_lookup] not in names:
+                continue
+            project = project_row(row[project_lookup])
+            project['counts'][kind] += row['count']
+            project['total'] += row['count']
+            totals[kind] += row['count']
+            if kind == 'entry':
+                project['versions'].append({
+                    'slug': row['version__slug'],
+                    'name': row['version__name'],
+                    'count': row['count'],
+                })
+
+        fields = ['id', label, project_lookup]
+        if kind == 'entry':
+            fields.append('version__slug')
+        objects = []
+        for row in model.unapproved_objects.order_by('id').values(
+                *fields)[:OLDEST_PENDING]:
+            name, slug, _ = names[row[project_lookup]]
+            objects.append({
+                'id': row['id'],
+                'label': row[label],
+                'project': name,
+                'project_slug': slug,
+                'version_slug': row.get('version__slug'),
+            })
+        oldest.append({'kind': kind, 'title': title, 'objects': objects})
+
+    for project in projects.values():
+        project['versions'].sort(key=lambda version: version['name'])
+    return {
+        'projects': sorted(
+            projects.values(), key=lambda project: project['name'].lower()),
+        'oldest': oldest,
+        'totals': totals,
+        'total': sum(totals.values()),
+        'project_ids': sorted(names),
+    }
+
+
+def moderation_dashboard():
+    """Get the moderation dashboard from the cache, or build it.
+
+    The urls of the pending lists are added on every request, they depend
+    on the language of the request.
+
+    :returns: The dashboard, see build_moderation_dashboard. Each project,
+        version and oldest object also has the 'url' of its pending list.
+    :rtype: dict
+    """
+    key = 'changes:moderation-dashboard'
+    dashboard = get_tagged(key)
+    if dashboard is None:
+        dashboard = build_moderation_dashboard()
+        set_tagged(
+            key,
+            dashboard,
+            ['projects'] + [
+                'project:%s' % project_id
+                for project_id in dashboard['project_ids']],
+            MODERATION_DASHBOARD_TIMEOUT)
+    for project in dashboard['projects']:
+        project['urls'] = dict(
+            (kind, pending_url(kind, project['slug']))
+            for kind, _, _ in DASHBOARD_KINDS if kind != 'entry')
+        for version in project['versions']:
+            version['url'] = pending_url(
+                'entry', project['slug'], version['slug'])
+    for kind in dashboard['oldest']:
+        for pending in kind['objects']:
+            pending['url'] = pending_url(
+                kind['kind'], pending['project_slug'],
+                pending['version_slug'])
+    return dashboard
@@ -0,0 +1,18 @@
+# coding=utf-8
+"""Custom signals for the changes app.
+
+Queryset ``update()`` and ``bulk_create()`` do not send ``post_save``, so
+code paths that change many rows at once send one of these signals instead.
+Receivers (e.g. cache invalidation) should connect to them in addition to the
+regular model signals.
+"""
+from django.dispatch import Signal
+
+# Sent once after a bulk approve or reject of pending objects.
+# sender is the model class, project the Project the objects belong to,
+# action is 'approve' or 'reject' and ids the requested primary keys.
+objects_moderated = Signal(providing_args=['project', 'action', 'ids'])
+
+# Sent once after entries were created in bulk by the EntryImporter.
+# sender is Entry, version the Version the entries were imported into.
+entries_imported = Signal(providing_args=['version'])
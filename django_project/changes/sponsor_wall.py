@@ -0,0 +1,126 @@
+# coding=utf-8
+"""The sponsor wall of a project.
+
+The sponsor list shows the current and the past sponsors of a project
+grouped by sponsorship level, each with a thumbnail of its logo. The wall
+is built with one query and the thumbnail urls resolved once, then kept in
+the cache under the ``sponsors:<project id>`` tag. Saving or deleting a
+sponsor, sponsorship period or sponsorship level of the project invalidates
+the tag (see changes.handlers), so only the wall of that project is built
+again.
+
+Periods ending today are current, so the wall of each day is cached
+separately.
+"""
+import datetime
+import logging
+from itertools import groupby
+from easy_thumbnails.files import get_thumbnailer
+from core.cache_tags import get_tagged, set_tagged
+from .caching import SPONSORS_TAG
+from .models import SponsorshipPeriod
+
+logger = logging.getLogger(__name__)
+
+# Seconds a wall stays cached when nothing changes.
+SPONSOR_WALL_TIMEOUT = 24 * 60 * 60
+
+# Size of the logo thumbnails on the wall.
+THUMBNAIL_OPTIONS = {'size': (50, 50), 'crop': True}
+
+
+def thumbnail_url(image):
+    """Get the url of the wall thumbnail of an image.
+
+    :param image: The image.
+    :type image: ImageFieldFile
+
+    :returns: The url, empty if there is no image or it can not be read.
+    :rtype: str
+    """
+    if not image:
+        return ''
+    try:
+        return get_thumbnailer(image).get_thumbnail(THUMBNAIL_OPTIONS).url
+    except Exception:  # pylint: disable=broad-except
+        # Like the thumbnail template tag, show no logo rather than fail.
+        logger.exception('Could not make a thumbnail of %s', image.name)
+        return ''
+
+
+def build_sponsor_wall(project, today=None):
+    """Build the sponsor wall of a project.
+
+    :param project: The project.
+    :type project: Project
+
+    :param today: Periods ending before this date are past, defaults to
+        today.
+    :type today: date
+
+    :returns: A dictionary with the 'current' and 'past' sponsor groups and
+        the 'count' of sponsorship periods. Each group is a dictionary with
+        the 'name' and 'logo' url of a level and its 'sponsors', highest
+        level first. Each sponsor is a dictionary with the 'slug' of the
+        period, the 'name', 'logo' and 'thumbnail' urls of the sponsor, the
+        'level' name and the 'start_date' and 'end_date'.
+    :rtype: dict
+    """
+    today = today or datetime.date.today()
+    periods = SponsorshipPeriod.objects.filter(
+        project=project).select_related(
+        'sponsor', 'sponsorship_level').only(
+        'slug', 'start_date', 'end_date',
+        'sponsor__name', 'sponsor__logo',
+        'sponsorship_level__name', 'sponsorship_level__logo').order_by(
+        '-sponsorship_level__value',
+        'sponsorship_level__name',
+        'sponsorship_level',
+        'start_date',
+        'id')
+    wall = {'current': [], 'past': [], 'count': 0}
+    for level, level_periods in groupby(
+            periods, lambda period: period.sponsorship_level):
+        groups = {}
+        for period in level_periods:
+            wall['count'] += 1
+            when = 'current' if period.end_date >= today else 'past'
+            if when not in groups:
+                groups[when] = {
+                    'name': level.name,
+                    'logo': level.logo.url if level.logo else '',
+                    'sponsors': [],
+                }
+                wall[when].append(groups[when])
+            groups[when]['sponsors'].append({
+                'slug': period.slug,
+                'name': period.sponsor.name,
+                'logo': period.sponsor.logo.url if period.sponsor.logo else '',
+                'thumbnail': thumbnail_url(period.sponsor.logo),
+                'level': level.name,
+                'start_date': period.start_date,
+                'end_date': period.end_date,
+            })
+    return wall
+
+
+def sponsor_wall(project):
+    """Get the sponsor wall of a project from the cache, or build it.
+
+    :param project: The project.
+    :type project: Project
+
+    :returns: The wall, see build_sponsor_wall.
+    :rtype: dict
+    """
+    today = datetime.date.today()
+    key = 'changes:sponsor-wall:%s:%s' % (project.id, today.isoformat())
+    wall = get_tagged(key)
+    if wall is None:
+        wall = build_sponsor_wall(project, today)
+        set_tagged(
+            key,
+            wall,
+            [SPONSORS_TAG % project.id, 'project:%s' % project.id],
+            SPONSOR_WALL_TIMEOUT)
+    return wall
@@ -0,0 +1,252 @@
+# coding=utf-8
+"""Sponsorship revenue by year, project, level and sponsor country.
+
+The value of a sponsorship level is what a sponsor pays for one
+sponsorship period. Periods often span the turn of a year, so the value of
+a period is prorated per day over the years it covers: a period from
+2015-07-01 to 2016-06-30 adds half its value to 2015 and half to 2016.
+
+The report is computed by the database in one query: the years between
+the first start and the last end date are generated by a recursive common
+table expression, each period is joined with the years it overlaps and the
+prorated values are summed with GROUP BY. Only PostgreSQL and SQLite have
+the date functions written here, other databases compute the same rows in
+Python.
+
+The rows are cached under the ``sponsorship-report`` tag, which every
+change of a sponsor, sponsorship level or period invalidates (see
+changes.handlers).
+"""
+import datetime
+import logging
+from collections import defaultdict
+from django.db import connections, router
+from django_countries import countries
+from core.cache_tags import get_tagged, set_tagged
+from base.models import Project
+from .caching import SPONSORSHIP_REPORT_TAG
+from .models import Sponsor, SponsorshipLevel, SponsorshipPeriod
+
+logger = logging.getLogger(__name__)
+
+# Seconds the report stays cached when nothing changes.
+SPONSORSHIP_REPORT_TIMEOUT = 60 * 60
+
+# Columns of the report rows, in export order.
+COLUMNS = (
+    'year',
+    'project',
+    'level',
+    'currency',
+    'country',
+    'periods',
+    'days',
+    'revenue',
+)
+
+# Date expressions of the report query per database vendor. ``year`` is the
+# year of a date, ``day`` a day number of a date (or a string formatted as
+# one) such that the difference of two is the number of days between them.
+DIALECTS = {
+    'postgresql': {
+        'year': 'CAST(EXTRACT(YEAR FROM {0}) AS integer)',
+        'date': "CAST(CAST({0} AS text) || '{1}' AS date)",
+        'day': '{0}',
+        'least': 'LEAST({0}, {1})',
+        'greatest': 'GREATEST({0}, {1})',
+    },
+    'sqlite': {
+        'year': "CAST(strftime('%%Y', {0}) AS integer)",
+        'date': "({0} || '{1}')",
+        'day': 'julianday({0})',
+        'least': 'MIN({0}, {1})',
+        'greatest': 'MAX({0}, {1})',
+    },
+}
+
+
+def _report_sql(connection, dialect, project_filter):
+    """The report query.
+
+    :param connection: The database connection.
+    :type connection: BaseDatabaseWrapper
+
+    :param dialect: The date expressions, one of DIALECTS.
+    :type dialect: dict
+
+    :param project_filter: Whether the query takes a project id parameter
+        (three times: the first year, the last year and the rows).
+    :type project_filter: bool
+
+    :rtype: str
+    """
+    qn = connection.ops.quote_name
+
+    def column(model, name):
+        return qn(model._meta.get_field(name).column)
+
+    start = 'p.%s' % column(SponsorshipPeriod, 'start_date')
+    end = 'p.%s' % column(SponsorshipPeriod, 'end_date')
+    year = dialect['year'].format
+    day = dialect['day'].format
+    first_day = dialect['date'].format('y.year', '-01-01')
+    last_day = dialect['date'].format('y.year', '-12-31')
+    overlap = '({0} - {1} + 1)'.format(
+        day(dialect['least'].format(end, last_day)),
+        day(dialect['greatest'].format(start, first_day)))
+    length = '({0} - {1} + 1)'.format(day(end), day(start))
+    where = (
+        'WHERE p.%s = %%s' % column(SponsorshipPeriod, 'project')
+        if project_filter else '')
+    return '''
+        WITH RECURSIVE years (year) AS (
+            SELECT MIN({start_year}) FROM {period} p {where}
+            UNION ALL
+            SELECT year + 1 FROM years
+            WHERE year < (SELECT MAX({end_year}) FROM {period} p {where})
+        )
+        SELECT y.year, pr.{project_name}, l.{level_name}, l.{currency},
+            s.{country}, COUNT(*), SUM({overlap}),
+            SUM(l.{value} * 1.0 * {overlap} / {length})
+        FROM {period} p
+        INNER JOIN years y ON y.year BETWEEN {start_year} AND {end_year}
+        INNER JOIN {level} l ON l.{level_id} = p.{period_level}
+        INNER JOIN {sponsor} s ON s.{sponsor_id} = p.{period_sponsor}
+        INNER JOIN {project} pr ON pr.{project_id} = p.{period_project}
+        {where}
+        GROUP BY y.year, pr.{project_id}, pr.{project_name}, l.{level_id},
+            l.{level_name}, l.{currency}, l.{value}, s.{country}
+        ORDER BY y.year, pr.{project_name}, l.{value} DESC, l.{level_name},
+            s.{country}
+        '''.format(
+        start_year=year(start),
+        end_year=year(end),
+        overlap=overlap,
+        length=length,
+        where=where,
+        period=qn(SponsorshipPeriod._meta.db_table),
+        period_level=column(SponsorshipPeriod, 'sponsorship_level'),
+        period_sponsor=column(SponsorshipPeriod, 'sponsor'),
+        period_project=column(SponsorshipPeriod, 'project'),
+        level=qn(SponsorshipLevel._meta.db_table),
+        level_id=qn(SponsorshipLevel._meta.pk.column),
+        level_name=column(SponsorshipLevel, 'name'),
+        currency=column(SponsorshipLevel, 'currency'),
+        value=column(SponsorshipLevel, 'value'),
+        sponsor=qn(Sponsor._meta.db_table),
+        sponsor_id=qn(Sponsor._meta.pk.column),
+        country=column(Sponsor, 'country'),
+        project=qn(Project._meta.db_table),
+        project_id=qn(Project._meta.pk.column),
+        project_name=column(Project, 'name'))
+
+
+def _python_rows(project=None):
+    """Compute the report rows in Python, for databases without a dialect.
+
+    :param project: Only report this project if given.
+    :type project: Project
+
+    :returns: Rows like those of the report query.
+    :rtype: list
+    """
+    periods = SponsorshipPeriod.objects.all()
+    if project is not None:
+        periods = periods.filter(project=project)
+    groups = defaultdict(lambda: [0, 0, 0.0])
+    order = {}
+    for start, end, project_name, level_id, level_name, currency, value, \
+            country in periods.values_list(
+                'start_date', 'end_date', 'project__name',
+                'sponsorship_level', 'sponsorship_level__name',
+                'sponsorship_level__currency', 'sponsorship_level__value',
+                'sponsor__country'):
+        length = (end - start).days + 1
+        for year in range(start.year, end.year + 1):
+            overlap = (
+                min(end, datetime.date(year, 12, 31)) -
+                max(start, datetime.date(year, 1, 1))).days + 1
+            key = (year, project_name, level_id, level_name, currency,
+                   country)
+            order[key] = (year, project_name, -value, level_name, country)
+            group = groups[key]
+            group[0] += 1
+            group[1] += overlap
+            group[2] += value * float(overlap) / length
+    return [
+        (row[0], row[1], row[3], row[4], row[5]) +
+        tuple(groups[row])
+        for row in sorted(groups, key=order.get)]
+
+
+def _query_rows(project=None):
+    """Get the rows of the report from the database.
+
+    :param project: Only report this project if given.
+    :type project: Project
+
+    :returns: Tuples of the year, project name, level name, currency,
+        country code, number of periods, sponsored days and revenue.
+    :rtype: list
+    """
+    connection = connections[router.db_for_read(SponsorshipPeriod)]
+    dialect = DIALECTS.get(connection.vendor)
+    if dialect is None:
+        return _python_rows(project)
+    params = [project.id] * 3 if project is not None else []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            _report_sql(connection, dialect, project is not None), params)
+        return cursor.fetchall()
+
+
+def sponsorship_report(project=None):
+    """Get the sponsorship revenue report, cached.
+
+    :param project: Only report this project if given.
+    :type project: Project
+
+    :returns: A list of dictionaries with the COLUMNS, by year, project,
+        level and country. The country is its name, the revenue is rounded
+        to cents.
+    :rtype: list
+    """
+    key = 'changes:sponsorship-report:%s' % (
+        project.id if project is not None else 'all')
+    rows = get_tagged(key)
+    if rows is None:
+        rows = [
+            {
+                'year': int(year),
+                'project': project_name,
+                'level': level,
+                'currency': currency,
+                'country': countries.name(country) or country,
+                'periods': periods,
+                'days': int(days),
+                'revenue': round(float(revenue), 2),
+            }
+            for year, project_name, level, currency, country, periods, days,
+            revenue in _query_rows(project)]
+        set_tagged(
+            key, rows, [SPONSORSHIP_REPORT_TAG, 'projects'],
+            SPONSORSHIP_REPORT_TIMEOUT)
+    return rows
+
+
+def yearly_totals(rows):
+    """Sum the revenue of report rows per year and currency.
+
+    :param rows: Rows of sponsorship_report.
+    :type rows: list
+
+    :returns: A list of dictionaries with the 'year', 'currency' and
+        'revenue', by year and currency.
+    :rtype: list
+    """
+    totals = defaultdict(float)
+    for row in rows:
+        totals[(row['year'], row['currency'])] += row['revenue']
+    return [
+        {'year': year, 'currency': currency, 'revenue': round(revenue, 2)}
+        for (year, currency), revenue in sorted(totals.items())]
@@ -0,0 +1,478 @@
+# coding=utf-8
+"""Keep the project and version statistics up to date.
+
+The project and version pages show how many entries, categories,
+contributors and pending objects there are. Rather than counting them on
+every request, the counters are stored in ProjectStatistics and
+VersionStatistics rows and changed as entries, versions and categories are
+saved or deleted:
+
+* the project counters are incremented and decremented with ``F()``
+  updates,
+* the counters of a version, and the number of contributors of a project
+  (a distinct count, which can not be kept by increments), are counted again
+  with one query on the indexed foreign keys of the changed rows only. The
+  contributors are only counted when an approved author changes, and once
+  for a deleted version rather than for each of its entries.
+
+The rows are inserted with their project or version, other receivers only
+update existing rows. Reading the statistics of a project or version
+without a row (e.g. created with bulk_create) counts everything once and
+stores the row, tolerating concurrent requests doing the same. Migration
+0009 fills the rows of the existing projects and versions, and the
+``rebuild_statistics`` command recounts all projects.
+
+Queryset ``update()`` and ``bulk_create()`` send no signals, so the bulk
+import and bulk moderation signals count their project and versions again.
+"""
+import logging
+import threading
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, IntegerField, Sum, When
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save)
+from django.dispatch import receiver
+from base.models import Project
+from .models import (
+    Category,
+    Entry,
+    ProjectStatistics,
+    Version,
+    VersionStatistics)
+from .signals import entries_imported, objects_moderated
+
+logger = logging.getLogger(__name__)
+
+PROJECT_STATISTICS_FIELDS = (
+    'versions', 'categories', 'entries', 'contributors', 'pending')
+
+VERSION_STATISTICS_FIELDS = (
+    'categories', 'entries', 'contributors', 'pending')
+
+# The ids of the versions being deleted by this thread, see version_deleting.
+_deleting = threading.local()
+
+
+def _count(approved):
+    """Aggregate counting the approved or the pending rows."""
+    return Sum(Case(
+        When(approved=approved, then=1),
+        default=0,
+        output_field=IntegerField()))
+
+
+def _count_approved(field):
+    """Aggregate counting the distinct values of a field of approved rows."""
+    return Count(Case(When(approved=True, then=field)), distinct=True)
+
+
+def _version_counts(**lookups):
+    """Count the entries of versions.
+
+    :param lookups: Filters of the entries, e.g. version=1.
+
+    :returns: A dictionary of version id -> dictionary of counters.
+    :rtype: dict
+    """
+    rows = Entry.objects.filter(**lookups).values('version').annotate(
+        categories=_count_approved('category'),
+        entries=_count(True),
+        contributors=_count_approved('author'),
+        pending=_count(False)).order_by()
+    return dict(
+        (row.pop('version'), row) for row in rows)
+
+
+def _contributors(project_id):
+    """Count the authors of the approved entries of a project."""
+    return Entry.approved_objects.filter(
+        version__project=project_id).aggregate(
+        contributors=Count('author', distinct=True))['contributors']
+
+
+def _save_counters(model, pk_name, pk, counters, create):
+    """Store the counters of a statistics row.
+
+    :param create: Whether to insert the row if there is none.
+    :type create: bool
+    """
+    if model.objects.filter(**{pk_name: pk}).update(**counters) or \
+            not create:
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**dict(counters, **{pk_name: pk}))
+    except IntegrityError:
+        # Created concurrently, or the parent is gone.
+        model.objects.filter(**{pk_name: pk}).update(**counters)
+
+
+def recount_version_statistics(version_ids, create=False):
+    """Count the entries of versions again.
+
+    :param version_ids: The version ids.
+    :type version_ids: list
+
+    :param create: Whether to insert the rows missing. Receivers of deletes
+        must not, the version may be deleted too.
+    :type create: bool
+
+    :returns: A dictionary of version id -> dictionary of counters.
+    :rtype: dict
+    """
+    counts = _version_counts(version__in=version_ids)
+    for version_id in version_ids:
+        counts.setdefault(
+            version_id, dict.fromkeys(VERSION_STATISTICS_FIELDS, 0))
+        _save_counters(
+            VersionStatistics, 'version_id', version_id, counts[version_id],
+            create)
+    return counts
+
+
+def _project_counters(project_id):
+    """Count the versions, categories and entries of a project.
+
+    :returns: A dictionary of counters.
+    :rtype: dict
+    """
+    versions = Version.objects.filter(project=project_id).aggregate(
+        versions=_count(True), pending=_count(False))
+    categories = Category.objects.filter(project=project_id).aggregate(
+        categories=_count(True), pending=_count(False))
+    entries = Entry.objects.filter(version__project=project_id).aggregate(
+        entries=_count(True),
+        contributors=_count_approved('author'),
+        pending=_count(False))
+    return {
+        'versions': versions['versions'] or 0,
+        'categories': categories['categories'] or 0,
+        'entries': entries['entries'] or 0,
+        'contributors': entries['contributors'],
+        'pending': (
+            (versions['pending'] or 0) + (categories['pending'] or 0) +
+            (entries['pending'] or 0)),
+    }
+
+
+def recount_project_statistics(project_id):
+    """Count the versions, categories and entries of a project again.
+
+    :param project_id: The project id.
+    :type project_id: int
+    """
+    _save_counters(
+        ProjectStatistics, 'project_id', project_id,
+        _project_counters(project_id), False)
+
+
+def rebuild_project_statistics(project_id):
+    """Count the statistics of a project and all its versions again.
+
+    :param project_id: The project id.
+    :type project_id: int
+
+    :returns: The statistics of the project.
+    :rtype: ProjectStatistics
+    """
+    counters = _project_counters(project_id)
+    by_version = _version_counts(version__project=project_id)
+    empty = dict.fromkeys(VERSION_STATISTICS_FIELDS, 0)
+    version_ids = list(Version.objects.filter(
+        project=project_id).values_list('id', flat=True))
+    with transaction.atomic():
+        _save_counters(
+            ProjectStatistics, 'project_id', project_id, counters, True)
+        VersionStatistics.objects.filter(
+            version__project=project_id).delete()
+        try:
+            with transaction.atomic():
+                VersionStatistics.objects.bulk_create([
+                    VersionStatistics(
+                        version_id=version_id,
+                        **by_version.get(version_id, empty))
+                    for version_id in version_ids])
+        except IntegrityError:
+            # Rows inserted concurrently, e.g. by another request reading
+            # the statistics for the first time.
+            recount_version_statistics(version_ids, True)
+    return ProjectStatistics(project_id=project_id, **counters)
+
+
+def project_statistics(project):
+    """Get the statistics of a project.
+
+    :param project: The project.
+    :type project: Project
+
+    :rtype: ProjectStatistics
+    """
+    try:
+        return ProjectStatistics.objects.get(project=project)
+    except ProjectStatistics.DoesNotExist:
+        return rebuild_project_statistics(project.id)
+
+
+def version_statistics(version):
+    """Get the statistics of a version.
+
+    :param version: The version.
+    :type version: Version
+
+    :rtype: VersionStatistics
+    """
+    try:
+        return VersionStatistics.objects.get(version=version)
+    except VersionStatistics.DoesNotExist:
+        return VersionStatistics(
+            version=version,
+            **recount_version_statistics([version.id], True)[version.id])
+
+
+def statistics_data(project):
+    """Get the statistics of a project and its versions for JSON.
+
+    :param project: The project.
+    :type project: Project
+
+    :returns: A dictionary with the counters of the project and its
+        'versions', a list of dictionaries with the 'name' and 'slug' and
+        the counters of each version, latest first.
+    :rtype: dict
+    """
+    statistics = project_statistics(project)
+    data = dict(
+        (field, getattr(statistics, field))
+        for field in PROJECT_STATISTICS_FIELDS)
+    versions = VersionStatistics.objects.filter(
+        version__project=project).select_related('version').only(
+        'version__name', 'version__slug',
+        *VERSION_STATISTICS_FIELDS).order_by('-version__padded_version')
+    data['versions'] = [
+        dict(
+            [('name', row.version.name), ('slug', row.version.slug)] +
+            [(field, getattr(row, field))
+             for field in VERSION_STATISTICS_FIELDS])
+        for row in versions]
+    return data
+
+
+def _add(model, lookups, **deltas):
+    """Add to the counters of the statistics rows matching lookups."""
+    deltas = dict(
+        (field, F(field) + delta) for field, delta in deltas.items() if delta)
+    if deltas:
+        model.objects.filter(**lookups).update(**deltas)
+
+
+def _deleting_versions():
+    """Get the ids of the versions being deleted by this thread.
+
+    :rtype: set
+    """
+    if not hasattr(_deleting, 'versions'):
+        _deleting.versions = set()
+    return _deleting.versions
+
+
+def _contributor(state):
+    """The version and author id of an approved entry, None if pending."""
+    if state is not None and state[1]:
+        return state[0], state[2]
+    return None
+
+
+def _entry_changed(before, after, recount=True):
+    """Update the statistics when an entry is saved or deleted.
+
+    :param before: The version id, approved flag, author id and category
+        id of the entry before, None for a new entry.
+    :type before: tuple
+
+    :param after: The same after, None for a deleted entry.
+    :type after: tuple
+
+    :param recount: Whether to count the version and the contributors
+        again, not when the version is deleted with the entry.
+    :type recount: bool
+    """
+    states = [state for state in (before, after) if state is not None]
+    for state, sign in ((before, -1), (after, 1)):
+        if state is not None:
+            version_id, approved = state[:2]
+            _add(ProjectStatistics, {'project__version': version_id},
+                 entries=sign if approved else 0,
+                 pending=0 if approved else sign)
+    if not recount:
+        return
+    recount_version_statistics(list(set(state[0] for state in states)))
+    if _contributor(before) != _contributor(after):
+        # An author of the approved entries was added, removed or moved.
+        project_ids = set(Version.objects.filter(
+            id__in=set(state[0] for state in states)).values_list(
+            'project', flat=True))
+        for project_id in project_ids:
+            ProjectStatistics.objects.filter(project=project_id).update(
+                contributors=_contributors(project_id))
+
+
+def _entry_state(entry):
+    """The fields of an entry the statistics depend on."""
+    return entry.version_id, entry.approved, entry.author_id, \
+        entry.category_id
+
+
+@receiver(pre_save, sender=Entry)
+def entry_saving(sender, instance, raw=False, **kwargs):
+    """Remember the counted fields of an entry before it changes."""
+    if raw or instance.pk is None:
+        instance._statistics_before = None
+        return
+    instance._statistics_before = Entry.objects.filter(
+        pk=instance.pk).values_list(
+        'version', 'approved', 'author', 'category').first()
+
+
+@receiver(post_save, sender=Entry)
+def entry_saved(sender, instance, raw=False, **kwargs):
+    """Count a new or changed entry."""
+    if raw:
+        return
+    before = getattr(instance, '_statistics_before', None)
+    after = _entry_state(instance)
+    if before != after:
+        _entry_changed(before, after)
+
+
+@receiver(post_delete, sender=Entry)
+def entry_deleted(sender, instance, **kwargs):
+    """Stop counting a deleted entry."""
+    _entry_changed(
+        _entry_state(instance), None,
+        recount=instance.version_id not in _deleting_versions())
+
+
+def _project_object_changed(before, after, counter):
+    """Update the project counters when a version or category changes.
+
+    :param before: The project id and approved flag before, None for a new
+        object.
+    :type before: tuple
+
+    :param after: The same after, None for a deleted object.
+    :type after: tuple
+
+    :param counter: The counter of approved objects of the project.
+    :type counter: str
+    """
+    for state, sign in ((before, -1), (after, 1)):
+        if state is not None:
+            project_id, approved = state
+            _add(ProjectStatistics, {'project': project_id},
+                 pending=0 if approved else sign,
+                 **{counter: sign if approved else 0})
+
+
+def _remember_project_state(sender, instance, raw=False, **kwargs):
+    """Remember the project and approval of a version or category."""
+    if raw or instance.pk is None:
+        instance._statistics_before = None
+        return
+    instance._statistics_before = sender.objects.filter(
+        pk=instance.pk).values_list('project', 'approved').first()
+
+
+pre_save.connect(_remember_project_state, sender=Version)
+pre_save.connect(_remember_project_state, sender=Category)
+
+
+@receiver(post_save, sender=Version)
+def version_saved(sender, instance, created, raw=False, **kwargs):
+    """Count a new or changed version."""
+    if raw:
+        return
+    before = getattr(instance, '_statistics_before', None)
+    after = (instance.project_id, instance.approved)
+    if before is not None and before[0] != after[0]:
+        # The entries moved to another project with the version.
+        rebuild_project_statistics(before[0])
+        rebuild_project_statistics(after[0])
+        return
+    if created:
+        recount_version_statistics([instance.id], True)
+    if before != after:
+        _project_object_changed(before, after, 'versions')
+
+
+@receiver(pre_delete, sender=Version)
+def version_deleting(sender, instance, **kwargs):
+    """Remember a version is deleted before its entries are.
+
+    The entries are then only uncounted from the project counters, without
+    counting the contributors of the project again for each of them.
+    """
+    _deleting_versions().add(instance.id)
+
+
+@receiver(post_delete, sender=Version)
+def version_deleted(sender, instance, **kwargs):
+    """Stop counting a deleted version.
+
+    Its entries are deleted (and uncounted) before it, the contributors of
+    the project are counted once here.
+    """
+    _deleting_versions().discard(instance.id)
+    _project_object_changed(
+        (instance.project_id, instance.approved), None, 'versions')
+    ProjectStatistics.objects.filter(project=instance.project_id).update(
+        contributors=_contributors(instance.project_id))
+
+
+@receiver(post_save, sender=Category)
+def category_saved(sender, instance, raw=False, **kwargs):
+    """Count a new or changed category."""
+    if raw:
+        return
+    before = getattr(instance, '_statistics_before', None)
+    after = (instance.project_id, instance.approved)
+    if before != after:
+        _project_object_changed(before, after, 'categories')
+
+
+@receiver(post_delete, sender=Category)
+def category_deleted(sender, instance, **kwargs):
+    """Stop counting a deleted category."""
+    _project_object_changed(
+        (instance.project_id, instance.approved), None, 'categories')
+
+
+@receiver(post_save, sender=Project)
+def project_saved(sender, instance, created, raw=False, **kwargs):
+    """Start counting for a new project."""
+    if created and not raw:
+        _save_counters(
+            ProjectStatistics, 'project_id', instance.id,
+            dict.fromkeys(PROJECT_STATISTICS_FIELDS, 0), True)
+
+
+@receiver(entries_imported)
+def entries_imported_counted(sender, version, **kwargs):
+    """Count the entries of a bulk import."""
+    recount_version_statistics([version.id])
+    recount_project_statistics(version.project_id)
+
+
+@receiver(objects_moderated)
+def objects_moderated_counted(sender, project, action, ids, **kwargs):
+    """Count the objects of a bulk approve or reject.
+
+    Rejected objects were deleted one by one, so their receivers counted
+    them already.
+    """
+    if action != 'approve' or sender not in (Entry, Version, Category):
+        return
+    if sender is Entry:
+        recount_version_statistics(list(Entry.objects.filter(
+            id__in=ids, version__project=project).values_list(
+            'version', flat=True).distinct()))
+    recount_project_statistics(project.id)
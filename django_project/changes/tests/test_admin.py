@@ -0,0 +1,66 @@
+# coding=utf-8
+"""Tests for the admin changelists."""
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test import TestCase
+from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
+from base.tests.model_factories import ProjectF, UserF
+from changes.models import Entry
+from changes.tests.model_factories import CategoryF, EntryF, VersionF
+from common.pagination import is_unfiltered
+
+
+class TestEntryAdmin(TestCase):
+    """Tests the entry changelist of the admin."""
+
+    def setUp(self):
+        """
+        Setup before each test
+        """
+        self.client = Client()
+        self.client.post('/set_language/', data={'language': 'en'})
+        UserF.create(
+            username='timlinux', password='password', is_staff=True,
+            is_superuser=True)
+        self.client.login(username='timlinux', password='password')
+        self.project = ProjectF.create()
+        self.version = VersionF.create(project=self.project, name='1.0.0')
+        self.category = CategoryF.create(project=self.project)
+        self.url = reverse('admin:changes_entry_changelist')
+
+    def _changelist_queries(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_queries_do_not_grow_with_rows(self):
+        EntryF.create(version=self.version, category=self.category)
+        _, few = self._changelist_queries()
+        for number in range(5):
+            EntryF.create(
+                version=VersionF.create(
+                    project=self.project, name='2.%s.0' % number),
+                category=CategoryF.create(project=self.project))
+        response, many = self._changelist_queries()
+        self.assertEqual(few, many)
+        self.assertEqual(response.context['cl'].result_count, 6)
+        self.assertIsNone(response.context['cl'].full_result_count)
+
+    def test_prefix_search(self):
+        EntryF.create(
+            version=self.version, category=self.category, title='Labels')
+        EntryF.create(
+            version=self.version, category=self.category, title='New labels')
+        response, _ = self._changelist_queries(q='label')
+        self.assertEqual(
+            [entry.title for entry in response.context['cl'].result_list],
+            ['Labels'])
+
+    def test_only_unfiltered_lists_are_estimated(self):
+        self.assertTrue(is_unfiltered(Entry.objects.order_by('-id')))
+        self.assertFalse(is_unfiltered(Entry.objects.filter(approved=True)))
+        self.assertFalse(is_unfiltered(
+            Entry.objects.filter(title__istartswith='label')))
+        self.assertFalse(is_unfiltered(Entry.objects.all()[5:]))
@@ -0,0 +1,111 @@
+# coding=utf-8
+"""Tests for the bulk entry importer."""
+import json
+import tempfile
+from StringIO import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from changes.importers import (
+    EntryImporter,
+    guess_import_format,
+    parse_entry_rows)
+from changes.models import Entry
+from changes.tests.model_factories import CategoryF, EntryF, VersionF
+from core.model_factories import UserF
+
+
+class TestEntryImporter(TestCase):
+    """Tests that entries are validated and created in bulk."""
+
+    def setUp(self):
+        """
+        Setup before each test
+        """
+        self.version = VersionF.create(name='2.14.0')
+        self.category = CategoryF.create(
+            project=self.version.project,
+            name='Symbology')
+        self.user = UserF.create()
+
+    def test_guess_import_format(self):
+        self.assertEqual(guess_import_format('entries.CSV'), 'csv')
+        self.assertEqual(guess_import_format('entries.json'), 'json')
+        self.assertIsNone(guess_import_format('entries.txt'))
+
+    def test_parse_entry_rows(self):
+        csv_rows = parse_entry_rows(
+            b'Category,Title\nSymbology,New renderer\n', 'csv')
+        json_rows = parse_entry_rows(json.dumps(
+            {'entries': [{'Category': 'Symbology',
+                          'Title': 'New renderer'}]}), 'json')
+        self.assertEqual(csv_rows, json_rows)
+        self.assertEqual(csv_rows[0]['title'], u'New renderer')
+        self.assertRaises(ValueError, parse_entry_rows, b'{}', 'json')
+
+    def test_parse_json_values_which_are_not_text(self):
+        rows = parse_entry_rows(json.dumps(
+            [{'category': 'Symbology', 'title': 5, 'video': None}]), 'json')
+        self.assertEqual(rows[0]['title'], u'5')
+        self.assertEqual(rows[0]['video'], u'')
+        self.assertRaises(
+            ValueError, parse_entry_rows,
+            json.dumps([{'category': 'Symbology', 'title': ['a']}]), 'json')
+
+    def test_run_creates_entries_with_unique_slugs(self):
+        EntryF.create(
+            version=self.version,
+            category=self.category,
+            title='Heatmap renderer')
+        rows = [
+            {'category': 'symbology', 'title': 'The heatmap renderer'},
+            {'category': self.category.slug, 'title': 'Heatmap renderer!'},
+        ]
+        with self.assertNumQueries(20):
+            # categories, existing entries and the insert wrapped in a
+            # savepoint (the test itself runs inside a transaction), then
+            # 6 queries counting the statistics of the version and project
+            # and 9 queries re-indexing the version for search
+            report = EntryImporter(self.version, self.user).run(rows)
+        self.assertEqual(report['created'], 2)
+        self.assertEqual(report['errors'], [])
+        slugs = set(Entry.objects.filter(
+            version=self.version).values_list('slug', flat=True))
+        self.assertEqual(
+            slugs,
+            set(['heatmap-renderer', 'heatmap-renderer-2',
+                 'heatmap-renderer-3']))
+
+    def test_run_reports_errors_per_row(self):
+        rows = [
+            {'category': 'Symbology', 'title': 'Valid entry'},
+            {'category': 'Unknown', 'title': 'Bad category'},
+            {'category': 'Symbology', 'title': 'Valid entry'},
+            {'category': 'Symbology', 'title': 'Bad url',
+             'funder_url': 'x' * 300},
+        ]
+        report = EntryImporter(self.version, self.user).run(rows)
+        self.assertEqual(report['created'], 0)
+        self.assertEqual(
+            [error['row'] for error in report['errors']], [2, 3, 4])
+        self.assertFalse(Entry.objects.filter(version=self.version).exists())
+
+        report = EntryImporter(
+            self.version, self.user, skip_invalid=True).run(rows)
+        self.assertEqual(report['created'], 1)
+
+    def test_import_entries_command(self):
+        import_file = tempfile.NamedTemporaryFile(suffix='.json')
+        import_file.write(json.dumps([
+            {'category': 'Symbology', 'title': 'Command entry'}]))
+        import_file.flush()
+        call_command(
+            'import_entries',
+            self.version.project.slug,
+            self.version.slug,
+            import_file.name,
+            author=self.user.username,
+            approve=True,
+            stdout=StringIO())
+        import_file.close()
+        self.assertTrue(Entry.approved_objects.filter(
+            version=self.version, title='Command entry').exists())
@@ -1,6 +1,8 @@
 # coding=utf-8
 """Tests for models."""
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from changes.tests.model_factories import (
     CategoryF,
     EntryF,
@@ -9,6 +11,7 @@ from changes.tests.model_factories import (
     SponsorF,
     SponsorshipPeriodF)
 from base.tests.model_factories import ProjectF
+from changes.models import Entry, Organisation
 
 
 class TestCategoryCRUD(TestCase):
@@ -139,6 +142,94 @@ class TestEntryCRUD(TestCase):
         self.assertTrue(model.pk is None)
 
 
+class TestEntryCredits(TestCase):
+    """
+    Tests the funder and developer organisations of entries.
+    """
+
+    def test_save_links_organisations(self):
+        """
+        Tests spellings of a name are linked to one organisation
+        """
+        entry = EntryF.create(
+            funded_by=u'Kartoza', funder_url=u'http://kartoza.com',
+            developed_by=u'Lutra Consulting', developer_url=u'')
+        other = EntryF.create(funded_by=u' kartoza ', developed_by=u'')
+
+        self.assertEqual(entry.funder, other.funder)
+        self.assertEqual(entry.funder.name, u'Kartoza')
+        self.assertEqual(entry.funder.url, u'http://kartoza.com')
+        self.assertEqual(entry.developer.name, u'Lutra Consulting')
+        self.assertIsNone(other.developer)
+        self.assertEqual(Organisation.objects.count(), 2)
+        self.assertEqual(
+            list(entry.funder.funded_entries.order_by('id')),
+            [entry, other])
+
+    def test_credits_html(self):
+        """
+        Tests the credits are rendered when the entry is saved
+        """
+        entry = EntryF.create(
+            funded_by=u'Kartoza', funder_url=u'http://kartoza.com',
+            developed_by=u'Tim', developer_url=u'')
+        self.assertIn(
+            u'This feature was funded by '
+            u'<a href="http://kartoza.com">Kartoza</a>',
+            entry.credits_html)
+        self.assertIn(u'This feature was developed by Tim', entry.credits_html)
+
+        entry.funded_by = u''
+        entry.funder_url = u''
+        entry.save()
+        self.assertNotIn(u'funded', entry.credits_html)
+        self.assertIsNone(entry.funder)
+        self.assertEqual(EntryF.create().credits_html, u'')
+
+    def test_save_relinks_changed_credits_only(self):
+        """
+        Tests saving an entry with unchanged credits does not relink them
+        """
+        entry = EntryF.create(
+            funded_by=u'Kartoza', funder_url=u'', developed_by=u'')
+        entry.title = u'Renamed'
+        with CaptureQueriesContext(connection) as queries:
+            entry.save()
+        self.assertFalse([
+            query for query in queries.captured_queries
+            if 'changes_organisation' in query['sql']])
+
+        entry.funded_by = u'Lutra Consulting'
+        entry.save()
+        self.assertEqual(entry.funder.name, u'Lutra Consulting')
+        self.assertIn(u'Lutra Consulting', entry.credits_html)
+
+    def test_link_credits_for_bulk_create(self):
+        """
+        Tests the organisations of many entries are created at once
+        """
+        Organisation.objects.create(key=u'kartoza', name=u'Kartoza')
+        version = VersionF.create()
+        category = CategoryF.create(project=version.project)
+        entries = [
+            Entry(title=u'Entry %s' % number, slug=u'entry-%s' % number,
+                  funded_by=u'Kartoza', funder_url=u'',
+                  developed_by=u'Developer %s' % number, developer_url=u'',
+                  author=version.author, version=version, category=category)
+            for number in range(5)]
+        with self.assertNumQueries(5):
+            # the existing organisations, the insert of the missing ones in
+            # a savepoint (the test runs inside a transaction) and reading
+            # their ids
+            Entry.link_credits(entries)
+        Entry.objects.bulk_create(entries)
+
+        self.assertEqual(Organisation.objects.count(), 6)
+        self.assertEqual(
+            Entry.objects.filter(funder__key=u'kartoza').count(), 5)
+        self.assertTrue(all(entry.credits_html for entry in entries))
+
+
 class TestVersionCRUD(TestCase):
     """
     Tests search models.
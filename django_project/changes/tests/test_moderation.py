@@ -0,0 +1,106 @@
+# coding=utf-8
+"""Tests for the moderation dashboard."""
+from django.core.urlresolvers import reverse
+from django.test import TestCase
+from django.test.client import Client
+from base.tests.model_factories import ProjectF, UserF
+from changes.moderation import (
+    build_moderation_dashboard,
+    moderation_dashboard)
+from changes.tests.model_factories import (
+    CategoryF,
+    EntryF,
+    SponsorF,
+    SponsorshipLevelF,
+    SponsorshipPeriodF,
+    VersionF)
+from core.cache_tags import tag_cache
+
+
+class TestModerationDashboard(TestCase):
+    """Tests for changes.moderation and its view."""
+
+    def setUp(self):
+        """
+        Setup before each test
+        """
+        tag_cache().clear()
+        self.project = ProjectF.create(name='QGIS', approved=True)
+        self.version = VersionF.create(project=self.project, name='1.0.0')
+        self.category = CategoryF.create(project=self.project)
+        self.client = Client()
+        self.client.post('/set_language/', data={'language': 'en'})
+        self.staff = UserF.create(
+            username='timlinux', password='password', is_staff=True)
+
+    def _pending(self):
+        EntryF.create(
+            version=self.version, category=self.category, approved=False,
+            title='Oldest')
+        EntryF.create(
+            version=self.version, category=self.category, approved=False)
+        VersionF.create(project=self.project, name='2.0.0', approved=False)
+        CategoryF.create(project=self.project, approved=False)
+        SponsorF.create(project=self.project, approved=False)
+        SponsorshipLevelF.create(project=self.project, approved=False)
+        SponsorshipPeriodF.create(
+            project=self.project,
+            sponsor=SponsorF.create(project=self.project, name='Kartoza'),
+            sponsorship_level=SponsorshipLevelF.create(project=self.project),
+            approved=False)
+        ProjectF.create(name='InaSAFE', approved=False)
+
+    def test_counts(self):
+        self._pending()
+        with self.assertNumQueries(15):
+            dashboard = build_moderation_dashboard()
+        self.assertEqual(
+            [project['name'] for project in dashboard['projects']],
+            ['InaSAFE', 'QGIS'])
+        qgis = dashboard['projects'][1]
+        self.assertTrue(qgis['approved'])
+        self.assertEqual(qgis['counts'], {
+            'project': 0,
+            'version': 1,
+            'category': 1,
+            'entry': 2,
+            'sponsor': 1,
+            'sponsorshiplevel': 1,
+            'sponsorshipperiod': 1,
+        })
+        self.assertEqual(qgis['total'], 7)
+        self.assertEqual(
+            qgis['versions'],
+            [{'slug': self.version.slug, 'name': '1.0.0', 'count': 2}])
+        self.assertEqual(dashboard['total'], 8)
+        oldest = dict(
+            (kind['kind'], kind['objects']) for kind in dashboard['oldest'])
+        self.assertEqual(oldest['entry'][0]['label'], 'Oldest')
+        self.assertEqual(oldest['entry'][0]['version_slug'], self.version.slug)
+        self.assertEqual(oldest['sponsorshipperiod'][0]['label'], 'Kartoza')
+        self.assertEqual(oldest['project'][0]['label'], 'InaSAFE')
+
+    def test_view_is_cached_until_a_change(self):
+        self._pending()
+        self.client.login(username='timlinux', password='password')
+        url = reverse('moderation-dashboard')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['dashboard']['total'], 8)
+        self.assertContains(response, reverse(
+            'pending-entry-list', kwargs={
+                'project_slug': self.project.slug,
+                'version_slug': self.version.slug}))
+
+        with self.assertNumQueries(0):
+            self.assertEqual(moderation_dashboard()['total'], 8)
+
+        CategoryF.create(project=self.project, approved=False)
+        response = self.client.get(url)
+        self.assertEqual(response.context['dashboard']['total'], 9)
+
+    def test_staff_only(self):
+        UserF.create(username='anita', password='password')
+        self.client.login(username='anita', password='password')
+        response = self.client.get(reverse('moderation-dashboard'))
+        self.assertEqual(response.status_code, 302)
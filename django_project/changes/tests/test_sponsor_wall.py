@@ -0,0 +1,84 @@
+# coding=utf-8
+"""Tests for the sponsor wall."""
+import datetime
+from django.test import TestCase
+from base.tests.model_factories import ProjectF
+from changes.sponsor_wall import build_sponsor_wall, sponsor_wall
+from changes.tests.model_factories import (
+    SponsorF,
+    SponsorshipLevelF,
+    SponsorshipPeriodF)
+from core.cache_tags import tag_cache
+
+
+class TestSponsorWall(TestCase):
+    """Tests for changes.sponsor_wall."""
+
+    def setUp(self):
+        """
+        Setup before each test
+        """
+        tag_cache().clear()
+        self.project = ProjectF.create()
+        self.gold = SponsorshipLevelF.create(
+            project=self.project, name='Gold', value=1000)
+        self.silver = SponsorshipLevelF.create(
+            project=self.project, name='Silver', value=100)
+        today = datetime.date.today()
+        self.current = today + datetime.timedelta(days=30)
+        self.past = today - datetime.timedelta(days=30)
+
+    def _period(self, name, level, end_date):
+        return SponsorshipPeriodF.create(
+            project=self.project,
+            sponsor=SponsorF.create(project=self.project, name=name),
+            sponsorship_level=level,
+            start_date=end_date - datetime.timedelta(days=365),
+            end_date=end_date)
+
+    def test_grouping(self):
+        self._period('Silver Now', self.silver, self.current)
+        self._period('Gold Before', self.gold, self.past)
+        self._period('Gold Now', self.gold, self.current)
+        self._period('Silver Today', self.silver, datetime.date.today())
+        # Other projects are not on the wall.
+        SponsorshipPeriodF.create()
+
+        with self.assertNumQueries(1):
+            wall = build_sponsor_wall(self.project)
+        self.assertEqual(wall['count'], 4)
+        self.assertEqual(
+            [(level['name'],
+              [sponsor['name'] for sponsor in level['sponsors']])
+             for level in wall['current']],
+            [('Gold', ['Gold Now']),
+             ('Silver', ['Silver Today', 'Silver Now'])])
+        self.assertEqual(
+            [level['name'] for level in wall['past']], ['Gold'])
+        sponsor = wall['past'][0]['sponsors'][0]
+        self.assertEqual(sponsor['level'], 'Gold')
+        self.assertTrue(sponsor['thumbnail'].startswith('/media/'))
+        self.assertTrue(sponsor['logo'].startswith('/media/'))
+
+    def test_cached(self):
+        period = self._period('Cached', self.gold, self.current)
+        sponsor_wall(self.project)
+        with self.assertNumQueries(0):
+            wall = sponsor_wall(self.project)
+        self.assertEqual(wall['count'], 1)
+
+        period.sponsor.name = 'Renamed'
+        period.sponsor.save()
+        wall = sponsor_wall(self.project)
+        self.assertEqual(wall['current'][0]['sponsors'][0]['name'], 'Renamed')
+
+        period.end_date = self.past
+        period.save()
+        wall = sponsor_wall(self.project)
+        self.assertEqual(wall['current'], [])
+        self.assertEqual(len(wall['past']), 1)
+
+        self.gold.name = 'Platinum'
+        self.gold.save()
+        self.assertEqual(sponsor_wall(self.project)['past'][0]['name'],
+                         'Platinum')
@@ -0,0 +1,135 @@
+# coding=utf-8
+"""Tests for the sponsorship report."""
+import csv
+import datetime
+import io
+import json
+import logging
+from django.core.urlresolvers import reverse
+from django.test import TestCase
+from django.test.client import Client
+from base.tests.model_factories import ProjectF
+from changes.sponsorship_report import (
+    _python_rows,
+    _query_rows,
+    sponsorship_report,
+    yearly_totals)
+from changes.tests.model_factories import (
+    SponsorF,
+    SponsorshipLevelF,
+    SponsorshipPeriodF)
+from core.cache_tags import tag_cache
+from core.model_factories import UserF
+
+
+class TestSponsorshipReport(TestCase):
+    """Tests for changes.sponsorship_report."""
+
+    def setUp(self):
+        """
+        Setup before each test
+        """
+        logging.disable(logging.CRITICAL)
+        tag_cache().clear()
+        self.project = ProjectF.create(name='Alpha')
+        self.gold = SponsorshipLevelF.create(
+            project=self.project, name='Gold', value=730, currency='EUR')
+        self.silver = SponsorshipLevelF.create(
+            project=self.project, name='Silver', value=100, currency='EUR')
+        self.za = SponsorF.create(project=self.project, country='ZA')
+        self.de = SponsorF.create(project=self.project, country='DE')
+
+    def _period(self, level, sponsor, start, end, project=None):
+        return SponsorshipPeriodF.create(
+            project=project or self.project,
+            sponsorship_level=level,
+            sponsor=sponsor,
+            start_date=start,
+            end_date=end)
+
+    def test_prorated(self):
+        # 730 days over 2015 (184 days) and 2016 (366) and 2017 (180).
+        self._period(self.gold, self.za, datetime.date(2015, 7, 1),
+                     datetime.date(2017, 6, 29))
+        self._period(self.silver, self.de, datetime.date(2016, 1, 1),
+                     datetime.date(2016, 12, 31))
+        self._period(self.silver, self.de, datetime.date(2016, 6, 1),
+                     datetime.date(2016, 6, 30))
+
+        with self.assertNumQueries(1):
+            rows = sponsorship_report(self.project)
+        self.assertEqual(
+            [(row['year'], row['level'], row['country'], row['periods'],
+              row['days'], row['revenue']) for row in rows],
+            [(2015, 'Gold', 'South Africa', 1, 184, 184.0),
+             (2016, 'Gold', 'South Africa', 1, 366, 366.0),
+             (2016, 'Silver', 'Germany', 2, 396, 200.0),
+             (2017, 'Gold', 'South Africa', 1, 180, 180.0)])
+        self.assertEqual(yearly_totals(rows), [
+            {'year': 2015, 'currency': 'EUR', 'revenue': 184.0},
+            {'year': 2016, 'currency': 'EUR', 'revenue': 566.0},
+            {'year': 2017, 'currency': 'EUR', 'revenue': 180.0},
+        ])
+
+    def test_same_as_python(self):
+        other = ProjectF.create(name='Beta')
+        self._period(self.gold, self.za, datetime.date(2014, 3, 5),
+                     datetime.date(2015, 3, 4))
+        self._period(self.silver, self.de, datetime.date(2015, 2, 1),
+                     datetime.date(2016, 11, 30))
+        self._period(self.gold, self.de, datetime.date(2013, 12, 31),
+                     datetime.date(2014, 1, 1), project=other)
+        for project in (None, self.project, other):
+            sql_rows = [
+                row[:6] + (round(row[6]), round(row[7], 6))
+                for row in _query_rows(project)]
+            python_rows = [
+                row[:6] + (round(row[6]), round(row[7], 6))
+                for row in _python_rows(project)]
+            self.assertEqual(sql_rows, python_rows)
+        self.assertEqual(_query_rows(ProjectF.create()), [])
+
+    def test_cached(self):
+        period = self._period(self.gold, self.za, datetime.date(2015, 1, 1),
+                              datetime.date(2015, 12, 31))
+        sponsorship_report()
+        with self.assertNumQueries(0):
+            self.assertEqual(sponsorship_report()[0]['revenue'], 730.0)
+        period.sponsorship_level = self.silver
+        period.save()
+        self.assertEqual(sponsorship_report()[0]['revenue'], 100.0)
+        self.silver.value = 50
+        self.silver.save()
+        self.assertEqual(sponsorship_report()[0]['revenue'], 50.0)
+
+    def test_views(self):
+        self._period(self.gold, self.za, datetime.date(2015, 1, 1),
+                     datetime.date(2015, 12, 31))
+        UserF.create(username='staff', password='password', is_staff=True)
+        UserF.create(username='member', password='password')
+        client = Client()
+        client.post('/set_language/', data={'language': 'en'})
+        url = reverse('sponsorship-report')
+        client.login(username='member', password='password')
+        self.assertEqual(client.get(url).status_code, 302)
+
+        client.login(username='staff', password='password')
+        response = client.get(url)
+        self.assertContains(response, 'South Africa')
+        self.assertContains(response, 'Alpha')
+
+        response = client.get(url, {'format': 'csv'})
+        lines = list(csv.reader(
+            io.BytesIO(''.join(response.streaming_content))))
+        self.assertEqual(lines[0][:3], ['year', 'project', 'level'])
+        self.assertEqual(
+            lines[1],
+            ['2015', 'Alpha', 'Gold', 'EUR', 'South Africa', '1', '365',
+             '730.0'])
+
+        response = client.get(reverse(
+            'project-sponsorship-report',
+            kwargs={'project_slug': ProjectF.create().slug}),
+            {'format': 'json'})
+        self.assertEqual(
+            json.loads(''.join(response.streaming_content)), [])
@@ -0,0 +1,178 @@
+# coding=utf-8
+"""Tests for the project and version statistics."""
+import json
+from StringIO import StringIO
+from django.core.management import call_command
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.db.models.signals import post_delete
+from django.test import TestCase
+from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
+from base.tests.model_factories import ProjectF, UserF
+from changes.models import ProjectStatistics, VersionStatistics
+from changes.statistics import (
+    _project_counters,
+    _version_counts,
+    project_statistics,
+    version_statistics)
+from changes.tests.model_factories import CategoryF, EntryF, VersionF
+
+
+class TestStatistics(TestCase):
+    """Tests the counters follow the changes of the models."""
+
+    def setUp(self):
+        """
+        Setup before each test
+        """
+        self.project = ProjectF.create()
+        self.version = VersionF.create(project=self.project, name='1.0.0')
+        self.category = CategoryF.create(project=self.project)
+        self.tim = UserF.create(username='tim')
+        self.anita = UserF.create(username='anita')
+
+    def assertCounted(self):
+        """Check the stored counters equal counting from scratch."""
+        stored = ProjectStatistics.objects.get(project=self.project)
+        for field, count in _project_counters(self.project.id).items():
+            self.assertEqual(getattr(stored, field), count, field)
+        counts = _version_counts(version__project=self.project)
+        for stored in VersionStatistics.objects.filter(
+                version__project=self.project):
+            for field, count in counts.get(stored.version_id, {}).items():
+                self.assertEqual(getattr(stored, field), count, field)
+
+    def test_counters_follow_changes(self):
+        entry = EntryF.create(
+            version=self.version, category=self.category, author=self.tim)
+        pending = EntryF.create(
+            version=self.version, category=self.category, author=self.anita,
+            approved=False)
+        self.assertCounted()
+        statistics = project_statistics(self.project)
+        self.assertEqual(statistics.versions, 1)
+        self.assertEqual(statistics.categories, 1)
+        self.assertEqual(statistics.entries, 1)
+        self.assertEqual(statistics.contributors, 1)
+        self.assertEqual(statistics.pending, 1)
+
+        pending.approved = True
+        pending.save()
+        self.assertCounted()
+        self.assertEqual(version_statistics(self.version).contributors, 2)
+
+        other = VersionF.create(
+            project=self.project, name='1.1.0', approved=False)
+        entry.version = other
+        entry.author = self.anita
+        entry.save()
+        self.assertCounted()
+        self.assertEqual(version_statistics(other).entries, 1)
+        self.assertEqual(project_statistics(self.project).contributors, 1)
+
+        CategoryF.create(project=self.project, approved=False)
+        self.assertEqual(project_statistics(self.project).pending, 2)
+        other.delete()
+        self.assertCounted()
+        self.assertEqual(project_statistics(self.project).entries, 1)
+
+        pending.delete()
+        self.category.delete()
+        self.assertCounted()
+        self.assertEqual(project_statistics(self.project).categories, 0)
+
+    def test_contributors_counted_once_per_version_delete(self):
+        for number in range(3):
+            EntryF.create(
+                version=self.version, category=self.category,
+                author=self.tim)
+        with CaptureQueriesContext(connection) as queries:
+            self.version.delete()
+        distinct_counts = [
+            query for query in queries.captured_queries
+            if 'COUNT(DISTINCT' in query['sql']]
+        self.assertEqual(len(distinct_counts), 1)
+        self.assertCounted()
+        self.assertEqual(project_statistics(self.project).contributors, 0)
+
+    def test_contributors_counted_when_author_changes(self):
+        entry = EntryF.create(
+            version=self.version, category=self.category, author=self.tim)
+        entry.category = CategoryF.create(project=self.project)
+        with CaptureQueriesContext(connection) as queries:
+            entry.save()
+        self.assertNotIn(
+            'COUNT(DISTINCT "changes_entry"."author_id")',
+            ' '.join(query['sql'] for query in queries.captured_queries))
+        entry.author = self.anita
+        entry.save()
+        self.assertCounted()
+        self.assertEqual(project_statistics(self.project).contributors, 1)
+
+    def test_read_is_one_query(self):
+        EntryF.create(version=self.version, category=self.category)
+        with self.assertNumQueries(1):
+            self.assertEqual(project_statistics(self.project).entries, 1)
+        with self.assertNumQueries(1):
+            self.assertEqual(version_statistics(self.version).entries, 1)
+
+    def test_missing_rows_are_counted(self):
+        EntryF.create(version=self.version, category=self.category)
+        ProjectStatistics.objects.all().delete()
+        VersionStatistics.objects.all().delete()
+        self.assertEqual(project_statistics(self.project).entries, 1)
+        self.assertEqual(version_statistics(self.version).entries, 1)
+        self.assertCounted()
+
+    def test_missing_rows_counted_concurrently(self):
+        EntryF.create(version=self.version, category=self.category)
+        ProjectStatistics.objects.all().delete()
+
+        def insert_again(sender, instance, **kwargs):
+            # Another request inserting the row while this one rebuilds.
+            VersionStatistics.objects.create(version_id=instance.version_id)
+
+        post_delete.connect(insert_again, sender=VersionStatistics)
+        try:
+            self.assertEqual(project_statistics(self.project).entries, 1)
+        finally:
+            post_delete.disconnect(insert_again, sender=VersionStatistics)
+        self.assertCounted()
+        self.assertEqual(version_statistics(self.version).entries, 1)
+
+    def test_rebuild_statistics_command(self):
+        EntryF.create(version=self.version, category=self.category)
+        ProjectStatistics.objects.update(entries=42)
+        VersionStatistics.objects.update(entries=42)
+        out = StringIO()
+        call_command('rebuild_statistics', self.project.slug, stdout=out)
+        self.assertCounted()
+        self.assertIn('1 entries', out.getvalue())
+
+    def test_statistics_json(self):
+        EntryF.create(version=self.version, category=self.category)
+        client = Client()
+        client.post('/set_language/', data={'language': 'en'})
+        response = client.get(reverse(
+            'project-statistics', kwargs={'project_slug': self.project.slug}))
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content)
+        self.assertEqual(data['entries'], 1)
+        self.assertEqual(data['versions'][0]['slug'], self.version.slug)
+        self.assertEqual(data['versions'][0]['entries'], 1)
+        self.assertNotIn('pending', data)
+        self.assertNotIn('pending', data['versions'][0])
+
+    def test_statistics_json_pending_for_staff(self):
+        EntryF.create(
+            version=self.version, category=self.category, approved=False)
+        UserF.create(username='staff', password='password', is_staff=True)
+        client = Client()
+        client.post('/set_language/', data={'language': 'en'})
+        client.login(username='staff', password='password')
+        data = json.loads(client.get(reverse(
+            'project-statistics',
+            kwargs={'project_slug': self.project.slug})).content)
+        self.assertEqual(data['pending'], 1)
+        self.assertEqual(data['versions'][0]['pending'], 1)
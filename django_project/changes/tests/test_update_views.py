@@ -0,0 +1,54 @@
+# coding=utf-8
+"""Tests who may open the update views of non-staff users."""
+from django.core.urlresolvers import reverse
+from django.test import TestCase
+from django.test.client import Client
+from base.tests.model_factories import ProjectF
+from core.model_factories import UserF
+from changes.tests.model_factories import (
+    CategoryF,
+    SponsorF,
+    SponsorshipLevelF,
+    SponsorshipPeriodF)
+
+
+class TestUpdatePermissions(TestCase):
+    """Non-staff users may only update what they own or wrote."""
+
+    def setUp(self):
+        """
+        Setup before each test
+        """
+        self.client = Client()
+        self.client.post('/set_language/', data={'language': 'en'})
+        self.owner = UserF.create(username='timlinux', password='password')
+        self.other = UserF.create(username='anita', password='password')
+        self.project = ProjectF.create(owner=self.owner)
+
+    def assertOnlyFor(self, user, url_name, slug):
+        url = reverse(url_name, kwargs={
+            'project_slug': self.project.slug, 'slug': slug})
+        self.client.login(username=user.username, password='password')
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.client.logout()
+        self.client.login(username=self.other.username, password='password')
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_category_update_by_project_owner(self):
+        category = CategoryF.create(project=self.project)
+        self.assertOnlyFor(self.owner, 'category-update', category.slug)
+
+    def test_sponsor_update_by_author(self):
+        sponsor = SponsorF.create(project=self.project, author=self.owner)
+        self.assertOnlyFor(self.owner, 'sponsor-update', sponsor.slug)
+
+    def test_sponsorship_level_update_by_author(self):
+        level = SponsorshipLevelF.create(
+            project=self.project, author=self.owner)
+        self.assertOnlyFor(self.owner, 'sponsorshiplevel-update', level.slug)
+
+    def test_sponsorship_period_update_by_author(self):
+        period = SponsorshipPeriodF.create(
+            project=self.project, author=self.owner)
+        self.assertOnlyFor(
+            self.owner, 'sponsorshipperiod-update', period.slug)
@@ -4,6 +4,7 @@
 from django.core.urlresolvers import reverse
 from django.test import TestCase
 from django.test.client import Client
+from django.core.files.uploadedfile import SimpleUploadedFile
 from base.tests.model_factories import ProjectF
 from changes.tests.model_factories import (
     CategoryF,
@@ -12,8 +13,10 @@ from changes.tests.model_factories import (
     SponsorshipLevelF,
     SponsorF,
     SponsorshipPeriodF)
+from changes.models import Entry, Version
 from core.model_factories import UserF
 import logging
+import json
 
 
 class TestCategoryViews(TestCase):
@@ -227,6 +230,20 @@ class TestEntryViews(TestCase):
         self.assertEqual(response.context_data['object_list'][0],
                          self.entry)
 
+    def test_EntryListView_groups_categories_of_equal_sort_number(self):
+        version = VersionF.create(project=self.project, name='3.0.0')
+        first = CategoryF.create(project=self.project, sort_number=0)
+        second = CategoryF.create(project=self.project, sort_number=0)
+        for category in (second, first, second, first):
+            EntryF.create(version=version, category=category)
+        response = self.client.get(reverse('entry-list', kwargs={
+            'project_slug': self.project.slug,
+            'version_slug': version.slug
+        }))
+        self.assertEqual(
+            [entry.category_id for entry in response.context_data['entries']],
+            [first.id, first.id, second.id, second.id])
+
     def test_EntryCreateView_with_login(self):
 
         self.client.login(username='timlinux', password='password')
@@ -388,6 +405,44 @@ class TestEntryViews(TestCase):
         }))
         self.assertEqual(response.status_code, 302)
 
+    def test_EntryImportView_with_login(self):
+
+        self.client.login(username='timlinux', password='password')
+        response = self.client.get(reverse('entry-import', kwargs={
+            'project_slug': self.project.slug,
+            'version_slug': self.version.slug
+        }))
+        self.assertEqual(response.status_code, 200)
+        expected_templates = [
+            'entry/import.html'
+        ]
+        self.assertEqual(response.template_name, expected_templates)
+
+    def test_EntryImportView_no_login(self):
+
+        response = self.client.get(reverse('entry-import', kwargs={
+            'project_slug': self.project.slug,
+            'version_slug': self.version.slug
+        }))
+        self.assertEqual(response.status_code, 302)
+
+    def test_EntryImport_with_login(self):
+
+        self.client.login(username='timlinux', password='password')
+        import_file = SimpleUploadedFile(
+            'entries.csv',
+            b'category,title,description\n'
+            b'testcategory,Imported Entry 1,First\n'
+            b'testcategory,Imported Entry 2,Second\n')
+        response = self.client.post(reverse('entry-import', kwargs={
+            'project_slug': self.project.slug,
+            'version_slug': self.version.slug
+        }), {'import_file': import_file})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context_data['report']['created'], 2)
+        self.assertEqual(
+            Entry.unapproved_objects.filter(version=self.version).count(), 2)
+
 
 class TestVersionViews(TestCase):
     """Tests that Version views work."""
@@ -442,6 +497,38 @@ class TestVersionViews(TestCase):
         self.assertEqual(response.context_data['object_list'][0],
                          self.version)
 
+    def test_VersionListView_keyset_pagination(self):
+        for minor in range(2, 13):
+            VersionF.create(project=self.project, name='1.%s.0' % minor)
+        url = reverse('version-list', kwargs={
+            'project_slug': self.project.slug
+        })
+        response = self.client.get(url)
+        first_page = response.context_data['versions']
+        page = response.context_data['page_obj']
+        self.assertEqual(
+            [version.name for version in first_page[:3]],
+            ['1.12.0', '1.11.0', '1.10.0'])
+        self.assertEqual(len(first_page), 10)
+        self.assertEqual(response.context_data['num_versions'], 12)
+        self.assertFalse(page.has_previous())
+
+        response = self.client.get(url, {'after': page.next_cursor})
+        second_page = response.context_data['versions']
+        page = response.context_data['page_obj']
+        self.assertEqual(
+            [version.name for version in second_page], ['1.2.0', '1.0.1'])
+        self.assertFalse(page.has_next())
+
+        response = self.client.get(url, {'before': page.previous_cursor})
+        self.assertEqual(
+            list(response.context_data['versions']), list(first_page))
+
+        # An invalid cursor shows the first page.
+        response = self.client.get(url, {'after': 'invalid'})
+        self.assertEqual(
+            list(response.context_data['versions']), list(first_page))
+
     def test_VersionCreateView_with_login(self):
 
         self.client.login(username='timlinux', password='password')
@@ -553,6 +640,15 @@ class TestVersionViews(TestCase):
         ]
         self.assertEqual(response.template_name, expected_templates)
 
+    def test_VersionDetailView_other_project(self):
+
+        other_project = ProjectF.create()
+        response = self.client.get(reverse('version-detail', kwargs={
+            'slug': self.version.slug,
+            'project_slug': other_project.slug
+        }))
+        self.assertEqual(response.status_code, 404)
+
     def test_VersionDeleteView_with_login(self):
 
         self.client.login(username='timlinux', password='password')
@@ -605,6 +701,57 @@ class TestVersionViews(TestCase):
         }))
         self.assertEqual(response.status_code, 302)
 
+    def test_VersionDiffView(self):
+        old_entry = EntryF.create(
+            version=self.version, category=self.category, title='Old')
+        middle = VersionF.create(project=self.project, name='1.1.0')
+        newest = VersionF.create(project=self.project, name='1.10.0')
+        middle_entry = EntryF.create(
+            version=middle, category=self.category, title='Middle')
+        newest_entry = EntryF.create(
+            version=newest, category=self.category, title='Newest')
+        url = reverse('version-diff', kwargs={
+            'project_slug': self.project.slug,
+            'from_slug': newest.slug,
+            'to_slug': self.version.slug
+        })
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['from_version'], self.version)
+        categories = response.context['category_rows']
+        self.assertEqual(len(categories), 1)
+        self.assertEqual(categories[0]['category'], self.category)
+        self.assertEqual(
+            categories[0]['entries'], [middle_entry, newest_entry])
+        self.assertNotContains(response, old_entry.title)
+
+        # Served from the cache until an entry of the project changes.
+        with self.settings(PAGE_CACHE_ENABLED=False):
+            with self.assertNumQueries(2):
+                self.client.get(url)
+        newest_entry.delete()
+        response = self.client.get(url)
+        self.assertEqual(response.context['category_rows'][0]['entries'],
+                         [middle_entry])
+
+    def test_VersionDiffView_unknown_version(self):
+        response = self.client.get(reverse('version-diff', kwargs={
+            'project_slug': self.project.slug,
+            'from_slug': self.version.slug,
+            'to_slug': '9.9.9'
+        }))
+        self.assertEqual(response.status_code, 404)
+
+    def test_VersionMarkdownView(self):
+        EntryF.create(
+            version=self.version, category=self.category,
+            video='https://www.youtube.com/watch?v=dQw4w9WgXcQ')
+        response = self.client.get(reverse('version-markdown', kwargs={
+            'project_slug': self.project.slug,
+            'slug': self.version.slug
+        }))
+        self.assertEqual(response.status_code, 200)
+
 
 class TestSponsorshipLevelViews(TestCase):
     """Tests that SponsorshipLevel views work."""
@@ -706,6 +853,14 @@ class TestSponsorshipLevelViews(TestCase):
         ]
         self.assertEqual(response.template_name, expected_templates)
 
+    def test_SponsorshipLevelDetailView_no_project(self):
+
+        response = self.client.get(reverse('sponsorshiplevel-detail', kwargs={
+            'slug': self.sponsorship_level.slug,
+            'project_slug': 'no-such-project'
+        }))
+        self.assertEqual(response.status_code, 404)
+
     def test_SponsorshipLevelDeleteView_with_login(self):
 
         self.client.login(username='timlinux', password='password')
@@ -1039,3 +1194,105 @@ class TestSponsorshipPeriodViews(TestCase):
             'slug': self.sponsorship_period.slug
         }))
         self.assertEqual(response.status_code, 302)
+
+    def test_JSONSponsorshipPeriodListView(self):
+        response = self.client.get(
+            reverse('json-sponsorshipperiod-list', kwargs={'version': 1}),
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, self.sponsorship_period.sponsor.name)
+
+
+class TestBulkModerationViews(TestCase):
+    """Tests that pending objects can be approved and rejected in bulk."""
+
+    def setUp(self):
+        """
+        Setup before each test
+
+        We force the locale to en otherwise it will use
+        the locale of the host running the tests and we
+        will get unpredictable results / 404s
+        """
+        self.client = Client()
+        self.client.post(
+                '/set_language/', data={'language': 'en'})
+        logging.disable(logging.CRITICAL)
+        self.project = ProjectF.create()
+        self.version = VersionF.create(project=self.project, approved=False)
+        self.category = CategoryF.create(project=self.project)
+        self.entries = [
+            EntryF.create(
+                version=self.version,
+                category=self.category,
+                approved=False) for _ in range(3)]
+        self.other_entry = EntryF.create(approved=False)
+        self.user = UserF.create(**{
+            'username': 'timlinux',
+            'password': 'password',
+            'is_staff': True
+        })
+
+    def _url(self, model_name, action):
+        return reverse('bulk-moderation', kwargs={
+            'project_slug': self.project.slug,
+            'model_name': model_name,
+            'action': action
+        })
+
+    def test_BulkApprove_entries(self):
+
+        self.client.login(username='timlinux', password='password')
+        ids = [entry.id for entry in self.entries] + [self.other_entry.id]
+        with self.assertNumQueries(12):
+            # project lookup, a single update, 7 queries counting the
+            # statistics of the version and project again and publishing the
+            # search documents, after the session and user lookups done by
+            # the authentication middleware
+            response = self.client.post(
+                self._url('entry', 'approve'),
+                {'ids': ','.join(str(pk) for pk in ids)})
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content)
+        self.assertTrue(data['successful'])
+        self.assertEqual(data['count'], 3)
+        self.assertEqual(
+            Entry.approved_objects.filter(version=self.version).count(), 3)
+        # Entries of other projects are never touched
+        self.assertFalse(
+            Entry.objects.get(id=self.other_entry.id).approved)
+
+    def test_BulkApprove_version_json_body(self):
+
+        self.client.login(username='timlinux', password='password')
+        response = self.client.post(
+            self._url('version', 'approve'),
+            json.dumps({'ids': [self.version.id]}),
+            content_type='application/json')
+        self.assertEqual(json.loads(response.content)['count'], 1)
+        self.assertTrue(Version.objects.get(id=self.version.id).approved)
+
+    def test_BulkReject_entries(self):
+
+        self.client.login(username='timlinux', password='password')
+        response = self.client.post(
+            self._url('entry', 'reject'),
+            {'ids': [self.entries[0].id, self.entries[1].id]})
+        self.assertEqual(json.loads(response.content)['count'], 2)
+        self.assertEqual(
+            Entry.objects.filter(version=self.version).count(), 1)
+
+    def test_BulkModeration_invalid_ids(self):
+
+        self.client.login(username='timlinux', password='password')
+        response = self.client.post(
+            self._url('entry', 'approve'), {'ids': 'one,two'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_BulkModeration_no_staff(self):
+
+        UserF.create(username='member', password='password')
+        self.client.login(username='member', password='password')
+        response = self.client.post(
+            self._url('entry', 'approve'), {'ids': self.entries[0].id})
+        self.assertEqual(response.status_code, 403)
@@ -30,6 +30,7 @@ from views import (
     ApproveVersionView,
     VersionDownload,
     VersionDownloadGnu,
+    VersionDiffView,
     # Entry
     EntryDetailView,
     EntryDeleteView,
@@ -38,6 +39,11 @@ from views import (
     EntryUpdateView,
     PendingEntryListView,
     ApproveEntryView,
+    EntryImportView,
+    # Sponsorship report
+    SponsorshipReportView,
+    # Statistics
+    ProjectStatisticsView,
     # Sponsor
     SponsorDetailView,
     SponsorDeleteView,
@@ -69,6 +75,10 @@ from views import (
     SponsorshipPeriodUpdateView,
     PendingSponsorshipPeriodListView,
     ApproveSponsorshipPeriodView,
+
+    # Bulk moderation
+    BulkModerationView,
+    ModerationDashboardView,
 )
 
 urlpatterns = patterns(
@@ -135,6 +145,10 @@ urlpatterns = patterns(
     url(regex='^(?P<project_slug>[\w-]+)/version/(?P<slug>[\w.-]+)/gnu/$',
         view=VersionDownloadGnu.as_view(),
         name='version-download-gnu'),
+    url(regex='^(?P<project_slug>[\w-]+)/version/(?P<from_slug>[\w.-]+)/'
+              'diff/(?P<to_slug>[\w.-]+)/$',
+        view=VersionDiffView.as_view(),
+        name='version-diff'),
 
     # Changelog entry management
     url(regex='^(?P<project_slug>[\w-]+)/(?P<version_slug>[\w.-]+)/'
@@ -158,10 +172,24 @@ urlpatterns = patterns(
               'create-entry/$',
         view=EntryCreateView.as_view(),
         name='entry-create'),
+    url(regex='^(?P<project_slug>[\w-]+)/(?P<version_slug>[\w.-]+)/'
+              'import-entries/$',
+        view=EntryImportView.as_view(),
+        name='entry-import'),
     url(regex='^entry/update/(?P<pk>\d+)$',
         view=EntryUpdateView.as_view(),
         name='entry-update'),
 
+    # Bulk approve / reject of pending objects - json only
+    url(regex='^(?P<project_slug>[\w-]+)/pending/(?P<model_name>\w+)/'
+              '(?P<action>approve|reject)/$',
+        view=BulkModerationView.as_view(),
+        name='bulk-moderation'),
+    # Pending objects of all projects, staff only
+    url(regex='^moderation/dashboard/$',
+        view=ModerationDashboardView.as_view(),
+        name='moderation-dashboard'),
+
     # Feeds
     url(regex='^(?P<project_slug>[\w-]+)/rss/latest-version/$',
         view=RssVersionFeed(),
@@ -272,6 +300,19 @@ urlpatterns = patterns(
     url(regex='^(?P<project_slug>[\w-]+)/sponsorshipperiod/(?P<slug>[\w-]+)/update/$',
         view=SponsorshipPeriodUpdateView.as_view(),
         name='sponsorshipperiod-update'),
+
+    # Sponsorship revenue report, staff only
+    url(regex='^sponsorship/report/$',
+        view=SponsorshipReportView.as_view(),
+        name='sponsorship-report'),
+    url(regex='^(?P<project_slug>[\w-]+)/sponsorship/report/$',
+        view=SponsorshipReportView.as_view(),
+        name='project-sponsorship-report'),
+
+    # Statistics of a project and its versions
+    url(regex='^(?P<project_slug>[\w-]+)/statistics/$',
+        view=ProjectStatisticsView.as_view(),
+        name='project-statistics'),
 )
 
 
@@ -5,3 +5,6 @@ from version import *
 from sponsor import *
 from sponsorship_level import *
 from sponsorship_period import *
+from moderation import *
+from report import *
+from statistics import *
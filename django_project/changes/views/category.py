@@ -5,6 +5,8 @@
 # noinspection PyUnresolvedReferences
 import logging
 from base.models import Project
+from base.project_cache import get_project
+from common.project_objects import ProjectObjectMixin
 from django.core.urlresolvers import reverse
 from django.shortcuts import get_object_or_404
 from django.http import HttpResponse
@@ -148,7 +150,7 @@ class CategoryListView(CategoryMixin, PaginationMixin, ListView):
         project_slug = self.kwargs.get('project_slug', None)
         context['project_slug'] = project_slug
         if project_slug:
-            context['the_project'] = Project.objects.get(slug=project_slug)
+            context['the_project'] = get_project(project_slug, self.request)
         return context
 
     def get_queryset(self, queryset=None):
@@ -165,7 +167,7 @@ class CategoryListView(CategoryMixin, PaginationMixin, ListView):
             project_slug = self.kwargs.get('project_slug', None)
             if project_slug:
                 try:
-                    project = Project.objects.get(slug=project_slug)
+                    project = get_project(project_slug, self.request)
                 except Project.DoesNotExist:
                     raise Http404(
                         'Sorry! The project you are requesting a category for '
@@ -174,7 +176,7 @@ class CategoryListView(CategoryMixin, PaginationMixin, ListView):
                         'approved yet. Try logging in as a staff member if '
                         'you wish to view it.')
                 queryset = Category.approved_objects.filter(
-                    project=project)
+                    project=project).select_related('project')
                 return queryset
             else:
                 raise Http404(
@@ -184,10 +186,11 @@ class CategoryListView(CategoryMixin, PaginationMixin, ListView):
             return queryset
 
 
-class CategoryDetailView(CategoryMixin, DetailView):
+class CategoryDetailView(CategoryMixin, ProjectObjectMixin, DetailView):
     """Detail view for Category."""
     context_object_name = 'category'
     template_name = 'category/detail.html'
+    not_found_message = 'The category you requested does not exist.'
 
     def get_queryset(self):
         """Get the queryset for this view.
@@ -198,39 +201,6 @@ class CategoryDetailView(CategoryMixin, DetailView):
         qs = Category.approved_objects.all()
         return qs
 
-    def get_object(self, queryset=None):
-        """Get the object for this view.
-
-        Because Category slugs are unique within a Project, we need to make
-        sure that we fetch the correct Category from the correct Project
-
-        :param queryset: A query set
-        :type queryset: QuerySet
-
-        :returns: Queryset which is filtered to only show a project
-        :rtype: QuerySet
-        :raises: Http404
-        """
-        if queryset is None:
-            queryset = self.get_queryset()
-        slug = self.kwargs.get('slug', None)
-        project_slug = self.kwargs.get('project_slug', None)
-        if slug and project_slug:
-            try:
-                project = Project.objects.get(slug=project_slug)
-            except Project.DoesNotExist:
-                raise Http404(
-                    'The project you requested a category for does not exist.'
-                )
-            try:
-                obj = queryset.get(project=project, slug=slug)
-                return obj
-            except Category.DoesNotExist:
-                raise Http404(
-                    'The category you requested does not exist.')
-        else:
-            raise Http404('Sorry! We could not find your category!')
-
 
 # noinspection PyAttributeOutsideInit
 class CategoryDeleteView(LoginRequiredMixin, CategoryMixin, DeleteView):
@@ -254,7 +224,7 @@ class CategoryDeleteView(LoginRequiredMixin, CategoryMixin, DeleteView):
         :rtype: HttpResponse
         """
         self.project_slug = self.kwargs.get('project_slug', None)
-        self.project = Project.objects.get(slug=self.project_slug)
+        self.project = get_project(self.project_slug, self.request)
         return super(CategoryDeleteView, self).get(request, *args, **kwargs)
 
     def post(self, request, *args, **kwargs):
@@ -273,7 +243,7 @@ class CategoryDeleteView(LoginRequiredMixin, CategoryMixin, DeleteView):
         :rtype: HttpResponse
         """
         self.project_slug = self.kwargs.get('project_slug', None)
-        self.project = Project.objects.get(slug=self.project_slug)
+        self.project = get_project(self.project_slug, self.request)
         return super(CategoryDeleteView, self).post(request, *args, **kwargs)
 
     def get_success_url(self):
@@ -363,7 +333,7 @@ class CategoryCreateView(LoginRequiredMixin, CategoryMixin, CreateView):
         """
         kwargs = super(CategoryCreateView, self).get_form_kwargs()
         self.project_slug = self.kwargs.get('project_slug', None)
-        self.project = Project.objects.get(slug=self.project_slug)
+        self.project = get_project(self.project_slug, self.request)
         kwargs.update({
             'project': self.project
         })
@@ -384,7 +354,7 @@ class CategoryUpdateView(LoginRequiredMixin, CategoryMixin, UpdateView):
         """
         kwargs = super(CategoryUpdateView, self).get_form_kwargs()
         self.project_slug = self.kwargs.get('project_slug', None)
-        self.project = Project.objects.get(slug=self.project_slug)
+        self.project = get_project(self.project_slug, self.request)
         kwargs.update({
             'project': self.project
         })
@@ -415,7 +385,7 @@ class CategoryUpdateView(LoginRequiredMixin, CategoryMixin, UpdateView):
         if self.request.user.is_staff:
             return qs
         else:
-            return qs.filter(creator=self.request.user)
+            return qs.filter(project__owner=self.request.user)
 
     def get_success_url(self):
         """Define the redirect URL
@@ -487,7 +457,7 @@ class PendingCategoryListView(
             self.project_slug = self.kwargs.get('project_slug', None)
             if self.project_slug:
                 try:
-                    self.project = Project.objects.get(slug=self.project_slug)
+                    self.project = get_project(self.project_slug, self.request)
                 except Project.DoesNotExist:
                     raise Http404(
                         'Sorry! The project you are requesting a category for '
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 """View classes for Entry"""
 
-from base.models import Project
+from base.project_cache import get_project
 # noinspection PyUnresolvedReferences
 import logging
 from django.core.urlresolvers import reverse
@@ -14,14 +14,17 @@ from django.views.generic import (
     DetailView,
     UpdateView,
     RedirectView,
+    FormView,
 )
 from django.db import IntegrityError
 from django.core.exceptions import ValidationError
 from django.http import HttpResponseRedirect
 from braces.views import LoginRequiredMixin, StaffuserRequiredMixin
 from pure_pagination.mixins import PaginationMixin
+from common.pagination import KeysetPaginationMixin
 from ..models import Version, Entry
-from ..forms import EntryForm
+from ..forms import EntryForm, EntryImportForm
+from ..importers import EntryImporter, parse_entry_rows
 
 logger = logging.getLogger(__name__)
 
@@ -32,17 +35,28 @@ __license__ = ''
 __copyright__ = ''
 
 
+# Fields shown by entry/includes/entry_detail.html, with the version and
+# category the lists are filtered and ordered by.
+ENTRY_LIST_FIELDS = (
+    'title', 'description', 'image_file', 'video', 'credits_html',
+    'approved', 'version', 'category')
+
+
 class EntryMixin(object):
     """Mixing for all views to inherit which sets some standard properties."""
     model = Entry  # implies -> queryset = Entry.objects.all()
     form_class = EntryForm
 
 
-class EntryListView(EntryMixin, PaginationMixin, ListView):
-    """List view for Entry."""
+class EntryListView(EntryMixin, KeysetPaginationMixin, ListView):
+    """List view for Entry, in category order."""
     context_object_name = 'entries'
     template_name = 'entry/list.html'
-    paginate_by = 1000
+    paginate_by = 100
+    # Categories may share a sort number, the category id keeps the entries
+    # of a category together.
+    keyset_fields = ('category__sort_number', 'category_id', 'id')
+    approximate_count = True
 
     def get_context_data(self, **kwargs):
         """Get the context data which is passed to a template.
@@ -54,7 +68,7 @@ class EntryListView(EntryMixin, PaginationMixin, ListView):
         :rtype: dict
         """
         context = super(EntryListView, self).get_context_data(**kwargs)
-        context['num_entries'] = self.get_queryset().count()
+        context['num_entries'] = context['page_obj'].count
         context['unapproved'] = False
         context['project_slug'] = self.project_slug
         context['version_slug'] = self.version_slug
@@ -72,7 +86,7 @@ class EntryListView(EntryMixin, PaginationMixin, ListView):
             self.version_slug = self.kwargs.get('version_slug', None)
             if self.project_slug and self.version_slug:
                 try:
-                    project = Project.objects.get(slug=self.project_slug)
+                    project = get_project(self.project_slug, self.request)
                 except:
                     raise Http404('Project not found')
                 try:
@@ -80,7 +94,9 @@ class EntryListView(EntryMixin, PaginationMixin, ListView):
                         slug=self.version_slug, project=project)
                 except:
                     raise Http404('Version not found')
-                queryset = Entry.objects.filter(version=version)
+                queryset = Entry.objects.filter(
+                    version=version).select_related('category').only(
+                    *ENTRY_LIST_FIELDS)
                 return queryset
             else:
                 raise Http404('Sorry! We could not find your entry!')
@@ -106,7 +122,7 @@ class EntryDetailView(EntryMixin, DetailView):
             queryset = self.get_queryset()
         pk = self.kwargs.get('pk', None)
         try:
-            obj = queryset.get(id=pk)
+            obj = queryset.select_related('version__project').get(id=pk)
         except Entry.DoesNotExist:
             raise Http404(
                     'Requested changelog entry does not exist.')
@@ -258,7 +274,7 @@ class EntryCreateView(LoginRequiredMixin, EntryMixin, CreateView):
         self.version_slug = self.kwargs.get('version_slug', None)
         self.version = Version.objects.get(slug=self.version_slug)
         self.project_slug = self.kwargs.get('project_slug', None)
-        self.project = Project.objects.get(slug=self.project_slug)
+        self.project = get_project(self.project_slug, self.request)
         kwargs.update({
             'user': self.request.user,
             'version': self.version,
@@ -351,9 +367,11 @@ class PendingEntryListView(EntryMixin, PaginationMixin, ListView,
         :rtype: dict
         """
         context = super(PendingEntryListView, self).get_context_data(**kwargs)
-        context['num_entries'] = self.get_queryset().count()
+        context['num_entries'] = context['paginator'].count
         context['unapproved'] = True
-        context['entries'] = Entry.objects.filter(version=self.version)
+        context['version'] = self.version
+        context['project_slug'] = self.kwargs.get('project_slug', None)
+        context['version_slug'] = self.kwargs.get('version_slug', None)
         return context
 
     def get_queryset(self):
@@ -369,16 +387,16 @@ class PendingEntryListView(EntryMixin, PaginationMixin, ListView,
             version_slug = self.kwargs.get('version_slug', None)
             if project_slug and version_slug:
                 try:
-                    project = Project.objects.get(slug=project_slug)
+                    project = get_project(project_slug, self.request)
                 except:
                     raise Http404('Project not found')
                 try:
-                    self.version = Version.objects.get(
-                        slug=version_slug, project=project)
+                    self.version = Version.objects.select_related(
+                        'project').get(slug=version_slug, project=project)
                 except:
                     raise Http404('Version not found')
                 queryset = Entry.unapproved_objects.filter(
-                    version=self.version)
+                    version=self.version).only(*ENTRY_LIST_FIELDS)
                 if self.request.user.is_staff:
                     return queryset
                 else:
@@ -417,3 +435,90 @@ class ApproveEntryView(StaffuserRequiredMixin, EntryMixin, RedirectView):
             'project_slug': entry.version.project.slug,
             'version_slug': entry.version.slug
         })
+
+
+# noinspection PyAttributeOutsideInit
+class EntryImportView(LoginRequiredMixin, EntryMixin, FormView):
+    """Import many Entries into a Version from an uploaded CSV/JSON file.
+
+    All rows are validated before anything is written. The template receives
+    a ``report`` with the number of created entries and the errors per row.
+    Imported entries are pending approval, as with EntryCreateView.
+    """
+    form_class = EntryImportForm
+    template_name = 'entry/import.html'
+
+    def dispatch(self, request, *args, **kwargs):
+        """Resolve the Version (and its Project) from the URL.
+
+        :param request: HTTP request object
+        :type request: HttpRequest
+
+        :param args: Positional arguments
+        :type args: tuple
+
+        :param kwargs: Keyword arguments
+        :type kwargs: dict
+
+        :returns: Unaltered request object
+        :rtype: HttpResponse
+        :raises: Http404
+        """
+        self.project_slug = kwargs.get('project_slug', None)
+        self.version_slug = kwargs.get('version_slug', None)
+        try:
+            self.version = Version.objects.select_related('project').get(
+                slug=self.version_slug, project__slug=self.project_slug)
+        except Version.DoesNotExist:
+            raise Http404('Version not found')
+        return super(EntryImportView, self).dispatch(
+            request, *args, **kwargs)
+
+    def get_form_kwargs(self):
+        """Get keyword arguments from form.
+
+        :returns keyword argument from the form
+        :rtype: dict
+        """
+        kwargs = super(EntryImportView, self).get_form_kwargs()
+        kwargs.update({'version': self.version})
+        return kwargs
+
+    def get_context_data(self, **kwargs):
+        """Get the context data which is passed to a template.
+
+        :param kwargs: Any arguments to pass to the superclass.
+        :type kwargs: dict
+
+        :returns: Context data which will be passed to the template.
+        :rtype: dict
+        """
+        context = super(EntryImportView, self).get_context_data(**kwargs)
+        context['version'] = self.version
+        context['project_slug'] = self.project_slug
+        context['version_slug'] = self.version_slug
+        return context
+
+    def form_valid(self, form):
+        """Parse the uploaded document and import its rows.
+
+        :param form: The bound and validated import form.
+        :type form: EntryImportForm
+
+        :returns: The import page including the import report.
+        :rtype: HttpResponse
+        """
+        try:
+            rows = parse_entry_rows(
+                form.cleaned_data['import_file'].read(),
+                form.cleaned_data['import_format'])
+        except ValueError as e:
+            form.add_error('import_file', str(e))
+            return self.form_invalid(form)
+        importer = EntryImporter(
+            self.version,
+            self.request.user,
+            skip_invalid=form.cleaned_data['skip_invalid'])
+        report = importer.run(rows)
+        return self.render_to_response(
+            self.get_context_data(form=form, report=report))
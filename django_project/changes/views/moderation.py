@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""**View classes for bulk moderation of pending objects**
+
+"""
+import json
+import logging
+from base.project_cache import get_project_or_404
+from django.http import HttpResponse
+from django.views.generic import TemplateView, View
+from braces.views import StaffuserRequiredMixin
+from ..moderation import MODERATED_MODELS, moderation_dashboard
+from ..signals import objects_moderated
+
+logger = logging.getLogger(__name__)
+
+MODERATION_ACTIONS = ('approve', 'reject')
+
+
+class BulkModerationView(StaffuserRequiredMixin, View):
+    """Approve or reject many pending objects of a project in one request.
+
+    POST the primary keys as repeated ``ids`` parameters, a comma separated
+    ``ids`` value or a JSON body ``{"ids": [1, 2, 3]}``. Approving is a
+    single ``UPDATE ... WHERE id IN (...)`` and rejecting deletes the pending
+    objects. Only unapproved objects of the project in the URL are affected.
+    The response is JSON e.g. ``{"successful": true, "count": 3}``.
+    """
+    raise_exception = True
+    http_method_names = ['post']
+
+    @staticmethod
+    def json_response(data, status=200):
+        """Serialise data as a JSON response.
+
+        :param data: The payload.
+        :type data: dict
+
+        :param status: HTTP status code.
+        :type status: int
+
+        :returns: A JSON response.
+        :rtype: HttpResponse
+        """
+        return HttpResponse(
+            json.dumps(data), content_type='application/json', status=status)
+
+    def get_ids(self):
+        """Read the requested primary keys from the request.
+
+        :returns: A list of primary keys.
+        :rtype: list
+        :raises: ValueError if an id is not an integer.
+        """
+        if self.request.META.get('CONTENT_TYPE', '').startswith(
+                'application/json'):
+            ids = json.loads(self.request.body).get('ids', [])
+        else:
+            ids = []
+            for value in self.request.POST.getlist('ids'):
+                ids.extend(value.split(','))
+        return sorted(set(int(pk) for pk in ids if str(pk).strip()))
+
+    def post(self, request, project_slug, model_name, action):
+        """Approve or reject the requested objects.
+
+        :param request: HTTP request object
+        :type request: HttpRequest
+
+        :param project_slug: The slug of the Project.
+        :type project_slug: str
+
+        :param model_name: One of the keys of MODERATED_MODELS.
+        :type model_name: str
+
+        :param action: One of MODERATION_ACTIONS.
+        :type action: str
+
+        :returns: A JSON response with the number of affected objects.
+        :rtype: HttpResponse
+        """
+        if model_name not in MODERATED_MODELS or \
+                action not in MODERATION_ACTIONS:
+            return self.json_response(
+                {'successful': False, 'errors': 'Unknown moderation.'}, 404)
+        try:
+            ids = self.get_ids()
+        except (ValueError, TypeError, AttributeError):
+            return self.json_response(
+                {'successful': False,
+                 'errors': 'ids must be a list of integers.'}, 400)
+        project = get_project_or_404(project_slug, request)
+        model, project_lookup = MODERATED_MODELS[model_name]
+        count = 0
+        if ids:
+            queryset = model.unapproved_objects.filter(
+                id__in=ids, **{project_lookup: project})
+            if action == 'approve':
+                count = queryset.update(approved=True)
+            else:
+                count = queryset.count()
+                queryset.delete()
+            objects_moderated.send(
+                sender=model, project=project, action=action, ids=ids)
+            logger.info(
+                '%s %s %s objects of %s', request.user, action, count,
+                project)
+        return self.json_response({
+            'successful': True,
+            'action': action,
+            'model': model_name,
+            'count': count
+        })
+
+
+class ModerationDashboardView(StaffuserRequiredMixin, TemplateView):
+    """What awaits moderation in all projects, on one page for the staff.
+    """
+    template_name = 'moderation/dashboard.html'
+
+    def get_context_data(self, **kwargs):
+        """Get the context data which is passed to a template.
+
+        :param kwargs: Any arguments to pass to the superclass.
+        :type kwargs: dict
+
+        :returns: Context data which will be passed to the template.
+        :rtype: dict
+        """
+        context = super(
+            ModerationDashboardView, self).get_context_data(**kwargs)
+        context['dashboard'] = moderation_dashboard()
+        return context
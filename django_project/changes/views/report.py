@@ -0,0 +1,105 @@
+# coding=utf-8
+"""Views of the sponsorship revenue report."""
+import csv
+import json
+import logging
+from django.http import StreamingHttpResponse
+from django.views.generic import TemplateView
+from braces.views import StaffuserRequiredMixin
+from base.project_cache import get_project_or_404
+from ..sponsorship_report import COLUMNS, sponsorship_report, yearly_totals
+
+logger = logging.getLogger(__name__)
+
+
+class Echo(object):
+    """File-like object returning what is written, to stream a csv writer.
+    """
+
+    @staticmethod
+    def write(value):
+        return value
+
+
+def csv_lines(rows):
+    """Generate the lines of the report as CSV.
+
+    :param rows: Rows of sponsorship_report.
+    :type rows: list
+
+    :returns: The header line and a line per row.
+    :rtype: generator
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(COLUMNS)
+    for row in rows:
+        yield writer.writerow(
+            [unicode(row[column]).encode('utf-8') for column in COLUMNS])
+
+
+def json_chunks(rows):
+    """Generate the report as a JSON list, a row at a time.
+
+    :param rows: Rows of sponsorship_report.
+    :type rows: list
+
+    :returns: The chunks of the JSON document.
+    :rtype: generator
+    """
+    yield '['
+    for index, row in enumerate(rows):
+        yield (',\n' if index else '\n') + json.dumps(row)
+    yield '\n]\n'
+
+
+class SponsorshipReportView(StaffuserRequiredMixin, TemplateView):
+    """Sponsorship revenue by year, project, level and country.
+
+    Of all projects, or of one if the url has a project slug. With
+    ``?format=csv`` or ``?format=json`` the report is streamed as a file.
+    """
+    template_name = 'sponsorship_period/report.html'
+    exports = {
+        'csv': (csv_lines, 'text/csv'),
+        'json': (json_chunks, 'application/json'),
+    }
+
+    def get(self, request, *args, **kwargs):
+        """Show or export the report.
+
+        :param request: HTTP request object
+        :type request: HttpRequest
+
+        :param args: Positional arguments
+        :type args: tuple
+
+        :param kwargs: Keyword arguments
+        :type kwargs: dict
+
+        :returns: The report page, or the CSV or JSON export.
+        :rtype: HttpResponse
+
+        :raises: Http404
+        """
+        project_slug = kwargs.get('project_slug', None)
+        project = None
+        if project_slug:
+            project = get_project_or_404(project_slug, request)
+        rows = sponsorship_report(project)
+
+        export = request.GET.get('format', None)
+        if export in self.exports:
+            generate, content_type = self.exports[export]
+            response = StreamingHttpResponse(
+                generate(rows), content_type=content_type)
+            response['Content-Disposition'] = (
+                'attachment; filename="sponsorship-report-%s.%s"' % (
+                    project_slug or 'all', export))
+            return response
+
+        context = self.get_context_data(
+            rows=rows,
+            totals=yearly_totals(rows),
+            the_project=project,
+            project_slug=project_slug)
+        return self.render_to_response(context)
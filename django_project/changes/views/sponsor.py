@@ -2,7 +2,8 @@ __author__ = 'rischan'
 
 
 import logging
-from base.models import Project
+from base.project_cache import get_project, get_project_or_404
+from common.project_objects import ProjectObjectMixin
 
 logger = logging.getLogger(__name__)
 
@@ -15,7 +16,8 @@ from django.views.generic import (
     DeleteView,
     DetailView,
     UpdateView,
-    RedirectView)
+    RedirectView,
+    TemplateView)
 from django.http import HttpResponseRedirect, Http404
 from django.db import IntegrityError
 from django.core.exceptions import ValidationError
@@ -25,6 +27,7 @@ from pure_pagination.mixins import PaginationMixin
 from ..models import Sponsor, SponsorshipPeriod  # noqa
 from ..models import SponsorshipLevel  # noqa
 from ..forms import SponsorForm
+from ..sponsor_wall import sponsor_wall
 from changes.views.sponsorship_period import SponsorshipPeriodListView  # noqa
 
 
@@ -110,11 +113,9 @@ class JSONSponsorListView(SponsorMixin, JSONResponseMixin, ListView):
         return self.render_to_json_response(context, **response_kwargs)
 
 
-class SponsorListView(SponsorMixin, PaginationMixin, ListView):
-    """List view for Sponsor."""
-    context_object_name = 'sponsors'
+class SponsorListView(SponsorMixin, TemplateView):
+    """The sponsor wall of a project, see changes.sponsor_wall."""
     template_name = 'sponsor/list.html'
-    paginate_by = 10
 
     def get_context_data(self, **kwargs):
         """Get the context data which is passed to a template.
@@ -124,44 +125,29 @@ class SponsorListView(SponsorMixin, PaginationMixin, ListView):
 
         :returns: Context data which will be passed to the template.
         :rtype: dict
-        """
 
+        :raises: Http404
+        """
         context = super(SponsorListView, self).get_context_data(**kwargs)
-        context['num_sponsors'] = context['sponsors'].count()
-        context['unapproved'] = False
         project_slug = self.kwargs.get('project_slug', None)
+        if not project_slug:
+            raise Http404('Sorry! We could not find your Sponsor!')
+        project = get_project_or_404(project_slug, self.request)
+        wall = sponsor_wall(project)
+        context['wall'] = wall
+        context['num_sponsors'] = wall['count']
+        context['unapproved'] = False
         context['project_slug'] = project_slug
-        if project_slug:
-            project = Project.objects.get(slug=project_slug)
-            context['the_project'] = Project.objects.get(slug=project_slug)
-            context['levels'] = SponsorshipLevel.objects.filter(project=project)
+        context['the_project'] = project
         return context
 
-    def get_queryset(self, queryset=None):
-        """Get the queryset for this view.
-
-        :param queryset: A query set
-        :type queryset: QuerySet
 
-        :returns: Sponsor Queryset which is filtered by project
-        :rtype: QuerySet
-        :raises: Http404
-        """
-        if self.queryset is None:
-            project_slug = self.kwargs.get('project_slug', None)
-            if project_slug:
-                project = Project.objects.get(slug=project_slug)
-                queryset = SponsorshipPeriod.objects.filter(project=project)
-                return queryset
-            else:
-                raise Http404('Sorry! We could not find your Sponsor!')
-        return self.queryset
-
-
-class SponsorDetailView(SponsorMixin, DetailView):
+class SponsorDetailView(SponsorMixin, ProjectObjectMixin, DetailView):
     """Detail view for Sponsor."""
     context_object_name = 'sponsor'
     template_name = 'sponsor/detail.html'
+    select_related = ('sponsor', 'sponsorship_level')
+    not_found_message = 'Sorry! We could not find your sponsor!'
 
     def get_queryset(self):
         """Get the queryset for this view.
@@ -172,30 +158,6 @@ class SponsorDetailView(SponsorMixin, DetailView):
         qs = SponsorshipPeriod.approved_objects.all()
         return qs
 
-    def get_object(self, queryset=None):
-        """Get the object for this view.
-
-        Because Sponsor slugs are unique within a Project, we need to make
-        sure that we fetch the correct Sponsor from the correct Project
-
-        :param queryset: A query set
-        :type queryset: QuerySet
-
-        :returns: Queryset which is filtered to only show a project
-        :rtype: QuerySet
-        :raises: Http404
-        """
-        if queryset is None:
-            queryset = self.get_queryset()
-            slug = self.kwargs.get('slug', None)
-            project_slug = self.kwargs.get('project_slug', None)
-            if slug and project_slug:
-                project = Project.objects.get(slug=project_slug)
-                obj = queryset.get(project=project, slug=slug)
-                return obj
-            else:
-                raise Http404('Sorry! We could not find your sponsor!')
-
 
 # noinspection PyAttributeOutsideInit
 class SponsorDeleteView(LoginRequiredMixin, SponsorMixin, DeleteView):
@@ -219,7 +181,7 @@ class SponsorDeleteView(LoginRequiredMixin, SponsorMixin, DeleteView):
         :rtype: HttpResponse
         """
         self.project_slug = self.kwargs.get('project_slug', None)
-        self.project = Project.objects.get(slug=self.project_slug)
+        self.project = get_project(self.project_slug, self.request)
         return super(SponsorDeleteView, self).get(request, *args, **kwargs)
 
     def post(self, request, *args, **kwargs):
@@ -238,7 +200,7 @@ class SponsorDeleteView(LoginRequiredMixin, SponsorMixin, DeleteView):
         :rtype: HttpResponse
         """
         self.project_slug = self.kwargs.get('project_slug', None)
-        self.project = Project.objects.get(slug=self.project_slug)
+        self.project = get_project(self.project_slug, self.request)
         return super(SponsorDeleteView, self).post(request, *args, **kwargs)
 
     def get_success_url(self):
@@ -329,7 +291,7 @@ class SponsorCreateView(LoginRequiredMixin, SponsorMixin, CreateView):
         """
         kwargs = super(SponsorCreateView, self).get_form_kwargs()
         self.project_slug = self.kwargs.get('project_slug', None)
-        self.project = Project.objects.get(slug=self.project_slug)
+        self.project = get_project(self.project_slug, self.request)
         kwargs.update({
             'user': self.request.user,
             'project': self.project
@@ -351,7 +313,7 @@ class SponsorUpdateView(LoginRequiredMixin, SponsorMixin, UpdateView):
         """
         kwargs = super(SponsorUpdateView, self).get_form_kwargs()
         self.project_slug = self.kwargs.get('project_slug', None)
-        self.project = Project.objects.get(slug=self.project_slug)
+        self.project = get_project(self.project_slug, self.request)
         kwargs.update({
             'user': self.request.user,
             'project': self.project
@@ -383,7 +345,7 @@ class SponsorUpdateView(LoginRequiredMixin, SponsorMixin, UpdateView):
         if self.request.user.is_staff:
             return qs
         else:
-            return qs.filter(creator=self.request.user)
+            return qs.filter(author=self.request.user)
 
     def get_success_url(self):
         """Define the redirect URL
@@ -454,9 +416,10 @@ class PendingSponsorListView(StaffuserRequiredMixin, SponsorMixin,
         if self.queryset is None:
             self.project_slug = self.kwargs.get('project_slug', None)
             if self.project_slug:
-                self.project = Project.objects.get(slug=self.project_slug)
+                self.project = get_project(self.project_slug, self.request)
                 queryset = Sponsor.unapproved_objects.filter(
-                    project=self.project)
+                    project=self.project).select_related('project').only(
+                    'name', 'slug', 'logo', 'approved', 'project')
                 return queryset
             else:
                 raise Http404('Sorry! We could not find your sponsor!')
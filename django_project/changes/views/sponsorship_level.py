@@ -2,7 +2,8 @@ __author__ = 'rischan - <--rischan@kartoza.com-->'
 __date__ = '12/28/15'
 
 import logging
-from base.models import Project
+from base.project_cache import get_project
+from common.project_objects import ProjectObjectMixin
 
 logger = logging.getLogger(__name__)
 
@@ -132,7 +133,7 @@ class SponsorshipLevelListView(
         project_slug = self.kwargs.get('project_slug', None)
         context['project_slug'] = project_slug
         if project_slug:
-            context['the_project'] = Project.objects.get(slug=project_slug)
+            context['the_project'] = get_project(project_slug, self.request)
         return context
 
     def get_queryset(self, queryset=None):
@@ -148,18 +149,21 @@ class SponsorshipLevelListView(
         if self.queryset is None:
             project_slug = self.kwargs.get('project_slug', None)
             if project_slug:
-                project = Project.objects.get(slug=project_slug)
-                queryset = SponsorshipLevel.objects.filter(project=project)
+                project = get_project(project_slug, self.request)
+                queryset = SponsorshipLevel.objects.filter(
+                    project=project).select_related('project')
                 return queryset
             else:
                 raise Http404('Sorry! We could not find your Sponsor Period!')
         return self.queryset
 
 
-class SponsorshipLevelDetailView(SponsorshipLevelMixin, DetailView):
+class SponsorshipLevelDetailView(
+        SponsorshipLevelMixin, ProjectObjectMixin, DetailView):
     """Detail view for Sponsorship Level."""
     context_object_name = 'sponsorshiplevel'
     template_name = 'sponsorship_level/detail.html'
+    not_found_message = 'Sorry! We could not find your sponsorship level!'
 
     def get_queryset(self):
         """Get the queryset for this view.
@@ -171,31 +175,6 @@ class SponsorshipLevelDetailView(SponsorshipLevelMixin, DetailView):
         qs = SponsorshipLevel.approved_objects.all()
         return qs
 
-    def get_object(self, queryset=None):
-        """Get the object for this view.
-
-        Because Sponsor slugs are unique within a Project, we need to make
-        sure that we fetch the correct Sponsor from the correct Project
-
-        :param queryset: A query set
-        :type queryset: QuerySet
-
-        :returns: Queryset which is filtered to only show a project
-        :rtype: QuerySet
-        :raises: Http404
-        """
-        if queryset is None:
-            queryset = self.get_queryset()
-            slug = self.kwargs.get('slug', None)
-            project_slug = self.kwargs.get('project_slug', None)
-            if slug and project_slug:
-                project = Project.objects.get(slug=project_slug)
-                obj = queryset.get(project=project, slug=slug)
-                return obj
-            else:
-                raise Http404('Sorry! We could not '
-                              'find your sponsorship level!')
-
 
 # noinspection PyAttributeOutsideInit
 class SponsorshipLevelDeleteView(
@@ -222,7 +201,7 @@ class SponsorshipLevelDeleteView(
         :rtype: HttpResponse
         """
         self.project_slug = self.kwargs.get('project_slug', None)
-        self.project = Project.objects.get(slug=self.project_slug)
+        self.project = get_project(self.project_slug, self.request)
         return super(
                 SponsorshipLevelDeleteView,
                 self).get(request, *args, **kwargs)
@@ -243,7 +222,7 @@ class SponsorshipLevelDeleteView(
         :rtype: HttpResponse
         """
         self.project_slug = self.kwargs.get('project_slug', None)
-        self.project = Project.objects.get(slug=self.project_slug)
+        self.project = get_project(self.project_slug, self.request)
         return super(
                 SponsorshipLevelDeleteView,
                 self).post(request, *args, **kwargs)
@@ -337,7 +316,7 @@ class SponsorshipLevelCreateView(
         """
         kwargs = super(SponsorshipLevelCreateView, self).get_form_kwargs()
         self.project_slug = self.kwargs.get('project_slug', None)
-        self.project = Project.objects.get(slug=self.project_slug)
+        self.project = get_project(self.project_slug, self.request)
         kwargs.update({
             'user': self.request.user,
             'project': self.project
@@ -362,7 +341,7 @@ class SponsorshipLevelUpdateView(
         """
         kwargs = super(SponsorshipLevelUpdateView, self).get_form_kwargs()
         self.project_slug = self.kwargs.get('project_slug', None)
-        self.project = Project.objects.get(slug=self.project_slug)
+        self.project = get_project(self.project_slug, self.request)
         kwargs.update({
             'user': self.request.user,
             'project': self.project
@@ -396,7 +375,7 @@ class SponsorshipLevelUpdateView(
         if self.request.user.is_staff:
             return qs
         else:
-            return qs.filter(creator=self.request.user)
+            return qs.filter(author=self.request.user)
 
     def get_success_url(self):
         """Define the redirect URL
@@ -462,7 +441,7 @@ class PendingSponsorshipLevelListView(
         if self.queryset is None:
             self.project_slug = self.kwargs.get('project_slug', None)
             if self.project_slug:
-                self.project = Project.objects.get(slug=self.project_slug)
+                self.project = get_project(self.project_slug, self.request)
                 queryset = SponsorshipLevel.unapproved_objects.filter(
                     project=self.project)
                 return queryset
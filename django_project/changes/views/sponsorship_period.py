@@ -2,7 +2,8 @@ __author__ = 'rischan - <--rischan@kartoza.com-->'
 __date__ = '12/28/15'
 
 import logging
-from base.models import Project
+from base.project_cache import get_project
+from common.project_objects import ProjectObjectMixin
 
 logger = logging.getLogger(__name__)
 
@@ -61,7 +62,7 @@ class JSONResponseMixin(object):
                 result += ',\n'
             result += '    "%s" : "%s"' % (
                 sponsorshipperiod.id,
-                sponsorshipperiod.name)
+                unicode(sponsorshipperiod))
             first_flag = False
         result += '\n}'
         return result
@@ -98,6 +99,14 @@ class JSONSponsorshipPeriodListView(
         return super(JSONSponsorshipPeriodListView, self).dispatch(
             request, *args, **kwargs)
 
+    def get_queryset(self):
+        """Get the sponsorship periods with their sponsor.
+
+        :returns: A queryset of SponsorshipPeriod.
+        :rtype: QuerySet
+        """
+        return SponsorshipPeriod.objects.select_related('sponsor')
+
     def render_to_response(self, context, **response_kwargs):
         """Render this Sponsorship Period as markdown.
 
@@ -139,7 +148,7 @@ class SponsorshipPeriodListView(
         project_slug = self.kwargs.get('project_slug', None)
         context['project_slug'] = project_slug
         if project_slug:
-            context['the_project'] = Project.objects.get(slug=project_slug)
+            context['the_project'] = get_project(project_slug, self.request)
         return context
 
     def get_queryset(self, queryset=None):
@@ -155,18 +164,23 @@ class SponsorshipPeriodListView(
         if self.queryset is None:
             project_slug = self.kwargs.get('project_slug', None)
             if project_slug:
-                project = Project.objects.get(slug=project_slug)
-                queryset = SponsorshipPeriod.objects.filter(project=project)
+                project = get_project(project_slug, self.request)
+                queryset = SponsorshipPeriod.objects.filter(
+                    project=project).select_related('project', 'sponsor')
                 return queryset
             else:
                 raise Http404('Sorry! We could not find your Sponsor Period!')
         return self.queryset
 
 
-class SponsorshipPeriodDetailView(SponsorshipPeriodMixin, DetailView):
+class SponsorshipPeriodDetailView(
+        SponsorshipPeriodMixin, ProjectObjectMixin, DetailView):
     """Detail view for Sponsorship Period."""
     context_object_name = 'sponsorshipperiod'
     template_name = 'sponsorship_period/detail.html'
+    select_related = ('sponsor', 'sponsorship_level')
+    not_found_message = (
+        'Sorry! We could not find your Sponsorship Period!')
 
     def get_queryset(self):
         """Get the queryset for this view.
@@ -178,31 +192,6 @@ class SponsorshipPeriodDetailView(SponsorshipPeriodMixin, DetailView):
         qs = SponsorshipPeriod.approved_objects.all()
         return qs
 
-    def get_object(self, queryset=None):
-        """Get the object for this view.
-
-        Because Sponsor slugs are unique within a Project, we need to make
-        sure that we fetch the correct Sponsor from the correct Project
-
-        :param queryset: A query set
-        :type queryset: QuerySet
-
-        :returns: Queryset which is filtered to only show a project
-        :rtype: QuerySet
-        :raises: Http404
-        """
-        if queryset is None:
-            queryset = self.get_queryset()
-            slug = self.kwargs.get('slug', None)
-            project_slug = self.kwargs.get('project_slug', None)
-            if slug and project_slug:
-                project = Project.objects.get(slug=project_slug)
-                obj = queryset.get(project=project, slug=slug)
-                return obj
-            else:
-                raise Http404('Sorry! We could not find '
-                              'your Sponsorship Period!')
-
 
 # noinspection PyAttributeOutsideInit
 class SponsorshipPeriodDeleteView(
@@ -229,7 +218,7 @@ class SponsorshipPeriodDeleteView(
         :rtype: HttpResponse
         """
         self.project_slug = self.kwargs.get('project_slug', None)
-        self.project = Project.objects.get(slug=self.project_slug)
+        self.project = get_project(self.project_slug, self.request)
         return super(
                 SponsorshipPeriodDeleteView,
                 self).get(request, *args, **kwargs)
@@ -250,7 +239,7 @@ class SponsorshipPeriodDeleteView(
         :rtype: HttpResponse
         """
         self.project_slug = self.kwargs.get('project_slug', None)
-        self.project = Project.objects.get(slug=self.project_slug)
+        self.project = get_project(self.project_slug, self.request)
         return super(
                 SponsorshipPeriodDeleteView,
                 self).post(request, *args, **kwargs)
@@ -344,7 +333,7 @@ class SponsorshipPeriodCreateView(
         """
         kwargs = super(SponsorshipPeriodCreateView, self).get_form_kwargs()
         self.project_slug = self.kwargs.get('project_slug', None)
-        self.project = Project.objects.get(slug=self.project_slug)
+        self.project = get_project(self.project_slug, self.request)
         kwargs.update({
             'user': self.request.user,
             'project': self.project
@@ -371,7 +360,7 @@ class SponsorshipPeriodUpdateView(
                 SponsorshipPeriodUpdateView,
                 self).get_form_kwargs()
         self.project_slug = self.kwargs.get('project_slug', None)
-        self.project = Project.objects.get(slug=self.project_slug)
+        self.project = get_project(self.project_slug, self.request)
         kwargs.update({
             'user': self.request.user,
             'project': self.project
@@ -405,7 +394,7 @@ class SponsorshipPeriodUpdateView(
         if self.request.user.is_staff:
             return qs
         else:
-            return qs.filter(creator=self.request.user)
+            return qs.filter(author=self.request.user)
 
     def get_success_url(self):
         """Define the redirect URL
@@ -471,7 +460,7 @@ class PendingSponsorshipPeriodListView(
         if self.queryset is None:
             self.project_slug = self.kwargs.get('project_slug', None)
             if self.project_slug:
-                self.project = Project.objects.get(slug=self.project_slug)
+                self.project = get_project(self.project_slug, self.request)
                 queryset = SponsorshipPeriod.unapproved_objects.filter(
                     project=self.project)
                 return queryset
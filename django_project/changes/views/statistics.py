@@ -0,0 +1,38 @@
+# coding=utf-8
+"""Views of the project statistics."""
+import json
+import logging
+from django.http import HttpResponse
+from django.views.generic import View
+from base.project_cache import get_project_or_404
+from ..statistics import statistics_data
+
+logger = logging.getLogger(__name__)
+
+
+class ProjectStatisticsView(View):
+    """The statistics of a project and its versions as JSON."""
+
+    def get(self, request, project_slug):
+        """Get the statistics.
+
+        :param request: HttpRequest object
+        :type request: HttpRequest
+
+        :param project_slug: The slug of the project.
+        :type project_slug: str
+
+        :returns: A JSON response with the counters of the project and its
+            versions, see statistics_data. Only staff get the 'pending'
+            counts, as on the project and version pages.
+        :rtype: HttpResponse
+
+        :raises: Http404
+        """
+        project = get_project_or_404(project_slug, request)
+        data = statistics_data(project)
+        if not request.user.is_staff:
+            for counters in [data] + data['versions']:
+                del counters['pending']
+        return HttpResponse(
+            json.dumps(data), content_type='application/json')
@@ -6,11 +6,14 @@
 # noinspection PyUnresolvedReferences
 # import logging
 from base.models import Project
+from base.project_cache import get_project, get_project_or_404
 # LOGGER = logging.getLogger(__name__)
 import re
 import zipfile
 import StringIO
+from itertools import groupby
 import pypandoc
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
 from django.http import Http404
 from django.shortcuts import get_object_or_404
@@ -20,14 +23,18 @@ from django.views.generic import (
     DeleteView,
     DetailView,
     UpdateView,
-    RedirectView)
+    RedirectView,
+    TemplateView)
 from django.http import HttpResponse
 from django.db import IntegrityError
 from django.core.exceptions import ValidationError
 from braces.views import LoginRequiredMixin, StaffuserRequiredMixin
-from pure_pagination.mixins import PaginationMixin
-from ..models import Version
+from common.pagination import KeysetPaginationMixin
+from common.project_objects import ProjectObjectMixin
+from ..caching import changelog_generation
+from ..models import Entry, Version
 from ..forms import VersionForm
+from ..statistics import version_statistics
 
 __author__ = 'Tim Sutton <tim@kartoza.com>'
 __revision__ = '$Format:%H$'
@@ -36,17 +43,32 @@ __license__ = ''
 __copyright__ = ''
 
 
+# Fields shown by version/includes/version-list-detail.html, with the
+# padded version for the keyset pagination.
+VERSION_LIST_FIELDS = (
+    'name', 'slug', 'approved', 'image_file', 'padded_version', 'project')
+
+
+VERSION_NOT_FOUND_MESSAGE = (
+    'Sorry! The version you are requesting could not be found or you do '
+    'not have permission to view the version. Also the version may not be '
+    'approved yet. Try logging in as a staff member if you wish to view '
+    'it.')
+
+
 class VersionMixin(object):
     """Mixing for all views to inherit which sets some standard properties."""
     model = Version  # implies -> queryset = Version.objects.all()
     form_class = VersionForm
 
 
-class VersionListView(VersionMixin, PaginationMixin, ListView):
-    """List view for Version."""
+class VersionListView(VersionMixin, KeysetPaginationMixin, ListView):
+    """List view for Version, newest first."""
     context_object_name = 'versions'
     template_name = 'version/list.html'
     paginate_by = 10
+    keyset_fields = ('-padded_version', '-id')
+    approximate_count = True
 
     def get_context_data(self, **kwargs):
         """Get the context data which is passed to a template.
@@ -58,7 +80,7 @@ class VersionListView(VersionMixin, PaginationMixin, ListView):
         :rtype: dict
         """
         context = super(VersionListView, self).get_context_data(**kwargs)
-        context['num_versions'] = self.get_queryset().count()
+        context['num_versions'] = context['page_obj'].count
         context['unapproved'] = False
         context['rst_download'] = False
         return context
@@ -80,24 +102,42 @@ class VersionListView(VersionMixin, PaginationMixin, ListView):
         project_slug = self.kwargs.get('project_slug', None)
         if project_slug:
             try:
-                project = Project.objects.get(slug=project_slug)
+                project = get_project(project_slug, self.request)
             except Project.DoesNotExist:
                 raise Http404(
                     'The requested project does not exist.'
                 )
             versions_qs = versions_qs.filter(
                 project=project).order_by('-padded_version')
-            return versions_qs
+            return versions_qs.select_related('project').only(
+                *VERSION_LIST_FIELDS)
         else:
             raise Http404('Sorry! We could not find your version!')
         # In case no project filter applied
         return versions_qs
 
 
-class VersionDetailView(VersionMixin, DetailView):
+class VersionDetailView(VersionMixin, ProjectObjectMixin, DetailView):
     """A tabular list style view for a Version."""
     context_object_name = 'version'
+    not_found_message = VERSION_NOT_FOUND_MESSAGE
     template_name = 'version/detail.html'
+    # Whether the template shows the version statistics.
+    show_statistics = True
+
+    def get_context_data(self, **kwargs):
+        """Get the context data which is passed to a template.
+
+        :param kwargs: Any arguments to pass to the superclass.
+        :type kwargs: dict
+
+        :returns: Context data which will be passed to the template.
+        :rtype: dict
+        """
+        context = super(VersionDetailView, self).get_context_data(**kwargs)
+        if self.show_statistics:
+            context['statistics'] = version_statistics(self.object)
+        return context
 
     def get_queryset(self):
         """Get the queryset for this view.
@@ -111,46 +151,101 @@ class VersionDetailView(VersionMixin, DetailView):
             versions_qs = Version.approved_objects.all()
         return versions_qs
 
-    def get_object(self, queryset=None):
-        """Get the object for this view.
 
-        Because Version slugs are unique within a Project, we need to make
-        sure that we fetch the correct Version from the correct Project
+# Seconds a version range diff stays cached, edits invalidate it earlier.
+VERSION_DIFF_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def version_range_categories(project, from_version, to_version):
+    """Get the approved entries of a range of versions, grouped by category.
+
+    The range covers the versions released after from_version up to and
+    including to_version, i.e. what changed when upgrading from one to the
+    other. All entries are fetched with one range query on the sortable
+    ``padded_version`` and the result is cached per (project, from, to).
+
+    :param project: The project of both versions.
+    :type project: Project
+
+    :param from_version: The older version (excluded).
+    :type from_version: Version
+
+    :param to_version: The newer version (included).
+    :type to_version: Version
+
+    :returns: A list of dictionaries with a 'category' and its 'entries',
+        in category order. Each entry has its version selected.
+    :rtype: list
+    """
+    cache_key = 'changes:version-diff:%s:%s:%s:%s' % (
+        project.id,
+        changelog_generation(project.id),
+        from_version.id,
+        to_version.id)
+    categories = cache.get(cache_key)
+    if categories is not None:
+        return categories
+    entries = Entry.approved_objects.filter(
+        version__project=project,
+        version__approved=True,
+        version__padded_version__gt=from_version.padded_version,
+        version__padded_version__lte=to_version.padded_version).order_by(
+        'category__sort_number',
+        'category__name',
+        'category',
+        'version__padded_version',
+        'id').select_related('category', 'version')
+    categories = [
+        {'category': category, 'entries': list(category_entries)}
+        for category, category_entries in groupby(
+            entries, lambda entry: entry.category)]
+    cache.set(cache_key, categories, VERSION_DIFF_CACHE_TIMEOUT)
+    return categories
+
+
+class VersionDiffView(VersionMixin, TemplateView):
+    """Everything that changed between two versions of a project."""
+    template_name = 'version/diff.html'
 
-        :param queryset
-        :type queryset: QuerySet
+    def get_context_data(self, **kwargs):
+        """Get the context data which is passed to a template.
+
+        :param kwargs: Any arguments to pass to the superclass.
+        :type kwargs: dict
+
+        :returns: Context data which will be passed to the template.
+        :rtype: dict
 
-        :returns: Queryset which is filtered to only show a project
-        :rtype QuerySet
         :raises: Http404
         """
-        if queryset is None:
-            queryset = self.get_queryset()
-        slug = self.kwargs.get('slug', None)
-        project_slug = self.kwargs.get('project_slug', None)
-        if slug and project_slug:
-            try:
-                project = Project.objects.get(slug=project_slug)
-            except Project.DoesNotExist:
-                raise Http404(
-                    'Requested project does not exist.')
-            try:
-                obj = queryset.filter(project=project).get(slug=slug)
-                return obj
-            except Version.DoesNotExist:
-                raise Http404(
-                    'Sorry! The project you are requesting a version for '
-                    'could not be found or you do not have permission to '
-                    'view the version. Also the version may not be '
-                    'approved yet. Try logging in as a staff member if '
-                    'you wish to view it.')
-        else:
-            raise Http404('Sorry! We could not find your version!')
+        context = super(VersionDiffView, self).get_context_data(**kwargs)
+        project = get_project_or_404(
+            self.kwargs.get('project_slug', None), self.request)
+        versions = Version.approved_objects.filter(
+            project=project,
+            slug__in=[self.kwargs['from_slug'], self.kwargs['to_slug']])
+        versions = dict((version.slug, version) for version in versions)
+        for version in versions.values():
+            version.project = project
+        try:
+            from_version = versions[self.kwargs['from_slug']]
+            to_version = versions[self.kwargs['to_slug']]
+        except KeyError:
+            raise Http404('Sorry! We could not find your versions!')
+        if from_version.padded_version > to_version.padded_version:
+            from_version, to_version = to_version, from_version
+        context['project'] = project
+        context['from_version'] = from_version
+        context['to_version'] = to_version
+        context['category_rows'] = version_range_categories(
+            project, from_version, to_version)
+        return context
 
 
 class VersionMarkdownView(VersionDetailView):
     """Return a markdown Version detail."""
     template_name = 'version/detail.md'
+    show_statistics = False
 
     def render_to_response(self, context, **response_kwargs):
         """Render this Version as markdown.
@@ -172,9 +267,10 @@ class VersionMarkdownView(VersionDetailView):
         return response
 
 
-class VersionThumbnailView(VersionMixin, DetailView):
+class VersionThumbnailView(VersionMixin, ProjectObjectMixin, DetailView):
     """A contact sheet style list of thumbs per entry."""
     context_object_name = 'version'
+    not_found_message = VERSION_NOT_FOUND_MESSAGE
     template_name = 'version/detail-thumbs.html'
 
     def get_context_data(self, **kwargs):
@@ -202,43 +298,6 @@ class VersionThumbnailView(VersionMixin, DetailView):
             versions_qs = Version.approved_objects.all()
         return versions_qs
 
-    def get_object(self, queryset=None):
-        """Get the object referenced by this view.
-
-        :param queryset: An option queryset from which the object should be
-            retrieved.
-        :type queryset: QuerySet
-
-        :returns: A Version instance.
-        :rtype: Version
-        """
-        if queryset is None:
-            queryset = self.get_queryset()
-        slug = self.kwargs.get('slug', None)
-        project_slug = self.kwargs.get('project_slug', None)
-        if slug and project_slug:
-            try:
-                project = Project.objects.get(slug=project_slug)
-            except Project.DoesNotExist:
-                raise Http404(
-                    'Sorry! The project you are requesting a version for '
-                    'could not be found or you do not have permission to '
-                    'view the version. Also the version may not be '
-                    'approved yet. Try logging in as a staff member if '
-                    'you wish to view it.')
-            try:
-                obj = queryset.filter(project=project).get(slug=slug)
-                return obj
-            except Version.DoesNotExist:
-                raise Http404(
-                    'Sorry! The version you are requesting '
-                    'could not be found or you do not have permission to '
-                    'view the version. Also the version may not be '
-                    'approved yet. Try logging in as a staff member if '
-                    'you wish to view it.')
-        else:
-            raise Http404('Sorry! We could not find your version!')
-
 
 # noinspection PyAttributeOutsideInit
 class VersionDeleteView(LoginRequiredMixin, VersionMixin, DeleteView):
@@ -266,7 +325,7 @@ class VersionDeleteView(LoginRequiredMixin, VersionMixin, DeleteView):
 
         """
         self.project_slug = self.kwargs.get('project_slug', None)
-        self.project = Project.objects.get(slug=self.project_slug)
+        self.project = get_project(self.project_slug, self.request)
         return super(VersionDeleteView, self).get(request, *args, **kwargs)
 
     def post(self, request, *args, **kwargs):
@@ -288,7 +347,7 @@ class VersionDeleteView(LoginRequiredMixin, VersionMixin, DeleteView):
         :rtype: HttpResponse
         """
         self.project_slug = self.kwargs.get('project_slug', None)
-        self.project = Project.objects.get(slug=self.project_slug)
+        self.project = get_project(self.project_slug, self.request)
         return super(VersionDeleteView, self).post(request, *args, **kwargs)
 
     def get_success_url(self):
@@ -361,7 +420,7 @@ class VersionCreateView(LoginRequiredMixin, VersionMixin, CreateView):
         """
         kwargs = super(VersionCreateView, self).get_form_kwargs()
         self.project_slug = self.kwargs.get('project_slug', None)
-        self.project = Project.objects.get(slug=self.project_slug)
+        self.project = get_project(self.project_slug, self.request)
         kwargs.update({
             'user': self.request.user,
             'project': self.project
@@ -392,7 +451,7 @@ class VersionUpdateView(StaffuserRequiredMixin, VersionMixin, UpdateView):
         """
         kwargs = super(VersionUpdateView, self).get_form_kwargs()
         self.project_slug = self.kwargs.get('project_slug', None)
-        self.project = Project.objects.get(slug=self.project_slug)
+        self.project = get_project(self.project_slug, self.request)
         kwargs.update({
             'user': self.request.user,
             'project': self.project
@@ -436,12 +495,13 @@ class VersionUpdateView(StaffuserRequiredMixin, VersionMixin, UpdateView):
 class PendingVersionListView(
         StaffuserRequiredMixin,
         VersionMixin,
-        PaginationMixin,
+        KeysetPaginationMixin,
         ListView):
     """List view for pending Version. Staff see all """
     context_object_name = 'versions'
     template_name = 'version/list.html'
     paginate_by = 10
+    keyset_fields = ('-padded_version', '-id')
 
     def __init__(self):
         """
@@ -465,7 +525,7 @@ class PendingVersionListView(
         """
         context = super(PendingVersionListView, self).get_context_data(
             **kwargs)
-        context['num_versions'] = self.get_queryset().count()
+        context['num_versions'] = context['page_obj'].count
         context['unapproved'] = True
         context['project'] = self.project
         return context
@@ -480,9 +540,10 @@ class PendingVersionListView(
         if self.queryset is None:
             self.project_slug = self.kwargs.get('project_slug', None)
             if self.project_slug:
-                self.project = Project.objects.get(slug=self.project_slug)
+                self.project = get_project(self.project_slug, self.request)
                 queryset = Version.unapproved_objects.filter(
-                    project=self.project)
+                    project=self.project).select_related('project').only(
+                    *VERSION_LIST_FIELDS)
                 if self.request.user.is_staff:
                     return queryset
                 else:
@@ -510,7 +571,7 @@ class ApproveVersionView(StaffuserRequiredMixin, VersionMixin, RedirectView):
         :returns: A url.
         :rtype: str
         """
-        project = Project.objects.get(slug=project_slug)
+        project = get_project(project_slug, self.request)
         version_qs = Version.unapproved_objects.filter(project=project)
         version = get_object_or_404(version_qs, slug=slug)
         version.approved = True
@@ -520,8 +581,13 @@ class ApproveVersionView(StaffuserRequiredMixin, VersionMixin, RedirectView):
         })
 
 
-class VersionDownload(VersionMixin, StaffuserRequiredMixin, DetailView):
+class VersionDownload(
+        VersionMixin,
+        StaffuserRequiredMixin,
+        ProjectObjectMixin,
+        DetailView):
     """View to allow staff users to download Version page in RST format"""
+    not_found_message = VERSION_NOT_FOUND_MESSAGE
     template_name = 'version/detail-content.html'
 
     def render_to_response(self, context, **response_kwargs):
@@ -602,9 +668,10 @@ class VersionDownload(VersionMixin, StaffuserRequiredMixin, DetailView):
         return temp_path
 
 
-class VersionDownloadGnu(VersionMixin, DetailView):
+class VersionDownloadGnu(VersionMixin, ProjectObjectMixin, DetailView):
     """A tabular list style view for a Version."""
     context_object_name = 'version'
+    not_found_message = VERSION_NOT_FOUND_MESSAGE
     template_name = 'version/detail-titles.txt'
 
     def get_queryset(self):
@@ -619,42 +686,6 @@ class VersionDownloadGnu(VersionMixin, DetailView):
             versions_qs = Version.approved_objects.all()
         return versions_qs
 
-    def get_object(self, queryset=None):
-        """Get the object for this view.
-
-        Because Version slugs are unique within a Project, we need to make
-        sure that we fetch the correct Version from the correct Project
-
-        :param queryset
-        :type queryset: QuerySet
-
-        :returns: Queryset which is filtered to only show a project
-        :rtype QuerySet
-        :raises: Http404
-        """
-        if queryset is None:
-            queryset = self.get_queryset()
-        slug = self.kwargs.get('slug', None)
-        project_slug = self.kwargs.get('project_slug', None)
-        if slug and project_slug:
-            try:
-                project = Project.objects.get(slug=project_slug)
-            except Project.DoesNotExist:
-                raise Http404(
-                    'Requested project does not exist.')
-            try:
-                obj = queryset.filter(project=project).get(slug=slug)
-                return obj
-            except Version.DoesNotExist:
-                raise Http404(
-                    'Sorry! The project you are requesting a version for '
-                    'could not be found or you do not have permission to '
-                    'view the version. Also the version may not be '
-                    'approved yet. Try logging in as a staff member if '
-                    'you wish to view it.')
-        else:
-            raise Http404('Sorry! We could not find your version!')
-
     def get(self, request, *args, **kwargs):
         """We overload this so we can return a text document instead of html.
 
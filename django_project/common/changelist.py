@@ -0,0 +1,36 @@
+# coding=utf-8
+"""**Admin changelists for large tables**
+
+The default changelist runs ``COUNT(*)`` twice (the filtered and the full
+table) and loads the related objects of every row one by one when they are
+displayed. Admins of big tables such as entries and votes mix this in and
+set ``list_select_related`` for their displayed relations, prefix (``^``)
+``search_fields`` on indexed columns and ``raw_id_fields`` for relations
+with too many rows for a select box.
+
+Example::
+
+    class VoteAdmin(LargeTableAdminMixin, reversion.VersionAdmin):
+        list_display = ('ballot', 'user', 'choice')
+        list_select_related = ('ballot__committee', 'user')
+        search_fields = ('^user__username',)
+        raw_id_fields = ('user', 'ballot')
+"""
+from .pagination import EstimatedCountPaginator
+
+
+class LargeTableAdminMixin(object):
+    """Mixin for a ModelAdmin listing a large table."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        """Ensure we use the correct manager.
+
+        :param request: HttpRequest object
+        """
+        qs = self.model.objects.all()
+        ordering = self.get_ordering(request)
+        if ordering:
+            qs = qs.order_by(*ordering)
+        return qs
@@ -0,0 +1,312 @@
+# coding=utf-8
+"""**Keyset (cursor) pagination for list views**
+
+OFFSET pagination makes the database read and discard every row before the
+requested page, so deep pages of big projects get slower linearly. Keyset
+pagination instead remembers the sort key of the last row shown and asks
+for the rows after it, which an index on the sort key answers directly.
+
+Example::
+
+    class VersionListView(KeysetPaginationMixin, ListView):
+        keyset_fields = ('-padded_version', '-id')
+        paginate_by = 10
+
+The page links carry an opaque ``after`` or ``before`` cursor instead of a
+page number.
+"""
+import base64
+import json
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+
+
+def encode_cursor(values):
+    """Encode the sort key values of a row as an url safe cursor.
+
+    :param values: The values of the keyset fields.
+    :type values: list
+
+    :returns: The cursor.
+    :rtype: str
+    """
+    return base64.urlsafe_b64encode(json.dumps(values))
+
+
+def decode_cursor(cursor, size):
+    """Decode a cursor created by encode_cursor.
+
+    :param cursor: The cursor from the request.
+    :type cursor: str
+
+    :param size: Expected number of values.
+    :type size: int
+
+    :returns: The values, or None if the cursor is invalid.
+    :rtype: list, None
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(str(cursor)))
+    except (TypeError, ValueError, UnicodeEncodeError):
+        return None
+    if not isinstance(values, list) or len(values) != size:
+        return None
+    return values
+
+
+def keyset_filter(keyset_fields, values, forward=True):
+    """Build the filter selecting the rows after (or before) a sort key.
+
+    For ordering ``('-a', 'b')`` and key ``(1, 2)`` the rows after are
+    ``a < 1 OR (a = 1 AND b > 2)``.
+
+    :param keyset_fields: Ordering of the list, the last field must be
+        unique (usually the primary key).
+    :type keyset_fields: tuple
+
+    :param values: The sort key values of the boundary row.
+    :type values: list
+
+    :param forward: True for the rows after the key, False for before.
+    :type forward: bool
+
+    :returns: A filter for the queryset.
+    :rtype: Q
+    """
+    condition = Q()
+    equal = Q()
+    for field, value in zip(keyset_fields, values):
+        descending = field.startswith('-')
+        name = field.lstrip('-')
+        lookup = 'lt' if descending == forward else 'gt'
+        condition |= equal & Q(**{'%s__%s' % (name, lookup): value})
+        equal &= Q(**{name: value})
+    return condition
+
+
+def estimated_count(queryset, exact_below=0):
+    """Count the rows of a queryset, estimated by the planner if possible.
+
+    On PostgreSQL the row estimate of the query plan is used, which does
+    not scan the table. Other databases fall back to an exact count.
+
+    :param queryset: The queryset to count.
+    :type queryset: QuerySet
+
+    :param exact_below: Count exactly when fewer rows are estimated, where
+        counting is cheap and an estimate would show.
+    :type exact_below: int
+
+    :returns: The (estimated) number of rows.
+    :rtype: int
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+    if not isinstance(plan, list):
+        plan = json.loads(plan)
+    estimate = int(plan[0]['Plan']['Plan Rows'])
+    if estimate < exact_below:
+        return queryset.count()
+    return estimate
+
+
+def is_unfiltered(queryset):
+    """Whether a queryset selects every row of its table.
+
+    :param queryset: The queryset.
+    :type queryset: QuerySet
+
+    :rtype: bool
+    """
+    query = queryset.query
+    return not (
+        query.where or query.distinct or query.low_mark or
+        query.high_mark is not None)
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator estimating the number of objects of large tables.
+
+    The admin changelist counts its rows for the page links, which scans
+    the whole table. For the unfiltered changelist ``COUNT(*)`` is replaced
+    by the planner estimate of the table size, so the last page links may
+    be off a little, the rows shown are not. Filtered or searched lists are
+    counted exactly: the planner guesses their selectivity, which can be
+    off by orders of magnitude.
+    """
+    exact_below = 10000
+
+    def _get_count(self):
+        """Get the (estimated) number of objects, across all pages.
+
+        :rtype: int
+        """
+        if self._count is None:
+            if is_unfiltered(self.object_list):
+                self._count = estimated_count(
+                    self.object_list, exact_below=self.exact_below)
+            else:
+                self._count = self.object_list.count()
+        return self._count
+    count = property(_get_count)
+
+
+class KeysetPage(object):
+    """One page of a keyset paginated list.
+
+    Provides the parts of the Django Page interface the templates use
+    (``object_list``, ``has_next``, ``has_previous``, ``has_other_pages``)
+    plus the cursors of the neighbouring pages.
+    """
+
+    def __init__(self, object_list, next_cursor, previous_cursor, counter):
+        """Constructor.
+
+        :param object_list: The objects of this page.
+        :type object_list: list
+
+        :param next_cursor: Cursor of the next page, or None.
+        :type next_cursor: str, None
+
+        :param previous_cursor: Cursor of the previous page, or None.
+        :type previous_cursor: str, None
+
+        :param counter: Callable counting all objects, only called when
+            the count is used.
+        :type counter: callable
+        """
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self._counter = counter
+        self._count = None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def count(self):
+        """Total number of objects in the list, on all pages.
+
+        A single page list is counted for free, otherwise the count is
+        exact or estimated depending on the view.
+        """
+        if self._count is None:
+            if not self.has_other_pages():
+                self._count = len(self.object_list)
+            else:
+                self._count = self._counter()
+        return self._count
+
+
+class KeysetPaginationMixin(object):
+    """Paginate a ListView on a unique sort key instead of an offset.
+
+    Set ``keyset_fields`` to the ordering of the list, ending with a unique
+    field, and ``paginate_by``. Set ``approximate_count`` to use the
+    planner estimate rather than ``COUNT(*)`` for the total of lists with
+    at least ``exact_count_below`` rows.
+    """
+    keyset_fields = ('-id',)
+    approximate_count = False
+    exact_count_below = 10000
+    paginate_by = 10
+
+    def _values(self, obj):
+        """Get the sort key values of an object."""
+        values = []
+        for field in self.keyset_fields:
+            value = obj
+            for attribute in field.lstrip('-').split('__'):
+                value = getattr(value, attribute)
+            values.append(value)
+        return values
+
+    def count_queryset(self, queryset):
+        """Count all objects of the list.
+
+        :param queryset: The unpaginated queryset.
+        :type queryset: QuerySet
+
+        :returns: The number of objects.
+        :rtype: int
+        """
+        if self.approximate_count:
+            return estimated_count(
+                queryset, exact_below=self.exact_count_below)
+        return queryset.count()
+
+    def paginate_queryset(self, queryset, page_size):
+        """Get the page of the list selected by the request cursor.
+
+        :param queryset: The queryset to paginate.
+        :type queryset: QuerySet
+
+        :param page_size: The number of objects per page.
+        :type page_size: int
+
+        :returns: A tuple of (paginator, page, object_list, is_paginated)
+            as expected by MultipleObjectMixin. There is no paginator.
+        :rtype: tuple
+        """
+        size = len(self.keyset_fields)
+        after = decode_cursor(self.request.GET.get('after', ''), size)
+        before = None
+        if after is None:
+            before = decode_cursor(self.request.GET.get('before', ''), size)
+        forward = before is None
+
+        ordering = self.keyset_fields
+        if not forward:
+            ordering = tuple(
+                field[1:] if field.startswith('-') else '-' + field
+                for field in ordering)
+        page_queryset = queryset.order_by(*ordering)
+        if after is not None:
+            page_queryset = page_queryset.filter(
+                keyset_filter(self.keyset_fields, after))
+        elif before is not None:
+            page_queryset = page_queryset.filter(
+                keyset_filter(self.keyset_fields, before, forward=False))
+
+        # One extra row tells whether there is a page beyond this one.
+        object_list = list(page_queryset[:page_size + 1])
+        more = len(object_list) > page_size
+        object_list = object_list[:page_size]
+        if not forward:
+            object_list.reverse()
+
+        if forward:
+            has_next, has_previous = more, after is not None
+        else:
+            # We came back from the page after this one.
+            has_next, has_previous = True, more
+        next_cursor = previous_cursor = None
+        if object_list and has_next:
+            next_cursor = encode_cursor(self._values(object_list[-1]))
+        if object_list and has_previous:
+            previous_cursor = encode_cursor(self._values(object_list[0]))
+        page = KeysetPage(
+            object_list,
+            next_cursor,
+            previous_cursor,
+            lambda: self.count_queryset(queryset))
+        return None, page, object_list, page.has_other_pages()
@@ -0,0 +1,106 @@
+# coding=utf-8
+"""**Resolve the objects of a project from the slugs in an url**
+
+Most urls name an object by the slug of its project and its own slug (and
+e.g. the slug of its committee), which are only unique together. Looking
+up the project first and then the object costs a query each, and the
+template then loads the project (and other related objects) again one by
+one. Here the object is fetched with one join on the slugs, selecting its
+project and the relations its template uses.
+
+Example::
+
+    class BallotDetailView(ProjectObjectMixin, DetailView):
+        project_path = 'committee__project'
+        slug_lookups = (('committee_slug', 'committee__slug'),
+                        ('slug', 'slug'))
+        select_related = ('proposer',)
+"""
+from django.core.exceptions import ObjectDoesNotExist
+from django.http import Http404
+
+
+def get_project_object(
+        queryset,
+        project_slug,
+        project_path='project',
+        select_related=(),
+        message=None,
+        **lookups):
+    """Get an object of a project in one query.
+
+    :param queryset: The queryset to get the object from.
+    :type queryset: QuerySet
+
+    :param project_slug: Slug of the project of the object.
+    :type project_slug: str
+
+    :param project_path: Lookup path from the model to its project, e.g.
+        'committee__project'. It is always selected.
+    :type project_path: str
+
+    :param select_related: More relations to select with the object.
+    :type select_related: tuple
+
+    :param message: The message of the Http404 when there is no object.
+    :type message: str
+
+    :param lookups: The lookups of the object within its project.
+
+    :returns: The object.
+    :rtype: Model
+
+    :raises: Http404
+    """
+    if not project_slug or not all(lookups.values()):
+        raise Http404(message or 'Sorry! We could not find your object!')
+    lookups['%s__slug' % project_path] = project_slug
+    try:
+        return queryset.select_related(project_path, *select_related).get(
+            **lookups)
+    except ObjectDoesNotExist:
+        raise Http404(message or 'Sorry! We could not find your object!')
+
+
+class ProjectObjectMixin(object):
+    """Get the object of a detail view with get_project_object.
+
+    The url must have a ``project_slug`` and the ``slug_lookups`` keyword
+    arguments. After get_object, ``self.project`` is the project of the
+    object.
+    """
+    # Lookup path from the model to its project.
+    project_path = 'project'
+    # Pairs of (url keyword argument, lookup of the object).
+    slug_lookups = (('slug', 'slug'),)
+    # Relations the template uses besides the project.
+    select_related = ()
+    not_found_message = 'Sorry! We could not find your object!'
+
+    def get_object(self, queryset=None):
+        """Get the object named by the url.
+
+        :param queryset: The queryset to get the object from, the view
+            queryset if None.
+        :type queryset: QuerySet
+
+        :returns: The object.
+        :rtype: Model
+
+        :raises: Http404
+        """
+        if queryset is None:
+            queryset = self.get_queryset()
+        obj = get_project_object(
+            queryset,
+            self.kwargs.get('project_slug', None),
+            project_path=self.project_path,
+            select_related=self.select_related,
+            message=self.not_found_message,
+            **dict(
+                (lookup, self.kwargs.get(kwarg, None))
+                for kwarg, lookup in self.slug_lookups))
+        self.project = obj
+        for attribute in self.project_path.split('__'):
+            self.project = getattr(self.project, attribute)
+        return obj
@@ -0,0 +1,54 @@
+/**
+ * Search box for the user inputs of base.widgets.
+ *
+ * The input holds the ids of the picked users, separated by commas when
+ * data-multiple is true. It is hidden behind a search box querying the
+ * data-url (the user-autocomplete view) with jQuery UI autocomplete, and
+ * a list of the picked users.
+ */
+$(function () {
+    $('input.user-autocomplete').each(function () {
+        var input = $(this).hide();
+        var multiple = input.data('multiple');
+        var selected = input.data('selected') || [];
+        var search = $('<input type="text" class="form-control">')
+            .attr('placeholder', 'Search users by name');
+        var picked = $('<ul class="list-inline"></ul>');
+        input.after(picked).after(search);
+
+        var update = function () {
+            input.val($.map(selected, function (user) {
+                return user.id;
+            }).join(','));
+            picked.empty();
+            $.each(selected, function (index, user) {
+                var remove = $('<a href="#">&times;</a>').click(function (e) {
+                    e.preventDefault();
+                    selected.splice(index, 1);
+                    update();
+                });
+                picked.append($('<li></li>').text(user.label + ' ')
+                    .append(remove));
+            });
+        };
+
+        search.autocomplete({
+            source: input.data('url'),
+            minLength: 2,
+            select: function (e, ui) {
+                e.preventDefault();
+                var user = {id: ui.item.id, label: ui.item.label};
+                if (!multiple) {
+                    selected = [user];
+                } else if ($.grep(selected, function (other) {
+                        return other.id === user.id;
+                    }).length === 0) {
+                    selected.push(user);
+                }
+                search.val('');
+                update();
+            }
+        });
+        update();
+    });
+});
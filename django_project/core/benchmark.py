@@ -0,0 +1,294 @@
+# coding=utf-8
+"""
+core.benchmark
+
+Repeatable latency benchmark of the most visited pages.
+
+The pages are requested in process through the Django test client, so no
+web server or external service is needed; the figures therefore cover the
+middleware, views and templates but not the network or WSGI server. Run it
+against a database filled by ``manage.py generate_load_data`` and compare
+the results with a stored baseline to notice regressions before a release
+announcement brings the traffic.
+"""
+import json
+import math
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.core.urlresolvers import reverse
+from django.db.models import Count
+from django.test.client import Client
+from base.models import Project
+from changes.models import Version
+from vota.models import Ballot
+
+# Page name -> (url name, function building the url kwargs from targets).
+BENCHMARK_PAGES = (
+    ('project-list', 'project-list', lambda targets: {}),
+    ('project-detail', 'project-detail', lambda targets: {
+        'slug': targets['project'].slug}),
+    ('version-detail', 'version-detail', lambda targets: {
+        'project_slug': targets['project'].slug,
+        'slug': targets['version'].slug}),
+    ('version-thumbs', 'version-thumbs', lambda targets: {
+        'project_slug': targets['project'].slug,
+        'slug': targets['version'].slug}),
+    ('version-rss', 'latest-version-rss-feed', lambda targets: {
+        'project_slug': targets['project'].slug}),
+    ('version-atom', 'latest-version-atom-feed', lambda targets: {
+        'project_slug': targets['project'].slug}),
+    ('entry-rss', 'latest-entry-rss-feed', lambda targets: {
+        'project_slug': targets['project'].slug}),
+    ('entry-atom', 'latest-entry-atom-feed', lambda targets: {
+        'project_slug': targets['project'].slug}),
+    ('committee-detail', 'committee-detail', lambda targets: {
+        'project_slug': targets['project'].slug,
+        'slug': targets['committee'].slug}),
+    ('ballot-detail', 'ballot-detail', lambda targets: {
+        'project_slug': targets['project'].slug,
+        'committee_slug': targets['committee'].slug,
+        'slug': targets['ballot'].slug}),
+)
+
+# Pages only shown to logged in users.
+LOGIN_REQUIRED_PAGES = ('ballot-detail',)
+
+# Password of the users created by generate_load_data.
+LOAD_DATA_PASSWORD = 'password'
+
+# Regressions smaller than this (ms) are considered noise.
+MINIMUM_REGRESSION_MS = 5.0
+
+
+class BenchmarkError(Exception):
+    """Raised when the database has no data to benchmark."""
+
+
+def benchmark_host():
+    """Get a host name the site accepts, to send with the requests.
+
+    The test client sends ``testserver``, which only the test runner
+    allows.
+
+    :returns: The first host of ALLOWED_HOSTS, or localhost if any host
+        is allowed or none is set (which DEBUG accepts).
+    :rtype: str
+    """
+    for host in settings.ALLOWED_HOSTS:
+        if host != '*':
+            return host.lstrip('.').split(':')[0]
+    return 'localhost'
+
+
+def benchmark_targets(project_slug=None):
+    """Choose the objects whose pages are benchmarked.
+
+    Without a slug the approved public project with the most versions is
+    used, with its latest approved version and the ballot with the most
+    votes.
+
+    :param project_slug: Slug of the project to benchmark.
+    :type project_slug: str, None
+
+    :returns: A dictionary with 'project', 'version', 'committee' and
+        'ballot'.
+    :rtype: dict
+    """
+    projects = Project.objects.filter(approved=True, private=False)
+    if project_slug:
+        projects = projects.filter(slug=project_slug)
+    project = projects.annotate(
+        versions=Count('version')).order_by('-versions', 'id').first()
+    if project is None:
+        raise BenchmarkError('There is no approved public project.')
+    version = Version.objects.filter(
+        project=project, approved=True).order_by('-padded_version').first()
+    ballot = Ballot.objects.filter(
+        committee__project=project).annotate(
+        votes=Count('vote')).order_by('-votes', 'id').select_related(
+        'committee__chair').first()
+    if version is None or ballot is None:
+        raise BenchmarkError(
+            'Project %s needs an approved version and a ballot.' % project)
+    return {
+        'project': project,
+        'version': version,
+        'committee': ballot.committee,
+        'ballot': ballot,
+    }
+
+
+def percentile(values, percent):
+    """Get a percentile of the values, by the nearest rank method.
+
+    :param values: The measured values.
+    :type values: list
+
+    :param percent: The percentile, e.g. 95.
+    :type percent: int
+
+    :returns: The value at the percentile.
+    :rtype: float
+    """
+    ordered = sorted(values)
+    rank = int(math.ceil(percent / 100.0 * len(ordered))) - 1
+    return ordered[max(0, min(rank, len(ordered) - 1))]
+
+
+def measure_page(client, url, requests=50, warmup=5, cold=False):
+    """Request a page repeatedly and summarise the latencies.
+
+    :param client: The test client.
+    :type client: Client
+
+    :param url: The url of the page.
+    :type url: str
+
+    :param requests: Number of measured requests.
+    :type requests: int
+
+    :param warmup: Number of requests made before measuring.
+    :type warmup: int
+
+    :param cold: Clear all configured caches before every request.
+    :type cold: bool
+
+    :returns: Latencies in ms, the throughput in requests per second and
+        the status code (the first one other than 200 if any).
+    :rtype: dict
+    """
+    for _ in range(warmup):
+        client.get(url)
+    latencies = []
+    status = None
+    for _ in range(requests):
+        if cold:
+            for alias in settings.CACHES:
+                caches[alias].clear()
+        start = time.time()
+        response = client.get(url)
+        latencies.append((time.time() - start) * 1000)
+        if status in (None, 200):
+            # Keep the first error, one is enough to distrust the page.
+            status = response.status_code
+    total = sum(latencies)
+    return {
+        'url': url,
+        'status': status,
+        'requests': requests,
+        'p50': round(percentile(latencies, 50), 2),
+        'p95': round(percentile(latencies, 95), 2),
+        'mean': round(total / requests, 2),
+        'min': round(min(latencies), 2),
+        'max': round(max(latencies), 2),
+        'throughput': round(requests * 1000 / total, 2) if total else None,
+    }
+
+
+def run_benchmark(
+        targets,
+        pages=None,
+        requests=50,
+        warmup=5,
+        cold=False,
+        username=None,
+        password=LOAD_DATA_PASSWORD,
+        host=None):
+    """Benchmark the pages of the targets.
+
+    Pages are requested as an anonymous visitor, except those in
+    LOGIN_REQUIRED_PAGES which are requested as a logged in user.
+
+    :param targets: The objects to request, see benchmark_targets.
+    :type targets: dict
+
+    :param pages: Names of the BENCHMARK_PAGES to run, all if None.
+    :type pages: list, None
+
+    :param username: User to log in as, by default the chair of the
+        benchmarked committee.
+    :type username: str, None
+
+    :param password: Password of the user.
+    :type password: str
+
+    :param host: Host name to request, see benchmark_host by default.
+    :type host: str, None
+
+    :returns: A dictionary of page name -> figures from measure_page.
+    :rtype: dict
+    """
+    host = host or benchmark_host()
+    anonymous = Client(HTTP_HOST=host)
+    anonymous.post('/set_language/', data={'language': 'en'})
+    member = Client(HTTP_HOST=host)
+    member.post('/set_language/', data={'language': 'en'})
+    username = username or targets['committee'].chair.username
+    logged_in = False
+    results = {}
+    for name, url_name, url_kwargs in BENCHMARK_PAGES:
+        if pages and name not in pages:
+            continue
+        client = anonymous
+        if name in LOGIN_REQUIRED_PAGES:
+            if not logged_in:
+                logged_in = member.login(
+                    username=username, password=password)
+                if not logged_in:
+                    raise BenchmarkError('Can not log in as %s.' % username)
+            client = member
+        url = reverse(url_name, kwargs=url_kwargs(targets))
+        results[name] = measure_page(
+            client, url, requests=requests, warmup=warmup, cold=cold)
+    return results
+
+
+def compare(results, baseline, tolerance=0.2):
+    """Compare benchmark results with a baseline.
+
+    A page regressed when its p95 latency is more than ``tolerance``
+    (a fraction) and more than MINIMUM_REGRESSION_MS above the baseline,
+    or when it stopped returning the same status code.
+
+    :param results: Results of run_benchmark.
+    :type results: dict
+
+    :param baseline: Results of an earlier run.
+    :type baseline: dict
+
+    :param tolerance: Allowed relative slowdown.
+    :type tolerance: float
+
+    :returns: Descriptions of the regressions.
+    :rtype: list
+    """
+    regressions = []
+    for name, result in sorted(results.items()):
+        reference = baseline.get(name)
+        if not reference:
+            continue
+        if result['status'] != reference['status']:
+            regressions.append('%s: status %s, baseline %s' % (
+                name, result['status'], reference['status']))
+        limit = max(
+            reference['p95'] * (1 + tolerance),
+            reference['p95'] + MINIMUM_REGRESSION_MS)
+        if result['p95'] > limit:
+            regressions.append('%s: p95 %.1f ms, baseline %.1f ms' % (
+                name, result['p95'], reference['p95']))
+    return regressions
+
+
+def dump_results(results, stream):
+    """Write results as JSON in a stable, diff friendly layout.
+
+    :param results: Results of run_benchmark.
+    :type results: dict
+
+    :param stream: The file to write to.
+    :type stream: file
+    """
+    json.dump(
+        results, stream, indent=2, sort_keys=True, separators=(',', ': '))
+    stream.write('\n')
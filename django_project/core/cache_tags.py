@@ -0,0 +1,340 @@
+# coding=utf-8
+"""
+core.cache_tags
+
+Tag based invalidation of cached data.
+
+Every cached value depends on some tags, e.g. ``project:3`` or
+``version:12``. Each tag has a generation counter in the cache; cached
+values are stored together with the generations of their tags at the time
+they were computed and are only used while all those generations are still
+current. Invalidating a tag is a single increment of its counter, however
+many values depend on it.
+
+Models declare the tags they dirty with ``register``, usually in the
+handlers module of their app::
+
+    register(Version, lambda version: [
+        'version:%s' % version.id, 'project:%s' % version.project_id])
+
+and saving or deleting an instance then invalidates those tags. Code paths
+which change rows without sending model signals (``update()``,
+``bulk_create()``) call ``invalidate_tags`` themselves.
+
+The signals fire before the change is committed, so a concurrent request
+could still read the old rows and cache them under the new generation.
+Tags invalidated while serving a request are therefore invalidated again
+once the request has finished (after its changes were committed), as
+core.edge_cache does for its purges.
+
+Counts of invalidations per tag kind and of tagged cache lookups are kept
+per process and shown to staff at ``/cache-tags/stats/``.
+"""
+import json
+import threading
+import time
+from collections import defaultdict
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import request_finished, request_started
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import Signal
+from django.http import HttpResponse
+from django.views.generic import View
+from braces.views import StaffuserRequiredMixin
+
+GENERATION_KEY = 'tags:generation:%s'
+
+# Sent after tags were invalidated, e.g. to purge an external cache.
+tags_invalidated = Signal(providing_args=['tags'])
+
+# model -> function returning the tags an instance dirties.
+_registry = {}
+
+_lock = threading.Lock()
+
+# Tags invalidated by the request served by this thread, see
+# invalidate_tags.
+_deferred = threading.local()
+
+
+def tag_cache():
+    """Get the cache holding the tag generations.
+
+    It must be shared by all processes serving the site, otherwise an
+    invalidation in one process is not seen by the others, and increment
+    atomically (e.g. memcached), otherwise concurrent invalidations of a
+    tag can be lost.
+
+    :returns: The ``CACHE_TAGS_ALIAS`` cache.
+    :rtype: BaseCache
+    """
+    return caches[getattr(settings, 'CACHE_TAGS_ALIAS', 'default')]
+
+
+def _new_generation():
+    """Start a generation which can not match one used before.
+
+    Used when a generation counter is missing from the cache, e.g. after it
+    was culled, so that values stored under the old counter stay invalid.
+    """
+    return int(time.time() * 1000)
+
+
+class TagStats(object):
+    """In-process counts of tag invalidations and tagged cache lookups."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Forget everything counted so far."""
+        self.since = time.time()
+        self.invalidations = defaultdict(int)
+        self.lookups = {'hit': 0, 'miss': 0, 'stale': 0}
+
+    def invalidated(self, tags):
+        """Count the invalidation of tags.
+
+        :param tags: The invalidated tags.
+        :type tags: list
+        """
+        with _lock:
+            for tag in tags:
+                self.invalidations[tag.split(':')[0]] += 1
+
+    def looked_up(self, outcome):
+        """Count a lookup of a tagged value.
+
+        :param outcome: 'hit', 'miss' or 'stale' (found but invalidated).
+        :type outcome: str
+        """
+        with _lock:
+            self.lookups[outcome] += 1
+
+    def as_dict(self):
+        """Summarise the statistics for the stats endpoint.
+
+        :returns: Invalidations per tag kind, with their rate per minute,
+            and the lookup counts.
+        :rtype: dict
+        """
+        with _lock:
+            minutes = max((time.time() - self.since) / 60, 1.0 / 60)
+            invalidations = dict(
+                (kind, {
+                    'count': count,
+                    'per_minute': round(count / minutes, 2),
+                }) for kind, count in self.invalidations.items())
+            lookups = dict(self.lookups)
+        total = sum(lookups.values())
+        lookups['hit_ratio'] = (
+            round(float(lookups['hit']) / total, 3) if total else None)
+        return {
+            'since': self.since,
+            'invalidations': invalidations,
+            'lookups': lookups,
+        }
+
+
+stats = TagStats()
+
+
+def tag_generations(tags):
+    """Get the current generations of tags.
+
+    :param tags: The tags.
+    :type tags: list
+
+    :returns: A dictionary of tag -> generation number.
+    :rtype: dict
+    """
+    cache = tag_cache()
+    keys = dict((GENERATION_KEY % tag, tag) for tag in tags)
+    found = cache.get_many(keys.keys())
+    generations = {}
+    for key, tag in keys.items():
+        generation = found.get(key)
+        if generation is None:
+            generation = _new_generation()
+            if not cache.add(key, generation, None):
+                # Started concurrently by another process.
+                generation = cache.get(key, generation)
+        generations[tag] = generation
+    return generations
+
+
+def tag_generation(tag):
+    """Get the current generation of a single tag.
+
+    :param tag: The tag.
+    :type tag: str
+
+    :returns: The generation number.
+    :rtype: int
+    """
+    return tag_generations([tag])[tag]
+
+
+def _increment_generations(tags):
+    """Start a new generation of tags and announce it."""
+    cache = tag_cache()
+    for tag in tags:
+        key = GENERATION_KEY % tag
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Not cached (yet, or evicted), start a new generation.
+            cache.set(key, _new_generation(), None)
+    tags_invalidated.send(sender=None, tags=tags)
+
+
+def invalidate_tags(tags):
+    """Invalidate every cached value depending on any of the tags.
+
+    During a request the tags are invalidated again once it has finished,
+    see collect_invalidations.
+
+    :param tags: The tags to invalidate.
+    :type tags: list
+    """
+    tags = set(tags)
+    pending = getattr(_deferred, 'tags', None)
+    if pending is not None:
+        pending.update(tags)
+    _increment_generations(tags)
+    stats.invalidated(tags)
+
+
+def collect_invalidations(sender, **kwargs):
+    """Start collecting the tags invalidated by a request."""
+    _deferred.tags = set()
+
+
+def flush_invalidations(sender, **kwargs):
+    """Invalidate the tags of a finished request again.
+
+    Values cached from the rows read before the changes of the request
+    were committed are dropped this way.
+    """
+    tags = getattr(_deferred, 'tags', None)
+    _deferred.tags = None
+    if tags:
+        _increment_generations(tags)
+
+
+def set_tagged(key, value, tags, timeout=None, cache=None):
+    """Cache a value which depends on tags.
+
+    :param key: The cache key.
+    :type key: str
+
+    :param value: The value, must be picklable.
+
+    :param tags: The tags the value depends on.
+    :type tags: list
+
+    :param timeout: Seconds to keep the value, the cache default if None.
+    :type timeout: int, None
+
+    :param cache: The cache to store the value in, the tag cache if None.
+    :type cache: BaseCache
+    """
+    cache = cache or tag_cache()
+    entry = {'tags': tag_generations(tags), 'value': value}
+    if timeout is None:
+        cache.set(key, entry)
+    else:
+        cache.set(key, entry, timeout)
+
+
+def get_tagged(key, default=None, cache=None):
+    """Get a value cached with set_tagged, unless a tag was invalidated.
+
+    :param key: The cache key.
+    :type key: str
+
+    :param default: Returned when there is no current value.
+
+    :param cache: The cache the value is stored in, the tag cache if None.
+    :type cache: BaseCache
+
+    :returns: The cached value or the default.
+    """
+    cache = cache or tag_cache()
+    entry = cache.get(key)
+    if entry is None:
+        stats.looked_up('miss')
+        return default
+    if tag_generations(entry['tags'].keys()) != entry['tags']:
+        stats.looked_up('stale')
+        return default
+    stats.looked_up('hit')
+    return entry['value']
+
+
+def tags_for_instance(instance):
+    """Get the tags a model instance dirties.
+
+    :param instance: A model instance.
+    :type instance: Model
+
+    :returns: The tags, empty if the model is not registered or a related
+        object is already deleted (e.g. in a cascading delete, where the
+        deleted parent invalidates the tags itself).
+    :rtype: list
+    """
+    tags = _registry.get(type(instance))
+    if tags is None:
+        return []
+    try:
+        return tags(instance)
+    except ObjectDoesNotExist:
+        return []
+
+
+def instance_changed(sender, instance, **kwargs):
+    """Invalidate the tags of a saved or deleted instance."""
+    tags = tags_for_instance(instance)
+    if tags:
+        invalidate_tags(tags)
+
+
+def register(model, tags):
+    """Declare the tags a model dirties when an instance is saved or deleted.
+
+    :param model: The model class.
+    :type model: Model
+
+    :param tags: Function returning the list of tags of an instance.
+    :type tags: callable
+    """
+    _registry[model] = tags
+    post_save.connect(
+        instance_changed, sender=model, dispatch_uid='cache_tags_save')
+    post_delete.connect(
+        instance_changed, sender=model, dispatch_uid='cache_tags_delete')
+
+
+request_started.connect(
+    collect_invalidations, dispatch_uid='cache_tags_collect')
+request_finished.connect(
+    flush_invalidations, dispatch_uid='cache_tags_flush')
+
+
+class CacheTagStatsView(StaffuserRequiredMixin, View):
+    """JSON statistics of the tag invalidations of this process.
+
+    POST to reset the statistics.
+    """
+    raise_exception = True
+
+    def get(self, request):
+        return HttpResponse(
+            json.dumps(stats.as_dict(), indent=2),
+            content_type='application/json')
+
+    def post(self, request):
+        stats.reset()
+        return self.get(request)
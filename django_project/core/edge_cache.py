@@ -0,0 +1,230 @@
+# coding=utf-8
+"""
+core.edge_cache
+
+Make pages cacheable by the nginx proxy cache in front of the site and
+purge them from it when they change.
+
+EdgeCacheMiddleware marks responses which are the same for all anonymous
+visitors with ``Cache-Control: public, s-maxage=EDGE_CACHE_MAX_AGE`` and a
+``Surrogate-Key`` header listing the cache tags of the page (its project,
+version, ballot, ...; see core.cache_tags). Other responses are marked
+private.
+
+nginx (see deployment/projecta.nginx.conf) caches pages by host and url,
+so for every cacheable page the url is remembered under each of its tags.
+When a tag is invalidated the remembered urls are purged through the purge
+location of nginx at ``EDGE_CACHE_PURGE_URL``; nothing is purged when that
+setting is empty. Tags invalidated while serving a request are collected and
+purged together once the request has finished, so that its changes are
+committed and it does not wait for the purges; outside of requests (e.g.
+management commands) they are purged right away.
+
+Remembering a url is a read-modify-write of the url list of a tag, so
+concurrent requests can lose a url, and a purge can race a request still
+reading the old data. Such pages are only dropped when they expire, which
+the short ``s-maxage`` bounds.
+"""
+import httplib
+import logging
+import threading
+import urlparse
+from django.conf import settings
+from django.core.signals import request_finished, request_started
+from django.utils.cache import patch_cache_control
+from core.cache_tags import tag_cache, tags_invalidated
+from core.page_cache import anonymous_request, cacheable_response, page_tags
+
+logger = logging.getLogger(__name__)
+
+# Urls cached at the edge under a tag.
+URLS_KEY = 'edge:urls:%s'
+
+# Context variables of a page and the tag kind of their objects.
+CONTEXT_TAGS = (
+    ('project', 'project'),
+    ('version', 'version'),
+    ('entry', 'entry'),
+    ('category', 'category'),
+    ('committee', 'committee'),
+    ('ballot', 'ballot'),
+)
+
+# Remembered urls per tag; beyond this the oldest are dropped and can only
+# expire from the edge cache.
+MAX_URLS_PER_TAG = 1000
+
+# Tags invalidated by the request served by this thread, see purge_tags.
+_pending = threading.local()
+
+
+def remember_url(tags, host, path):
+    """Remember that a page is cached at the edge under tags.
+
+    :param tags: The tags of the page.
+    :type tags: list
+
+    :param host: The host the page was requested from.
+    :type host: str
+
+    :param path: The full path of the page.
+    :type path: str
+    """
+    cache = tag_cache()
+    keys = [URLS_KEY % tag for tag in tags]
+    url = (host, path)
+    found = cache.get_many(keys)
+    for key in keys:
+        urls = found.get(key, [])
+        if url not in urls:
+            urls = (urls + [url])[-MAX_URLS_PER_TAG:]
+            cache.set(key, urls, None)
+
+
+def purge_urls(urls):
+    """Ask the edge cache to drop pages, over one connection.
+
+    :param urls: The (host, full path) of the pages.
+    :type urls: list
+
+    :returns: The number of successful purge requests.
+    :rtype: int
+    """
+    purge_url = urlparse.urlsplit(settings.EDGE_CACHE_PURGE_URL)
+    connection = httplib.HTTPConnection(
+        purge_url.netloc,
+        timeout=getattr(settings, 'EDGE_CACHE_PURGE_TIMEOUT', 2))
+    purged = 0
+    try:
+        for host, path in urls:
+            try:
+                # Reopened by httplib if nginx closed it.
+                connection.request(
+                    'GET', purge_url.path.rstrip('/') + path,
+                    headers={'Host': host})
+                response = connection.getresponse()
+                response.read()
+            except Exception as e:  # pylint: disable=broad-except
+                logger.warning('Purging %s%s failed: %s', host, path, e)
+                connection.close()
+                continue
+            # ngx_cache_purge answers 404 for pages which were not cached.
+            if response.status in (200, 404):
+                purged += 1
+    finally:
+        connection.close()
+    return purged
+
+
+def purge_tagged(tags):
+    """Purge the pages cached at the edge under tags.
+
+    :param tags: The tags.
+    :type tags: list, set
+    """
+    cache = tag_cache()
+    keys = [URLS_KEY % tag for tag in tags]
+    urls = set()
+    for tag_urls in cache.get_many(keys).values():
+        urls.update(tag_urls)
+    cache.delete_many(keys)
+    purge_urls(sorted(urls))
+
+
+def purge_tags(sender, tags, **kwargs):
+    """Purge the pages under invalidated tags, after the current request.
+
+    :param tags: The invalidated tags.
+    :type tags: list
+    """
+    if not getattr(settings, 'EDGE_CACHE_PURGE_URL', None):
+        return
+    pending = getattr(_pending, 'tags', None)
+    if pending is None:
+        purge_tagged(tags)
+    else:
+        pending.update(tags)
+
+
+def collect_purges(sender, **kwargs):
+    """Start collecting the tags invalidated by a request."""
+    _pending.tags = set()
+
+
+def flush_purges(sender, **kwargs):
+    """Purge the pages under the tags invalidated by a finished request."""
+    tags = getattr(_pending, 'tags', None)
+    _pending.tags = None
+    if tags and getattr(settings, 'EDGE_CACHE_PURGE_URL', None):
+        purge_tagged(tags)
+
+
+tags_invalidated.connect(purge_tags, dispatch_uid='edge_cache_purge')
+request_started.connect(collect_purges, dispatch_uid='edge_cache_collect')
+request_finished.connect(flush_purges, dispatch_uid='edge_cache_flush')
+
+
+class EdgeCacheMiddleware(object):
+    """Add Cache-Control and Surrogate-Key headers to responses.
+
+    Should come right after AnonymousPageCacheMiddleware, so that pages
+    served from the page cache keep their headers.
+    """
+
+    @staticmethod
+    def process_view(request, view_func, view_args, view_kwargs):
+        """Remember the tags of an anonymous page view.
+
+        :param request: Http Request obj
+        :param view_func: The view which would handle the request.
+        :param view_args: Positional arguments of the view.
+        :param view_kwargs: Keyword arguments of the view.
+        """
+        if getattr(settings, 'EDGE_CACHE_ENABLED', False) and \
+                anonymous_request(request):
+            tags = page_tags(request, view_kwargs)
+            if tags is not None:
+                request.edge_cache_tags = set(tags)
+
+    @staticmethod
+    def process_template_response(request, response):
+        """Add the tags of the objects shown on the page.
+
+        :param request: Http Request obj
+        :param response: Http Response obj
+        """
+        tags = getattr(request, 'edge_cache_tags', None)
+        if tags is not None and response.context_data:
+            for name, kind in CONTEXT_TAGS:
+                obj = response.context_data.get(name)
+                if getattr(obj, 'pk', None) is not None:
+                    tags.add('%s:%s' % (kind, obj.pk))
+        return response
+
+    @staticmethod
+    def process_response(request, response):
+        """Mark the response as cacheable at the edge or private.
+
+        :param request: Http Request obj
+        :param response: Http Response obj
+        """
+        if not getattr(settings, 'EDGE_CACHE_ENABLED', False):
+            return response
+        if response.has_header('Surrogate-Key'):
+            # Served from the page cache, which kept the headers.
+            tags = response['Surrogate-Key'].split()
+        else:
+            tags = getattr(request, 'edge_cache_tags', None)
+            if not tags or not cacheable_response(response):
+                if not response.has_header('Cache-Control'):
+                    patch_cache_control(response, private=True)
+                return response
+            tags = sorted(tags)
+            response['Surrogate-Key'] = ' '.join(tags)
+            patch_cache_control(
+                response,
+                public=True,
+                max_age=0,
+                s_maxage=getattr(settings, 'EDGE_CACHE_MAX_AGE', 300))
+        remember_url(tags, request.get_host(), request.get_full_path())
+        return response
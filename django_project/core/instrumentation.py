@@ -0,0 +1,303 @@
+# coding=utf-8
+"""
+core.instrumentation
+
+Opt-in per-request instrumentation. When ``INSTRUMENTATION_ENABLED`` is
+True in the settings, InstrumentationMiddleware records for every request
+the number of SQL queries, the time spent in the database, in template
+rendering, in markdown conversion and in thumbnail generation. The figures
+are sent back in a ``Server-Timing`` header, aggregated per view for the
+staff-only stats endpoint and the slowest requests are kept with the
+fingerprints of their queries (and logged when slower than
+``INSTRUMENTATION_SLOW_REQUEST_MS``), e.g. to spot an N+1 regression in
+NavContextMiddleware or Version.categories().
+"""
+import heapq
+import json
+import logging
+import re
+import threading
+import time
+from collections import defaultdict
+from functools import wraps
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpResponse
+from django.views.generic import View
+from braces.views import StaffuserRequiredMixin
+
+logger = logging.getLogger(__name__)
+
+# Sections timed besides the database, in Server-Timing order.
+SECTIONS = ('template', 'markdown', 'thumbnail')
+
+_local = threading.local()
+_lock = threading.Lock()
+
+NUMBER_RE = re.compile(r'\b\d+(\.\d+)?\b')
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+IN_LIST_RE = re.compile(r'\bIN \((?:\?, )*\?\)')
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """Reduce an SQL statement to its shape by removing literal values.
+
+    e.g. ``SELECT ... WHERE "id" IN (1, 2, 3)`` becomes
+    ``SELECT ... WHERE "id" IN (...)``.
+
+    :param sql: The executed SQL.
+    :type sql: str
+
+    :returns: The fingerprint.
+    :rtype: str
+    """
+    sql = STRING_RE.sub('?', sql)
+    sql = NUMBER_RE.sub('?', sql)
+    sql = IN_LIST_RE.sub('IN (...)', sql)
+    return WHITESPACE_RE.sub(' ', sql).strip()
+
+
+def timed(section):
+    """Decorate a function to add its duration to a section of the request.
+
+    Costs a single attribute lookup when instrumentation is not active.
+
+    :param section: One of SECTIONS.
+    :type section: str
+    """
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            timings = getattr(_local, 'timings', None)
+            if timings is None:
+                return function(*args, **kwargs)
+            start = time.time()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                timings[section] += time.time() - start
+        return wrapper
+    return decorator
+
+
+class RequestStats(object):
+    """In-process aggregate of the instrumented requests."""
+
+    def __init__(self, slowest=10):
+        """Constructor.
+
+        :param slowest: How many of the slowest requests to keep.
+        :type slowest: int
+        """
+        self.slowest_size = slowest
+        self.reset()
+
+    def reset(self):
+        """Forget everything recorded so far."""
+        self.views = defaultdict(lambda: {
+            'requests': 0,
+            'queries': 0,
+            'max_queries': 0,
+            'time': 0.0,
+            'db_time': 0.0,
+        })
+        # A min-heap of (duration, record), the fastest on top.
+        self.slowest = []
+
+    def add(self, record):
+        """Record one request.
+
+        :param record: Figures of the request as built by the middleware.
+        :type record: dict
+
+        :returns: True if the request is one of the slowest so far.
+        :rtype: bool
+        """
+        with _lock:
+            view = self.views[record['view']]
+            view['requests'] += 1
+            view['queries'] += record['queries']
+            view['max_queries'] = max(view['max_queries'], record['queries'])
+            view['time'] += record['time']
+            view['db_time'] += record['db_time']
+            entry = (record['time'], record)
+            if len(self.slowest) < self.slowest_size:
+                heapq.heappush(self.slowest, entry)
+                return True
+            if entry[0] > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, entry)
+                return True
+            return False
+
+    def as_dict(self):
+        """Summarise the statistics for the stats endpoint.
+
+        :returns: Per view averages and the slowest requests.
+        :rtype: dict
+        """
+        with _lock:
+            views = {}
+            for name, view in self.views.items():
+                views[name] = dict(view)
+                views[name]['avg_queries'] = (
+                    float(view['queries']) / view['requests'])
+                views[name]['avg_time'] = view['time'] / view['requests']
+            slowest = [
+                record for _, record in sorted(
+                    self.slowest, key=lambda entry: -entry[0])]
+        return {'views': views, 'slowest': slowest}
+
+
+stats = RequestStats(getattr(settings, 'INSTRUMENTATION_SLOWEST_REQUESTS', 10))
+
+
+def _query_fingerprints(queries, limit=5):
+    """Group queries by fingerprint, most frequent first.
+
+    :param queries: Entries of a connection's queries log.
+    :type queries: list
+
+    :param limit: Number of fingerprints to return.
+    :type limit: int
+
+    :returns: A list of dictionaries with 'sql', 'count' and 'time'.
+    :rtype: list
+    """
+    groups = {}
+    for query in queries:
+        key = fingerprint(query['sql'])
+        group = groups.setdefault(key, {'sql': key, 'count': 0, 'time': 0.0})
+        group['count'] += 1
+        group['time'] += float(query['time'])
+    return sorted(
+        groups.values(), key=lambda group: (-group['count'], -group['time'])
+    )[:limit]
+
+
+def _instrument_thumbnails():
+    """Time thumbnail generation done by easy_thumbnails."""
+    from easy_thumbnails.files import Thumbnailer
+    if not getattr(Thumbnailer, 'instrumented', False):
+        Thumbnailer.get_thumbnail = timed('thumbnail')(
+            Thumbnailer.get_thumbnail)
+        Thumbnailer.instrumented = True
+
+
+class InstrumentationMiddleware(object):
+    """Record query count and timings of each request.
+
+    Should be the first middleware so that its timing covers the others.
+    """
+
+    def __init__(self):
+        if not getattr(settings, 'INSTRUMENTATION_ENABLED', False):
+            raise MiddlewareNotUsed()
+        _instrument_thumbnails()
+
+    @staticmethod
+    def process_request(request):
+        """Start recording the request.
+
+        :param request: Http Request obj
+        """
+        _local.timings = defaultdict(float)
+        _local.query_offsets = {}
+        _local.start = time.time()
+        for connection in connections.all():
+            _local.query_offsets[connection.alias] = (
+                connection.force_debug_cursor, len(connection.queries_log))
+            connection.force_debug_cursor = True
+
+    @staticmethod
+    def process_template_response(request, response):
+        """Time rendering of the template response.
+
+        As the first middleware this runs right before the response is
+        rendered.
+
+        :param request: Http Request obj
+        :param response: Http Response obj
+        """
+        timings = getattr(_local, 'timings', None)
+        if timings is not None:
+            start = time.time()
+
+            def rendered(response):
+                timings['template'] += time.time() - start
+            response.add_post_render_callback(rendered)
+        return response
+
+    @staticmethod
+    def process_response(request, response):
+        """Add the Server-Timing header and aggregate the figures.
+
+        :param request: Http Request obj
+        :param response: Http Response obj
+        """
+        timings = getattr(_local, 'timings', None)
+        if timings is None:
+            return response
+        duration = time.time() - _local.start
+        queries = []
+        for connection in connections.all():
+            debug_cursor, offset = _local.query_offsets.get(
+                connection.alias, (False, 0))
+            connection.force_debug_cursor = debug_cursor
+            queries.extend(list(connection.queries_log)[offset:])
+        _local.timings = None
+        db_time = sum(float(query['time']) for query in queries)
+
+        resolver_match = getattr(request, 'resolver_match', None)
+        record = {
+            'view': resolver_match.url_name if resolver_match else None,
+            'path': request.path,
+            'method': request.method,
+            'status': response.status_code,
+            'queries': len(queries),
+            'time': duration,
+            'db_time': db_time,
+        }
+        for section in SECTIONS:
+            record[section] = timings[section]
+
+        metrics = ['db;dur=%.1f;desc="%s queries"' % (
+            db_time * 1000, len(queries))]
+        for section in SECTIONS:
+            if timings[section]:
+                metrics.append('%s;dur=%.1f' % (
+                    section, timings[section] * 1000))
+        metrics.append('total;dur=%.1f' % (duration * 1000))
+        response['Server-Timing'] = ', '.join(metrics)
+
+        if stats.add(record):
+            record['fingerprints'] = _query_fingerprints(queries)
+        if duration * 1000 >= getattr(
+                settings, 'INSTRUMENTATION_SLOW_REQUEST_MS', 500) and \
+                'fingerprints' in record:
+            logger.warning(
+                'Slow request %s %s: %.0f ms, %s queries (%.0f ms)\n%s',
+                request.method, request.path, duration * 1000, len(queries),
+                db_time * 1000, '\n'.join(
+                    '%4d x %s' % (group['count'], group['sql'])
+                    for group in record['fingerprints']))
+        return response
+
+
+class InstrumentationStatsView(StaffuserRequiredMixin, View):
+    """JSON statistics of the instrumented requests of this process.
+
+    POST to reset the statistics.
+    """
+    raise_exception = True
+
+    def get(self, request):
+        data = stats.as_dict()
+        data['enabled'] = getattr(settings, 'INSTRUMENTATION_ENABLED', False)
+        return HttpResponse(
+            json.dumps(data, indent=2), content_type='application/json')
+
+    def post(self, request):
+        stats.reset()
+        return self.get(request)
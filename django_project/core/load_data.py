@@ -0,0 +1,398 @@
+# coding=utf-8
+"""
+core.load_data
+
+Generate a large synthetic data set for load testing and benchmarking.
+
+Unlike the model factories, which create and save one object at a time,
+the generator builds unsaved instances itself (filling in the slugs and
+padded versions their save() methods would compute) and writes them with
+``bulk_create`` in chunks. A seeded random generator makes the data
+identical on every run with the same options, except the ballot dates,
+which are spread around the time of the run.
+
+bulk_create sends no signals, so derived data (e.g. the search index)
+has to be rebuilt afterwards. The statistics of each project are counted
+once its entries are written and the results of the closed ballots are
+frozen at the end.
+"""
+import datetime
+import logging
+import random
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import slugify
+from base.models import Project
+from changes.models import (
+    Category,
+    Entry,
+    Sponsor,
+    SponsorshipLevel,
+    SponsorshipPeriod,
+    Version)
+from changes.statistics import rebuild_project_statistics
+from vota.closing import close_ballots
+from vota.models import Ballot, Committee, Vote
+
+logger = logging.getLogger(__name__)
+
+# Prefix of the slugs and user names of generated objects.
+PREFIX = 'load'
+
+WORDS = (
+    'raster', 'vector', 'layer', 'map', 'canvas', 'symbol', 'label',
+    'style', 'render', 'print', 'layout', 'projection', 'plugin', 'python',
+    'processing', 'algorithm', 'toolbox', 'attribute', 'table', 'form',
+    'widget', 'field', 'expression', 'filter', 'query', 'database',
+    'provider', 'service', 'tile', 'cache', 'mesh', 'point', 'cloud',
+    'terrain', 'elevation', 'profile', 'snapping', 'digitizing', 'editing',
+    'geometry', 'topology', 'heatmap', 'cluster', 'legend', 'scale', 'bar',
+    'atlas', 'report', 'export', 'import', 'settings', 'performance',
+)
+
+CATEGORY_NAMES = (
+    'General', 'Symbology', 'Labelling', 'Rendering', 'Map Composer',
+    'Processing', 'Data Providers', 'Digitising', 'Analysis Tools',
+    'Browser', 'Server', 'Programmability', 'User Interface', '3D Features',
+)
+
+SPONSORSHIP_LEVELS = (
+    ('Bronze', 500),
+    ('Silver', 3000),
+    ('Gold', 9000),
+    ('Platinum', 27000),
+)
+
+VOTE_CHOICES = ('y', 'y', 'y', 'n', '-')
+
+
+class LoadDataGenerator(object):
+    """Create projects with versions, entries, sponsors and ballots.
+
+    Example::
+
+        generator = LoadDataGenerator(projects=2, versions=10, entries=20)
+        counts = generator.run()
+    """
+
+    def __init__(
+            self,
+            projects=50,
+            versions=300,
+            entries=500,
+            users=2000,
+            committee_size=1000,
+            committees=2,
+            ballots=10,
+            votes=1000,
+            sponsors=40,
+            periods=3,
+            seed=1,
+            chunk_size=1000,
+            stdout=None):
+        """Constructor.
+
+        :param projects: Number of projects.
+        :param versions: Versions per project.
+        :param entries: Entries per version.
+        :param users: Size of the pool of users (authors and voters).
+        :param committee_size: Members per committee.
+        :param committees: Committees per project.
+        :param ballots: Ballots per committee.
+        :param votes: Votes per ballot, at most the committee size (each
+            member votes once).
+        :param sponsors: Sponsors per project.
+        :param periods: Overlapping sponsorship periods per sponsor.
+        :param seed: Seed of the random generator.
+        :param chunk_size: Number of rows per INSERT statement.
+        :param stdout: Optional stream for progress messages.
+        :type stdout: file
+
+        :raises: ValueError if there are more votes than members.
+        """
+        if votes > committee_size:
+            raise ValueError(
+                '%s votes per ballot need at least %s committee members, '
+                'not %s.' % (votes, votes, committee_size))
+        self.projects = projects
+        self.versions = versions
+        self.entries = entries
+        self.users = max(users, committee_size, 1)
+        self.committee_size = committee_size
+        self.committees = committees
+        self.ballots = ballots
+        self.votes = votes
+        self.sponsors = sponsors
+        self.periods = periods
+        self.chunk_size = chunk_size
+        self.stdout = stdout
+        self.random = random.Random(seed)
+        self.counts = {}
+        # A fixed reference date keeps the generated data reproducible.
+        self.epoch = datetime.date(2010, 1, 1)
+
+    def log(self, message):
+        """Report progress."""
+        logger.info(message)
+        if self.stdout:
+            self.stdout.write(message)
+
+    def sentence(self, minimum=3, maximum=8):
+        """Random words for titles and descriptions."""
+        words = self.random.sample(
+            WORDS, self.random.randint(minimum, maximum))
+        return ' '.join(words).capitalize()
+
+    def bulk_create(self, model, objects, prepare=None):
+        """Insert objects in chunks and count them.
+
+        :param model: The model class.
+        :param objects: An iterable of unsaved instances.
+        :param prepare: Optional callable taking each chunk before it is
+            inserted.
+        """
+        chunk = []
+        for obj in objects:
+            chunk.append(obj)
+            if len(chunk) >= self.chunk_size:
+                if prepare is not None:
+                    prepare(chunk)
+                model.objects.bulk_create(chunk)
+                self.counts[model.__name__] = self.counts.get(
+                    model.__name__, 0) + len(chunk)
+                chunk = []
+        if chunk:
+            if prepare is not None:
+                prepare(chunk)
+            model.objects.bulk_create(chunk)
+            self.counts[model.__name__] = self.counts.get(
+                model.__name__, 0) + len(chunk)
+
+    @staticmethod
+    def version_name(index):
+        """Semantic version name of the index'th release, e.g. 2.14.1."""
+        major, rest = divmod(index, 100)
+        minor, patch = divmod(rest, 5)
+        return '%s.%s.%s' % (major + 1, minor * 2, patch)
+
+    def create_users(self):
+        """Create the user pool.
+
+        :returns: The user ids.
+        :rtype: list
+        """
+        password = make_password('password')
+        self.bulk_create(User, (
+            User(
+                username='%s-user-%05d' % (PREFIX, number),
+                email='%s-user-%05d@example.com' % (PREFIX, number),
+                first_name='Load',
+                last_name='User %s' % number,
+                password=password)
+            for number in range(self.users)))
+        return list(User.objects.filter(
+            username__startswith='%s-user-' % PREFIX).order_by(
+            'id').values_list('id', flat=True))
+
+    def create_project(self, number, user_ids):
+        """Create one project with all its related objects.
+
+        :param number: Sequence number of the project.
+        :param user_ids: The user pool.
+        """
+        name = 'Load Project %03d' % number
+        project = Project.objects.create(
+            name=name,
+            description=self.sentence(),
+            owner_id=self.random.choice(user_ids),
+            approved=True,
+            private=number % 10 == 9)
+
+        self.bulk_create(Category, (
+            Category(
+                name=category_name,
+                slug=slugify(category_name),
+                sort_number=sort_number,
+                approved=True,
+                project=project)
+            for sort_number, category_name in enumerate(CATEGORY_NAMES)))
+        category_ids = list(Category.objects.filter(
+            project=project).values_list('id', flat=True))
+
+        versions = []
+        for index in range(self.versions):
+            version = Version(
+                name=self.version_name(index),
+                description=self.sentence(5, 15),
+                release_date=self.epoch + datetime.timedelta(days=index * 14),
+                approved=self.random.random() > 0.02,
+                author_id=self.random.choice(user_ids),
+                project=project)
+            version.slug = Version.slug_for_name(version.name)
+            version.padded_version = version.pad_name(version.name)
+            versions.append(version)
+        self.bulk_create(Version, versions)
+        version_ids = list(Version.objects.filter(
+            project=project).values_list('id', flat=True))
+        self.create_entries(version_ids, category_ids, user_ids)
+        rebuild_project_statistics(project.id)
+        self.create_sponsors(project, user_ids)
+        self.create_committees(project, user_ids)
+        return project
+
+    def create_entries(self, version_ids, category_ids, user_ids):
+        """Create the entries of the versions of a project."""
+        def entries():
+            for version_id in version_ids:
+                slugs = set()
+                for number in range(self.entries):
+                    title = '%s %s' % (self.sentence(2, 5), number)
+                    slug = Entry.slug_for_title(title)
+                    if slug in slugs:
+                        continue
+                    slugs.add(slug)
+                    funded = self.random.random() < 0.2
+                    yield Entry(
+                        title=title,
+                        slug=slug,
+                        description=self.sentence(10, 30),
+                        approved=self.random.random() > 0.05,
+                        funded_by='Funder %s' % self.random.randint(
+                            1, 50) if funded else '',
+                        funder_url='http://funder.example.com' if funded
+                        else '',
+                        developed_by='Developer %s' % self.random.randint(
+                            1, 100),
+                        author_id=self.random.choice(user_ids),
+                        version_id=version_id,
+                        category_id=self.random.choice(category_ids))
+        self.bulk_create(Entry, entries(), prepare=Entry.link_credits)
+
+    def create_sponsors(self, project, user_ids):
+        """Create sponsorship levels, sponsors and overlapping periods."""
+        self.bulk_create(SponsorshipLevel, (
+            SponsorshipLevel(
+                name=name,
+                slug=slugify(name),
+                value=value,
+                currency='EUR',
+                approved=True,
+                author_id=self.random.choice(user_ids),
+                project=project)
+            for name, value in SPONSORSHIP_LEVELS))
+        level_ids = list(SponsorshipLevel.objects.filter(
+            project=project).values_list('id', flat=True))
+
+        self.bulk_create(Sponsor, (
+            Sponsor(
+                name='Sponsor %03d' % number,
+                slug='sponsor-%03d' % number,
+                sponsor_url='http://sponsor%s.example.com' % number,
+                contact_person='Contact %s' % number,
+                address='Street %s' % number,
+                country='ZA',
+                sponsor_email='sponsor%s@example.com' % number,
+                approved=True,
+                author_id=self.random.choice(user_ids),
+                project=project)
+            for number in range(self.sponsors)))
+        sponsor_ids = list(Sponsor.objects.filter(
+            project=project).values_list('id', flat=True))
+
+        def periods():
+            for sponsor_id in sponsor_ids:
+                start = self.epoch + datetime.timedelta(
+                    days=self.random.randint(0, 3000))
+                for number in range(self.periods):
+                    # Renewals start before the previous period ends.
+                    end = start + datetime.timedelta(
+                        days=self.random.randint(180, 730))
+                    yield SponsorshipPeriod(
+                        slug='%s-%s' % (sponsor_id, number),
+                        start_date=start,
+                        end_date=end,
+                        approved=True,
+                        author_id=self.random.choice(user_ids),
+                        project=project,
+                        sponsor_id=sponsor_id,
+                        sponsorship_level_id=self.random.choice(level_ids))
+                    start = end - datetime.timedelta(
+                        days=self.random.randint(0, 60))
+        self.bulk_create(SponsorshipPeriod, periods())
+
+    def create_committees(self, project, user_ids):
+        """Create committees with members, ballots and votes.
+
+        The ballots of a committee opened a month apart, the last one is
+        open now and the others closed. Only members vote.
+        """
+        now = timezone.now().replace(microsecond=0)
+        for number in range(self.committees):
+            name = 'Committee %s' % number
+            members = self.random.sample(user_ids, self.committee_size)
+            committee = Committee.objects.create(
+                name=name,
+                description=self.sentence(),
+                sort_number=number,
+                quorum_setting='50',
+                chair_id=members[0] if members else user_ids[0],
+                project=project)
+            Committee.users.through.objects.bulk_create([
+                Committee.users.through(
+                    committee=committee, user_id=user_id)
+                for user_id in members])
+            self.bulk_create(Ballot, (
+                Ballot(
+                    name='Ballot %s' % index,
+                    slug='ballot-%s' % index,
+                    summary=self.sentence(),
+                    description=self.sentence(10, 30),
+                    approved=self.random.random() > 0.3,
+                    open_from=now - datetime.timedelta(
+                        days=(self.ballots - 1 - index) * 30 + 7),
+                    closes=now - datetime.timedelta(
+                        days=(self.ballots - 1 - index) * 30 - 7),
+                    private=self.random.random() < 0.1,
+                    proposer_id=self.random.choice(members or user_ids),
+                    committee=committee)
+                for index in range(self.ballots)))
+            ballot_ids = Ballot.objects.filter(
+                committee=committee).values_list('id', flat=True)
+
+            def votes():
+                for ballot_id in ballot_ids:
+                    for user_id in self.random.sample(members, self.votes):
+                        yield Vote(
+                            ballot_id=ballot_id,
+                            user_id=user_id,
+                            choice=self.random.choice(VOTE_CHOICES))
+            self.bulk_create(Vote, votes())
+
+    def clear(self):
+        """Delete the previously generated data."""
+        Project.objects.filter(
+            slug__startswith='%s-project-' % PREFIX).delete()
+        User.objects.filter(username__startswith='%s-user-' % PREFIX).delete()
+
+    def run(self):
+        """Generate the data set.
+
+        :returns: A dictionary of model name -> number of created objects.
+        :rtype: dict
+        """
+        with transaction.atomic():
+            user_ids = self.create_users()
+        self.log('Created %s users' % len(user_ids))
+        for number in range(self.projects):
+            # One transaction per project keeps each commit a sane size.
+            with transaction.atomic():
+                project = self.create_project(number, user_ids)
+            self.counts['Project'] = self.counts.get('Project', 0) + 1
+            self.log('Created %s (%s/%s)' % (
+                project.name, number + 1, self.projects))
+        results = close_ballots()
+        self.counts['BallotResult'] = len(results)
+        self.log('Closed %s ballots' % len(results))
+        return self.counts
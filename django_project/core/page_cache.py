@@ -0,0 +1,256 @@
+# coding=utf-8
+"""
+core.page_cache
+
+Full response cache for anonymous visitors.
+
+Most requests are anonymous readers of public projects, for whom a page
+only depends on its url, language and host. AnonymousPageCacheMiddleware
+stores those responses in the ``PAGE_CACHE_ALIAS`` cache under a key which
+contains the generation of the cache tag of the project the page belongs to
+(or of the ``projects`` tag for pages like the project list). Any change to
+an object of a project invalidates its tag, see core.cache_tags, so its
+cached pages are never read again and expire. Votes only invalidate the tag
+of their ballot, so the keys of pages showing the tallies of the ballots of
+a project also contain the generations of those ballot tags. Logged in
+users always get a fresh page.
+"""
+import hashlib
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import InvalidCacheBackendError
+from django.http import HttpResponse
+from base.models import Project
+from core.cache_tags import get_tagged, set_tagged, tag_generations
+from vota.models import Ballot
+
+# Cache tag of the pages of a project, and of the site wide pages.
+PROJECT_TAG = 'project:%s'
+SITE_TAG = 'projects'
+
+BALLOT_TAG = 'ballot:%s'
+
+# Project slug -> id, slugs do not change once a project is created.
+PROJECT_KEY = 'pages:project:%s'
+
+# Project id -> tags of its ballots.
+BALLOTS_KEY = 'pages:ballots:%s'
+
+PAGE_KEY = 'pages:page:%s:%s:%s:%s'
+
+# Url names whose ``slug`` argument is the slug of a project.
+PROJECT_SLUG_URL_NAMES = ('project-detail', 'project-ballot-list')
+
+# Url names of pages showing the current tallies of ballots of the project.
+TALLY_URL_NAMES = (
+    'project-detail', 'project-ballot-list', 'committee-list',
+    'committee-detail', 'ballot-list')
+
+
+def page_cache():
+    """Get the cache the pages are stored in.
+
+    :returns: The ``PAGE_CACHE_ALIAS`` cache, or the default cache if that
+        is not configured.
+    :rtype: BaseCache
+    """
+    try:
+        return caches[getattr(settings, 'PAGE_CACHE_ALIAS', 'pages')]
+    except InvalidCacheBackendError:
+        return caches['default']
+
+
+def project_id_for_slug(slug):
+    """Get the primary key of a project, cached.
+
+    :param slug: The project slug.
+    :type slug: str
+
+    :returns: The primary key, or None if there is no such project.
+    :rtype: int, None
+    """
+    cache = page_cache()
+    key = PROJECT_KEY % slug
+    project_id = cache.get(key)
+    if project_id is None:
+        project_id = Project.objects.filter(slug=slug).values_list(
+            'id', flat=True).first()
+        if project_id is not None:
+            cache.set(key, project_id, None)
+    return project_id
+
+
+def forget_project_slug(slug):
+    """Drop the cached id of a deleted project, the slug may be reused.
+
+    :param slug: The project slug.
+    :type slug: str
+    """
+    page_cache().delete(PROJECT_KEY % slug)
+
+
+def project_ballot_tags(project_id):
+    """Get the cache tags of the ballots of a project, cached.
+
+    :param project_id: The primary key of the project.
+    :type project_id: int
+
+    :returns: The tags.
+    :rtype: list
+    """
+    key = BALLOTS_KEY % project_id
+    tags = get_tagged(key)
+    if tags is None:
+        # Creating or deleting a ballot invalidates the project tag.
+        tags = [BALLOT_TAG % ballot_id for ballot_id in Ballot.objects.filter(
+            committee__project_id=project_id).values_list('id', flat=True)]
+        set_tagged(key, tags, [PROJECT_TAG % project_id])
+    return tags
+
+
+def page_key(request, tags):
+    """Build the cache key of a page.
+
+    :param request: Http Request obj
+    :param tags: Cache tags of the page, the first one names it.
+    :type tags: list
+
+    :returns: The cache key.
+    :rtype: str
+    """
+    url = hashlib.md5(
+        (u'%s%s' % (request.get_host(), request.get_full_path())).encode(
+            'utf-8')).hexdigest()
+    language = getattr(request, 'LANGUAGE_CODE', settings.LANGUAGE_CODE)
+    generations = tag_generations(tags)
+    if len(tags) == 1:
+        generation = generations[tags[0]]
+    else:
+        generation = hashlib.md5(','.join(
+            '%s=%s' % (tag, generations[tag]) for tag in sorted(tags))
+        ).hexdigest()
+    return PAGE_KEY % (tags[0], generation, language, url)
+
+
+def anonymous_request(request):
+    """Whether a request is an anonymous page view, the same for everyone.
+
+    :param request: Http Request obj
+
+    :rtype: bool
+    """
+    if request.method not in ('GET', 'HEAD') or request.is_ajax():
+        return False
+    # A pending message must be shown on the next page.
+    if 'messages' in request.COOKIES:
+        return False
+    return not request.user.is_authenticated()
+
+
+def cacheable_response(response):
+    """Whether a response may be shared by all anonymous visitors.
+
+    :param response: Http Response obj
+
+    :rtype: bool
+    """
+    cache_control = response.get('Cache-Control', '')
+    return not (
+        response.status_code != 200 or response.streaming or
+        response.cookies or 'private' in cache_control or
+        'no-store' in cache_control)
+
+
+def page_tag(request, view_kwargs):
+    """Get the cache tag of the project (or site wide) page requested.
+
+    :param request: Http Request obj
+    :param view_kwargs: Keyword arguments of the view.
+    :type view_kwargs: dict
+
+    :returns: The tag, or None for an unknown project.
+    :rtype: str, None
+    """
+    slug = view_kwargs.get('project_slug')
+    url_name = getattr(request.resolver_match, 'url_name', None)
+    if slug is None and url_name in PROJECT_SLUG_URL_NAMES:
+        slug = view_kwargs.get('slug')
+    if slug is None:
+        return SITE_TAG
+    project_id = project_id_for_slug(slug)
+    if project_id is None:
+        return None
+    return PROJECT_TAG % project_id
+
+
+def page_tags(request, view_kwargs):
+    """Get the cache tags of the page requested.
+
+    :param request: Http Request obj
+    :param view_kwargs: Keyword arguments of the view.
+    :type view_kwargs: dict
+
+    :returns: The tag of page_tag, followed by the tags of the ballots of
+        the project for pages showing their tallies. None for an unknown
+        project.
+    :rtype: list, None
+    """
+    tag = page_tag(request, view_kwargs)
+    if tag is None:
+        return None
+    tags = [tag]
+    url_name = getattr(request.resolver_match, 'url_name', None)
+    if tag != SITE_TAG and url_name in TALLY_URL_NAMES:
+        tags.extend(project_ballot_tags(int(tag.split(':')[1])))
+    return tags
+
+
+class AnonymousPageCacheMiddleware(object):
+    """Serve anonymous GET requests from the page cache.
+
+    Should come before the session, csrf and messages middleware, so that
+    it sees the cookies they add to a response: pages which set cookies
+    (e.g. contain a csrf token) are never cached.
+    """
+
+    @staticmethod
+    def process_view(request, view_func, view_args, view_kwargs):
+        """Return the cached page for the request if there is one.
+
+        :param request: Http Request obj
+        :param view_func: The view which would handle the request.
+        :param view_args: Positional arguments of the view.
+        :param view_kwargs: Keyword arguments of the view.
+        """
+        if not getattr(settings, 'PAGE_CACHE_ENABLED', False) or \
+                not anonymous_request(request):
+            return None
+        tags = page_tags(request, view_kwargs)
+        if tags is None:
+            return None
+        request.page_cache_key = page_key(request, tags)
+        response = page_cache().get(request.page_cache_key)
+        if response is not None:
+            response['X-Page-Cache'] = 'HIT'
+        return response
+
+    @staticmethod
+    def process_response(request, response):
+        """Store a successful response to an anonymous request.
+
+        :param request: Http Request obj
+        :param response: Http Response obj
+        """
+        key = getattr(request, 'page_cache_key', None)
+        if key is None or response.has_header('X-Page-Cache') or \
+                not cacheable_response(response):
+            return response
+        response['X-Page-Cache'] = 'MISS'
+        # A plain copy, a cached TemplateResponse would be passed to the
+        # template response middleware again when served.
+        cached = HttpResponse(response.content, status=response.status_code)
+        for header, value in response.items():
+            cached[header] = value
+        page_cache().set(
+            key, cached, getattr(settings, 'PAGE_CACHE_TIMEOUT', 600))
+        return response
@@ -12,7 +12,13 @@ EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
-    }
+    },
+    'pages': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    },
+    'tags': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    },
 }
 
 # Make sure static files storage is set to default
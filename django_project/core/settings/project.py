@@ -17,6 +17,7 @@ INSTALLED_APPS += (
     'changes',
     'github_issue',
     'vota',
+    'search',
     'disqus',
 )
 
@@ -45,10 +46,85 @@ LOCALE_PATHS = (absolute_path('locale'),)
 
 
 MIDDLEWARE_CLASSES = (
+    # Per request query counts and timings, see INSTRUMENTATION_ENABLED
+    'core.instrumentation.InstrumentationMiddleware',
+    # Whole pages for anonymous visitors, see PAGE_CACHE_ENABLED
+    'core.page_cache.AnonymousPageCacheMiddleware',
+    # Cache-Control and Surrogate-Key headers, see EDGE_CACHE_ENABLED
+    'core.edge_cache.EdgeCacheMiddleware',
     # For nav bar generation
     'core.custom_middleware.NavContextMiddleware',
 ) + MIDDLEWARE_CLASSES
 
+# Record query counts and timings of every request, exposed as Server-Timing
+# headers and aggregated at /instrumentation/stats/ for staff.
+INSTRUMENTATION_ENABLED = False
+# Number of slowest requests kept with their query fingerprints
+INSTRUMENTATION_SLOWEST_REQUESTS = 10
+# Slowest requests taking longer than this many milliseconds are logged
+INSTRUMENTATION_SLOW_REQUEST_MS = 500
+
+# Serve anonymous visitors whole pages from the 'pages' cache. The cached
+# pages of a project are invalidated whenever one of its objects changes.
+PAGE_CACHE_ENABLED = True
+PAGE_CACHE_ALIAS = 'pages'
+# Seconds a page stays cached when nothing changes
+PAGE_CACHE_TIMEOUT = 600
+
+# Let the nginx proxy cache (deployment/projecta.nginx.conf) keep pages
+# which are the same for all anonymous visitors for EDGE_CACHE_MAX_AGE
+# seconds, and purge them when they change through the nginx purge
+# location, e.g. 'http://127.0.0.1/purge'. No purging if empty. Pages whose
+# purge was missed (see core.edge_cache) are stale for at most
+# EDGE_CACHE_MAX_AGE seconds.
+EDGE_CACHE_ENABLED = True
+EDGE_CACHE_MAX_AGE = 60
+EDGE_CACHE_PURGE_URL = ''
+EDGE_CACHE_PURGE_TIMEOUT = 2
+
+# Seconds a process keeps the projects it looked up by slug, see
+# base.project_cache. Other processes see changes to a project this late.
+PROJECT_CACHE_TIMEOUT = 30
+
+# Live ballot tallies (vota.views.ballot.BallotTallyView): seconds a tally
+# stream or long poll stays open, below the uwsgi harakiri timeout, and
+# seconds between checks of the change counter of the ballot. At most
+# BALLOT_TALLY_MAX_WAITING requests of a process wait at once, each holds a
+# worker thread; beyond that they are answered right away and asked to come
+# back after BALLOT_TALLY_BUSY_RETRY seconds.
+BALLOT_TALLY_WAIT_SECONDS = 15
+BALLOT_TALLY_POLL_INTERVAL = 1
+BALLOT_TALLY_MAX_WAITING = 10
+BALLOT_TALLY_BUSY_RETRY = 10
+
+# Cache holding the generations of the cache tags, see core.cache_tags
+CACHE_TAGS_ALIAS = 'tags'
+
+# The default and page caches are shared by the worker processes of the
+# host. The tag generations must be shared by all processes of all hosts
+# and incremented atomically, which the file based cache can not do, so
+# they (and the values cached with them) are kept in memcached.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': '/tmp/projecta-cache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+    'pages': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': '/tmp/projecta-page-cache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+    'tags': {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': os.environ.get('MEMCACHED_LOCATION', '127.0.0.1:11211'),
+    },
+}
+
 # Project specific javascript files to be pipelined
 # For third party libs like jquery should go in contrib.py
 PIPELINE_JS['project'] = {
@@ -8,6 +8,25 @@ INSTALLED_APPS += (
 
 TEST_RUNNER = 'django.test.runner.DiscoverRunner'
 
+# Keep the caches in memory, file based caches would outlive the test run
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'pages': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'pages',
+    },
+    'tags': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tags',
+    },
+}
+
+# Rolled back test data never signals a change, do not keep projects
+# between requests.
+PROJECT_CACHE_TIMEOUT = 0
+
 NOSE_ARGS = (
     '--with-coverage',
     '--cover-erase',
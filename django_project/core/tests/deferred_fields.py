@@ -0,0 +1,44 @@
+# coding=utf-8
+"""Detect deferred fields loaded one row at a time.
+
+List views load only the columns their templates show (``only()``). A
+template which then uses one of the other fields still works, but loads
+it with an extra query per object, which is easy to miss. Record those
+loads while rendering a page and fail the test::
+
+    with DeferredFieldLoads() as loads:
+        client.get(url)
+    self.assertEqual(loads.fields, [])
+"""
+from django.db.models import Model
+
+
+class DeferredFieldLoads(object):
+    """Context manager recording the deferred fields loaded inside it."""
+
+    def __init__(self):
+        self.fields = []
+        self._refresh_from_db = None
+
+    def __enter__(self):
+        self.fields = []
+        self._refresh_from_db = Model.__dict__['refresh_from_db']
+        original = self._refresh_from_db
+        loaded = self.fields
+
+        def refresh_from_db(instance, using=None, fields=None, **kwargs):
+            """Record the loading of deferred fields of an instance."""
+            if fields and instance._deferred:
+                model = instance._meta.proxy_for_model
+                for name in fields:
+                    field = '%s.%s' % (model.__name__, name)
+                    if field not in loaded:
+                        loaded.append(field)
+            return original(instance, using=using, fields=fields, **kwargs)
+
+        Model.refresh_from_db = refresh_from_db
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        Model.refresh_from_db = self._refresh_from_db
+        return False
@@ -0,0 +1,72 @@
+# coding=utf-8
+"""Tests for the page benchmark."""
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.utils.six import StringIO
+from core.benchmark import (
+    BENCHMARK_PAGES,
+    benchmark_host,
+    benchmark_targets,
+    compare,
+    percentile,
+    run_benchmark)
+from core.load_data import LoadDataGenerator
+
+
+class TestBenchmark(TestCase):
+    """Tests for core.benchmark."""
+
+    def test_percentile(self):
+        values = range(1, 101)
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile([7], 95), 7)
+
+    def test_compare(self):
+        baseline = {'page': {'status': 200, 'p95': 100.0}}
+        self.assertEqual(
+            compare({'page': {'status': 200, 'p95': 115.0}}, baseline), [])
+        self.assertEqual(len(compare(
+            {'page': {'status': 200, 'p95': 130.0}}, baseline)), 1)
+        self.assertEqual(len(compare(
+            {'page': {'status': 500, 'p95': 10.0}}, baseline)), 1)
+        # Pages missing from the baseline are not compared.
+        self.assertEqual(
+            compare({'other': {'status': 200, 'p95': 1.0}}, baseline), [])
+
+    def _load_data(self):
+        LoadDataGenerator(
+            projects=1, versions=2, entries=3, users=5, committee_size=3,
+            committees=1, ballots=1, votes=3, sponsors=1, periods=1).run()
+
+    def test_benchmark_host(self):
+        with override_settings(ALLOWED_HOSTS=['.example.com', 'other']):
+            self.assertEqual(benchmark_host(), 'example.com')
+        with override_settings(ALLOWED_HOSTS=['*']):
+            self.assertEqual(benchmark_host(), 'localhost')
+        with override_settings(ALLOWED_HOSTS=[]):
+            self.assertEqual(benchmark_host(), 'localhost')
+
+    @override_settings(ALLOWED_HOSTS=['changelog.example.com'])
+    def test_command_fails_on_errors(self):
+        self._load_data()
+        with self.assertRaises(CommandError):
+            call_command(
+                'run_benchmarks', host='evil.example.com', requests=1,
+                warmup=0, pages=['project-list'], stdout=StringIO())
+        out = StringIO()
+        call_command(
+            'run_benchmarks', requests=1, warmup=0, pages=['project-list'],
+            stdout=out)
+        self.assertIn('project-list', out.getvalue())
+
+    @override_settings(ALLOWED_HOSTS=['changelog.example.com'])
+    def test_run_benchmark(self):
+        self._load_data()
+        results = run_benchmark(
+            benchmark_targets(), requests=2, warmup=0)
+        self.assertEqual(len(results), len(BENCHMARK_PAGES))
+        for name, result in results.items():
+            self.assertEqual(result['status'], 200, name)
+            self.assertEqual(result['requests'], 2)
+            self.assertLessEqual(result['p50'], result['p95'])
@@ -0,0 +1,114 @@
+# coding=utf-8
+"""Tests for the tag based cache invalidation."""
+import json
+from django.core.signals import request_finished, request_started
+from django.core.urlresolvers import reverse
+from django.db import close_old_connections
+from django.test import TestCase
+from django.test.client import Client
+from base.tests.model_factories import ProjectF
+from changes.tests.model_factories import CategoryF, EntryF, VersionF
+from core.cache_tags import (
+    get_tagged,
+    invalidate_tags,
+    set_tagged,
+    stats,
+    tag_generation,
+    tags_for_instance)
+from core.model_factories import UserF
+from vota.tests.model_factories import BallotF, CommitteeF, VoteF
+
+
+class TestCacheTags(TestCase):
+    """Tests for core.cache_tags."""
+
+    def setUp(self):
+        """
+        Setup before each test
+        """
+        stats.reset()
+        self.project = ProjectF.create()
+        self.version = VersionF.create(project=self.project, name='1.0.0')
+        self.category = CategoryF.create(project=self.project)
+
+    def test_invalidate(self):
+        set_tagged('key', 'value', ['a', 'b'])
+        self.assertEqual(get_tagged('key'), 'value')
+        invalidate_tags(['c'])
+        self.assertEqual(get_tagged('key'), 'value')
+        invalidate_tags(['b'])
+        self.assertIsNone(get_tagged('key'))
+        self.assertEqual(get_tagged('missing', 'default'), 'default')
+        lookups = stats.as_dict()['lookups']
+        self.assertEqual(
+            (lookups['hit'], lookups['stale'], lookups['miss']), (2, 1, 1))
+
+    def test_entry_dirties_version_and_project(self):
+        tags = ['version:%s' % self.version.id, 'project:%s' % self.project.id]
+        set_tagged('version-page', 'cached', tags)
+        entry = EntryF.create(version=self.version, category=self.category)
+        self.assertIn('feeds:%s' % self.project.id, tags_for_instance(entry))
+        self.assertIsNone(get_tagged('version-page'))
+        invalidations = stats.as_dict()['invalidations']
+        self.assertEqual(invalidations['entry']['count'], 1)
+
+    def test_read_before_commit_is_dropped(self):
+        tags = ['project:%s' % self.project.id]
+        # As the test client does, keep the connection of the test
+        # transaction open.
+        request_started.disconnect(close_old_connections)
+        request_finished.disconnect(close_old_connections)
+        self.addCleanup(request_started.connect, close_old_connections)
+        self.addCleanup(request_finished.connect, close_old_connections)
+        request_started.send(sender=None)
+        try:
+            self.project.name = u'Renamed'
+            self.project.save()
+            # Another request reads the old row before the save is
+            # committed and caches it under the new generation.
+            set_tagged('project-page', 'old name', tags)
+            self.assertEqual(get_tagged('project-page'), 'old name')
+        finally:
+            request_finished.send(sender=None)
+        self.assertIsNone(get_tagged('project-page'))
+
+    def test_other_project_untouched(self):
+        generation = tag_generation('project:%s' % self.project.id)
+        VersionF.create(project=ProjectF.create(), name='2.0.0')
+        self.assertEqual(
+            tag_generation('project:%s' % self.project.id), generation)
+
+    def test_vota_models(self):
+        user = UserF.create()
+        committee = CommitteeF.create(project=self.project, users=[user])
+        ballot = BallotF.create(committee=committee, proposer=user)
+        generation = tag_generation('ballot:%s' % ballot.id)
+        project_generation = tag_generation('project:%s' % self.project.id)
+        VoteF.create(ballot=ballot, user=user, choice='y')
+        self.assertNotEqual(
+            tag_generation('ballot:%s' % ballot.id), generation)
+        self.assertEqual(
+            tag_generation('project:%s' % self.project.id),
+            project_generation)
+        generation = tag_generation('committee:%s' % committee.id)
+        committee.users.remove(user)
+        self.assertNotEqual(
+            tag_generation('committee:%s' % committee.id), generation)
+
+    def test_cascading_delete(self):
+        EntryF.create(version=self.version, category=self.category)
+        tag = 'version:%s' % self.version.id
+        generation = tag_generation(tag)
+        self.version.delete()
+        self.assertNotEqual(tag_generation(tag), generation)
+
+    def test_stats_view(self):
+        client = Client()
+        url = reverse('cache-tag-stats')
+        self.assertEqual(client.get(url).status_code, 403)
+        UserF.create(username='staff', password='password', is_staff=True)
+        client.login(username='staff', password='password')
+        data = json.loads(client.get(url).content)
+        self.assertIn('version', data['invalidations'])
+        data = json.loads(client.post(url).content)
+        self.assertEqual(data['invalidations'], {})
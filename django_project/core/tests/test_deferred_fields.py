@@ -0,0 +1,48 @@
+# coding=utf-8
+"""Tests for the deferred field load detection used by the view tests."""
+from django.core.urlresolvers import reverse
+from django.test import TestCase
+from django.test.client import Client
+from base.tests.model_factories import ProjectF
+from changes.models import Version
+from changes.tests.model_factories import VersionF
+from core.tests.deferred_fields import DeferredFieldLoads
+
+
+class TestDeferredFieldLoads(TestCase):
+    """Tests for core.tests.deferred_fields."""
+
+    def setUp(self):
+        """
+        Setup before each test
+        """
+        self.project = ProjectF.create()
+        self.version = VersionF.create(
+            project=self.project, name='1.0.0', description='Long text')
+
+    def test_records_deferred_loads(self):
+        version = Version.objects.only('name').get(id=self.version.id)
+        with DeferredFieldLoads() as loads:
+            self.assertEqual(version.name, '1.0.0')
+            self.assertEqual(loads.fields, [])
+            self.assertEqual(version.description, 'Long text')
+            self.assertEqual(version.slug, '1.0.0')
+            version.refresh_from_db()
+        self.assertEqual(
+            loads.fields, ['Version.description', 'Version.slug'])
+        # Restored on exit.
+        version = Version.objects.only('name').get(id=self.version.id)
+        with DeferredFieldLoads() as loads:
+            pass
+        self.assertEqual(version.description, 'Long text')
+        self.assertEqual(loads.fields, [])
+
+    def test_version_list(self):
+        client = Client()
+        client.post('/set_language/', data={'language': 'en'})
+        with DeferredFieldLoads() as loads:
+            response = client.get(reverse('version-list', kwargs={
+                'project_slug': self.project.slug}))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '1.0.0')
+        self.assertEqual(loads.fields, [])
@@ -0,0 +1,120 @@
+# coding=utf-8
+"""Tests for the edge cache headers and purging."""
+import threading
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from django.core.urlresolvers import reverse
+from django.test import TestCase
+from django.test.client import Client
+from base.tests.model_factories import ProjectF
+from changes.tests.model_factories import CategoryF, EntryF, VersionF
+from core.cache_tags import tag_cache
+from core.edge_cache import collect_purges, flush_purges
+from core.model_factories import UserF
+from core.page_cache import page_cache
+
+
+class StubPurgeServer(HTTPServer):
+    """Records the purge requests sent to it."""
+
+    def __init__(self):
+        HTTPServer.__init__(self, ('127.0.0.1', 0), StubPurgeHandler)
+        self.purged = []
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:%s/purge' % self.server_port
+
+
+class StubPurgeHandler(BaseHTTPRequestHandler):
+    """Answers like ngx_cache_purge."""
+
+    def do_GET(self):
+        self.server.purged.append((self.headers['Host'], self.path))
+        self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class TestEdgeCache(TestCase):
+    """Tests for EdgeCacheMiddleware and the purge hook."""
+
+    def setUp(self):
+        """
+        Setup before each test
+        """
+        tag_cache().clear()
+        page_cache().clear()
+        self.client = Client()
+        self.client.post('/set_language/', data={'language': 'en'})
+        self.project = ProjectF.create()
+        self.version = VersionF.create(project=self.project, name='1.0.0')
+        self.category = CategoryF.create(project=self.project)
+        self.url = reverse('version-detail', kwargs={
+            'project_slug': self.project.slug,
+            'slug': self.version.slug
+        })
+        self.server = StubPurgeServer()
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_headers(self):
+        response = self.client.get(self.url)
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('s-maxage=60', response['Cache-Control'])
+        keys = response['Surrogate-Key'].split()
+        self.assertIn('project:%s' % self.project.id, keys)
+        self.assertIn('version:%s' % self.version.id, keys)
+        # Served from the page cache with the same headers.
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Page-Cache'], 'HIT')
+        self.assertIn('version:%s' % self.version.id,
+                      response['Surrogate-Key'])
+
+    def test_authenticated_private(self):
+        UserF.create(username='reader', password='password')
+        self.client.login(username='reader', password='password')
+        response = self.client.get(self.url)
+        self.assertIn('private', response['Cache-Control'])
+        self.assertFalse(response.has_header('Surrogate-Key'))
+
+    def test_purge_on_change(self):
+        project_url = reverse('project-detail', kwargs={
+            'slug': self.project.slug})
+        other_project = ProjectF.create()
+        other_url = reverse('project-detail', kwargs={
+            'slug': other_project.slug})
+        with self.settings(EDGE_CACHE_PURGE_URL=self.server.url):
+            self.client.get(self.url)
+            self.client.get(project_url)
+            self.client.get(other_url)
+            EntryF.create(version=self.version, category=self.category)
+        self.assertEqual(
+            sorted(self.server.purged),
+            sorted([('testserver', '/purge' + self.url),
+                    ('testserver', '/purge' + project_url)]))
+
+    def test_purge_after_request(self):
+        with self.settings(EDGE_CACHE_PURGE_URL=self.server.url):
+            self.client.get(self.url)
+            collect_purges(sender=None)
+            try:
+                EntryF.create(version=self.version, category=self.category)
+                EntryF.create(version=self.version, category=self.category)
+                self.assertEqual(self.server.purged, [])
+            finally:
+                flush_purges(sender=None)
+        # Once, however often its tags were invalidated.
+        self.assertEqual(
+            self.server.purged, [('testserver', '/purge' + self.url)])
+
+    def test_no_purge_url(self):
+        self.client.get(self.url)
+        EntryF.create(version=self.version, category=self.category)
+        self.assertEqual(self.server.purged, [])
@@ -0,0 +1,68 @@
+# coding=utf-8
+"""Tests for the request instrumentation middleware."""
+import json
+from django.core.urlresolvers import reverse
+from django.test import TestCase, override_settings
+from django.test.client import Client
+from base.tests.model_factories import ProjectF
+from changes.tests.model_factories import VersionF
+from core.instrumentation import fingerprint, stats
+from core.model_factories import UserF
+
+
+class TestInstrumentation(TestCase):
+    """Tests that requests are measured when instrumentation is enabled."""
+
+    def setUp(self):
+        """
+        Setup before each test
+        """
+        self.client = Client()
+        self.client.post(
+            '/set_language/', data={'language': 'en'})
+        self.project = ProjectF.create()
+        VersionF.create(project=self.project, name='1.0.0')
+        self.user = UserF.create(**{
+            'username': 'timlinux',
+            'password': 'password',
+            'is_staff': True
+        })
+        stats.reset()
+
+    def test_fingerprint(self):
+        self.assertEqual(
+            fingerprint(
+                'SELECT "a" FROM "t" WHERE "id" IN (1, 2, 3) AND '
+                '"name" = \'x\'  AND "n" > 2.5'),
+            'SELECT "a" FROM "t" WHERE "id" IN (...) AND "name" = ? AND '
+            '"n" > ?')
+
+    def test_disabled_by_default(self):
+        response = self.client.get(reverse('version-list', kwargs={
+            'project_slug': self.project.slug}))
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    @override_settings(INSTRUMENTATION_ENABLED=True)
+    def test_server_timing_and_stats(self):
+        client = Client()
+        client.post('/set_language/', data={'language': 'en'})
+        response = client.get(reverse('version-list', kwargs={
+            'project_slug': self.project.slug}))
+        header = response['Server-Timing']
+        self.assertIn('db;dur=', header)
+        self.assertIn('template;dur=', header)
+        self.assertIn('total;dur=', header)
+
+        client.login(username='timlinux', password='password')
+        data = json.loads(client.get(
+            reverse('instrumentation-stats')).content)
+        self.assertTrue(data['enabled'])
+        self.assertEqual(data['views']['version-list']['requests'], 1)
+        self.assertGreater(data['views']['version-list']['queries'], 0)
+        slowest = [record['view'] for record in data['slowest']]
+        self.assertIn('version-list', slowest)
+        self.assertTrue(data['slowest'][0]['fingerprints'])
+
+    def test_stats_staff_only(self):
+        response = self.client.get(reverse('instrumentation-stats'))
+        self.assertEqual(response.status_code, 403)
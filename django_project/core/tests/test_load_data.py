@@ -0,0 +1,79 @@
+# coding=utf-8
+"""Tests for the synthetic load test data generator."""
+from StringIO import StringIO
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.db.models import Count
+from django.test import TestCase
+from base.models import Project
+from changes.models import Entry, SponsorshipPeriod, Version
+from vota.models import Ballot, BallotResult, Committee, Vote
+
+SIZES = {
+    'projects': 2,
+    'versions': 3,
+    'entries': 4,
+    'users': 10,
+    'committee_size': 5,
+    'committees': 1,
+    'ballots': 2,
+    'votes': 4,
+    'sponsors': 2,
+    'periods': 2,
+    'chunk_size': 5,
+}
+
+
+class TestGenerateLoadData(TestCase):
+    """Tests for the generate_load_data command."""
+
+    def generate(self, **options):
+        options.update(SIZES)
+        call_command('generate_load_data', stdout=StringIO(), **options)
+
+    def test_volumes(self):
+        self.generate()
+        self.assertEqual(Project.objects.count(), 2)
+        self.assertEqual(User.objects.count(), 10)
+        self.assertEqual(Version.objects.count(), 2 * 3)
+        self.assertEqual(Entry.objects.count(), 2 * 3 * 4)
+        self.assertEqual(SponsorshipPeriod.objects.count(), 2 * 2 * 2)
+        self.assertEqual(Committee.objects.count(), 2)
+        self.assertEqual(Committee.users.through.objects.count(), 2 * 5)
+        self.assertEqual(Ballot.objects.count(), 2 * 2)
+        self.assertEqual(Vote.objects.count(), 2 * 2 * 4)
+        self.assertEqual(
+            set(Ballot.objects.annotate(
+                votes=Count('vote')).values_list('votes', flat=True)),
+            {4})
+        for committee in Committee.objects.all():
+            self.assertFalse(Vote.objects.filter(
+                ballot__committee=committee).exclude(
+                user__in=committee.users.all()).exists())
+        # The last ballot of each committee is open, the other is closed.
+        self.assertEqual(
+            sorted(ballot.is_open() for ballot in Ballot.objects.all()),
+            [False, False, True, True])
+        self.assertEqual(BallotResult.objects.count(), 2)
+        version = Version.objects.get(
+            project__slug='load-project-000', slug='1.0.2')
+        self.assertEqual(
+            version.slug, Version.slug_for_name(version.name))
+        self.assertEqual(version.padded_version, '001000002')
+
+    def test_more_votes_than_members(self):
+        with self.assertRaises(CommandError):
+            call_command(
+                'generate_load_data', stdout=StringIO(),
+                **dict(SIZES, votes=6))
+        self.assertFalse(Project.objects.exists())
+
+    def test_deterministic(self):
+        self.generate(seed=3)
+        first = list(Entry.objects.order_by('id').values_list(
+            'title', 'category__name', 'approved'))
+        self.generate(seed=3, clear=True)
+        second = list(Entry.objects.order_by('id').values_list(
+            'title', 'category__name', 'approved'))
+        self.assertEqual(first, second)
+        self.assertEqual(Project.objects.count(), 2)
@@ -0,0 +1,94 @@
+# coding=utf-8
+"""Tests for the anonymous page cache."""
+from django.core.urlresolvers import reverse
+from django.test import TestCase
+from django.test.client import Client
+from base.tests.model_factories import ProjectF
+from changes.tests.model_factories import (
+    CategoryF,
+    EntryF,
+    VersionF)
+from core.model_factories import UserF
+from core.page_cache import page_cache
+from vota.tests.model_factories import BallotF, CommitteeF, VoteF
+
+
+class TestAnonymousPageCache(TestCase):
+    """Tests for AnonymousPageCacheMiddleware."""
+
+    def setUp(self):
+        """
+        Setup before each test
+        """
+        page_cache().clear()
+        self.client = Client()
+        self.client.post('/set_language/', data={'language': 'en'})
+        self.project = ProjectF.create()
+        self.other_project = ProjectF.create()
+        self.version = VersionF.create(project=self.project, name='1.0.0')
+        self.category = CategoryF.create(project=self.project)
+        self.url = reverse('version-detail', kwargs={
+            'project_slug': self.project.slug,
+            'slug': self.version.slug
+        })
+
+    def test_anonymous_page_cached(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Page-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Page-Cache'], 'HIT')
+        self.assertEqual(response.status_code, 200)
+
+    def test_invalidated_by_project_change(self):
+        self.client.get(self.url)
+        EntryF.create(
+            version=self.version, category=self.category,
+            title='Brand new entry', approved=True)
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Page-Cache'], 'MISS')
+        self.assertContains(response, 'Brand new entry')
+
+    def test_other_project_change_keeps_cache(self):
+        self.client.get(self.url)
+        VersionF.create(project=self.other_project, name='2.0.0')
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Page-Cache'], 'HIT')
+
+    def test_vote_invalidates_tally_pages_only(self):
+        user = UserF.create()
+        committee = CommitteeF.create(project=self.project, users=[user])
+        ballot = BallotF.create(committee=committee, proposer=user)
+        ballot_list_url = reverse('ballot-list', kwargs={
+            'project_slug': self.project.slug,
+            'committee_slug': committee.slug
+        })
+        self.client.get(self.url)
+        response = self.client.get(ballot_list_url)
+        self.assertEqual(response['X-Page-Cache'], 'MISS')
+        response = self.client.get(ballot_list_url)
+        self.assertEqual(response['X-Page-Cache'], 'HIT')
+        VoteF.create(ballot=ballot, user=user, choice='y')
+        response = self.client.get(ballot_list_url)
+        self.assertEqual(response['X-Page-Cache'], 'MISS')
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Page-Cache'], 'HIT')
+
+    def test_language_in_key(self):
+        self.client.get(self.url)
+        with self.settings(LANGUAGE_CODE='en'):
+            response = self.client.get(self.url.replace('/en/', '/id/', 1))
+        self.assertEqual(response['X-Page-Cache'], 'MISS')
+
+    def test_authenticated_bypass(self):
+        UserF.create(username='reader', password='password')
+        self.client.get(self.url)
+        self.client.login(username='reader', password='password')
+        response = self.client.get(self.url)
+        self.assertFalse(response.has_header('X-Page-Cache'))
+
+    def test_disabled(self):
+        with self.settings(PAGE_CACHE_ENABLED=False):
+            self.client.get(self.url)
+            response = self.client.get(self.url)
+        self.assertFalse(response.has_header('X-Page-Cache'))
@@ -0,0 +1,387 @@
+# coding=utf-8
+"""Query count regression tests for every named URL.
+
+A synthetic fixture with several objects behind every relation is built
+from the model factories, then every named URL of changes, vota and base is
+requested as an anonymous user, a member (logged in, not staff) and a
+staff user. The fixture is then grown tenfold and every URL requested
+again: the number of queries must not change, so a change which adds an
+N+1 query pattern to a view fails here, and must stay within the ceilings
+in ``query_budgets.json``, as must the wall time. Pages must also not use
+fields their view deferred with ``only()``, each of which costs a query per
+row.
+
+After an intended change in query counts, regenerate the budget file
+(which also records the wall time ceilings, see time_budget_for) with::
+
+    QUERY_BUDGETS_UPDATE=1 python manage.py test core.tests.test_query_budgets
+
+and review the diff.
+"""
+import datetime
+import json
+import math
+import os
+import time
+from distutils.spawn import find_executable
+from importlib import import_module
+from django.contrib.sites.models import Site
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
+from base.tests.model_factories import ProjectF
+from changes.tests.model_factories import (
+    CategoryF,
+    EntryF,
+    SponsorF,
+    SponsorshipLevelF,
+    SponsorshipPeriodF,
+    VersionF)
+from core.cache_tags import tag_cache
+from core.model_factories import UserF
+from core.page_cache import page_cache
+from core.tests.deferred_fields import DeferredFieldLoads
+from vota.tests.model_factories import BallotF, CommitteeF, VoteF
+
+BUDGET_FILE = os.path.join(os.path.dirname(__file__), 'query_budgets.json')
+
+URL_MODULES = ('changes.urls', 'vota.urls', 'base.urls')
+
+ROLES = ('anonymous', 'member', 'staff')
+
+# Wall time ceiling (ms) for views without their own 'time' budget. The
+# time budgets are deliberately generous, to only catch pathological
+# slowdowns on a busy CI machine: the query count is the precise
+# regression signal.
+DEFAULT_TIME_BUDGET = 10000
+
+# A regenerated 'time' budget is the slowest role's wall time times this
+# factor, rounded up to 100 ms and at least MIN_TIME_BUDGET.
+TIME_BUDGET_FACTOR = 10
+MIN_TIME_BUDGET = 5000
+
+# Numbers of objects created behind each relation of the fixture. Every
+# URL is measured with both, and must run as many queries with each.
+FIXTURE_SIZES = (12, 40)
+
+
+def time_budget_for(durations):
+    """Get the wall time ceiling recorded for the durations of a view.
+
+    :param durations: The wall times in ms of the requests of each role.
+    :type durations: list
+
+    :returns: The ceiling in ms.
+    :rtype: int
+    """
+    ceiling = int(math.ceil(max(durations) * TIME_BUDGET_FACTOR / 100.0))
+    return max(MIN_TIME_BUDGET, ceiling * 100)
+
+
+def pandoc_available():
+    """Whether the pandoc binary used by the download views is installed."""
+    return find_executable('pandoc') is not None
+
+
+# URL name -> check for an external program the view needs.
+EXTERNAL_REQUIREMENTS = {
+    'version-download': pandoc_available,
+}
+
+
+class Rollback(Exception):
+    """Raised to undo the changes made by a request."""
+
+
+class TestQueryBudgets(TestCase):
+    """Checks the query count of every named URL against its budget."""
+
+    def setUp(self):
+        """
+        Build the parts of the synthetic fixture which do not grow.
+        """
+        self.member = UserF.create(username='member', password='password')
+        self.staff = UserF.create(
+            username='staff', password='password', is_staff=True)
+        self.project = ProjectF.create(owner=self.staff)
+        # A second project, so that missing project filters show up.
+        ProjectF.create()
+        self.categories = []
+        self.versions = []
+        self.entries = {}
+        self.levels = []
+        self.sponsors = []
+        self.periods = []
+        self.committee = CommitteeF.create(
+            project=self.project, chair=self.staff,
+            users=[self.staff, self.member])
+        self.ballots = []
+        self.grow(FIXTURE_SIZES[0])
+        self.version = self.versions[-1]
+        self.entry = EntryF.create(
+            version=self.version, category=self.categories[0])
+        self.ballot = self.ballots[0]
+
+        # Pending objects for the approve views.
+        self.pending = {
+            'project': ProjectF.create(approved=False),
+            'category': CategoryF.create(
+                project=self.project, approved=False),
+            'version': VersionF.create(
+                project=self.project, name='9.0.0', approved=False),
+            'entry': EntryF.create(
+                version=self.version,
+                category=self.categories[0],
+                approved=False),
+            'sponsor': SponsorF.create(project=self.project, approved=False),
+            'sponsorshiplevel': SponsorshipLevelF.create(
+                project=self.project, approved=False),
+            'sponsorshipperiod': SponsorshipPeriodF.create(
+                project=self.project,
+                sponsor=self.sponsors[0],
+                sponsorship_level=self.levels[0],
+                approved=False),
+        }
+
+    def grow(self, size):
+        """Add objects until there are size of them behind every relation.
+
+        The objects already created (and so the urls of the fixture) stay
+        the same.
+
+        :param size: Number of objects behind each relation.
+        :type size: int
+        """
+        for number in range(len(self.categories), size):
+            self.categories.append(
+                CategoryF.create(project=self.project, sort_number=number))
+        for number in range(len(self.versions), size):
+            self.versions.append(VersionF.create(
+                project=self.project,
+                name='1.%s.0' % number,
+                release_date=(
+                    datetime.date(2015, 1, 1) +
+                    datetime.timedelta(days=number))))
+        for version in self.versions:
+            entries = self.entries.setdefault(version.id, [])
+            for number in range(len(entries), size):
+                entries.append(EntryF.create(
+                    version=version,
+                    category=self.categories[number],
+                    author=self.member,
+                    funded_by='Funder',
+                    funder_url='http://funder.example.com'))
+
+        for number in range(len(self.levels), size):
+            self.levels.append(SponsorshipLevelF.create(
+                project=self.project, value=number))
+        for number in range(len(self.sponsors), size):
+            sponsor = SponsorF.create(project=self.project)
+            self.sponsors.append(sponsor)
+            self.periods.append(SponsorshipPeriodF.create(
+                project=self.project,
+                sponsor=sponsor,
+                sponsorship_level=self.levels[number],
+                start_date=datetime.date(2014, 1, 1),
+                end_date=datetime.date(2016, 1, 1)))
+
+        for number in range(len(self.ballots), size):
+            ballot = BallotF.create(
+                committee=self.committee, proposer=self.staff)
+            self.ballots.append(ballot)
+            for user in (self.staff, self.member):
+                VoteF.create(ballot=ballot, user=user, choice='y')
+
+    def url_kwargs(self, name, pattern):
+        """Get the kwargs to reverse a named URL against the fixture.
+
+        :param name: The URL name.
+        :type name: str
+
+        :param pattern: The regex of the URL pattern.
+        :type pattern: str
+
+        :returns: The kwargs of the URL.
+        :rtype: dict
+        """
+        prefix = name.split('-')[0]
+        if name.endswith('-approve'):
+            obj = self.pending[prefix]
+        elif name == 'sponsor-detail':
+            # The sponsor list links to the detail of a sponsorship period.
+            obj = self.periods[0]
+        else:
+            obj = {
+                'category': self.categories[0],
+                'version': self.version,
+                'entry': self.entry,
+                'sponsor': self.sponsors[0],
+                'sponsorshiplevel': self.levels[0],
+                'sponsorshipperiod': self.periods[0],
+                'committee': self.committee,
+                'ballot': self.ballot,
+                'project': self.project,
+            }.get(prefix)
+        candidates = {
+            'project_slug': self.project.slug,
+            'version_slug': self.version.slug,
+            'committee_slug': self.committee.slug,
+            'ballot_slug': self.ballot.slug,
+            'from_slug': self.versions[0].slug,
+            'to_slug': self.version.slug,
+            'version': self.version.id,
+            'model_name': 'entry',
+            'action': 'approve',
+            'slug': getattr(obj, 'slug', None),
+            'pk': getattr(obj, 'pk', None),
+        }
+        return dict(
+            (key, value) for key, value in candidates.items()
+            if '(?P<%s>' % key in pattern)
+
+    def named_urls(self):
+        """Get (name, url) of every named URL of the tested apps.
+
+        :returns: A list of tuples.
+        :rtype: list
+        """
+        urls = []
+        for module in URL_MODULES:
+            for pattern in import_module(module).urlpatterns:
+                if pattern.name:
+                    urls.append((pattern.name, reverse(
+                        pattern.name,
+                        kwargs=self.url_kwargs(
+                            pattern.name, pattern.regex.pattern))))
+        return urls
+
+    def client_for(self, role):
+        """Get a test client logged in as the role.
+
+        :param role: One of ROLES.
+        :type role: str
+
+        :returns: A client.
+        :rtype: Client
+        """
+        client = Client()
+        client.post('/set_language/', data={'language': 'en'})
+        if role != 'anonymous':
+            client.login(username=role, password='password')
+        return client
+
+    def measure(self, client, url, ajax=False):
+        """Request a URL, undoing any changes it makes.
+
+        :returns: A tuple of (status code, number of queries, time in ms,
+            deferred fields loaded).
+        :rtype: tuple
+        """
+        cache.clear()
+        tag_cache().clear()
+        page_cache().clear()
+        # The current site is cached per process by the first page using it.
+        Site.objects.clear_cache()
+        try:
+            with transaction.atomic():
+                with CaptureQueriesContext(connection) as queries, \
+                        DeferredFieldLoads() as deferred:
+                    start = time.time()
+                    try:
+                        if ajax:
+                            status = client.get(
+                                url, HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+                            ).status_code
+                        else:
+                            status = client.get(url).status_code
+                    except Exception:  # pylint: disable=broad-except
+                        # The test client re-raises errors of the view.
+                        status = 500
+                    duration = (time.time() - start) * 1000
+                raise Rollback()
+        except Rollback:
+            pass
+        return status, len(queries), duration, deferred.fields
+
+    def measure_all(self, clients, errors):
+        """Request every named URL as every role.
+
+        :param clients: Role -> client, see client_for.
+        :type clients: dict
+
+        :param errors: List to add the page errors to.
+        :type errors: list
+
+        :returns: URL name -> role -> (number of queries, time in ms), the
+            URLs whose external requirement is missing are left out.
+        :rtype: dict
+        """
+        measured = {}
+        for name, url in self.named_urls():
+            requirement = EXTERNAL_REQUIREMENTS.get(name)
+            if requirement and not requirement():
+                continue
+            measured[name] = {}
+            for role in ROLES:
+                status, queries, duration, deferred = self.measure(
+                    clients[role], url, ajax=name.startswith('json-'))
+                measured[name][role] = (queries, duration)
+                if status >= 500:
+                    errors.append(
+                        '%s as %s: status %s' % (name, role, status))
+                if deferred:
+                    errors.append('%s as %s: loads deferred %s' % (
+                        name, role, ', '.join(deferred)))
+        return measured
+
+    def test_query_budgets(self):
+        with open(BUDGET_FILE) as budget_file:
+            budgets = json.load(budget_file)
+        update = bool(os.environ.get('QUERY_BUDGETS_UPDATE'))
+        errors = []
+        problems = []
+        clients = dict((role, self.client_for(role)) for role in ROLES)
+        small = self.measure_all(clients, errors)
+        self.grow(FIXTURE_SIZES[1])
+        large = self.measure_all(clients, errors)
+        self.assertEqual(errors, [], 'Page errors:\n' + '\n'.join(errors))
+
+        updated = dict(budgets)
+        for name, roles in sorted(large.items()):
+            budget = budgets.get(name, {})
+            updated[name] = {'time': time_budget_for(
+                [duration for _, duration in roles.values()])}
+            for role in ROLES:
+                queries, duration = roles[role]
+                updated[name][role] = queries
+                if queries != small[name][role][0]:
+                    problems.append(
+                        '%s as %s: %s queries with %s rows, %s with %s' % (
+                            name, role, small[name][role][0],
+                            FIXTURE_SIZES[0], queries, FIXTURE_SIZES[1]))
+                if role not in budget:
+                    if not update:
+                        problems.append(
+                            '%s as %s: no budget, %s queries' % (
+                                name, role, queries))
+                    continue
+                if queries > budget[role]:
+                    problems.append(
+                        '%s as %s: %s queries, budget %s' % (
+                            name, role, queries, budget[role]))
+                time_budget = budget.get('time', DEFAULT_TIME_BUDGET)
+                if duration > time_budget:
+                    problems.append(
+                        '%s as %s: %.0f ms, budget %s ms' % (
+                            name, role, duration, time_budget))
+        if update:
+            with open(BUDGET_FILE, 'w') as budget_file:
+                json.dump(
+                    updated, budget_file, indent=2, sort_keys=True,
+                    separators=(',', ': '))
+                budget_file.write('\n')
+        self.assertEqual(
+            problems, [], 'Query budgets exceeded:\n' + '\n'.join(problems))
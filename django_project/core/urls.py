@@ -8,6 +8,8 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.http import HttpResponseServerError
 from django.template import loader, Context
+from core.cache_tags import CacheTagStatsView
+from core.instrumentation import InstrumentationStatsView
 
 admin.autodiscover()
 handler404 = 'base.views.error_views.custom_404'
@@ -35,6 +37,8 @@ urlpatterns = []
 # e.g. /en/reports/
 urlpatterns += i18n_patterns(
     url(r'^site-admin/', include(admin.site.urls)),
+    # before base.urls, whose project detail pattern would match search/
+    url(r'^', include('search.urls')),
     url(r'^', include('base.urls')),
     url(r'^', include('changes.urls')),
     url(r'^', include('vota.urls')),
@@ -47,6 +51,16 @@ urlpatterns += i18n_patterns(
     url(r'^accounts/logout/', 'django.contrib.auth.views.logout', name='user-logout'),
 )
 
+urlpatterns += patterns(
+    '',
+    url(r'^instrumentation/stats/$',
+        InstrumentationStatsView.as_view(),
+        name='instrumentation-stats'),
+    url(r'^cache-tags/stats/$',
+        CacheTagStatsView.as_view(),
+        name='cache-tag-stats'),
+)
+
 if 'rosetta' in settings.INSTALLED_APPS:
     urlpatterns += patterns(
         '',
@@ -0,0 +1,4 @@
+# coding=utf-8
+"""Full-text search across changelog entries, versions and ballots."""
+
+default_app_config = 'search.apps.SearchConfig'
@@ -0,0 +1,13 @@
+# coding=utf-8
+"""App configuration for search."""
+from django.apps import AppConfig
+
+
+class SearchConfig(AppConfig):
+    """Connects the handlers which keep the search index up to date."""
+    name = 'search'
+    verbose_name = 'Search'
+
+    def ready(self):
+        # noinspection PyUnresolvedReferences
+        import search.handlers  # noqa
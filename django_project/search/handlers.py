@@ -0,0 +1,90 @@
+# coding=utf-8
+"""Signal receivers keeping the search index in sync with the content.
+
+Connected when the app registry is ready (see SearchConfig).
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from base.models import Project
+from changes.models import Entry, Version
+from changes.signals import entries_imported, objects_moderated
+from vota.models import Ballot
+from .index import index_instance, index_queryset, kind_for_model
+from .models import SearchDocument
+
+
+@receiver(post_save, sender=Entry)
+@receiver(post_save, sender=Version)
+@receiver(post_save, sender=Ballot)
+def update_document(sender, instance, raw=False, **kwargs):
+    """Index an object when it is saved."""
+    if raw:
+        # Loading fixtures, related objects may not exist yet.
+        return
+    index_instance(instance)
+
+
+@receiver(post_save, sender=Version)
+def update_version_entries(sender, instance, raw=False, created=False,
+                           **kwargs):
+    """Reindex the entries of a saved version, they are only public while
+    the version is approved.
+    """
+    if raw or created:
+        return
+    index_queryset(Entry.objects.filter(version=instance))
+
+
+@receiver(post_save, sender=Project)
+def update_project_documents(sender, instance, raw=False, created=False,
+                             **kwargs):
+    """Reindex the versions and ballots of a saved project, their urls use
+    its slug.
+    """
+    if raw or created:
+        return
+    index_queryset(Version.objects.filter(project=instance))
+    index_queryset(Ballot.objects.filter(committee__project=instance))
+
+
+@receiver(post_delete, sender=Entry)
+@receiver(post_delete, sender=Version)
+@receiver(post_delete, sender=Ballot)
+def delete_document(sender, instance, **kwargs):
+    """Remove the document of a deleted object from the index."""
+    SearchDocument.objects.filter(
+        kind=kind_for_model(sender), object_id=instance.pk).delete()
+
+
+@receiver(entries_imported)
+def index_imported_entries(sender, version, **kwargs):
+    """Index the entries of a version after a bulk import."""
+    index_queryset(Entry.objects.filter(version=version))
+
+
+@receiver(objects_moderated)
+def update_moderated_documents(sender, action, ids, **kwargs):
+    """Publish the documents of objects approved in bulk.
+
+    Entries are only public in approved versions, so approving a version
+    publishes its approved entries too. Rejected objects are deleted,
+    which sends post_delete for each of them.
+    """
+    kind = kind_for_model(sender)
+    if kind is None or action != 'approve':
+        return
+    if kind == 'entry':
+        SearchDocument.objects.filter(
+            kind=kind,
+            object_id__in=Entry.objects.filter(
+                id__in=ids, version__approved=True).values('id')).update(
+            public=True)
+        return
+    SearchDocument.objects.filter(
+        kind=kind, object_id__in=ids).update(public=True)
+    if kind == 'version':
+        SearchDocument.objects.filter(
+            kind='entry',
+            object_id__in=Entry.objects.filter(
+                version_id__in=ids, approved=True).values('id')).update(
+            public=True)
@@ -0,0 +1,319 @@
+# coding=utf-8
+"""Maintaining and querying the full-text search index.
+
+Each searchable object is stored as one SearchDocument. On PostgreSQL the
+documents are matched with ``to_tsvector`` / ``plainto_tsquery`` against
+the trigger maintained ``search_vector`` column and ranked with
+``ts_rank``. Elsewhere the documents are tokenised in Python and matched
+through the SearchTerm postings, ranked by summed term weights.
+"""
+import logging
+import re
+from collections import Counter
+from django.core.urlresolvers import NoReverseMatch
+from django.db import connection, transaction
+from django.utils.translation import get_language
+from django.db.models import Count, Sum
+from core.settings.contrib import STOP_WORDS
+from changes.models import Entry, Version
+from vota.models import Ballot
+from .models import SearchDocument, SearchTerm
+
+logger = logging.getLogger(__name__)
+
+TERM_MAX_LENGTH = 64
+
+# Occurrences of a term in the title count this many times.
+TITLE_WEIGHT = 4
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+# Upper bound of rows per INSERT when writing the index in bulk.
+BATCH_SIZE = 500
+
+
+def uses_native_search():
+    """Whether the database provides native full-text search.
+
+    :returns: True on PostgreSQL.
+    :rtype: bool
+    """
+    return connection.vendor == 'postgresql'
+
+
+def tokenize(text):
+    """Split text into lower cased search terms, dropping stop words.
+
+    :param text: The text to split.
+    :type text: str
+
+    :returns: A list of terms (with repetitions).
+    :rtype: list
+    """
+    return [
+        word[:TERM_MAX_LENGTH] for word in WORD_RE.findall(
+            (text or u'').lower())
+        if len(word) > 1 and word not in STOP_WORDS]
+
+
+def _url(instance):
+    """Get the url of an object without the language prefix.
+
+    :param instance: The indexed object.
+    :type instance: Model
+
+    :returns: The url path, or an empty string if it can not be reversed
+        (e.g. a version without a slug).
+    :rtype: str
+    """
+    try:
+        url = instance.get_absolute_url()
+    except NoReverseMatch:
+        return ''
+    prefix = '/%s/' % get_language()
+    if url.startswith(prefix):
+        url = url[len(prefix) - 1:]
+    return url
+
+
+def _entry_document(entry):
+    return {
+        'project_id': entry.version.project_id,
+        'version_id': entry.version_id,
+        'title': entry.title,
+        'body': entry.description or u'',
+        'url': _url(entry),
+        'public': entry.approved and entry.version.approved,
+    }
+
+
+def _version_document(version):
+    return {
+        'project_id': version.project_id,
+        'version_id': version.id,
+        'title': version.name,
+        'body': version.description or u'',
+        'url': _url(version),
+        'public': version.approved,
+    }
+
+
+def _ballot_document(ballot):
+    return {
+        'project_id': ballot.committee.project_id,
+        'version_id': None,
+        'title': ballot.name,
+        'body': u'%s\n%s' % (ballot.summary, ballot.description),
+        'url': _url(ballot),
+        'public': not ballot.private,
+    }
+
+
+# kind -> (model, function building the document fields, select_related).
+INDEXED_MODELS = {
+    'entry': (Entry, _entry_document, ('version__project',)),
+    'version': (Version, _version_document, ('project',)),
+    'ballot': (Ballot, _ballot_document, ('committee__project',)),
+}
+
+
+def kind_for_model(model):
+    """Get the document kind of an indexed model.
+
+    :param model: A model class or instance.
+    :type model: Model
+
+    :returns: The kind, or None if the model is not indexed.
+    :rtype: str, None
+    """
+    for kind, (indexed_model, _, _) in INDEXED_MODELS.items():
+        if isinstance(model, indexed_model) or model is indexed_model:
+            return kind
+    return None
+
+
+def _postings(document):
+    """Count the weighted terms of a document.
+
+    :param document: The (saved) search document.
+    :type document: SearchDocument
+
+    :returns: Unsaved SearchTerm instances.
+    :rtype: list
+    """
+    weights = Counter(tokenize(document.body))
+    for term in tokenize(document.title):
+        weights[term] += TITLE_WEIGHT
+    return [
+        SearchTerm(document=document, term=term, weight=weight)
+        for term, weight in weights.items()]
+
+
+def _batch_size(model, objects):
+    """Rows per INSERT for a bulk write, within the database limits.
+
+    SQLite limits both the number of query parameters and the number of
+    rows of a compound INSERT, and an explicit batch size is not checked
+    against those limits.
+
+    :param model: The model to insert.
+    :type model: Model
+
+    :param objects: The unsaved instances.
+    :type objects: list
+
+    :returns: The batch size.
+    :rtype: int
+    """
+    return max(1, min(BATCH_SIZE, connection.ops.bulk_batch_size(
+        model._meta.concrete_fields, objects)))
+
+
+def index_instance(instance):
+    """Add or refresh the search document of a single object.
+
+    :param instance: An Entry, Version or Ballot.
+    :type instance: Model
+
+    :returns: The search document.
+    :rtype: SearchDocument
+    """
+    kind = kind_for_model(instance)
+    _, build, _ = INDEXED_MODELS[kind]
+    with transaction.atomic():
+        document, _ = SearchDocument.objects.update_or_create(
+            kind=kind, object_id=instance.pk, defaults=build(instance))
+        if not uses_native_search():
+            document.terms.all().delete()
+            SearchTerm.objects.bulk_create(_postings(document))
+    return document
+
+
+def remove_instance(instance):
+    """Remove the search document of an object.
+
+    :param instance: An Entry, Version or Ballot.
+    :type instance: Model
+    """
+    SearchDocument.objects.filter(
+        kind=kind_for_model(instance), object_id=instance.pk).delete()
+
+
+def index_queryset(queryset):
+    """(Re)index many objects of one model with a constant number of writes.
+
+    :param queryset: A queryset of Entry, Version or Ballot.
+    :type queryset: QuerySet
+
+    :returns: The number of indexed objects.
+    :rtype: int
+    """
+    kind = kind_for_model(queryset.model)
+    _, build, related = INDEXED_MODELS[kind]
+    documents = [
+        SearchDocument(kind=kind, object_id=instance.pk, **build(instance))
+        for instance in queryset.select_related(*related)]
+    object_ids = [document.object_id for document in documents]
+    with transaction.atomic():
+        SearchDocument.objects.filter(
+            kind=kind, object_id__in=object_ids).delete()
+        SearchDocument.objects.bulk_create(
+            documents, batch_size=_batch_size(SearchDocument, documents))
+        if not uses_native_search():
+            # bulk_create does not set primary keys on every backend.
+            saved = SearchDocument.objects.filter(
+                kind=kind, object_id__in=object_ids)
+            postings = []
+            for document in saved:
+                postings.extend(_postings(document))
+            SearchTerm.objects.bulk_create(
+                postings, batch_size=_batch_size(SearchTerm, postings))
+    return len(documents)
+
+
+def rebuild_index():
+    """Drop and rebuild the whole search index.
+
+    :returns: A dictionary of kind -> number of indexed objects.
+    :rtype: dict
+    """
+    SearchDocument.objects.all().delete()
+    counts = {}
+    for kind, (model, _, _) in INDEXED_MODELS.items():
+        counts[kind] = index_queryset(model.objects.all())
+        logger.info('Indexed %s %s documents', counts[kind], kind)
+    return counts
+
+
+def visible_documents(user=None):
+    """Get the documents a user may see in search results.
+
+    Anonymous users only see public documents of approved, public projects.
+    Authenticated users also see documents of private projects and staff
+    see everything, including unapproved objects.
+
+    :param user: The user searching.
+    :type user: User, None
+
+    :returns: A queryset of search documents.
+    :rtype: QuerySet
+    """
+    documents = SearchDocument.objects.all()
+    if user is not None and user.is_staff:
+        return documents
+    documents = documents.filter(public=True, project__approved=True)
+    if user is None or not user.is_authenticated():
+        documents = documents.filter(project__private=False)
+    return documents
+
+
+def search(query, project=None, version=None, kind=None, user=None):
+    """Search the index, best matches first.
+
+    All terms of the query must occur in a document for it to match.
+
+    :param query: The search text entered by the user.
+    :type query: str
+
+    :param project: Restrict the results to this project.
+    :type project: Project, None
+
+    :param version: Restrict the results to this version.
+    :type version: Version, None
+
+    :param kind: Restrict the results to one of the indexed kinds.
+    :type kind: str, None
+
+    :param user: The user searching, used to filter unapproved or private
+        objects.
+    :type user: User, None
+
+    :returns: A queryset of SearchDocument annotated with ``rank``.
+    :rtype: QuerySet
+    """
+    terms = sorted(set(tokenize(query)))
+    documents = visible_documents(user)
+    if not terms:
+        return documents.none()
+    if project is not None:
+        documents = documents.filter(project=project)
+    if version is not None:
+        documents = documents.filter(version=version)
+    if kind:
+        documents = documents.filter(kind=kind)
+    if uses_native_search():
+        text = u' '.join(terms)
+        return documents.extra(
+            select={
+                'rank': "ts_rank(search_searchdocument.search_vector, "
+                        "plainto_tsquery('english', %s))"},
+            select_params=[text],
+            where=["search_searchdocument.search_vector @@ "
+                   "plainto_tsquery('english', %s)"],
+            params=[text],
+            order_by=['-rank', '-id'])
+    return documents.filter(
+        terms__term__in=terms).annotate(
+        rank=Sum('terms__weight'),
+        matched=Count('terms__term', distinct=True)).filter(
+        matched=len(terms)).order_by('-rank', '-id')
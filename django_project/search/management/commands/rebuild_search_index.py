@@ -0,0 +1,24 @@
+# coding=utf-8
+"""A command to rebuild the full-text search index."""
+from django.core.management.base import BaseCommand
+from ...index import rebuild_index
+
+
+class Command(BaseCommand):
+    """Index all entries, versions and ballots from scratch.
+
+    Run once after installing the search app, the index is kept up to date
+    by signal handlers afterwards.
+    """
+    # noinspection PyShadowingBuiltins
+    help = 'Rebuilds the full-text search index.'
+
+    def handle(self, *args, **options):
+        """Implementation for command.
+
+        :param args: Not used
+        :param options: Not used
+        """
+        counts = rebuild_index()
+        for kind, count in sorted(counts.items()):
+            self.stdout.write('Indexed %s %s documents.' % (count, kind))
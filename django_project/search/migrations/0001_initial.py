@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('changes', '0005_auto_20160229_2050'),
+        ('base', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('kind', models.CharField(help_text=b'The type of the indexed object.', max_length=20, choices=[(b'entry', b'Entry'), (b'version', b'Version'), (b'ballot', b'Ballot')])),
+                ('object_id', models.PositiveIntegerField(help_text=b'Primary key of the indexed object.')),
+                ('title', models.CharField(max_length=255)),
+                ('body', models.TextField(default=b'', blank=True)),
+                ('url', models.CharField(help_text=b'Url of the indexed object without the language prefix.', max_length=255, blank=True)),
+                ('public', models.BooleanField(default=False, help_text=b'Whether the object is approved (or, for ballots, not private).')),
+                ('project', models.ForeignKey(to='base.Project')),
+                ('version', models.ForeignKey(blank=True, to='changes.Version', null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.PositiveIntegerField(default=1, help_text=b'Occurrences of the term, title occurrences count more.')),
+                ('document', models.ForeignKey(related_name='terms', to='search.SearchDocument')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='searchterm',
+            unique_together=set([('term', 'document')]),
+        ),
+        migrations.AlterUniqueTogether(
+            name='searchdocument',
+            unique_together=set([('kind', 'object_id')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='searchdocument',
+            index_together=set([('project', 'kind')]),
+        ),
+    ]
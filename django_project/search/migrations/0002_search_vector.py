@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""Add a trigger maintained tsvector column with a GIN index on PostgreSQL.
+
+Other databases use the SearchTerm postings instead, so this is a no-op
+there.
+"""
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+FORWARD_SQL = [
+    "ALTER TABLE search_searchdocument ADD COLUMN search_vector tsvector",
+    """
+    CREATE FUNCTION search_searchdocument_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW.body, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER search_searchdocument_vector_trigger
+    BEFORE INSERT OR UPDATE ON search_searchdocument
+    FOR EACH ROW EXECUTE PROCEDURE search_searchdocument_vector_update()
+    """,
+    "CREATE INDEX search_searchdocument_vector_gin "
+    "ON search_searchdocument USING gin(search_vector)",
+]
+
+BACKWARD_SQL = [
+    "DROP TRIGGER IF EXISTS search_searchdocument_vector_trigger "
+    "ON search_searchdocument",
+    "DROP FUNCTION IF EXISTS search_searchdocument_vector_update()",
+    "DROP INDEX IF EXISTS search_searchdocument_vector_gin",
+    "ALTER TABLE search_searchdocument DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def run_sql(statements):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_sql(FORWARD_SQL), run_sql(BACKWARD_SQL)),
+    ]
@@ -0,0 +1,92 @@
+# coding=utf-8
+"""Models for the persistent full-text search index.
+
+Every searchable object (Entry, Version, Ballot) has one SearchDocument
+holding a denormalised copy of its text, the project (and version) it
+belongs to and whether it is publicly visible.
+
+On PostgreSQL the document also has a ``search_vector`` tsvector column
+with a GIN index, maintained by a database trigger (see migration 0002).
+On other databases (e.g. SQLite test runs) a SearchTerm row per distinct
+term acts as an inverted index instead.
+"""
+from django.db import models
+from django.utils.translation import get_language
+
+KIND_CHOICES = (
+    ('entry', 'Entry'),
+    ('version', 'Version'),
+    ('ballot', 'Ballot'),
+)
+
+
+class SearchDocument(models.Model):
+    """The indexed text of one searchable object."""
+
+    kind = models.CharField(
+        help_text='The type of the indexed object.',
+        choices=KIND_CHOICES,
+        max_length=20)
+
+    object_id = models.PositiveIntegerField(
+        help_text='Primary key of the indexed object.')
+
+    title = models.CharField(
+        max_length=255)
+
+    body = models.TextField(
+        blank=True,
+        default='')
+
+    url = models.CharField(
+        help_text='Url of the indexed object without the language prefix.',
+        blank=True,
+        max_length=255)
+
+    public = models.BooleanField(
+        help_text=(
+            'Whether the object is approved (or, for ballots, not '
+            'private).'),
+        default=False)
+
+    project = models.ForeignKey('base.Project')
+    version = models.ForeignKey('changes.Version', null=True, blank=True)
+
+    # noinspection PyClassicStyleClass
+    class Meta:
+        """Meta options for the search document class."""
+        unique_together = ('kind', 'object_id')
+        index_together = (
+            ('project', 'kind'),
+        )
+        app_label = 'search'
+
+    def __unicode__(self):
+        return u'%s : %s' % (self.kind, self.title)
+
+    def get_absolute_url(self):
+        if not self.url:
+            return ''
+        return u'/%s%s' % (get_language(), self.url)
+
+
+class SearchTerm(models.Model):
+    """An inverted index posting: a term occurring in a document.
+
+    Only used when the database has no native full-text search.
+    """
+
+    term = models.CharField(max_length=64)
+    weight = models.PositiveIntegerField(
+        help_text='Occurrences of the term, title occurrences count more.',
+        default=1)
+    document = models.ForeignKey(SearchDocument, related_name='terms')
+
+    # noinspection PyClassicStyleClass
+    class Meta:
+        """Meta options for the search term class."""
+        unique_together = ('term', 'document')
+        app_label = 'search'
+
+    def __unicode__(self):
+        return u'%s : %s' % (self.term, self.document_id)
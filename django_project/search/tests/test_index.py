@@ -0,0 +1,117 @@
+# coding=utf-8
+"""Tests for the search index."""
+from django.test import TestCase
+from changes.tests.model_factories import CategoryF, EntryF, VersionF
+from changes.importers import EntryImporter
+from changes.signals import objects_moderated
+from changes.models import Entry, Version
+from core.model_factories import UserF
+from vota.tests.model_factories import BallotF
+from search.index import rebuild_index, search, tokenize
+from search.models import SearchDocument
+
+
+class TestSearchIndex(TestCase):
+    """Tests that documents are indexed, ranked and filtered."""
+
+    def setUp(self):
+        """
+        Setup before each test
+        """
+        self.version = VersionF.create(name='2.14.0')
+        self.project = self.version.project
+        self.heatmap = EntryF.create(
+            version=self.version,
+            title='Heatmap renderer',
+            description='Render points as a heatmap')
+        self.labels = EntryF.create(
+            version=self.version,
+            title='Curved labels',
+            description='Labels follow the heatmap lines')
+        self.staff = UserF.create(is_staff=True)
+
+    def test_tokenize(self):
+        self.assertEqual(
+            tokenize(u'The Heatmap renderer, and a 3D view!'),
+            [u'heatmap', u'renderer', u'3d', u'view'])
+
+    def test_documents_follow_saves_and_deletes(self):
+        self.assertTrue(SearchDocument.objects.filter(
+            kind='entry', object_id=self.heatmap.id).exists())
+        self.heatmap.title = 'Hillshade renderer'
+        self.heatmap.save()
+        self.assertEqual(
+            [d.object_id for d in search('hillshade')], [self.heatmap.id])
+        self.heatmap.delete()
+        self.assertFalse(search('hillshade').exists())
+
+    def test_ranking_and_all_terms_required(self):
+        results = list(search('heatmap'))
+        # The title match ranks above the description match.
+        self.assertEqual(
+            [d.object_id for d in results], [self.heatmap.id, self.labels.id])
+        self.assertEqual(
+            [d.object_id for d in search('heatmap lines')], [self.labels.id])
+        self.assertFalse(search('the').exists())
+
+    def test_filters(self):
+        other = EntryF.create(title='Heatmap elsewhere')
+        self.assertEqual(search('heatmap').count(), 3)
+        self.assertEqual(search('heatmap', project=self.project).count(), 2)
+        self.assertEqual(
+            search('heatmap', version=other.version).count(), 1)
+        self.assertEqual(search('heatmap', kind='version').count(), 0)
+        ballot = BallotF.create(name='Heatmap ballot')
+        self.assertEqual(
+            [d.object_id for d in search('ballot', kind='ballot')],
+            [ballot.id])
+
+    def test_visibility(self):
+        pending = EntryF.create(
+            version=self.version, title='Heatmap pending', approved=False)
+        self.assertEqual(search('pending').count(), 0)
+        self.assertEqual(search('pending', user=self.staff).count(), 1)
+        Entry.objects.filter(id=pending.id).update(approved=True)
+        objects_moderated.send(
+            sender=Entry, project=self.project, action='approve',
+            ids=[pending.id])
+        self.assertEqual(search('pending').count(), 1)
+        self.project.private = True
+        self.project.save()
+        self.assertEqual(search('pending').count(), 0)
+        self.assertEqual(search('pending', user=UserF.create()).count(), 1)
+
+    def test_entries_follow_their_version(self):
+        version = VersionF.create(
+            project=self.project, name='3.0.0', approved=False)
+        entry = EntryF.create(version=version, title='Mesh layers')
+        self.assertEqual(search('mesh').count(), 0)
+        self.assertEqual(search('mesh', user=self.staff).count(), 1)
+        Version.objects.filter(id=version.id).update(approved=True)
+        objects_moderated.send(
+            sender=Version, project=self.project, action='approve',
+            ids=[version.id])
+        self.assertEqual(search('mesh').count(), 1)
+
+        version.approved = False
+        version.save()
+        self.assertEqual(search('mesh').count(), 0)
+        self.assertFalse(SearchDocument.objects.get(
+            kind='entry', object_id=entry.id).public)
+
+        self.project.slug = 'renamed'
+        self.project.save()
+        document = SearchDocument.objects.get(
+            kind='version', object_id=self.version.id)
+        self.assertTrue(document.url.startswith('/renamed/'))
+
+    def test_import_and_rebuild(self):
+        category = CategoryF.create(project=self.project, name='Analysis')
+        EntryImporter(self.version, self.staff, approved=True).run([
+            {'category': category.name,
+             'title': 'Imported raster calculator'}])
+        self.assertEqual(search('raster calculator').count(), 1)
+        SearchDocument.objects.all().delete()
+        counts = rebuild_index()
+        self.assertEqual(counts['entry'], 3)
+        self.assertEqual(search('heatmap').count(), 2)
@@ -0,0 +1,40 @@
+# coding=utf-8
+"""Tests for the search views."""
+from django.core.urlresolvers import reverse
+from django.test import TestCase
+from django.test.client import Client
+from changes.tests.model_factories import EntryF, VersionF
+
+
+class TestSearchViews(TestCase):
+    """Tests that the search views work."""
+
+    def setUp(self):
+        """
+        Setup before each test
+        """
+        self.client = Client()
+        self.client.post(
+            '/set_language/', data={'language': 'en'})
+        self.version = VersionF.create(name='2.14.0')
+        self.entry = EntryF.create(
+            version=self.version, title='Heatmap renderer')
+        self.other = EntryF.create(title='Heatmap elsewhere')
+
+    def test_search_view(self):
+        response = self.client.get(reverse('search'), {'q': 'heatmap'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context_data['results']), 2)
+        self.assertContains(response, self.entry.get_absolute_url())
+
+    def test_project_search_view(self):
+        url = reverse('project-search', kwargs={
+            'project_slug': self.version.project.slug})
+        response = self.client.get(
+            url, {'q': 'heatmap', 'version': self.version.slug})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [d.object_id for d in response.context_data['results']],
+            [self.entry.id])
+        response = self.client.get(url, {'q': 'x', 'version': 'unknown'})
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,17 @@
+# coding=utf-8
+# flake8: noqa
+"""Urls for search application."""
+
+from django.conf.urls import patterns, url  # noqa
+
+from views import SearchView
+
+urlpatterns = patterns(
+    '',
+    url(regex='^search/$',
+        view=SearchView.as_view(),
+        name='search'),
+    url(regex='^(?P<project_slug>[\w-]+)/search/$',
+        view=SearchView.as_view(),
+        name='project-search'),
+)
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""**View classes for full-text search**
+
+"""
+from base.project_cache import get_project_or_404
+from django.shortcuts import get_object_or_404
+from django.views.generic import ListView
+from pure_pagination.mixins import PaginationMixin
+from changes.models import Version
+from .index import INDEXED_MODELS, search
+from .models import KIND_CHOICES, SearchDocument
+
+
+class SearchView(PaginationMixin, ListView):
+    """Ranked full-text search over entries, versions and ballots.
+
+    Query parameters: ``q`` the search text, ``version`` a version slug
+    (only with a project in the URL) and ``kind`` one of the indexed kinds.
+    """
+    model = SearchDocument
+    context_object_name = 'results'
+    template_name = 'search/results.html'
+    paginate_by = 20
+
+    def get_project(self):
+        """Get the project the search is restricted to, if any.
+
+        :returns: The project named in the URL or None.
+        :rtype: Project, None
+
+        :raises: Http404
+        """
+        project_slug = self.kwargs.get('project_slug', None)
+        if not project_slug:
+            return None
+        return get_project_or_404(project_slug, self.request)
+
+    def get_queryset(self):
+        """Get the ranked search results.
+
+        :returns: A queryset of SearchDocument, best matches first.
+        :rtype: QuerySet
+
+        :raises: Http404
+        """
+        self.query = self.request.GET.get('q', '').strip()
+        self.kind = self.request.GET.get('kind', '')
+        if self.kind not in INDEXED_MODELS:
+            self.kind = ''
+        self.project = self.get_project()
+        self.version = None
+        version_slug = self.request.GET.get('version', '')
+        if self.project and version_slug:
+            self.version = get_object_or_404(
+                Version, project=self.project, slug=version_slug)
+        return search(
+            self.query,
+            project=self.project,
+            version=self.version,
+            kind=self.kind,
+            user=self.request.user).select_related('project', 'version')
+
+    def get_context_data(self, **kwargs):
+        """Get the context data which is passed to a template.
+
+        :param kwargs: Any arguments to pass to the superclass.
+        :type kwargs: dict
+
+        :returns: Context data which will be passed to the template.
+        :rtype: dict
+        """
+        context = super(SearchView, self).get_context_data(**kwargs)
+        context['query'] = self.query
+        context['kind'] = self.kind
+        context['kinds'] = KIND_CHOICES
+        context['project'] = self.project
+        context['search_version'] = self.version
+        return context
@@ -16,51 +16,31 @@ historization for a model).
 from django.contrib import admin
 from models import Committee, Vote, Ballot
 import reversion
+from common.changelist import LargeTableAdminMixin
 
 
-class CommitteeAdmin(reversion.VersionAdmin):
+class CommitteeAdmin(LargeTableAdminMixin, reversion.VersionAdmin):
     """Committee admin model."""
+    list_display = ('name', 'project', 'chair')
+    list_select_related = ('project', 'chair')
+    search_fields = ('^name',)
+    raw_id_fields = ('chair', 'users')
 
-    def queryset(self, request):
-        """Ensure we use the correct manager.
 
-        :param request: HttpRequest object
-        """
-        qs = self.model.objects
-        ordering = self.get_ordering(request)
-        if ordering:
-            qs = qs.order_by(*ordering)
-        return qs
-
-
-class VoteAdmin(reversion.VersionAdmin):
+class VoteAdmin(LargeTableAdminMixin, reversion.VersionAdmin):
     """Vote admin model."""
+    list_display = ('ballot', 'user', 'choice')
+    list_select_related = ('ballot__committee', 'user')
+    search_fields = ('^user__username',)
+    raw_id_fields = ('user', 'ballot')
 
-    def queryset(self, request):
-        """Ensure we use the correct manager.
-
-        :param request: HttpRequest object
-        """
-        qs = self.model.objects
-        ordering = self.get_ordering(request)
-        if ordering:
-            qs = qs.order_by(*ordering)
-        return qs
 
-
-class BallotAdmin(reversion.VersionAdmin):
+class BallotAdmin(LargeTableAdminMixin, reversion.VersionAdmin):
     """Ballot admin model."""
-
-    def queryset(self, request):
-        """Ensure we use the correct manager.
-
-        :param request: HttpRequest object
-        """
-        qs = self.model.objects
-        ordering = self.get_ordering(request)
-        if ordering:
-            qs = qs.order_by(*ordering)
-        return qs
+    list_display = ('name', 'committee', 'proposer', 'open_from', 'closes')
+    list_select_related = ('committee__project', 'proposer')
+    search_fields = ('^name', '^proposer__username')
+    raw_id_fields = ('proposer', 'committee')
 
 admin.site.register(Committee, CommitteeAdmin)
 admin.site.register(Vote, VoteAdmin)
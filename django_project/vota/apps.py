@@ -0,0 +1,13 @@
+# coding=utf-8
+"""App configuration for vota."""
+from django.apps import AppConfig
+
+
+class VotaConfig(AppConfig):
+    """Registers the cache tags of the vota models."""
+    name = 'vota'
+    verbose_name = 'Vota'
+
+    def ready(self):
+        # noinspection PyUnresolvedReferences
+        import vota.handlers  # noqa
@@ -0,0 +1,174 @@
+# coding=utf-8
+"""
+vota.closing
+
+Close ballots whose voting period has ended.
+
+``close_ballots`` is run every few minutes by the ``close_ballots``
+management command (see deployment/docker/uwsgi.conf). It finds the
+ballots which closed since the last run with a query on the indexed
+``closes`` column, counts the votes of all of them with one grouped
+query, and stores each outcome in a BallotResult, which the pages of a
+closed ballot show from then on. The ballots are marked approved, denied
+or no_quorum accordingly; a ballot without quorum is neither approved nor
+denied.
+"""
+import logging
+from django.db import transaction
+from django.db.models import Case, Count, IntegerField, Sum, When
+from django.utils import timezone
+from core.cache_tags import invalidate_tags, tags_for_instance
+from vota.models import Ballot, BallotResult, Committee, Vote
+from vota.models.ballot import quorum_reached
+
+logger = logging.getLogger(__name__)
+
+
+def _count(choice):
+    """Aggregate counting the votes with a choice."""
+    return Sum(Case(
+        When(choice=choice, then=1),
+        default=0,
+        output_field=IntegerField()))
+
+
+def count_votes(ballot_ids):
+    """Count the votes of ballots by choice.
+
+    :param ballot_ids: The ballot ids.
+    :type ballot_ids: list
+
+    :returns: A dictionary of ballot id -> (yes, no, abstain) counts.
+    :rtype: dict
+    """
+    counts = Vote.objects.filter(ballot__in=ballot_ids).values(
+        'ballot').annotate(
+        positive=_count('y'),
+        negative=_count('n'),
+        abstentions=_count('-')).order_by()
+    return dict(
+        (row['ballot'], (row['positive'], row['negative'],
+                         row['abstentions']))
+        for row in counts)
+
+
+def committee_sizes(committee_ids):
+    """Count the members of committees.
+
+    :param committee_ids: The committee ids.
+    :type committee_ids: list
+
+    :returns: A dictionary of committee id -> number of members.
+    :rtype: dict
+    """
+    members = Committee.users.through.objects.filter(
+        committee__in=committee_ids).values('committee').annotate(
+        size=Count('user')).order_by()
+    return dict((row['committee'], row['size']) for row in members)
+
+
+def load_vote_counts(ballots):
+    """Count the votes of many ballots at once, for their count methods.
+
+    Without this every ballot of a list counts its votes and committee
+    members with queries of its own.
+
+    :param ballots: The ballots, a queryset is evaluated.
+    :type ballots: iterable
+
+    :returns: The ballots.
+    :rtype: list
+    """
+    ballots = list(ballots)
+    votes = count_votes([ballot.id for ballot in ballots])
+    sizes = committee_sizes(
+        list(set(ballot.committee_id for ballot in ballots)))
+    for ballot in ballots:
+        ballot._vote_counts = votes.get(ballot.id, (0, 0, 0))
+        ballot._committee_size = sizes.get(ballot.committee_id, 0)
+    return ballots
+
+
+def closable_ballots(now):
+    """Lock the closed ballots without a result.
+
+    Ballots with a result are excluded with a subquery, not a join on
+    BallotResult: PostgreSQL can not lock the nullable side of an outer
+    join.
+
+    :param now: Select the ballots closing before this time.
+    :type now: datetime
+
+    :rtype: QuerySet
+    """
+    return Ballot.objects.filter(closes__lte=now).exclude(
+        pk__in=BallotResult.objects.values('ballot')).select_related(
+        'committee').select_for_update()
+
+
+def close_ballots(now=None):
+    """Freeze the results of the ballots which closed.
+
+    :param now: Close the ballots closing before this time, defaults to now.
+    :type now: datetime
+
+    :returns: The results written.
+    :rtype: list
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        ballots = list(closable_ballots(now))
+        if not ballots:
+            return []
+        votes = count_votes([ballot.id for ballot in ballots])
+        sizes = committee_sizes(
+            list(set(ballot.committee_id for ballot in ballots)))
+
+        results = []
+        for ballot in ballots:
+            positive, negative, abstentions = votes.get(ballot.id, (0, 0, 0))
+            size = sizes.get(ballot.committee_id, 0)
+            quorum = quorum_reached(
+                positive + negative + abstentions,
+                size,
+                ballot.committee.quorum_setting)
+            if not quorum:
+                outcome = 'no_quorum'
+            elif positive > negative:
+                outcome = 'approved'
+            else:
+                outcome = 'denied'
+            results.append(BallotResult(
+                ballot=ballot,
+                positive_votes=positive,
+                negative_votes=negative,
+                abstentions=abstentions,
+                committee_size=size,
+                quorum_setting=int(ballot.committee.quorum_setting),
+                has_quorum=quorum,
+                outcome=outcome,
+                closed=ballot.closes))
+        BallotResult.objects.bulk_create(results)
+        for result in results:
+            # bulk_create leaves the instances marked as unsaved.
+            result._state.adding = False
+
+        for outcome, flags in (
+                ('approved', {'approved': True, 'denied': False,
+                              'no_quorum': False}),
+                ('denied', {'approved': False, 'denied': True,
+                            'no_quorum': False}),
+                ('no_quorum', {'approved': False, 'denied': False,
+                               'no_quorum': True})):
+            ids = [result.ballot_id for result in results
+                   if result.outcome == outcome]
+            if ids:
+                Ballot.objects.filter(id__in=ids).update(**flags)
+
+    # update() sends no signals.
+    tags = set()
+    for ballot in ballots:
+        tags.update(tags_for_instance(ballot))
+    invalidate_tags(tags)
+    logger.info('Closed %s ballots', len(results))
+    return results
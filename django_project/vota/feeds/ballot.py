@@ -11,7 +11,7 @@ __copyright__ = ''
 from django.contrib.syndication.views import Feed
 from django.shortcuts import get_object_or_404
 from django.http import Http404
-from base.models.project import Project
+from base.project_cache import get_project
 from vota.models.committee import Committee
 from vota.models.ballot import Ballot
 
@@ -41,7 +41,7 @@ class BallotFeed(Feed):
         """
         try:
             project_slug = kwargs.get('project_slug', None)
-            project = Project.objects.get(slug=project_slug)
+            project = get_project(project_slug, request)
             committee_slug = kwargs.get('committee_slug', None)
             committee = get_object_or_404(
                 Committee, project=project, slug=committee_slug)
@@ -95,8 +95,8 @@ class BallotFeed(Feed):
         :returns: List of 5 latest approved Ballot from a Committee
         :rtype: list
         """
-        ballots = Ballot.objects.filter(committee=obj).order_by(
-            '-datetime_created')
+        ballots = Ballot.objects.filter(committee=obj).select_related(
+            'committee__project').order_by('-open_from')[:5]
         return ballots
 
     def item_title(self, item):
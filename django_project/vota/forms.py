@@ -8,6 +8,8 @@ from crispy_forms.layout import (
     Field,
     Fieldset
 )
+from base.widgets import (
+    UserAutocompleteWidget, UserAutocompleteMultipleWidget)
 from vota.models import Vote, Committee, Ballot
 
 logger = logging.getLogger(__name__)
@@ -50,6 +52,11 @@ class CreateCommitteeForm(forms.ModelForm):
             'quorum_setting',
             'users',
         )
+        # Search users instead of listing them all.
+        widgets = {
+            'chair': UserAutocompleteWidget(),
+            'users': UserAutocompleteMultipleWidget(),
+        }
 
     def __init__(self, *args, **kwargs):
         self.user = kwargs.pop('user')
@@ -72,17 +79,16 @@ class CreateCommitteeForm(forms.ModelForm):
         self.helper.form_class = 'form-horizontal'
         self.helper.form_id = 'committee-form'
         super(CreateCommitteeForm, self).__init__(*args, **kwargs)
+        if self.instance.pk is None:
+            # Chaired by its creator unless someone else is picked.
+            self.fields['chair'].initial = self.user.pk
         self.helper.add_input(Submit('submit', 'Submit'))
-        self.fields['chair'].queryset = self.fields['chair'].queryset \
-            .order_by('username')
-        self.fields['users'].queryset = self.fields['users'].queryset\
-            .order_by('username')
 
     def save(self, commit=True):
         instance = super(CreateCommitteeForm, self).save(commit=False)
-        instance.chair = self.user
         instance.project = self.project
         instance.save()
+        self.save_m2m()
         return instance
 
 
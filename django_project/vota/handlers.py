@@ -0,0 +1,44 @@
+# coding=utf-8
+"""Cache tags of the vota models.
+
+Connected when the app registry is ready (see VotaConfig).
+"""
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
+from core.cache_tags import invalidate_tags, register
+from .models import Ballot, Committee, Vote
+
+register(Committee, lambda committee: [
+    'committee:%s' % committee.id,
+    'project:%s' % committee.project_id,
+])
+
+register(Ballot, lambda ballot: [
+    'ballot:%s' % ballot.id,
+    'committee:%s' % ballot.committee_id,
+    'project:%s' % ballot.committee.project_id,
+    'feeds:%s' % ballot.committee.project_id,
+])
+
+# Only the ballot: a vote must not invalidate every page of the project.
+# Pages showing the tallies of the ballots of a project depend on their
+# ballot tags, see core.page_cache.page_tags.
+register(Vote, lambda vote: ['ballot:%s' % vote.ballot_id])
+
+
+@receiver(m2m_changed, sender=Committee.users.through)
+def committee_users_changed(sender, instance, action, pk_set, **kwargs):
+    """Invalidate the caches of committees whose members changed."""
+    if not action.startswith('post_'):
+        return
+    if isinstance(instance, Committee):
+        committees = [instance]
+    else:
+        # Changed from the user side, pk_set holds committee ids.
+        committees = Committee.objects.filter(pk__in=pk_set or [])
+    tags = []
+    for committee in committees:
+        tags.extend(['committee:%s' % committee.id,
+                     'project:%s' % committee.project_id])
+    if tags:
+        invalidate_tags(tags)
@@ -0,0 +1,25 @@
+# coding=utf-8
+"""A command to freeze the results of the ballots which closed."""
+from django.core.management.base import BaseCommand
+from vota.closing import close_ballots
+
+
+class Command(BaseCommand):
+    """Count the votes of closed ballots and store their outcome.
+
+    Meant to run every few minutes, e.g. from the uwsgi cron. Ballots
+    which were already closed are skipped, so it is cheap to run often.
+    """
+    # noinspection PyShadowingBuiltins
+    help = 'Closes the ballots whose voting period has ended.'
+
+    def handle(self, *args, **options):
+        """Implementation for command.
+
+        :param args: Not used
+        :param options: Not used
+        """
+        results = close_ballots()
+        for result in results:
+            self.stdout.write('%s: %s' % (result.ballot, result.outcome))
+        self.stdout.write('Closed %s ballots' % len(results))
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import vota.models.ballot
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vota', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BallotResult',
+            fields=[
+                ('ballot', models.OneToOneField(related_name='result', primary_key=True, serialize=False, to='vota.Ballot')),
+                ('positive_votes', models.PositiveIntegerField(default=0)),
+                ('negative_votes', models.PositiveIntegerField(default=0)),
+                ('abstentions', models.PositiveIntegerField(default=0)),
+                ('committee_size', models.PositiveIntegerField(default=0, help_text='Number of committee members when the ballot closed.')),
+                ('quorum_setting', models.PositiveSmallIntegerField(default=0, help_text='The percentage of committee members required to vote when the ballot closed.')),
+                ('has_quorum', models.BooleanField(default=False)),
+                ('outcome', models.CharField(max_length=10, choices=[(b'approved', b'Approved'), (b'denied', b'Denied'), (b'no_quorum', b'Denied, no quorum')])),
+                ('closed', models.DateTimeField(help_text='Date the ballot closed.')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='ballot',
+            name='closes',
+            field=models.DateTimeField(default=vota.models.ballot.default_closing_date, help_text='Date the ballot closes', db_index=True),
+        ),
+    ]
@@ -1,3 +1,4 @@
 from committee import *
 from ballot import *
+from ballot_result import *
 from vote import *
\ No newline at end of file
@@ -2,12 +2,14 @@
 This model is to create "ballots" i.e. questions/proposals/changes which a
 Committee can vote on.
 
-After voting is complete, a ballot should be marked as either Denied or Passed.
+After voting is complete, a ballot is marked as either Denied or Passed by
+vota.closing, which also freezes its result in a BallotResult.
 
-If no quorum is reached, no_quorum should be True
+If no quorum is reached, no_quorum is True
 
 A ballot has one Committee.
 """
+from django.core.exceptions import ObjectDoesNotExist
 from django.core.urlresolvers import reverse
 from django.utils.text import slugify
 import logging
@@ -18,6 +20,7 @@ from django.db import models
 from django.utils.translation import ugettext_lazy as _
 from django.utils import timezone
 from vota.models.vote import Vote
+from vota.models.ballot_result import BallotResult
 import datetime
 from django.contrib.auth.models import User
 
@@ -25,41 +28,68 @@ from django.contrib.auth.models import User
 class ApprovedCategoryManager(models.Manager):
     """Custom category manager that shows only approved ballots."""
 
-    def get_query_set(self):
+    def get_queryset(self):
         """Query set generator"""
         return super(
-            ApprovedCategoryManager, self).get_query_set().filter(
+            ApprovedCategoryManager, self).get_queryset().filter(
                 approved=True)
 
 
 class DeniedCategoryManager(models.Manager):
     """Custom version manager that shows only denied ballots."""
 
-    def get_query_set(self):
+    def get_queryset(self):
         """Query set generator"""
         return super(
-            DeniedCategoryManager, self).get_query_set().filter(
+            DeniedCategoryManager, self).get_queryset().filter(
                 denied=True)
 
 
 class OpenBallotManager(models.Manager):
     """Custom version manager that shows only open ballots."""
 
-    def get_query_set(self):
+    def get_queryset(self):
         """Query set generator"""
+        now = timezone.now()
         return super(
-            OpenBallotManager, self).get_query_set().filter(
-                open_from__lt=timezone.now()).filter(closes__gt=timezone.now())
+            OpenBallotManager, self).get_queryset().filter(
+                open_from__lte=now).filter(closes__gt=now)
 
 
 class ClosedBallotManager(models.Manager):
     """Custom version manager that shows only closed ballots."""
 
-    def get_query_set(self):
+    def get_queryset(self):
         """Query set generator"""
         return super(
-            ClosedBallotManager, self).get_query_set().filter(
-                closes__gt=timezone.now())
+            ClosedBallotManager, self).get_queryset().filter(
+                closes__lte=timezone.now())
+
+
+def quorum_reached(vote_count, committee_size, quorum_setting):
+    """Whether enough committee members voted.
+
+    :param vote_count: The number of votes cast.
+    :type vote_count: int
+
+    :param committee_size: The number of committee members.
+    :type committee_size: int
+
+    :param quorum_setting: Percentage of the members which must be
+        exceeded by the votes.
+    :type quorum_setting: str, int
+
+    :rtype: bool
+    """
+    if not committee_size:
+        return False
+    percentage = 100 * float(vote_count) / float(committee_size)
+    return percentage > float(quorum_setting)
+
+
+def default_closing_date():
+    """Ballots close a week after they are created by default."""
+    return timezone.now() + datetime.timedelta(days=7)
 
 
 class Ballot(models.Model):
@@ -112,7 +142,8 @@ class Ballot(models.Model):
 
     closes = models.DateTimeField(
         help_text=_('Date the ballot closes'),
-        default=timezone.now() + datetime.timedelta(days=7)
+        default=default_closing_date,
+        db_index=True
     )
 
     private = models.BooleanField(
@@ -146,8 +177,24 @@ class Ballot(models.Model):
             filtered_words = [t for t in words if t.lower() not in STOP_WORDS]
             new_list = ' '.join(filtered_words)
             self.slug = slugify(new_list)[:50]
+        elif Ballot.objects.filter(pk=self.pk).exclude(
+                closes=self.closes).exists():
+            self.drop_result()
         super(Ballot, self).save(*args, **kwargs)
 
+    def drop_result(self):
+        """Drop the frozen result and outcome of the ballot.
+
+        Used when the closing date changes: vota.closing counts the votes
+        again once the ballot is closed.
+        """
+        results = BallotResult.objects.filter(ballot=self)
+        if results.exists():
+            results.delete()
+            self.approved = self.denied = self.no_quorum = False
+        # The cached reverse one to one relation.
+        self.__dict__.pop('_result_cache', None)
+
     def __unicode__(self):
         return u'%s : %s' % (self.committee.name, self.name)
 
@@ -164,19 +211,68 @@ class Ballot(models.Model):
             voted = True
         return voted
 
+    def get_result(self):
+        """Get the frozen result of the ballot.
+
+        :returns: The result, or None while the ballot is open or before
+            the closed ballot is counted (see vota.closing).
+        :rtype: BallotResult, None
+        """
+        if self.closes > timezone.now():
+            return None
+        try:
+            return self.result
+        except ObjectDoesNotExist:
+            return None
+
+    def _counted_votes(self, index):
+        """Get a vote count loaded by vota.closing.load_vote_counts.
+
+        :param index: 0 for yes, 1 for no and 2 for abstain votes.
+        :type index: int
+
+        :returns: The count, None if the counts were not loaded.
+        :rtype: int, None
+        """
+        counts = getattr(self, '_vote_counts', None)
+        if counts is None:
+            return None
+        return counts[index]
+
     def get_positive_vote_count(self):
-        votes = Vote.objects.filter(ballot=self).filter(choice='y').count()
+        result = self.get_result()
+        if result is not None:
+            return result.positive_votes
+        votes = self._counted_votes(0)
+        if votes is None:
+            votes = Vote.objects.filter(ballot=self).filter(
+                choice='y').count()
         return votes
 
     def get_negative_vote_count(self):
-        votes = Vote.objects.filter(ballot=self).filter(choice='n').count()
+        result = self.get_result()
+        if result is not None:
+            return result.negative_votes
+        votes = self._counted_votes(1)
+        if votes is None:
+            votes = Vote.objects.filter(ballot=self).filter(
+                choice='n').count()
         return votes
 
     def get_abstainer_count(self):
-        votes = Vote.objects.filter(ballot=self).filter(choice='-').count()
+        result = self.get_result()
+        if result is not None:
+            return result.abstentions
+        votes = self._counted_votes(2)
+        if votes is None:
+            votes = Vote.objects.filter(ballot=self).filter(
+                choice='-').count()
         return votes
 
     def get_current_tally(self):
+        result = self.get_result()
+        if result is not None:
+            return result.tally
         positive = self.get_positive_vote_count()
         negative = self.get_negative_vote_count()
         tally = 0
@@ -185,23 +281,43 @@ class Ballot(models.Model):
         return tally
 
     def get_total_vote_count(self):
+        result = self.get_result()
+        if result is not None:
+            return result.total_votes
+        counts = getattr(self, '_vote_counts', None)
+        if counts is not None:
+            return sum(counts)
         vote_count = Vote.objects.filter(ballot=self).count()
         return vote_count
 
     def has_quorum(self):
-        vote_count = self.get_total_vote_count()
-        committee_user_count = self.committee.users.all().count()
-        if committee_user_count != 0:
-            quorum_percent = self.committee.quorum_setting
-            percentage = 100 * float(vote_count) / float(committee_user_count)
-            if percentage > quorum_percent:
-                return True
-        else:
-            return False
+        result = self.get_result()
+        if result is not None:
+            return result.has_quorum
+        committee_size = getattr(self, '_committee_size', None)
+        if committee_size is None:
+            committee_size = self.committee.users.all().count()
+        return quorum_reached(
+            self.get_total_vote_count(),
+            committee_size,
+            self.committee.quorum_setting)
+
+    def get_status(self):
+        """Whether the ballot is pending (not open yet), open or closed.
+
+        :returns: 'pending', 'open' or 'closed'.
+        :rtype: str
+        """
+        now = timezone.now()
+        if now < self.open_from:
+            return 'pending'
+        if now < self.closes:
+            return 'open'
+        return 'closed'
 
     def is_open(self):
         open_date = self.open_from
         close_date = self.closes
-        if open_date < timezone.now() < close_date:
+        if open_date <= timezone.now() < close_date:
             return True
         return False
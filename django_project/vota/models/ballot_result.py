@@ -0,0 +1,82 @@
+# coding=utf-8
+"""
+The frozen result of a closed ballot.
+
+When a ballot closes, its votes are counted once and the outcome is stored
+here (see vota.closing). Pages of closed ballots then show this snapshot
+instead of counting the votes on every view. A result never changes after
+it is written; it is dropped when the closing date of its ballot changes.
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+from django.db import models
+from django.utils.translation import ugettext_lazy as _
+
+OUTCOME_CHOICES = (
+    ('approved', 'Approved'),
+    ('denied', 'Denied'),
+    ('no_quorum', 'Denied, no quorum'),
+)
+
+
+class BallotResult(models.Model):
+    """The vote counts and outcome of a ballot when it closed."""
+
+    # noinspection PyUnresolvedReferences
+    ballot = models.OneToOneField(
+        'Ballot', primary_key=True, related_name='result')
+
+    positive_votes = models.PositiveIntegerField(default=0)
+    negative_votes = models.PositiveIntegerField(default=0)
+    abstentions = models.PositiveIntegerField(default=0)
+
+    committee_size = models.PositiveIntegerField(
+        help_text=_('Number of committee members when the ballot closed.'),
+        default=0
+    )
+
+    quorum_setting = models.PositiveSmallIntegerField(
+        help_text=_('The percentage of committee members required to vote '
+                    'when the ballot closed.'),
+        default=0
+    )
+
+    has_quorum = models.BooleanField(default=False)
+
+    outcome = models.CharField(max_length=10, choices=OUTCOME_CHOICES)
+
+    closed = models.DateTimeField(
+        help_text=_('Date the ballot closed.')
+    )
+
+    created = models.DateTimeField(auto_now_add=True)
+
+    objects = models.Manager()
+
+    # noinspection PyClassicStyleClass
+    class Meta:
+        """Meta options for the ballot result class."""
+        app_label = 'vota'
+
+    def __unicode__(self):
+        return u'%s : %s' % (self.ballot_id, self.outcome)
+
+    def save(self, *args, **kwargs):
+        """Write a new result, results can not be changed.
+
+        :raises: ValueError
+        """
+        if not self._state.adding:
+            raise ValueError('The result of a closed ballot is final.')
+        super(BallotResult, self).save(*args, **kwargs)
+
+    @property
+    def total_votes(self):
+        """The number of votes cast."""
+        return self.positive_votes + self.negative_votes + self.abstentions
+
+    @property
+    def tally(self):
+        """Positive minus negative votes."""
+        return self.positive_votes - self.negative_votes
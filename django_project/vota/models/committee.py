@@ -89,9 +89,12 @@ class Committee(models.Model):
         })
 
     def get_public_open_ballots(self):
-        """Get all ballots for self
+        """Get all ballots for self, with their votes counted
 
-        :return: Ballot queryset
-        :rtype: QuerySet
+        :return: Ballots
+        :rtype: list
         """
-        return Ballot.open_objects.filter(committee=self).filter(private=False)
+        # vota.closing imports the models.
+        from vota.closing import load_vote_counts
+        return load_vote_counts(
+            Ballot.open_objects.filter(committee=self).filter(private=False))
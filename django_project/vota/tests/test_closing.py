@@ -0,0 +1,137 @@
+# coding=utf-8
+"""Tests for closing ballots."""
+import datetime
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from django.utils.six import StringIO
+from core.model_factories import UserF
+from vota.closing import close_ballots, closable_ballots
+from vota.models import Ballot, BallotResult
+from vota.tests.model_factories import BallotF, CommitteeF, VoteF
+
+
+class TestCloseBallots(TestCase):
+    """Tests for vota.closing."""
+
+    def setUp(self):
+        """
+        Setup before each test
+        """
+        self.members = [UserF.create() for _ in range(4)]
+        self.committee = CommitteeF.create(quorum_setting=u'50')
+        self.committee.users.add(*self.members)
+        self.past = timezone.now() - datetime.timedelta(days=1)
+
+    def _ballot(self, choices, **kwargs):
+        ballot = BallotF.create(
+            committee=self.committee,
+            approved=False,
+            closes=kwargs.pop('closes', self.past),
+            **kwargs)
+        for user, choice in zip(self.members, choices):
+            VoteF.create(ballot=ballot, user=user, choice=choice)
+        return ballot
+
+    def test_locking_query_has_no_outer_join(self):
+        # PostgreSQL refuses FOR UPDATE on the nullable side of an outer
+        # join, which SQLite does not check.
+        self.assertNotIn(
+            'OUTER JOIN', str(closable_ballots(timezone.now()).query))
+
+    def test_outcomes(self):
+        approved = self._ballot('yyn')
+        denied = self._ballot('ynn')
+        no_quorum = self._ballot('y')
+        # Half of the members voting does not exceed a 50% quorum.
+        half = self._ballot('yn')
+        open_ballot = self._ballot(
+            'yyyy', closes=timezone.now() + datetime.timedelta(days=1))
+
+        results = close_ballots()
+        self.assertEqual(len(results), 4)
+        self.assertFalse(
+            BallotResult.objects.filter(ballot=open_ballot).exists())
+
+        result = BallotResult.objects.get(ballot=approved)
+        self.assertEqual(result.outcome, 'approved')
+        self.assertEqual(
+            (result.positive_votes, result.negative_votes,
+             result.abstentions, result.committee_size,
+             result.quorum_setting),
+            (2, 1, 0, 4, 50))
+        self.assertTrue(result.has_quorum)
+        self.assertTrue(Ballot.objects.get(pk=approved.pk).approved)
+
+        denied = Ballot.objects.get(pk=denied.pk)
+        self.assertEqual(denied.result.outcome, 'denied')
+        self.assertTrue(denied.denied)
+        self.assertFalse(denied.no_quorum)
+
+        no_quorum = Ballot.objects.get(pk=no_quorum.pk)
+        self.assertEqual(no_quorum.result.outcome, 'no_quorum')
+        self.assertTrue(no_quorum.no_quorum)
+        self.assertFalse(no_quorum.approved)
+        self.assertFalse(no_quorum.denied)
+        self.assertEqual(
+            BallotResult.objects.get(ballot=half).outcome, 'no_quorum')
+
+        # Closed ballots are only closed once.
+        self.assertEqual(close_ballots(), [])
+
+    def test_snapshot(self):
+        ballot = self._ballot('yyn-')
+        close_ballots()
+        ballot = Ballot.objects.select_related('result').get(pk=ballot.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(ballot.get_positive_vote_count(), 2)
+            self.assertEqual(ballot.get_negative_vote_count(), 1)
+            self.assertEqual(ballot.get_abstainer_count(), 1)
+            self.assertEqual(ballot.get_total_vote_count(), 4)
+            self.assertEqual(ballot.get_current_tally(), 1)
+            self.assertTrue(ballot.has_quorum())
+        # A vote counted after closing does not change the result.
+        VoteF.create(ballot=ballot, user=UserF.create(), choice='n')
+        self.assertEqual(ballot.get_negative_vote_count(), 1)
+
+    def test_result_is_final(self):
+        ballot = self._ballot('y')
+        result = close_ballots()[0]
+        result.outcome = 'approved'
+        self.assertRaises(ValueError, result.save)
+        self.assertEqual(
+            BallotResult.objects.get(ballot=ballot).outcome, 'no_quorum')
+
+    def test_closing_date_changed(self):
+        ballot = self._ballot('yyn')
+        close_ballots()
+        ballot = Ballot.objects.get(pk=ballot.pk)
+        self.assertEqual(ballot.get_result().outcome, 'approved')
+        # Extended: counted again once it closes.
+        ballot.closes = timezone.now() + datetime.timedelta(days=1)
+        ballot.save()
+        ballot = Ballot.objects.get(pk=ballot.pk)
+        self.assertFalse(
+            BallotResult.objects.filter(ballot=ballot).exists())
+        self.assertFalse(ballot.approved)
+        VoteF.create(ballot=ballot, user=self.members[3], choice='n')
+        ballot.closes = self.past
+        ballot.save()
+        self.assertIsNone(ballot.get_result())
+        close_ballots()
+        ballot = Ballot.objects.get(pk=ballot.pk)
+        self.assertEqual(ballot.get_result().outcome, 'denied')
+        self.assertTrue(ballot.denied)
+
+    def test_managers(self):
+        closed = self._ballot('')
+        open_ballot = self._ballot(
+            '', closes=timezone.now() + datetime.timedelta(days=1))
+        self.assertEqual(list(Ballot.closed_objects.all()), [closed])
+        self.assertEqual(list(Ballot.open_objects.all()), [open_ballot])
+
+    def test_command(self):
+        self._ballot('yyy')
+        out = StringIO()
+        call_command('close_ballots', stdout=out)
+        self.assertIn('Closed 1 ballots', out.getvalue())
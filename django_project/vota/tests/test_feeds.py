@@ -0,0 +1,32 @@
+# coding=utf-8
+"""Tests for the ballot feed."""
+import datetime
+from django.core.urlresolvers import reverse
+from django.test import TestCase
+from django.test.client import Client
+from base.tests.model_factories import ProjectF
+from vota.tests.model_factories import BallotF, CommitteeF
+
+
+class TestBallotFeed(TestCase):
+    """Tests the RSS feed of the ballots of a committee."""
+
+    def test_newest_ballots_first(self):
+        project = ProjectF.create()
+        committee = CommitteeF.create(project=project)
+        now = datetime.datetime.now()
+        BallotF.create(
+            committee=committee, name='Older ballot',
+            open_from=now - datetime.timedelta(days=20))
+        BallotF.create(
+            committee=committee, name='Newer ballot',
+            open_from=now - datetime.timedelta(days=2))
+        client = Client()
+        client.post('/set_language/', data={'language': 'en'})
+        response = client.get(reverse('latest-ballot-rss', kwargs={
+            'project_slug': project.slug,
+            'committee_slug': committee.slug}))
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(
+            response.content.index('Newer ballot'),
+            response.content.index('Older ballot'))
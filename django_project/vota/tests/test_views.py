@@ -2,14 +2,17 @@
 # flake8: noqa
 
 from django.core.urlresolvers import reverse
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.test.client import Client
 from base.tests.model_factories import ProjectF
+from vota.closing import close_ballots
+from vota.models import Committee
 from vota.tests.model_factories import VoteF, CommitteeF, BallotF
 from core.model_factories import UserF
 import logging
 import json
 import datetime
+from django.utils import timezone
 
 
 class TestVoteViews(TestCase):
@@ -68,6 +71,57 @@ class TestVoteViews(TestCase):
         json_return = response.content
         data = json.loads(json_return)
         self.assertTrue(data['successful'])
+        self.assertEqual(data['tally']['negative'], 1)
+        self.assertEqual(data['tally']['total'], 2)
+
+        # Voting again changes the vote.
+        response = client.post(reverse('vote-create', kwargs={
+            'project_slug': self.project.slug,
+            'committee_slug': self.committee.slug,
+            'ballot_slug': self.ballot.slug
+        }), {'choice': 'y'})
+        data = json.loads(response.content)
+        self.assertEqual(data['tally']['negative'], 0)
+        self.assertEqual(data['tally']['positive'], 1)
+        self.assertEqual(data['tally']['total'], 2)
+
+    def test_VoteCreate_closed_ballot(self):
+        client = Client()
+        client.login(username='timlinux', password='password')
+        self.ballot.closes = timezone.now() - datetime.timedelta(days=1)
+        self.ballot.save()
+        response = client.post(reverse('vote-create', kwargs={
+            'project_slug': self.project.slug,
+            'committee_slug': self.committee.slug,
+            'ballot_slug': self.ballot.slug
+        }), {'choice': 'y'})
+        data = json.loads(response.content)
+        self.assertNotIn('successful', data)
+        self.assertIn('__all__', data['errors'])
+        self.assertEqual(self.ballot.vote_set.count(), 1)
+
+    def test_VoteCreate_not_a_member(self):
+        UserF.create(username='anita', password='password')
+        client = Client()
+        client.login(username='anita', password='password')
+        response = client.post(reverse('vote-create', kwargs={
+            'project_slug': self.project.slug,
+            'committee_slug': self.committee.slug,
+            'ballot_slug': self.ballot.slug
+        }), {'choice': 'y'})
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.ballot.vote_set.count(), 1)
+
+    def test_VoteCreate_other_committee(self):
+        client = Client()
+        client.login(username='timlinux', password='password')
+        other_committee = CommitteeF.create(project=self.project)
+        response = client.post(reverse('vote-create', kwargs={
+            'project_slug': self.project.slug,
+            'committee_slug': other_committee.slug,
+            'ballot_slug': self.ballot.slug
+        }), {'choice': 'y'})
+        self.assertEqual(response.status_code, 404)
 
     def test_VoteCreate_no_login(self):
         client = Client()
@@ -126,6 +180,130 @@ class TestBallotViews(TestCase):
         self.assertEqual(response.template_name, expected_templates)
         self.assertEqual(response.context_data['ballot'],
                          self.ballot)
+        self.assertEqual(response.context_data['committee'],
+                         self.committee)
+
+    def test_BallotDetailView_other_committee(self):
+        other_committee = CommitteeF.create(project=self.project)
+        client = Client()
+        client.login(username='timlinux', password='password')
+        response = client.get(reverse('ballot-detail', kwargs={
+            'project_slug': self.project.slug,
+            'committee_slug': other_committee.slug,
+            'slug': self.ballot.slug
+        }))
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(BALLOT_TALLY_WAIT_SECONDS=0)
+    def test_BallotTallyView_poll(self):
+        VoteF.create(ballot=self.ballot, choice='y')
+        client = Client()
+        client.login(username='timlinux', password='password')
+        url = reverse('ballot-tally', kwargs={
+            'project_slug': self.project.slug,
+            'committee_slug': self.committee.slug,
+            'slug': self.ballot.slug
+        })
+        data = json.loads(client.get(url).content)
+        self.assertTrue(data['open'])
+        self.assertEqual(data['tally']['positive'], 1)
+
+        # Unchanged, the poll times out with the same tally.
+        unchanged = json.loads(
+            client.get(url, {'generation': data['generation']}).content)
+        self.assertEqual(unchanged, data)
+
+        VoteF.create(ballot=self.ballot, choice='n')
+        changed = json.loads(
+            client.get(url, {'generation': data['generation']}).content)
+        self.assertNotEqual(changed['generation'], data['generation'])
+        self.assertEqual(changed['tally']['total'], 2)
+
+    @override_settings(BALLOT_TALLY_WAIT_SECONDS=0)
+    def test_BallotTallyView_stream(self):
+        client = Client()
+        client.login(username='timlinux', password='password')
+        url = reverse('ballot-tally', kwargs={
+            'project_slug': self.project.slug,
+            'committee_slug': self.committee.slug,
+            'slug': self.ballot.slug
+        })
+        response = client.get(url, HTTP_ACCEPT='text/event-stream')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = ''.join(response.streaming_content)
+        self.assertIn('retry: ', events)
+        self.assertIn('"total": 0', events)
+        self.assertNotIn('event: closed', events)
+
+        # No event for the tally the client already got.
+        generation = events.split('id: ')[1].split()[0]
+        response = client.get(
+            url, HTTP_ACCEPT='text/event-stream',
+            HTTP_LAST_EVENT_ID=generation)
+        self.assertNotIn('data: {"', ''.join(response.streaming_content))
+
+        self.ballot.closes = timezone.now() - datetime.timedelta(days=1)
+        self.ballot.save()
+        response = client.get(url, HTTP_ACCEPT='text/event-stream')
+        self.assertIn('event: closed', ''.join(response.streaming_content))
+
+    @override_settings(BALLOT_TALLY_WAIT_SECONDS=0)
+    def test_BallotTallyView_status(self):
+        client = Client()
+        client.login(username='timlinux', password='password')
+        url = reverse('ballot-tally', kwargs={
+            'project_slug': self.project.slug,
+            'committee_slug': self.committee.slug,
+            'slug': self.ballot.slug
+        })
+        self.ballot.open_from = timezone.now() + datetime.timedelta(days=1)
+        self.ballot.save()
+        data = json.loads(client.get(url).content)
+        self.assertEqual(data['status'], 'pending')
+        self.assertFalse(data['open'])
+        response = client.get(url, HTTP_ACCEPT='text/event-stream')
+        self.assertNotIn('event: closed', ''.join(response.streaming_content))
+
+        # Closed ballots show their frozen result.
+        self.ballot.open_from = timezone.now() - datetime.timedelta(days=2)
+        self.ballot.closes = timezone.now() - datetime.timedelta(days=1)
+        self.ballot.save()
+        VoteF.create(ballot=self.ballot, choice='y')
+        close_ballots()
+        VoteF.create(ballot=self.ballot, choice='y')
+        data = json.loads(client.get(url).content)
+        self.assertEqual(data['status'], 'closed')
+        self.assertEqual(data['tally']['total'], 1)
+
+    @override_settings(
+        BALLOT_TALLY_WAIT_SECONDS=0, BALLOT_TALLY_MAX_WAITING=0)
+    def test_BallotTallyView_busy(self):
+        client = Client()
+        client.login(username='timlinux', password='password')
+        url = reverse('ballot-tally', kwargs={
+            'project_slug': self.project.slug,
+            'committee_slug': self.committee.slug,
+            'slug': self.ballot.slug
+        })
+        data = json.loads(client.get(url).content)
+        self.assertEqual(data['retry'], 0)
+        # Nothing changed and no room to wait: ask again later.
+        data = json.loads(
+            client.get(url, {'generation': data['generation']}).content)
+        self.assertEqual(data['retry'], 10000)
+        response = client.get(url, HTTP_ACCEPT='text/event-stream')
+        events = ''.join(response.streaming_content)
+        self.assertIn('retry: 10000', events)
+        self.assertIn('"total": 0', events)
+
+    def test_BallotTallyView_no_login(self):
+        client = Client()
+        response = client.get(reverse('ballot-tally', kwargs={
+            'project_slug': self.project.slug,
+            'committee_slug': self.committee.slug,
+            'slug': self.ballot.slug
+        }))
+        self.assertEqual(response.status_code, 302)
 
     def test_BallotListView_with_login(self):
         client = Client()
@@ -390,6 +568,52 @@ class TestCommitteeViews(TestCase):
             'slug': 'new-test-committee'
         }))
 
+    def test_CommitteeCreate_users(self):
+        client = Client()
+        client.post('/set_language/', data={'language': 'en'})
+        client.login(username='timlinux', password='password')
+        members = [UserF.create(), UserF.create()]
+        response = client.get(reverse('committee-create', kwargs={
+            'project_slug': self.project.slug
+        }))
+        self.assertContains(response, 'user-autocomplete')
+        # The users are not listed in the form.
+        self.assertNotContains(response, members[0].username)
+        post_data = {
+            'name': u'Member Committee',
+            'description': u'New test description',
+            'sort_number': 1,
+            'quorum_setting': u'50',
+            'chair': self.user.id,
+            'users': '%s,%s' % (members[0].id, members[1].id)
+        }
+        client.post(reverse('committee-create', kwargs={
+            'project_slug': self.project.slug
+        }), post_data)
+        committee = Committee.objects.get(slug='member-committee')
+        self.assertEqual(
+            sorted(committee.users.values_list('id', flat=True)),
+            sorted(member.id for member in members))
+
+    def test_CommitteeCreate_chair(self):
+        client = Client()
+        client.post('/set_language/', data={'language': 'en'})
+        client.login(username='timlinux', password='password')
+        chair = UserF.create()
+        post_data = {
+            'name': u'Chaired Committee',
+            'description': u'New test description',
+            'sort_number': 1,
+            'quorum_setting': u'50',
+            'chair': chair.id,
+            'users': '%s' % chair.id
+        }
+        client.post(reverse('committee-create', kwargs={
+            'project_slug': self.project.slug
+        }), post_data)
+        committee = Committee.objects.get(slug='chaired-committee')
+        self.assertEqual(committee.chair, chair)
+
     def test_CommitteeCreate_no_login(self):
         client = Client()
         post_data = {
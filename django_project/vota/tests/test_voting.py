@@ -0,0 +1,150 @@
+# coding=utf-8
+"""Tests for casting votes."""
+import datetime
+from django.core.exceptions import PermissionDenied
+from django.db import connection
+from unittest import skipUnless
+from django.test import TestCase
+from django.utils import timezone
+from core.model_factories import UserF
+from vota.models import Ballot, Vote
+from vota.tests.model_factories import BallotF, CommitteeF, VoteF
+from vota import voting
+from vota.closing import close_ballots
+from vota.voting import (
+    VotingClosed,
+    _update_or_insert,
+    ballot_tally,
+    cast_vote,
+    final_tally,
+    live_tally,
+    supports_upsert)
+
+
+class TestCastVote(TestCase):
+    """Tests for vota.voting."""
+
+    def setUp(self):
+        """
+        Setup before each test
+        """
+        self.user = UserF.create()
+        self.ballot = BallotF.create()
+        self.committee = self.ballot.committee
+        self.committee.users.add(self.user)
+        self.project = self.committee.project
+
+    def _cast(self, choice, ballot=None):
+        ballot = ballot or self.ballot
+        return cast_vote(
+            self.user, choice, self.project, ballot.committee.slug,
+            ballot.slug)
+
+    def test_insert_and_update(self):
+        ballot_id = self._cast('y')
+        self.assertEqual(ballot_id, self.ballot.id)
+        self._cast('n')
+        vote = Vote.objects.get(user=self.user, ballot=self.ballot)
+        self.assertEqual(vote.choice, 'n')
+
+    @skipUnless(supports_upsert(connection), 'No INSERT ... ON CONFLICT')
+    def test_one_statement(self):
+        with self.assertNumQueries(1):
+            self._cast('y')
+        with self.assertNumQueries(1):
+            self._cast('n')
+
+    def test_ballot_of_other_committee(self):
+        other = BallotF.create(
+            committee=CommitteeF.create(
+                project=self.project, users=[self.user]),
+            slug=self.ballot.slug)
+        self._cast('y', ballot=other)
+        self.assertEqual(
+            list(Vote.objects.values_list('ballot', flat=True)), [other.id])
+
+    def test_missing_ballot(self):
+        self.assertRaises(
+            Ballot.DoesNotExist, cast_vote, self.user, 'y', self.project,
+            self.committee.slug, 'missing')
+        other_project_ballot = BallotF.create()
+        self.assertRaises(Ballot.DoesNotExist, self._cast, 'y',
+                          other_project_ballot)
+        self.assertFalse(Vote.objects.exists())
+
+    def test_not_a_member(self):
+        other = BallotF.create(
+            committee=CommitteeF.create(project=self.project))
+        self.assertRaises(PermissionDenied, self._cast, 'y', other)
+        self.assertFalse(Vote.objects.exists())
+
+    def test_ballot_not_open(self):
+        now = timezone.now()
+        closed = BallotF.create(
+            committee=self.committee,
+            open_from=now - datetime.timedelta(days=7),
+            closes=now - datetime.timedelta(days=1))
+        pending = BallotF.create(
+            committee=self.committee,
+            open_from=now + datetime.timedelta(days=1),
+            closes=now + datetime.timedelta(days=7))
+        self.assertRaises(VotingClosed, self._cast, 'y', closed)
+        self.assertRaises(VotingClosed, self._cast, 'y', pending)
+        self.assertFalse(Vote.objects.exists())
+
+    def test_fallback(self):
+        _update_or_insert(connection, self.user, 'y', self.ballot.id)
+        _update_or_insert(connection, self.user, '-', self.ballot.id)
+        vote = Vote.objects.get(user=self.user, ballot=self.ballot)
+        self.assertEqual(vote.choice, '-')
+
+    def test_tally(self):
+        self._cast('y')
+        VoteF.create(ballot=self.ballot, choice='y')
+        VoteF.create(ballot=self.ballot, choice='n')
+        with self.assertNumQueries(1):
+            tally = ballot_tally(self.ballot.id)
+        self.assertEqual(tally, {
+            'positive': 2,
+            'negative': 1,
+            'abstentions': 0,
+            'total': 3,
+            'tally': 1,
+        })
+
+    def test_live_tally(self):
+        generation, tally = live_tally(self.ballot.id)
+        self.assertEqual(tally['total'], 0)
+        with self.assertNumQueries(0):
+            self.assertEqual(live_tally(self.ballot.id), (generation, tally))
+        self._cast('y')
+        with self.assertNumQueries(1):
+            new_generation, tally = live_tally(self.ballot.id)
+        self.assertNotEqual(new_generation, generation)
+        self.assertEqual(tally['positive'], 1)
+
+    def test_live_tally_evicts(self):
+        others = [BallotF.create(committee=self.committee) for _ in range(2)]
+        max_tallies, voting.MAX_TALLIES = voting.MAX_TALLIES, 2
+        try:
+            for ballot in [self.ballot] + others:
+                live_tally(ballot.id)
+        finally:
+            voting.MAX_TALLIES = max_tallies
+        self.assertNotIn(self.ballot.id, voting._tallies)
+        for ballot in others:
+            self.assertIn(ballot.id, voting._tallies)
+
+    def test_final_tally(self):
+        self._cast('y')
+        Ballot.objects.filter(id=self.ballot.id).update(
+            closes=timezone.now() - datetime.timedelta(minutes=1))
+        close_ballots()
+        # A vote counted after closing does not change the result.
+        VoteF.create(ballot=self.ballot, choice='n')
+        ballot = Ballot.objects.select_related('result').get(
+            id=self.ballot.id)
+        with self.assertNumQueries(0):
+            tally = final_tally(ballot)
+        self.assertEqual(tally['total'], 1)
+        self.assertEqual(tally['tally'], 1)
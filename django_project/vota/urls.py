@@ -16,7 +16,8 @@ from views.ballot import (
     BallotCreateView,
     BallotDeleteView,
     BallotUpdateView,
-    BallotListView
+    BallotListView,
+    BallotTallyView
 )
 
 
@@ -62,6 +63,10 @@ urlpatterns = patterns(
               'ballots/(?P<slug>[\w-]+)/update/$',
         view=BallotUpdateView.as_view(),
         name='ballot-update'),
+    url(regex='^(?P<project_slug>[\w-]+)/committees/(?P<committee_slug>[\w-]+)/'
+              'ballots/(?P<slug>[\w-]+)/tally/$',
+        view=BallotTallyView.as_view(),
+        name='ballot-tally'),
     url(regex='^(?P<project_slug>[\w-]+)/committees/(?P<committee_slug>[\w-]+)/'
               'create-ballot/$',
         view=BallotCreateView.as_view(),
@@ -3,18 +3,24 @@
 # noinspection PyUnresolvedReferences
 from django.core.exceptions import (
     ObjectDoesNotExist, MultipleObjectsReturned)
-from django.http import Http404
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+import json
 import logging
+import time
 from braces.views import (
     LoginRequiredMixin, StaffuserRequiredMixin)
+from django.conf import settings
 from django.core.urlresolvers import reverse
 from django.views.generic import (
-    DetailView, CreateView, DeleteView, UpdateView, ListView)
-from django.db import IntegrityError
+    DetailView, CreateView, DeleteView, UpdateView, ListView, View)
+from django.db import IntegrityError, connection
 from django.core.exceptions import ValidationError
-from base.models import Project
+from base.project_cache import get_project
+from common.project_objects import ProjectObjectMixin, get_project_object
+from vota.closing import load_vote_counts
 from vota.forms import BallotCreateForm
 from vota.models import Ballot, Committee
+from vota.voting import final_tally, live_tally, waiting
 
 logger = logging.getLogger(__name__)
 
@@ -24,39 +30,192 @@ class BallotMixin(object):
     form_class = BallotCreateForm
 
 
-class BallotDetailView(LoginRequiredMixin, BallotMixin, DetailView):
+class BallotDetailView(
+        LoginRequiredMixin, BallotMixin, ProjectObjectMixin, DetailView):
     context_object_name = 'ballot'
     template_name = 'ballot/detail.html'
+    # Ballot slugs are unique within a Committee.
+    project_path = 'committee__project'
+    slug_lookups = (
+        ('committee_slug', 'committee__slug'),
+        ('slug', 'slug'),
+    )
+    select_related = ('proposer', 'result')
+    not_found_message = 'Sorry! We could not find your ballot!'
 
     def get_context_data(self, **kwargs):
         context = super(BallotDetailView, self).get_context_data(**kwargs)
-        context['committee'] = Committee.objects.get(
-            id=self.object.committee.id)
+        context['committee'] = self.object.committee
         return context
 
     def get_queryset(self):
         ballot_qs = Ballot.objects.all()
         return ballot_qs
 
-    def get_object(self, queryset=None):
+
+class BallotTallyView(LoginRequiredMixin, View):
+    """The tally of a ballot as votes come in.
+
+    Requested with ``Accept: text/event-stream`` (EventSource) this streams
+    a server-sent event with the tally whenever it changes, otherwise it
+    answers a long poll: given the ``generation`` of the last answer it
+    waits until the tally changes and returns it as JSON.
+
+    Waiting only reads the change counter of the ballot from the cache
+    every ``BALLOT_TALLY_POLL_INTERVAL`` seconds (see vota.voting), without
+    holding a database connection. Streams and polls end after
+    ``BALLOT_TALLY_WAIT_SECONDS``, before the uwsgi harakiri timeout; the
+    browser then reconnects. Each waiting request holds a worker thread, so
+    at most ``BALLOT_TALLY_MAX_WAITING`` wait at once per process; others
+    get the current tally right away and come back after
+    ``BALLOT_TALLY_BUSY_RETRY`` seconds. Closed ballots are answered right
+    away with their final tally.
+    """
+
+    def get(self, request, *args, **kwargs):
+        """Stream or long poll the tally of the ballot.
+
+        :param request: HTTP request object
+        :type request: HttpRequest
+
+        :param args: Positional arguments
+        :type args: tuple
+
+        :param kwargs: Keyword arguments
+        :type kwargs: dict
+
+        :returns: An event stream or JSON with the generation, the tally,
+            the status of the ballot ('pending', 'open' or 'closed') and
+            the milliseconds to wait before polling again.
+        :rtype: HttpResponse
+
+        :raises: Http404
         """
-        Get the object for this view.
-        Because Ballot slugs are unique within a Committee, we need to make
-        sure that we fetch the correct Ballot from the correct Committee
+        ballot = get_project_object(
+            Ballot.objects.select_related('result'),
+            kwargs.get('project_slug', None),
+            project_path='committee__project',
+            message='Sorry! We could not find your ballot!',
+            committee__slug=kwargs.get('committee_slug', None),
+            slug=kwargs.get('slug', None))
+        if 'text/event-stream' in request.META.get('HTTP_ACCEPT', ''):
+            response = StreamingHttpResponse(
+                self.events(
+                    ballot, request.META.get('HTTP_LAST_EVENT_ID', None)),
+                content_type='text/event-stream')
+            response['Cache-Control'] = 'no-cache'
+            # Do not let nginx buffer the events.
+            response['X-Accel-Buffering'] = 'no'
+            return response
+
+        generation, tally, retry = self.wait(
+            ballot, request.GET.get('generation', None))
+        status = ballot.get_status()
+        return HttpResponse(json.dumps({
+            'generation': generation,
+            'tally': tally,
+            'status': status,
+            'open': status == 'open',
+            'retry': retry,
+        }), content_type='application/json')
+
+    @staticmethod
+    def current_tally(ballot):
+        """Get the tally of a ballot, final once it is closed.
+
+        :param ballot: The ballot.
+        :type ballot: Ballot
+
+        :returns: The generation and the tally.
+        :rtype: tuple
         """
-        if queryset is None:
-            queryset = self.get_queryset()
-            slug = self.kwargs.get('slug', None)
-            project_slug = self.kwargs.get('project_slug', None)
-            committee_slug = self.kwargs.get('committee_slug', None)
-            if slug and project_slug and committee_slug:
-                project = Project.objects.get(slug=project_slug)
-                committee = Committee.objects.filter(project=project)\
-                    .get(slug=committee_slug)
-                obj = queryset.get(slug=slug, committee=committee)
-                return obj
-            else:
-                raise Http404
+        if ballot.get_status() == 'closed':
+            return 'closed', final_tally(ballot)
+        return live_tally(ballot.id)
+
+    @staticmethod
+    def sleep():
+        """Wait for the next check of the change counter."""
+        # Do not hold a database connection while waiting.
+        connection.close()
+        time.sleep(settings.BALLOT_TALLY_POLL_INTERVAL)
+
+    @classmethod
+    def wait(cls, ballot, last_generation):
+        """Wait until the tally changes, or the wait times out.
+
+        :param ballot: The ballot.
+        :type ballot: Ballot
+
+        :param last_generation: The generation the client knows, if any.
+        :type last_generation: str
+
+        :returns: The generation, the tally and the milliseconds the client
+            should wait before polling again.
+        :rtype: tuple
+        """
+        generation, tally = cls.current_tally(ballot)
+        if str(generation) != last_generation or \
+                ballot.get_status() == 'closed':
+            return generation, tally, 0
+        if not waiting.enter(settings.BALLOT_TALLY_MAX_WAITING):
+            return generation, tally, settings.BALLOT_TALLY_BUSY_RETRY * 1000
+        try:
+            deadline = time.time() + settings.BALLOT_TALLY_WAIT_SECONDS
+            while time.time() < deadline:
+                cls.sleep()
+                generation, tally = cls.current_tally(ballot)
+                if str(generation) != last_generation or \
+                        ballot.get_status() == 'closed':
+                    break
+        finally:
+            waiting.leave()
+        return generation, tally, 0
+
+    @classmethod
+    def events(cls, ballot, last_generation):
+        """Generate the server-sent events of the tally changes.
+
+        :param ballot: The ballot.
+        :type ballot: Ballot
+
+        :param last_generation: The id of the last event the client got.
+        :type last_generation: str
+
+        :returns: The events, a ``closed`` event ends the stream for good.
+        :rtype: generator
+        """
+        generation, tally = cls.current_tally(ballot)
+        if ballot.get_status() == 'closed':
+            yield 'data: %s\n\n' % json.dumps(tally)
+            yield 'event: closed\ndata: {}\n\n'
+            return
+        # Counted only once the response is being sent, a response which
+        # is never iterated holds no slot.
+        if not waiting.enter(settings.BALLOT_TALLY_MAX_WAITING):
+            yield 'retry: %d\n\n' % (settings.BALLOT_TALLY_BUSY_RETRY * 1000)
+            if str(generation) != last_generation:
+                yield 'id: %s\ndata: %s\n\n' % (
+                    generation, json.dumps(tally))
+            return
+        try:
+            yield 'retry: %d\n\n' % (
+                settings.BALLOT_TALLY_POLL_INTERVAL * 1000)
+            deadline = time.time() + settings.BALLOT_TALLY_WAIT_SECONDS
+            while True:
+                if str(generation) != last_generation:
+                    last_generation = str(generation)
+                    yield 'id: %s\ndata: %s\n\n' % (
+                        generation, json.dumps(tally))
+                if ballot.get_status() == 'closed':
+                    yield 'event: closed\ndata: {}\n\n'
+                    return
+                if time.time() >= deadline:
+                    return
+                cls.sleep()
+                generation, tally = cls.current_tally(ballot)
+        finally:
+            waiting.leave()
 
 
 # noinspection PyAttributeOutsideInit
@@ -89,7 +248,7 @@ class BallotListView(BallotMixin, ListView):
         committee_slug = self.kwargs.get('committee_slug')
         project_slug = self.kwargs.get('project_slug')
         try:
-            self.project = Project.objects.get(slug=project_slug)
+            self.project = get_project(project_slug, self.request)
         except:
             raise Http404('Project could not be found')
         try:
@@ -114,6 +273,8 @@ class BallotListView(BallotMixin, ListView):
         context = super(BallotListView, self).get_context_data(**kwargs)
         context['committee'] = self.committee
         context['is_member'] = self.is_member
+        context['ballots'] = context['object_list'] = load_vote_counts(
+            context['object_list'])
         return context
 
     def get_queryset(self):
@@ -133,7 +294,11 @@ class BallotListView(BallotMixin, ListView):
         else:
             qs = Ballot.objects.filter(committee=self.committee) \
                 .filter(private=False)
-        return qs
+        # Only what ballot/includes/ballot-panel.html shows, not the long
+        # descriptions.
+        return qs.select_related('committee__project', 'result').only(
+            'name', 'slug', 'summary', 'private', 'approved', 'denied',
+            'closes', 'committee')
 
 
 # noinspection PyAttributeOutsideInit
@@ -149,7 +314,7 @@ class BallotCreateView(LoginRequiredMixin, BallotMixin, CreateView):
     def get_form_kwargs(self):
         kwargs = super(BallotCreateView, self).get_form_kwargs()
         self.project_slug = self.kwargs.get('project_slug', None)
-        self.project = Project.objects.get(slug=self.project_slug)
+        self.project = get_project(self.project_slug, self.request)
         self.committee_slug = self.kwargs.get('committee_slug', None)
         self.committee = Committee.objects.filter(
             project=self.project).get(slug=self.committee_slug)
@@ -183,7 +348,7 @@ class BallotUpdateView(LoginRequiredMixin, BallotMixin, UpdateView):
     def get(self, request, *args, **kwargs):
         self.project_slug = kwargs.get('project_slug', None)
         self.committee_slug = kwargs.get('committee_slug', None)
-        self.project = Project.objects.get(slug=self.project_slug)
+        self.project = get_project(self.project_slug, self.request)
         self.committee = Committee.objects.filter(
             project=self.project).get(slug=self.committee_slug)
         return super(BallotUpdateView, self).get(request, *args, **kwargs)
@@ -191,7 +356,7 @@ class BallotUpdateView(LoginRequiredMixin, BallotMixin, UpdateView):
     def post(self, request, *args, **kwargs):
         self.project_slug = kwargs.get('project_slug', None)
         self.committee_slug = kwargs.get('committee_slug', None)
-        self.project = Project.objects.get(slug=self.project_slug)
+        self.project = get_project(self.project_slug, self.request)
         self.committee = Committee.objects.filter(
             project=self.project).get(slug=self.committee_slug)
         return super(BallotUpdateView, self).post(request, *args, **kwargs)
@@ -219,7 +384,7 @@ class BallotUpdateView(LoginRequiredMixin, BallotMixin, UpdateView):
     def get_form_kwargs(self):
         kwargs = super(BallotUpdateView, self).get_form_kwargs()
         self.project_slug = self.kwargs.get('project_slug', None)
-        self.project = Project.objects.get(slug=self.project_slug)
+        self.project = get_project(self.project_slug, self.request)
         self.committee_slug = self.kwargs.get('committee_slug', None)
         self.committee = Committee.objects.filter(
             project=self.project).get(slug=self.committee_slug)
@@ -275,7 +440,7 @@ class BallotDeleteView(StaffuserRequiredMixin, BallotMixin, DeleteView):
         """
         self.project_slug = kwargs.get('project_slug', None)
         self.committee_slug = kwargs.get('committee_slug', None)
-        self.project = Project.objects.get(slug=self.project_slug)
+        self.project = get_project(self.project_slug, self.request)
         self.committee = Committee.objects.filter(
             project=self.project).get(slug=self.committee_slug)
         return super(BallotDeleteView, self).get(request, *args, **kwargs)
@@ -301,7 +466,7 @@ class BallotDeleteView(StaffuserRequiredMixin, BallotMixin, DeleteView):
         """
         self.project_slug = kwargs.get('project_slug', None)
         self.committee_slug = kwargs.get('committee_slug', None)
-        self.project = Project.objects.get(slug=self.project_slug)
+        self.project = get_project(self.project_slug, self.request)
         self.committee = Committee.objects.filter(
             project=self.project).get(slug=self.committee_slug)
         return super(BallotDeleteView, self).post(request, *args, **kwargs)
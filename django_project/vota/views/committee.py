@@ -14,7 +14,8 @@ from django.views.generic import (
 )
 from django.db import IntegrityError
 from django.core.exceptions import ValidationError
-from base.models import Project
+from base.project_cache import get_project
+from common.project_objects import ProjectObjectMixin
 from vota.forms import CreateCommitteeForm
 from vota.models import Committee, Ballot
 
@@ -29,12 +30,19 @@ class CommitteeMixin(object):
     form_class = CreateCommitteeForm
 
 
-class CommitteeDetailView(CommitteeMixin, DetailView):
+class CommitteeDetailView(CommitteeMixin, ProjectObjectMixin, DetailView):
     """
     The view class for rendering a Committee view
     """
     context_object_name = 'committee'
     template_name = 'committee/detail.html'
+    # Committee slugs are unique within a Project.
+    select_related = ('chair',)
+    not_found_message = (
+        'Sorry! The committee you are requesting could not be found or you '
+        'do not have permission to view it. Also the committee may not be '
+        'approved yet. Try logging in as a staff member if you wish to view '
+        'it.')
 
     def get_context_data(self, **kwargs):
         """
@@ -49,48 +57,16 @@ class CommitteeDetailView(CommitteeMixin, DetailView):
 
         """
         context = super(CommitteeDetailView, self).get_context_data(**kwargs)
-        context['committees'] = self.get_queryset()
+        context['committees'] = self.get_queryset().filter(
+            project=self.project).select_related('project')
         context['open_ballots'] = Ballot.open_objects.filter(
-            committee=self.get_object()).order_by('-closes')
+            committee=self.object).select_related(
+            'committee__project').order_by('-closes')
         context['closed_ballots'] = Ballot.closed_objects.filter(
-            committee=self.get_object()).order_by('closes')
+            committee=self.object).select_related(
+            'committee__project', 'result').order_by('closes')
         return context
 
-    def get_object(self, queryset=None):
-        """Get the object for this view.
-
-        Because Committee slugs are unique within a Project, we need to make
-        sure that we fetch the correct Committee from the correct Project
-
-        :param queryset: A queryset to use to obtain the expected object
-        :type queryset: Queryset
-
-        """
-
-        if queryset is None:
-            queryset = self.get_queryset()
-        slug = self.kwargs.get('slug', None)
-        project_slug = self.kwargs.get('project_slug', None)
-        if slug and project_slug:
-            try:
-                project = Project.objects.get(slug=project_slug)
-            except Project.DoesNotExist:
-                raise Http404(
-                    'The requested project does not exist.'
-                )
-            try:
-                obj = queryset.get(slug=slug, project=project)
-                return obj
-            except Committee.DoesNotExist:
-                raise Http404(
-                    'Sorry! The committee you are requesting '
-                    'could not be found or you do not have permission to '
-                    'view it. Also the committee may not be '
-                    'approved yet. Try logging in as a staff member if '
-                    'you wish to view it.')
-        else:
-            raise Http404('Sorry! We could not find your committee!')
-
 
 # noinspection PyAttributeOutsideInit
 class CommitteeListView(CommitteeMixin, ListView):
@@ -118,7 +94,7 @@ class CommitteeListView(CommitteeMixin, ListView):
         """
         project_slug = self.kwargs.get('project_slug')
         try:
-            self.project = Project.objects.get(slug=project_slug)
+            self.project = get_project(project_slug, self.request)
         except:
             raise Http404('Project could not be found')
         return super(CommitteeListView, self).get(
@@ -134,7 +110,8 @@ class CommitteeListView(CommitteeMixin, ListView):
         :rtype: QuerySet
 
         """
-        qs = Committee.objects.filter(project=self.project)
+        qs = Committee.objects.filter(project=self.project).select_related(
+            'project').only('name', 'slug', 'description', 'project')
         return qs
 
 
@@ -152,7 +129,7 @@ class CommitteeCreateView(LoginRequiredMixin, CommitteeMixin, CreateView):
     def get_form_kwargs(self):
         kwargs = super(CommitteeCreateView, self).get_form_kwargs()
         self.project_slug = self.kwargs.get('project_slug', None)
-        self.project = Project.objects.get(slug=self.project_slug)
+        self.project = get_project(self.project_slug, self.request)
         kwargs.update({
             'user': self.request.user,
             'project': self.project
@@ -188,7 +165,7 @@ class CommitteeUpdateView(LoginRequiredMixin, CommitteeMixin, UpdateView):
     def get_form_kwargs(self):
         kwargs = super(CommitteeUpdateView, self).get_form_kwargs()
         self.project_slug = self.kwargs.get('project_slug', None)
-        self.project = Project.objects.get(slug=self.project_slug)
+        self.project = get_project(self.project_slug, self.request)
         kwargs.update({
             'user': self.request.user,
             'project': self.project
@@ -237,7 +214,7 @@ class CommitteeDeleteView(StaffuserRequiredMixin, CommitteeMixin, DeleteView):
 
         """
         self.project_slug = self.kwargs.get('project_slug', None)
-        self.project = Project.objects.get(slug=self.project_slug)
+        self.project = get_project(self.project_slug, self.request)
         return super(CommitteeDeleteView, self).get(request, *args, **kwargs)
 
     def post(self, request, *args, **kwargs):
@@ -254,7 +231,7 @@ class CommitteeDeleteView(StaffuserRequiredMixin, CommitteeMixin, DeleteView):
 
         """
         self.project_slug = self.kwargs.get('project_slug', None)
-        self.project = Project.objects.get(slug=self.project_slug)
+        self.project = get_project(self.project_slug, self.request)
         return super(CommitteeDeleteView, self).post(request, *args, **kwargs)
 
     def get_success_url(self):
@@ -7,14 +7,16 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+from django.http import Http404
 from django.views.generic import (
     CreateView,
 )
-from django.db import IntegrityError
-from django.core.exceptions import ValidationError
 from braces.views import LoginRequiredMixin
+from base.project_cache import get_project_or_404
+from common.project_objects import get_project_object
 from vota.models import Vote, Ballot
 from vota.forms import VoteForm
+from vota.voting import VotingClosed, ballot_tally, cast_vote
 
 
 # noinspection PyAttributeOutsideInit
@@ -31,8 +33,13 @@ class VoteCreateUpdateView(LoginRequiredMixin, CreateView):
 
     def get_form_kwargs(self):
         kwargs = super(VoteCreateUpdateView, self).get_form_kwargs()
-        the_ballot_slug = self.kwargs['ballot_slug']
-        self.the_ballot = Ballot.objects.get(slug=the_ballot_slug)
+        self.the_ballot = get_project_object(
+            Ballot.objects.all(),
+            self.kwargs.get('project_slug', None),
+            project_path='committee__project',
+            message='Sorry! We could not find your ballot!',
+            committee__slug=self.kwargs.get('committee_slug', None),
+            slug=self.kwargs.get('ballot_slug', None))
         try:
             existing_vote = Vote.objects.filter(ballot=self.the_ballot)\
                 .get(user=self.request.user)
@@ -43,17 +50,61 @@ class VoteCreateUpdateView(LoginRequiredMixin, CreateView):
             kwargs.update({'instance': self.object})
         return kwargs
 
+    def post(self, request, *args, **kwargs):
+        """Cast or change the vote of the user.
+
+        The form is only validated here, the ballot is looked up and the
+        vote written by cast_vote.
+
+        :param request: HTTP request object
+        :type request: HttpRequest
+
+        :param args: Positional arguments
+        :type args: tuple
+
+        :param kwargs: Keyword arguments
+        :type kwargs: dict
+
+        :returns: JSON with the tally of the ballot, or the form errors.
+        :rtype: HttpResponse
+        """
+        self.object = None
+        form = self.get_form_class()(data=request.POST)
+        if form.is_valid():
+            return self.form_valid(form)
+        return self.form_invalid(form)
+
     def form_valid(self, form):
-        """Check that there is no referential integrity error when saving."""
+        """Write the vote and return the new tally of the ballot.
+
+        :param form: The vote form.
+        :type form: VoteForm
+
+        :returns: JSON with the tally of the ballot, or an error if the
+            ballot is not open.
+        :rtype: HttpResponse
+
+        :raises: Http404, PermissionDenied
+        """
+        project = get_project_or_404(
+            self.kwargs.get('project_slug', None), self.request)
         try:
-            form.instance.ballot = self.the_ballot
-            form.instance.user = self.request.user
-            form.save()
-            return HttpResponse(json.dumps(
-                {'successful': True}), content_type='application/json')
-        except IntegrityError:
-            return ValidationError(
-                'ERROR: Vote by this name already exists!')
+            ballot_id = cast_vote(
+                self.request.user,
+                form.cleaned_data['choice'],
+                project,
+                self.kwargs.get('committee_slug', None),
+                self.kwargs.get('ballot_slug', None))
+        except Ballot.DoesNotExist:
+            raise Http404('Sorry! We could not find your ballot!')
+        except VotingClosed:
+            return HttpResponse(json.dumps({
+                'errors': {'__all__': ['This ballot is not open for voting.']}
+            }), content_type='application/json')
+        return HttpResponse(json.dumps({
+            'successful': True,
+            'tally': ballot_tally(ballot_id),
+        }), content_type='application/json')
 
     def form_invalid(self, form):
         errors = form.errors
@@ -0,0 +1,353 @@
+# coding=utf-8
+"""
+vota.voting
+
+Cast votes on ballots.
+
+A user has at most one vote per ballot (unique user and ballot), voting
+again changes the choice. Only members of the committee of a ballot can
+vote, and only while it is open. ``cast_vote`` finds the open ballot by its
+committee and slug, checks the membership and inserts or updates the vote
+in a single
+``INSERT ... SELECT ... ON CONFLICT DO UPDATE`` statement, so two quick
+clicks can not both insert a vote, and it needs no query to look up the
+ballot or the existing vote first. Databases without ``ON CONFLICT ...
+RETURNING`` (PostgreSQL before 9.5, SQLite before 3.35) use an update or
+insert in a transaction instead.
+
+Raw SQL sends no signals, so the cache tags of the ballot are invalidated
+here.
+
+The generation of the ``ballot:<id>`` cache tag counts the changes of a
+ballot and its votes. ``live_tally`` counts the votes again only when it
+changed, for all the requests of the process following the ballot, and
+keeps the tallies of the ``MAX_TALLIES`` most recently followed ballots.
+The tally of a closed ballot is final, ``final_tally`` reads it from its
+frozen result.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from django.core.exceptions import PermissionDenied
+from django.db import IntegrityError, connections, router, transaction
+from django.utils import timezone
+from core.cache_tags import invalidate_tags, tag_generation
+from vota.closing import count_votes
+from vota.models import Ballot, Committee, Vote
+
+logger = logging.getLogger(__name__)
+
+# Ballots whose tallies a process keeps.
+MAX_TALLIES = 1000
+
+# ballot id -> (generation of the ballot tag, tally), least recently used
+# first.
+_tallies = OrderedDict()
+
+_lock = threading.Lock()
+
+
+class VotingClosed(Exception):
+    """Raised when voting on a ballot which is not open."""
+
+
+def supports_upsert(connection):
+    """Whether a database supports INSERT ... ON CONFLICT ... RETURNING.
+
+    :param connection: The database connection.
+    :type connection: BaseDatabaseWrapper
+
+    :rtype: bool
+    """
+    if connection.vendor == 'postgresql':
+        return connection.pg_version >= 90500
+    if connection.vendor == 'sqlite':
+        from django.db.backends.sqlite3.base import Database
+        return Database.sqlite_version_info >= (3, 35, 0)
+    return False
+
+
+def _upsert_sql(connection):
+    """The statement inserting or updating a vote on a ballot.
+
+    Its parameters are the choice, the user id, the project id, the
+    committee slug, the ballot slug, the current time twice and the user id
+    again. It returns the ballot id, or no row when there is no such open
+    ballot or the user is not a member of its committee.
+
+    :param connection: The database connection.
+    :type connection: BaseDatabaseWrapper
+
+    :rtype: str
+    """
+    qn = connection.ops.quote_name
+    vote_fields = dict(
+        (field.name, qn(field.column)) for field in Vote._meta.fields)
+    members = Committee.users.through
+    return (
+        'INSERT INTO {vote} ({choice}, {user}, {ballot}) '
+        'SELECT %s, %s, b.{ballot_id} '
+        'FROM {ballot_table} b '
+        'INNER JOIN {committee_table} c '
+        'ON c.{committee_id} = b.{ballot_committee} '
+        'WHERE c.{committee_project} = %s '
+        'AND c.{committee_slug} = %s AND b.{ballot_slug} = %s '
+        'AND b.{ballot_open_from} <= %s AND b.{ballot_closes} > %s '
+        'AND EXISTS (SELECT 1 FROM {member_table} m '
+        'WHERE m.{member_committee} = c.{committee_id} '
+        'AND m.{member_user} = %s) '
+        'ON CONFLICT ({user}, {ballot}) '
+        'DO UPDATE SET {choice} = excluded.{choice} '
+        'RETURNING {ballot}').format(
+        vote=qn(Vote._meta.db_table),
+        choice=vote_fields['choice'],
+        user=vote_fields['user'],
+        ballot=vote_fields['ballot'],
+        ballot_table=qn(Ballot._meta.db_table),
+        ballot_id=qn(Ballot._meta.pk.column),
+        ballot_committee=qn(Ballot._meta.get_field('committee').column),
+        ballot_slug=qn(Ballot._meta.get_field('slug').column),
+        ballot_open_from=qn(Ballot._meta.get_field('open_from').column),
+        ballot_closes=qn(Ballot._meta.get_field('closes').column),
+        committee_table=qn(Committee._meta.db_table),
+        committee_id=qn(Committee._meta.pk.column),
+        committee_project=qn(Committee._meta.get_field('project').column),
+        committee_slug=qn(Committee._meta.get_field('slug').column),
+        member_table=qn(members._meta.db_table),
+        member_committee=qn(members._meta.get_field('committee').column),
+        member_user=qn(members._meta.get_field('user').column))
+
+
+def _update_or_insert(connection, user, choice, ballot_id):
+    """Update the vote of a user or insert it (the portable fallback).
+
+    :param connection: The database connection.
+    :type connection: BaseDatabaseWrapper
+
+    :param user: The voter.
+    :type user: User
+
+    :param choice: The vote choice, see VOTE_CHOICES.
+    :type choice: str
+
+    :param ballot_id: The ballot id.
+    :type ballot_id: int
+    """
+    votes = Vote.objects.using(connection.alias).filter(
+        user=user, ballot_id=ballot_id)
+    with transaction.atomic(using=connection.alias):
+        if votes.update(choice=choice):
+            return
+        try:
+            with transaction.atomic(using=connection.alias):
+                Vote.objects.using(connection.alias).create(
+                    user=user, ballot_id=ballot_id, choice=choice)
+        except IntegrityError:
+            # A concurrent request inserted the vote first.
+            votes.update(choice=choice)
+
+
+def _find_ballot(
+        connection, user, project, committee_slug, ballot_slug, now):
+    """Get the id of a ballot the user may vote on now.
+
+    :param connection: The database connection.
+    :type connection: BaseDatabaseWrapper
+
+    :param user: The voter.
+    :type user: User
+
+    :param project: The project of the ballot.
+    :type project: Project
+
+    :param committee_slug: The slug of the committee of the ballot.
+    :type committee_slug: str
+
+    :param ballot_slug: The ballot slug.
+    :type ballot_slug: str
+
+    :param now: The current time.
+    :type now: datetime
+
+    :returns: The ballot id.
+    :rtype: int
+
+    :raises: Ballot.DoesNotExist, PermissionDenied, VotingClosed
+    """
+    ballot = Ballot.objects.using(connection.alias).filter(
+        committee__project=project,
+        committee__slug=committee_slug,
+        slug=ballot_slug).values_list(
+        'id', 'committee', 'open_from', 'closes').first()
+    if ballot is None:
+        raise Ballot.DoesNotExist('Ballot matching query does not exist.')
+    ballot_id, committee_id, open_from, closes = ballot
+    if not Committee.users.through.objects.using(connection.alias).filter(
+            committee=committee_id, user=user.pk).exists():
+        raise PermissionDenied(
+            'Only members of the committee can vote on ballot %s.' %
+            ballot_id)
+    if not open_from <= now < closes:
+        raise VotingClosed('Ballot %s is not open for voting.' % ballot_id)
+    return ballot_id
+
+
+def cast_vote(user, choice, project, committee_slug, ballot_slug):
+    """Insert or change the vote of a committee member on an open ballot.
+
+    :param user: The voter.
+    :type user: User
+
+    :param choice: The vote choice, see VOTE_CHOICES.
+    :type choice: str
+
+    :param project: The project of the ballot.
+    :type project: Project
+
+    :param committee_slug: The slug of the committee of the ballot.
+    :type committee_slug: str
+
+    :param ballot_slug: The ballot slug.
+    :type ballot_slug: str
+
+    :returns: The ballot id.
+    :rtype: int
+
+    :raises: Ballot.DoesNotExist, PermissionDenied, VotingClosed
+    """
+    connection = connections[router.db_for_write(Vote)]
+    now = timezone.now()
+    if supports_upsert(connection):
+        # One statement, atomic by itself.
+        db_now = connection.ops.value_to_db_datetime(now)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                _upsert_sql(connection),
+                [choice, user.pk, project.pk, committee_slug, ballot_slug,
+                 db_now, db_now, user.pk])
+            row = cursor.fetchone()
+        if row is None:
+            # Find out why: no such ballot, not a member or not open.
+            ballot_id = _find_ballot(
+                connection, user, project, committee_slug, ballot_slug, now)
+            # Changed concurrently.
+            raise VotingClosed(
+                'Ballot %s is not open for voting.' % ballot_id)
+        ballot_id = row[0]
+    else:
+        ballot_id = _find_ballot(
+            connection, user, project, committee_slug, ballot_slug, now)
+        _update_or_insert(connection, user, choice, ballot_id)
+
+    invalidate_tags(['ballot:%s' % ballot_id])
+    logger.debug('%s voted %s on ballot %s', user, choice, ballot_id)
+    return ballot_id
+
+
+def ballot_tally(ballot_id):
+    """Count the votes of a ballot.
+
+    :param ballot_id: The ballot id.
+    :type ballot_id: int
+
+    :returns: The positive, negative and abstaining votes, their total and
+        the tally (positive minus negative).
+    :rtype: dict
+    """
+    positive, negative, abstentions = count_votes([ballot_id]).get(
+        ballot_id, (0, 0, 0))
+    return {
+        'positive': positive,
+        'negative': negative,
+        'abstentions': abstentions,
+        'total': positive + negative + abstentions,
+        'tally': positive - negative,
+    }
+
+
+def live_tally(ballot_id):
+    """Get the tally of a ballot with its change counter.
+
+    The votes are only counted when the ballot changed since this process
+    last counted them.
+
+    :param ballot_id: The ballot id.
+    :type ballot_id: int
+
+    :returns: The generation of the ballot tag and the tally (see
+        ballot_tally).
+    :rtype: tuple
+    """
+    generation = tag_generation('ballot:%s' % ballot_id)
+    with _lock:
+        found = _tallies.pop(ballot_id, None)
+        if found is not None:
+            # Most recently used.
+            _tallies[ballot_id] = found
+    if found is not None and found[0] == generation:
+        return found
+    # Counted without the lock, the requests following other ballots do
+    # not wait for it. The generation is read before counting, a vote
+    # cast meanwhile changes it again.
+    counted = (generation, ballot_tally(ballot_id))
+    with _lock:
+        found = _tallies.pop(ballot_id, None)
+        if found is None or found[0] < generation:
+            found = counted
+        _tallies[ballot_id] = found
+        while len(_tallies) > MAX_TALLIES:
+            _tallies.popitem(last=False)
+    return counted
+
+
+def final_tally(ballot):
+    """Get the tally of a closed ballot.
+
+    :param ballot: The ballot.
+    :type ballot: Ballot
+
+    :returns: The tally (see ballot_tally), from the frozen result of the
+        ballot once it is written (see vota.closing).
+    :rtype: dict
+    """
+    result = ballot.get_result()
+    if result is None:
+        return live_tally(ballot.id)[1]
+    return {
+        'positive': result.positive_votes,
+        'negative': result.negative_votes,
+        'abstentions': result.abstentions,
+        'total': result.total_votes,
+        'tally': result.tally,
+    }
+
+
+class WaitingRequests(object):
+    """Counts the requests of the process waiting for tally changes."""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def enter(self, limit):
+        """Count a request which wants to wait, unless there are too many.
+
+        :param limit: The number of requests allowed to wait.
+        :type limit: int
+
+        :returns: Whether the request may wait, it must call leave then.
+        :rtype: bool
+        """
+        with self._lock:
+            if self.count >= limit:
+                return False
+            self.count += 1
+            return True
+
+    def leave(self):
+        """Stop counting a request which was allowed to wait."""
+        with self._lock:
+            self.count -= 1
+
+
+waiting = WaitingRequests()